@@ -0,0 +1,16 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Memory tooling for agents-md.
+
+Local, dependency-free helpers that maintain the machine-readable parts of the
+memory system (see _agents-md/memory/organization.md and rag.md) so agents do
+not have to rebuild them by hand.
+
+Run the tools through memory.py next to setup.py:
+    python3 memory.py --help
+"""
+
+__version__ = '0.1.0'
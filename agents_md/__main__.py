@@ -0,0 +1,11 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""`python -m agents_md`: the same commands as the agents-md console script."""
+
+import sys
+
+from .cli import main
+
+sys.exit(main(prog='agents-md'))
@@ -0,0 +1,308 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Command-line entry point of agents-md (the `agents-md` console script,
+setup.py and memory.py).
+
+Each subcommand names its handler as "module:function"; the module is only
+imported when that subcommand runs, so adding tools does not slow down the
+others. This module itself imports only argparse and trace.py, and locale
+catalogs are loaded by the setup commands for the active language only;
+benchmarks/bench_startup.py keeps an eye on the cold-start cost.
+"""
+
+import argparse
+import importlib
+import sys
+
+from . import trace
+
+def build_parser(prog=None):
+    """Build the argument parser with every subcommand."""
+    tracing = argparse.ArgumentParser(add_help=False)
+    tracing.add_argument('--trace', metavar='FILE', help='Write step timings and file-operation counts to FILE (.json: Chrome trace)')
+    tracing.add_argument('--trace-format', choices=trace.FORMATS, help='Trace format (default: from the file name)')
+    common = argparse.ArgumentParser(add_help=False, parents=[tracing])
+    common.add_argument('--memory-path', help='Memory root (defaults to MEMORY_PATH configured in AGENTS.md)')
+
+    parser = argparse.ArgumentParser(prog=prog, description='Setup and memory tooling for agents-md')
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+
+    configure = subparsers.add_parser('configure', parents=[tracing], help='Set the language and MEMORY_PATH of AGENTS.md and GEMINI.md')
+    configure.add_argument('--lang', choices=['en', 'ja'], help='CLI language (en/ja)')
+    configure.add_argument('--memory-path', help='Memory root path; configures without prompts (batch mode)')
+    configure.add_argument('--workspace', action='append',
+                           help='Workspace directory or glob pattern to configure without prompts (repeatable)')
+    configure.add_argument('--scan', metavar='DIR', action='append',
+                           help='Find and classify every AGENTS.md/GEMINI.md below DIR (repeatable)')
+    configure.add_argument('--upgrade', action='store_true',
+                           help='With --scan, re-render outdated files from the current templates')
+    configure.add_argument('--jobs', type=int, help='Parallel workers for batch and scan mode (default: CPU count)')
+    configure.add_argument('--create', action='store_true',
+                           help='With --workspace, also write both files into directories that have neither '
+                                '(in --lang, default: en)')
+    configure.add_argument('--dry-run', action='store_true', help='Print a diff of the changes instead of writing files')
+    configure.set_defaults(handler='agents_md.configure:run_configure', needs_memory_root=False)
+
+    switch_lang = subparsers.add_parser('switch-lang', parents=[tracing], help='Switch AGENTS.md and GEMINI.md to another language')
+    switch_lang.add_argument('language', choices=['en', 'ja'], help='Language to switch to')
+    switch_lang.add_argument('--workspace', action='append',
+                             help='Workspace directory or glob pattern to switch (repeatable; default: this checkout)')
+    switch_lang.add_argument('--jobs', type=int, help='Parallel workers with several workspaces (default: CPU count)')
+    switch_lang.add_argument('--create', action='store_true',
+                             help='With --workspace, also write both files into directories that have neither')
+    switch_lang.add_argument('--dry-run', action='store_true', help='Print a diff of the changes instead of writing files')
+    switch_lang.set_defaults(handler='agents_md.configure:run_switch_lang', needs_memory_root=False)
+
+    index = subparsers.add_parser('index', parents=[common], help='Update memories.json incrementally')
+    index.add_argument('projects', nargs='*', help='Project directories to index (default: all)')
+    index.add_argument('--full', action='store_true', help='Ignore the manifest and re-parse every file')
+    index.set_defaults(handler='agents_md.indexer:run')
+
+    store = subparsers.add_parser('store', parents=[common], help='Keep memories.json entries in an SQLite store and query it')
+    store.add_argument('action', choices=['init', 'query', 'export', 'drop'],
+                       help='init: create the store; query: look up entries; export: write memories.json; drop: remove the store')
+    store.add_argument('projects', nargs='*', help='Project directories (default: all)')
+    store.add_argument('--tag', action='append', default=[], help='With query, entries with this tag (repeatable, all must match)')
+    store.add_argument('--keyword', action='append', default=[], help='With query, entries with this keyword (repeatable)')
+    store.add_argument('--path', metavar='PREFIX', help='With query, entries whose path starts with PREFIX')
+    store.add_argument('--type', choices=['context', 'topic', 'session', 'other'], help='With query, entries of this type')
+    store.add_argument('--manual-export', action='store_true', help='With init, only write memories.json on "store export"')
+    store.add_argument('-o', '--output', help='With export of one project, write to this file instead of memories.json')
+    store.add_argument('--json', action='store_true', help='Print query results as JSON')
+    store.set_defaults(handler='agents_md.store:run')
+
+    journal = subparsers.add_parser('journal', parents=[common], help='Record memory writes without clobbering other agents, and merge them')
+    journal.add_argument('action', choices=['append', 'write', 'set', 'merge', 'status'],
+                         help='append/write PATH [TEXT]: change a markdown file; set PROJECT[/FILE] KEY=VALUE ...: '
+                              'memories.json keys; merge: apply records; status: pending records')
+    journal.add_argument('items', nargs='*', help='Target and text (read from stdin when omitted) or KEY=VALUE pairs')
+    journal.add_argument('--writer', help='Writer label in journal file names (default: $AGENTS_MD_WRITER or "agent")')
+    journal.add_argument('--merge', action='store_true', help='With append/write/set, merge right away unless a merger is running')
+    journal.add_argument('--watch', action='store_true', help='With merge, keep merging every --interval seconds')
+    journal.add_argument('--interval', type=float, default=1.0, help='Seconds between merges with --watch (default: 1)')
+    journal.add_argument('--json', action='store_true', help='With status, print JSON')
+    journal.set_defaults(handler='agents_md.journal:run')
+
+    ingest = subparsers.add_parser('ingest', parents=[common], help="Add a repository's new commits to the project's session files")
+    ingest.add_argument('project', help='Project directory in the memory root')
+    ingest.add_argument('--repo', help='Git repository (default: the current directory)')
+    ingest.add_argument('--rev', default='HEAD', help='Branch or commit to follow (default: HEAD)')
+    ingest.add_argument('--since', help='On the first run, only commits newer than this (default: "30 days ago")')
+    ingest.add_argument('--all', action='store_true', help='On the first run, ingest the whole history')
+    ingest.add_argument('--max', type=int, help='Ingest at most this many (the newest) new commits')
+    ingest.add_argument('--dry-run', action='store_true', help='Show what would be written without writing')
+    ingest.add_argument('--json', action='store_true', help='Print the result as JSON')
+    ingest.set_defaults(handler='agents_md.ingest:run')
+
+    verify = subparsers.add_parser('verify', parents=[common], help='Report code paths and symbols cited in memory that no longer exist')
+    verify.add_argument('project', help='Project directory in the memory root')
+    verify.add_argument('--workspace', help='Code checkout to verify against (remembered per project)')
+    verify.add_argument('--lookup', nargs='+', metavar='NAME', help='Only look up these paths or symbols in the workspace index')
+    verify.add_argument('--full', action='store_true', help='Rebuild the workspace index from scratch')
+    verify.add_argument('--json', action='store_true', help='Print the report as JSON')
+    verify.set_defaults(handler='agents_md.verify:run')
+
+    serve = subparsers.add_parser('serve', parents=[common], help='Keep the memory indexes resident and answer queries over a Unix socket')
+    serve.add_argument('--socket', help='Socket path (default: agents-md-[hash].sock in $XDG_RUNTIME_DIR or the temp directory)')
+    serve.add_argument('--status', action='store_true', help="Print the running server's latency stats, then exit")
+    serve.add_argument('--stop', action='store_true', help='Shut the running server down')
+    serve.add_argument('--include-private', action='store_true', help='Also index private/ (off by default)')
+    serve.add_argument('--quiet', action='store_true', help='Do not log to stderr')
+    serve.add_argument('--json', action='store_true', help='With --status, print the status as JSON')
+    serve.set_defaults(handler='agents_md.server:run')
+
+    call = subparsers.add_parser('call', parents=[common], help='Send one request to the memory server')
+    call.add_argument('method', choices=['lookup', 'search', 'tags', 'headers', 'section', 'stats', 'ping'],
+                      help='Server method')
+    call.add_argument('items', nargs='*', help='Query words, tags or path and section, and KEY=VALUE parameters')
+    call.add_argument('--socket', help='Socket path (default: agents-md-[hash].sock in $XDG_RUNTIME_DIR or the temp directory)')
+    call.add_argument('--timeout', type=float, default=10.0, help='Seconds to wait for the answer (default: 10)')
+    call.add_argument('--json', action='store_true', help='Print the result as JSON')
+    call.set_defaults(handler='agents_md.client:run')
+
+    digest = subparsers.add_parser('digest', parents=[common], help='Regenerate the status digest in context.md when its inputs changed')
+    digest.add_argument('projects', nargs='*', help='Project directories (default: all)')
+    digest.add_argument('-b', '--budget', type=int, help='Token budget of the digest (default: the current one, or 200)')
+    digest.add_argument('--force', action='store_true', help='Regenerate even if no input changed')
+    digest.add_argument('--dry-run', action='store_true', help='Print the digest instead of writing context.md')
+    digest.set_defaults(handler='agents_md.digest:run')
+
+    search = subparsers.add_parser('search', parents=[common], help='Ranked BM25 search over all memory files')
+    search.add_argument('query', nargs='*', help='Search terms (English or Japanese)')
+    search.add_argument('-n', '--limit', type=int, default=10, help='Number of results (default: 10)')
+    search.add_argument('--refresh', action='store_true', help='Update the index for changed files before searching')
+    search.add_argument('--full', action='store_true', help='With --refresh, rebuild the index from scratch')
+    search.add_argument('--include-private', action='store_true', help='Also index private/ (off by default)')
+    search.add_argument('--json', action='store_true', help='Print results as JSON')
+    search.set_defaults(handler='agents_md.search:run')
+
+    headers = subparsers.add_parser('headers', parents=[common], help='List indexed headings with line numbers and token counts')
+    headers.add_argument('paths', nargs='*', help='Files or directories relative to the memory root (default: all)')
+    headers.add_argument('--refresh', action='store_true', help='Update the section index for changed files first')
+    headers.add_argument('--full', action='store_true', help='With --refresh, rebuild the index from scratch')
+    headers.add_argument('--include-private', action='store_true', help='Also index private/ (off by default)')
+    headers.add_argument('--json', action='store_true', help='Print sections as JSON')
+    headers.set_defaults(handler='agents_md.sections:run_headers')
+
+    section = subparsers.add_parser('section', parents=[common], help='Print one section of a memory file')
+    section.add_argument('path', help='File relative to the memory root')
+    section.add_argument('section', help='Section number (as listed by headers) or heading title')
+    section.add_argument('--subsections', action='store_true', help='Include nested subsections')
+    section.add_argument('--include-private', action='store_true', help='Allow reading files under private/ (refused by default)')
+    section.set_defaults(handler='agents_md.sections:run_section')
+
+    retrieve = subparsers.add_parser('retrieve', parents=[common], help='Retrieve the best sections for a query within a token budget')
+    retrieve.add_argument('query', nargs='+', help='What to look for')
+    retrieve.add_argument('-b', '--budget', type=int, default=2000, help='Hard token budget for all stages (default: 2000)')
+    retrieve.add_argument('-p', '--project', action='append', help='Limit to a project (repeatable)')
+    retrieve.add_argument('--max-files', type=int, default=5, help='Candidate files to scan headers of (default: 5)')
+    retrieve.add_argument('--json', action='store_true', help='Print the plan and sections as JSON')
+    retrieve.set_defaults(handler='agents_md.retrieve:run')
+
+    tags = subparsers.add_parser('tags', parents=[common], help='Find files or sections by tag expression (AND/OR/NOT)')
+    tags.add_argument('expression', nargs='*', help='Tag expression, e.g. "auth AND (api OR token) AND NOT deprecated" (default: list tags)')
+    tags.add_argument('--sections', action='store_true', help='Match sections instead of whole files')
+    tags.add_argument('-n', '--limit', type=int, default=0, help='Print at most this many results (default: all)')
+    tags.add_argument('--refresh', action='store_true', help='Update the tag index for changed files first')
+    tags.add_argument('--full', action='store_true', help='With --refresh, rebuild the index from scratch')
+    tags.add_argument('--include-private', action='store_true', help='Also index private/ (off by default)')
+    tags.add_argument('--json', action='store_true', help='Print results as JSON')
+    tags.set_defaults(handler='agents_md.tags:run')
+
+    semantic = subparsers.add_parser('semantic', parents=[common], help='Offline semantic search over memory sections (needs NumPy)')
+    semantic.add_argument('query', nargs='*', help='What to look for, in your own words')
+    semantic.add_argument('-n', '--limit', type=int, default=10, help='Number of sections (default: 10)')
+    semantic.add_argument('--batch', metavar='FILE', help="Answer one query per line of FILE ('-' for stdin) as JSON lines")
+    semantic.add_argument('--refresh', action='store_true', help='Embed the sections of changed files first')
+    semantic.add_argument('--full', action='store_true', help='With --refresh, rebuild the index from scratch')
+    semantic.add_argument('--svd', action='store_true', help='On a full build, learn a latent projection (slower build, better recall)')
+    semantic.add_argument('--dim', type=int, default=256, help='Vector dimensions on a full build (default: 256)')
+    semantic.add_argument('--include-private', action='store_true', help='Also index private/ (off by default)')
+    semantic.add_argument('--json', action='store_true', help='Print results as JSON')
+    semantic.set_defaults(handler='agents_md.semantic:run')
+
+    compact = subparsers.add_parser('compact', parents=[common], help='Roll closed session months into one archive file each')
+    compact.add_argument('projects', nargs='*', help='Project directories to compact (default: all)')
+    compact.add_argument('--before', metavar='YYYY-MM', help='Compact months before this one (default: the current month)')
+    compact.add_argument('--dry-run', action='store_true', help='Show what would be rolled up without writing')
+    compact.set_defaults(handler='agents_md.compact:run')
+
+    pack = subparsers.add_parser('pack', parents=[common], help='Move cold files of a directory into one compressed pack')
+    pack.add_argument('directories', nargs='+', help='Directories relative to the memory root (e.g. my-project/session/2025-01)')
+    pack.add_argument('--older-than', type=float, default=0, metavar='DAYS', help='Only pack files not modified for DAYS days (default: all)')
+    pack.add_argument('--dry-run', action='store_true', help='Show what would be packed without writing')
+    pack.set_defaults(handler='agents_md.pack:run_pack')
+
+    unpack = subparsers.add_parser('unpack', parents=[common], help='Restore files from a pack')
+    unpack.add_argument('pack', help='Pack (or the directory it replaced) relative to the memory root')
+    unpack.add_argument('members', nargs='*', help='Members to restore (default: all)')
+    unpack.add_argument('--list', action='store_true', help='List the members instead of restoring them')
+    unpack.add_argument('--dry-run', action='store_true', help='Show what would be restored without writing')
+    unpack.set_defaults(handler='agents_md.pack:run_unpack')
+
+    mirror = subparsers.add_parser('mirror', parents=[common], help='Sync a fast local copy of the memory root both ways')
+    mirror.add_argument('local', help='Local mirror directory (outside the memory root)')
+    mirror.add_argument('--watch', action='store_true', help='Keep syncing every --interval seconds')
+    mirror.add_argument('--interval', type=float, default=10.0, help='Seconds between syncs with --watch (default: 10)')
+    mirror.add_argument('--block-size', type=int, default=4096, help='Bytes per compared block (default: 4096)')
+    mirror.add_argument('--dry-run', action='store_true', help='Show what would be synced without writing')
+    mirror.add_argument('--force', action='store_true', help='Sync deletions even when a side looks unmounted')
+    mirror.add_argument('--json', action='store_true', help='Print sync results as JSON')
+    mirror.set_defaults(handler='agents_md.mirror:run')
+
+    watch = subparsers.add_parser('watch', parents=[common], help='Keep memories.json, digests and the search/section/tag indexes live')
+    watch.add_argument('--status', action='store_true', help="Print the running watcher's queue depth and lag, then exit")
+    watch.add_argument('--backend', choices=['auto', 'inotify', 'poll'], default='auto',
+                       help='Change detection (default: inotify on Linux, polling elsewhere)')
+    watch.add_argument('--debounce', type=float, default=0.5, help='Seconds of quiet before a batch is indexed (default: 0.5)')
+    watch.add_argument('--max-delay', type=float, default=5.0, help='Index a batch at most this many seconds after its first change (default: 5)')
+    watch.add_argument('--interval', type=float, default=2.0, help='Polling interval in seconds (default: 2)')
+    watch.add_argument('--include-private', action='store_true', help='Also index private/ (off by default)')
+    watch.add_argument('--quiet', action='store_true', help='Do not log batches to stderr')
+    watch.add_argument('--json', action='store_true', help='With --status, print the status as JSON')
+    watch.set_defaults(handler='agents_md.watcher:run')
+
+    dedup = subparsers.add_parser('dedup', parents=[common], help='Report clusters of near-duplicate files or sections')
+    dedup.add_argument('paths', nargs='*', help='Directories relative to the memory root to scan (default: all)')
+    dedup.add_argument('-t', '--threshold', type=float, default=0.7, help='Minimum estimated Jaccard similarity (default: 0.7)')
+    dedup.add_argument('--sections', action='store_true', help='Compare sections instead of whole files')
+    dedup.add_argument('--min-terms', type=int, default=20, help='Ignore files or sections with fewer terms (default: 20)')
+    dedup.add_argument('--include-private', action='store_true', help='Also scan private/ (off by default)')
+    dedup.add_argument('--json', action='store_true', help='Print clusters as JSON')
+    dedup.set_defaults(handler='agents_md.dedup:run')
+
+    privacy = subparsers.add_parser('privacy', parents=[common], help='Find credentials and personal info outside private/')
+    privacy.add_argument('paths', nargs='*', help='Directories relative to the memory root to report on (default: all)')
+    privacy.add_argument('--full', action='store_true', help='Ignore cached results and re-scan every file')
+    privacy.add_argument('-j', '--jobs', type=int, help='Worker processes for large scans (default: CPU count)')
+    privacy.add_argument('--json', action='store_true', help='Print findings as JSON')
+    privacy.set_defaults(handler='agents_md.privacy:run')
+
+    return parser
+
+def load_handler(spec):
+    """Import a "module:function" handler lazily."""
+    module_name, function_name = spec.split(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+def use_utf8_console():
+    """Make the Windows console print Japanese text and the ✓/✗ marks."""
+    try:
+        # Try to set UTF-8 encoding for Windows console
+        if sys.stdout.encoding != 'utf-8':
+            import codecs
+            sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+            sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+    except (AttributeError, ImportError):
+        # Fallback: Try to set console code page to UTF-8
+        try:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetConsoleOutputCP(65001)  # UTF-8 code page
+        except (AttributeError, OSError):
+            pass  # If it fails, continue anyway
+
+def main(argv=None, prog=None):
+    """Main function."""
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    if not getattr(args, 'handler', None):
+        parser.print_help()
+        return 1
+    if sys.platform == 'win32':
+        use_utf8_console()
+
+    if args.trace:
+        try:
+            trace.enable(args.trace, args.trace_format)
+        except OSError as e:
+            print(f"✗ Error: Cannot write trace file: {e}")
+            return 1
+    try:
+        with trace.span('memory.' + args.command, argv=sys.argv[1:] if argv is None else list(argv)) as span:
+            status = _dispatch(args)
+            span.set(exit=status)
+            return status
+    except KeyboardInterrupt:
+        print("\n\nOperation cancelled by user.")
+        return 1
+
+def _dispatch(args):
+    if not getattr(args, 'needs_memory_root', True):
+        return load_handler(args.handler)(args, None)
+    from .common import resolve_memory_root
+    memory_root = resolve_memory_root(args.memory_path)
+    if memory_root is None:
+        print("✗ Error: MEMORY_PATH is not configured.")
+        print("  Run `agents-md configure` (or setup.py) first, or pass --memory-path.")
+        return 1
+    if not memory_root.is_dir():
+        print(f"✗ Error: Memory root does not exist: {memory_root}")
+        return 1
+    return load_handler(args.handler)(args, memory_root)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Thin client of the memory query server (server.py).
+
+Sends one JSON-RPC request per line over the server's Unix domain socket and
+prints the result. It imports nothing but the standard library and
+common.py, so a lookup costs a connect and a round trip instead of loading
+and parsing the indexes:
+
+    memory.py call search token refresh
+    memory.py call section my-project/topic/auth.md "Token refresh"
+    memory.py call lookup auth api project=my-project
+    memory.py call stats
+
+Bare words become the method's main parameter (the query, tag expression,
+tags or path); KEY=VALUE pairs set any parameter, with JSON values.
+Programs can use request() directly.
+"""
+
+import itertools
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .common import content_hash, dump_json
+
+# sun_path holds 104-108 bytes depending on the platform
+MAX_SOCKET_PATH = 100
+DEFAULT_TIMEOUT = 10.0
+
+_ids = itertools.count(1)
+
+class ServerError(Exception):
+    """The server answered a request with an error."""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+class ServerUnavailable(OSError):
+    """No server is listening on the socket."""
+
+def socket_path(memory_root):
+    """Socket of the memory root's server.
+
+    agents-md-[hash of the root].sock in $XDG_RUNTIME_DIR, or else in the
+    temp directory. Memory roots often live on cloud-synced or FUSE mounts,
+    which cannot hold sockets, and their paths can be too long for one.
+    """
+    digest = content_hash(str(Path(memory_root).absolute()).encode('utf-8'))
+    name = f"agents-md-{digest}.sock"
+    for directory in (os.environ.get('XDG_RUNTIME_DIR'), tempfile.gettempdir()):
+        if directory and os.path.isdir(directory):
+            path = Path(directory, name)
+            if len(os.fsencode(str(path))) <= MAX_SOCKET_PATH:
+                return path
+    return Path('/tmp', name)
+
+class Connection:
+    """One connection to the server; requests on it are answered in order."""
+
+    def __init__(self, path, timeout=DEFAULT_TIMEOUT):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ServerUnavailable("Unix domain sockets are not available on this platform")
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(str(path))
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            self.sock.close()
+            raise ServerUnavailable(f"no memory server at {path} ({e.strerror})")
+        self.stream = self.sock.makefile('rb')
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def call(self, method, params=None):
+        """Full response object of one request (result, elapsed_ms, ...)."""
+        request_id = next(_ids)
+        message = {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params or {}}
+        self.sock.sendall(dump_json(message).encode('utf-8') + b'\n')
+        line = self.stream.readline()
+        if not line:
+            raise ServerUnavailable("the memory server closed the connection")
+        response = json.loads(line.decode('utf-8'))
+        error = response.get('error')
+        if error:
+            raise ServerError(error.get('code'), error.get('message', 'unknown error'))
+        return response
+
+def request(memory_root, method, params=None, timeout=DEFAULT_TIMEOUT, path=None):
+    """Result of one request to the memory root's server."""
+    with Connection(path or socket_path(memory_root), timeout) as connection:
+        return connection.call(method, params)['result']
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def build_params(method, items):
+    """Params of a method from bare words and KEY=VALUE pairs."""
+    params = {}
+    words = []
+    for item in items:
+        key, separator, value = item.partition('=')
+        if separator and key.isidentifier():
+            try:
+                params[key] = json.loads(value)
+            except ValueError:
+                params[key] = value
+        else:
+            words.append(item)
+    if words:
+        if method == 'section':
+            params.setdefault('path', words[0])
+            if len(words) > 1:
+                params.setdefault('section', ' '.join(words[1:]))
+        elif method == 'lookup':
+            params.setdefault('tags', words)
+        elif method == 'headers':
+            params.setdefault('path', words[0])
+        elif method == 'tags':
+            params.setdefault('expression', ' '.join(words))
+        else:
+            params.setdefault('query', ' '.join(words))
+    return params
+
+def print_stats(stats):
+    """Print the latency stats a server reports."""
+    print(f"Memory server: pid {stats['pid']}, up {stats['uptime']:.0f}s, {stats['requests']} requests, "
+          f"{stats['errors']} errors")
+    print(f"  Memory path: {stats['memory_path']}")
+    resident = stats['resident']
+    print(f"  Resident: {resident['projects']} projects, {resident['files']} indexed files, "
+          f"{resident['tags']} tags, {resident['search_documents']} search documents, "
+          f"{resident['section_files']} files with section offsets")
+    if stats['methods']:
+        print(f"  {'method':<10} {'count':>7} {'errors':>6} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)")
+    for method, latency in sorted(stats['methods'].items()):
+        print(f"  {method:<10} {latency['count']:>7} {latency['errors']:>6} {latency['mean_ms']:>8.3f} "
+              f"{latency['p50_ms']:>8.3f} {latency['p95_ms']:>8.3f} {latency['p99_ms']:>8.3f} {latency['max_ms']:>8.3f}")
+
+def print_result(method, result):
+    """Print a result the way the matching memory.py command would."""
+    if method == 'search':
+        for item in result:
+            print(f"{item['score']:8.3f}  {item['path']}  {item['title']}")
+    elif method == 'lookup':
+        for item in result:
+            tags = ', '.join(item.get('tags', []))
+            print(f"{item['path']}  {item.get('title', '')}" + (f"  [{tags}]" if tags else ''))
+    elif method == 'headers':
+        for relpath, sections in result.items():
+            print(relpath)
+            for number, section in enumerate(sections):
+                marker = '#' * section['level'] if section['level'] else '(preamble)'
+                print(f"  #{number:<3} L{section['line']:<5} {marker} {section['title']}  ({section['tokens']} tokens)")
+    elif method == 'section':
+        print(result['text'], end='')
+    elif method == 'tags' and isinstance(result, dict):
+        for tag, count in result.items():
+            print(f"{count:6}  #{tag}")
+    elif method == 'tags':
+        for item in result:
+            if 'section' in item:
+                print(f"{item['path']} #{item['section']} L{item['line']} {item['title']}")
+            else:
+                print(item['path'])
+    elif method == 'stats':
+        print_stats(result)
+    else:
+        print(dump_json(result, pretty=True), end='')
+
+def run(args, memory_root):
+    """memory.py call METHOD [WORD ...] [KEY=VALUE ...] [--json]"""
+    params = build_params(args.method, args.items)
+    path = Path(args.socket) if args.socket else socket_path(memory_root)
+    started = time.perf_counter()
+    try:
+        with Connection(path, args.timeout) as connection:
+            response = connection.call(args.method, params)
+    except ServerUnavailable as e:
+        print(f"✗ Error: {e}. Start one with: python3 memory.py serve")
+        return 1
+    except ServerError as e:
+        print(f"✗ Error: {e}")
+        return 1
+    except (OSError, ValueError) as e:
+        print(f"✗ Error: request failed: {e}")
+        return 1
+    round_trip = (time.perf_counter() - started) * 1000
+    if args.json:
+        print(dump_json(response['result'], pretty=True), end='')
+        return 0
+    print_result(args.method, response['result'])
+    if args.method not in ('section', 'stats'):
+        # The timing goes to stderr so stdout stays pasteable
+        print(f"{response.get('elapsed_ms', 0):.2f} ms in the server, {round_trip:.2f} ms round trip",
+              file=sys.stderr)
+    return 0
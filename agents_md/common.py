@@ -0,0 +1,318 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Shared helpers for the memory tools.
+
+Covers memory root resolution, walking memory markdown files against a
+(size, mtime, hash) manifest, atomic JSON writes and advisory file locks.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from . import trace
+from .config import read_memory_path
+
+# Hidden directory (inside a project or the memory root) holding tool state
+STATE_DIR = ".agents-md"
+MEMORY_INDEX = "memories.json"
+MANIFEST = "manifest.json"
+PRIVATE_DIR = "private"
+COMMON_DIR = "common"
+MARKDOWN_SUFFIXES = (".md",)
+# Compressed container of cold memory files (see pack.py)
+PACK_SUFFIX = ".mdpack"
+# Lock files of memory files shared by concurrent writers (see file_lock)
+LOCK_DIR = "locks"
+
+# Process umask, read once so new files get the same mode open() would give them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# ============================================================================
+# MEMORY ROOT
+# ============================================================================
+def get_repo_directory():
+    """Get the agents-md checkout this package lives in."""
+    return Path(__file__).resolve().parent.parent
+
+def read_configured_memory_path(agents_file):
+    """Read the configured MEMORY_PATH definition from an AGENTS.md/GEMINI.md file."""
+    return read_memory_path(agents_file, heuristics=False)
+
+def resolve_memory_root(memory_path=None):
+    """Resolve the memory root from an explicit path or the configured AGENTS.md.
+
+    The checkout this package runs from is asked first; an installed package
+    has none and reads the AGENTS.md of the current directory.
+
+    Returns a Path, or None when nothing is configured.
+    """
+    if not memory_path:
+        candidates = [directory / name for directory in dict.fromkeys((get_repo_directory(), Path.cwd()))
+                      for name in ("AGENTS.md", "GEMINI.md")]
+        memory_path = next(filter(None, map(read_configured_memory_path, candidates)), None)
+    if not memory_path:
+        return None
+    memory_path = os.path.expandvars(os.path.expanduser(memory_path))
+    return Path(memory_path).absolute()
+
+def list_projects(memory_root, include_private=False):
+    """List memory directories that get their own memories.json.
+
+    Every visible top-level directory is a project; common/ is included,
+    private/ only when explicitly requested.
+    """
+    projects = []
+    try:
+        entries = sorted(os.scandir(memory_root), key=lambda e: e.name)
+    except OSError:
+        return projects
+    for entry in entries:
+        if entry.name.startswith('.') or not entry.is_dir():
+            continue
+        if entry.name == PRIVATE_DIR and not include_private:
+            continue
+        projects.append(entry.name)
+    return projects
+
+def state_path(base, *parts):
+    """Path of a tool state file under base/.agents-md/."""
+    return Path(base, STATE_DIR, *parts)
+
+def local_state_path(*parts):
+    """Path of per-machine tool state kept out of the memory root.
+
+    $XDG_STATE_HOME/agents-md, %LOCALAPPDATA%/agents-md on Windows, or else
+    ~/.local/state/agents-md. For files that must not be synced with the
+    memory root (SQLite databases).
+    """
+    base = os.environ.get('XDG_STATE_HOME')
+    if not base and sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA')
+    return Path(base or Path.home() / '.local' / 'state', 'agents-md', *parts)
+
+# ============================================================================
+# FILE WALKING
+# ============================================================================
+def iter_markdown_files(base, skip_dirs=(), suffixes=MARKDOWN_SUFFIXES):
+    """Yield (relpath, stat) for every markdown file below base.
+
+    relpath uses forward slashes. Hidden directories (including the tool state
+    directory) are skipped, as are top-level directories named in skip_dirs.
+    suffixes selects other file types (packs) with the same rules.
+    """
+    base = str(base)
+    stack = [('', base)]
+    while stack:
+        prefix, directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            name = entry.name
+            if name.startswith('.'):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not prefix and name in skip_dirs:
+                        continue
+                    stack.append((prefix + name + '/', entry.path))
+                elif name.endswith(suffixes) and entry.is_file():
+                    yield prefix + name, entry.stat()
+            except OSError:
+                continue
+
+def content_hash(data):
+    """Short content hash used in manifests."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def stat_markdown_paths(base, relpaths, skip_dirs=()):
+    """Yield (relpath, stat) for the given relpaths that are markdown files.
+
+    Applies the same filters as iter_markdown_files (hidden directories,
+    skip_dirs, suffix), so a list of changed paths from a watcher yields the
+    same files a full walk would.
+    """
+    base = str(base)
+    for relpath in sorted(set(relpaths)):
+        parts = relpath.split('/')
+        if any(part.startswith('.') for part in parts) or (len(parts) > 1 and parts[0] in skip_dirs):
+            continue
+        if not relpath.endswith(MARKDOWN_SUFFIXES):
+            continue
+        try:
+            st = os.stat(os.path.join(base, relpath))
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            yield relpath, st
+
+def scan_manifest(base, manifest, skip_dirs=(), paths=None):
+    """Walk base against a manifest of {relpath: {size, mtime_ns, hash}}.
+
+    Yields (relpath, record, data). Files whose size and mtime match the
+    manifest are not opened and data is None; otherwise data holds the bytes
+    read and record carries their fresh hash. Callers compare record['hash']
+    with the previous one to tell touched files from modified ones, and treat
+    manifest keys that were never yielded as removed.
+
+    With paths (relpaths known to have changed, e.g. from the watcher) only
+    those files are looked at; every other manifest entry is yielded as
+    unchanged without touching the disk.
+    """
+    if paths is None:
+        files = iter_markdown_files(base, skip_dirs)
+    else:
+        paths = set(paths)
+        for relpath, previous in manifest.items():
+            if relpath not in paths:
+                yield relpath, previous, None
+        files = stat_markdown_paths(base, paths, skip_dirs)
+    stats = reads = bytes_read = 0
+    for relpath, st in files:
+        stats += 1
+        previous = manifest.get(relpath)
+        if previous and previous.get('size') == st.st_size and previous.get('mtime_ns') == st.st_mtime_ns:
+            yield relpath, previous, None
+            continue
+        try:
+            with open(os.path.join(str(base), relpath), 'rb') as f:
+                data = f.read()
+        except OSError:
+            continue
+        reads += 1
+        bytes_read += len(data)
+        record = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': content_hash(data)}
+        yield relpath, record, data
+    trace.add(stats=stats, reads=reads, bytes_read=bytes_read)
+
+# ============================================================================
+# JSON STATE
+# ============================================================================
+def load_json(path, default=None):
+    """Load a JSON file, returning default when missing or unreadable."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        trace.add(reads=1, bytes_read=len(data))
+        return json.loads(data.decode('utf-8'))
+    except (OSError, ValueError):
+        return default
+
+def write_temp_file(path, data):
+    """Write data to a temp file next to path, with the mode path would get.
+
+    Returns the temp file path; the caller renames it into place (or removes
+    it on failure).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = os.stat(str(path)).st_mode & 0o777
+    except OSError:
+        mode = 0o666 & ~_UMASK
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix='.' + path.name + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, mode)
+        trace.add(writes=1, bytes_written=len(data))
+    except BaseException:
+        remove_quietly(tmp_path)
+        raise
+    return tmp_path
+
+def remove_quietly(path):
+    """Delete a file, ignoring errors (used to clean up temp files)."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+def atomic_write_bytes(path, data):
+    """Write data to path via a temp file in the same directory and a rename."""
+    tmp_path = write_temp_file(path, data)
+    try:
+        os.replace(tmp_path, str(path))
+    except BaseException:
+        remove_quietly(tmp_path)
+        raise
+
+def dump_json(obj, pretty=False):
+    """Serialize obj the way the memory tools store it."""
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2) + '\n'
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+def write_json(path, obj, pretty=False):
+    """Atomically write obj as UTF-8 JSON."""
+    atomic_write_bytes(path, dump_json(obj, pretty).encode('utf-8'))
+
+# ============================================================================
+# ADVISORY LOCKS
+# ============================================================================
+def lock_path(memory_root, relpath):
+    """Lock file guarding the memory file at memory-root-relative relpath."""
+    return state_path(memory_root, LOCK_DIR, content_hash(relpath.encode('utf-8')) + '.lock')
+
+@contextlib.contextmanager
+def file_lock(memory_root, relpath, blocking=True):
+    """Hold the advisory lock of a memory file while reading and rewriting it.
+
+    The lock lives in a separate file under [memory root]/.agents-md/locks/,
+    because the guarded file itself is replaced by atomic writes. Tools that
+    read-modify-write shared files (the indexer, digest, compact, the journal
+    merger) take it; plain appends by agents do not. With blocking=False the
+    context yields False instead of waiting for another holder.
+    """
+    path = lock_path(memory_root, relpath)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(str(path), 'a+b') as f:
+        acquired = _acquire(f.fileno(), blocking)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                _release(f.fileno())
+
+def _acquire(fd, blocking):
+    if fcntl is not None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            return False
+        return True
+    while True:
+        try:
+            # Locks the first byte; LK_NBLCK fails at once instead of retrying for 10s
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            time.sleep(0.01)
+
+def _release(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
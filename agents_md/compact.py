@@ -0,0 +1,275 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Session log roll-up and compaction.
+
+organization.md keeps one file per session under
+session/YYYY-MM/YYYY-MM-DD_feature.md, so a busy project collects thousands
+of small files that slow down ls, grep -r and cloud-drive syncs. `memory.py
+compact` rolls every closed month (before the current one by default) into a
+single session/YYYY-MM.md archive:
+
+    # Session Archive: 2025-09
+
+    <!-- agents-md:archive month=2025-09 parts=2 -->
+
+    | # | Session | Date | Title | Tags | Line |
+    |---|---------|------|-------|------|------|
+    | 1 | 2025-09-03_auth | 2025-09-03 | Auth fix | auth, api | 12 |
+    ...
+
+    # 2025-09-03_auth
+    <!-- agents-md:part name=2025-09-03_auth.md date=2025-09-03 hash=... tags=auth,api title="Auth fix" -->
+
+    (the session file, its headings demoted one level, tag footers kept)
+
+Every session is one level-1 section named after its file, so `memory.py
+section proj/session/2025-09.md 2025-09-03_auth --subsections` reads exactly
+that session. The indexer lists the parts of an archive (pointer, title,
+date, tags, line) in memories.json, and references to archived files kept
+elsewhere in memories.json are rewritten to "session/2025-09.md#2025-09-03_auth".
+
+Compacting a month again (a late session file) merges the new files into the
+existing archive. Source files are only deleted after the archive has been
+written atomically and read back.
+"""
+
+import os
+import re
+import time
+from datetime import date
+from pathlib import Path
+
+from . import trace
+from .common import (
+    MEMORY_INDEX, atomic_write_bytes, content_hash, file_lock, list_projects, load_json,
+    write_json,
+)
+from .indexer import index_project
+from .markdown import (
+    extract_tags, format_attributes, iter_archive_parts, iter_headings,
+    session_date,
+)
+
+SESSION_DIR = "session"
+_MONTH_RE = re.compile(r'^\d{4}-\d{2}$')
+_ARCHIVE_MARKER = '<!-- agents-md:archive '
+
+# ============================================================================
+# ARCHIVE FORMAT
+# ============================================================================
+def demote_headings(text):
+    """Push every heading outside code fences one level down (h6 stays h6)."""
+    lines = text.split('\n')
+    for index, level, _ in iter_headings(text):
+        if level < 6:
+            lines[index] = '#' + lines[index]
+    return '\n'.join(lines)
+
+def archive_pointer(month, name):
+    """Section pointer of an archived session, relative to the project."""
+    return f"{SESSION_DIR}/{month}.md#{Path(name).stem}"
+
+def render_part(name, text, data_hash):
+    """One archive part for a session file: (metadata, block text)."""
+    headings = list(iter_headings(text))
+    title = next((heading for _, level, heading in headings if level == 1), None)
+    if title is None:
+        title = headings[0][2] if headings else Path(name).stem
+    tags = extract_tags(text)
+    attributes = {'name': name, 'date': session_date(name) or '', 'hash': data_hash,
+                  'tags': ','.join(tags), 'title': title}
+    block = (f"# {Path(name).stem}\n<!-- agents-md:part {format_attributes(attributes)} -->\n\n"
+             f"{demote_headings(text).strip(chr(10))}\n\n")
+    meta = {'name': name, 'date': attributes['date'], 'hash': data_hash, 'title': title, 'tags': tags}
+    return meta, block
+
+def split_archive(text):
+    """Existing parts of an archive as a list of (metadata, block text)."""
+    markers = list(iter_archive_parts(text))
+    parts = []
+    for position, (start, _, attributes) in enumerate(markers):
+        end = markers[position + 1][0] if position + 1 < len(markers) else len(text)
+        block = text[start:end].rstrip('\n') + '\n\n'
+        parts.append(({
+            'name': attributes.get('name', ''),
+            'date': attributes.get('date', ''),
+            'hash': attributes.get('hash', ''),
+            'title': attributes.get('title') or Path(attributes.get('name', '')).stem,
+            'tags': [tag for tag in attributes.get('tags', '').split(',') if tag],
+        }, block))
+    return parts
+
+def _cell(value):
+    return str(value).replace('|', '\\|').replace('\n', ' ')
+
+def render_archive(month, parts):
+    """Full archive text for a month from (metadata, block) parts."""
+    parts = sorted(parts, key=lambda part: part[0]['name'])
+    header = [
+        f"# Session Archive: {month}",
+        "",
+        f"<!-- agents-md:archive month={month} parts={len(parts)} -->",
+        "",
+        "| # | Session | Date | Title | Tags | Line |",
+        "|---|---------|------|-------|------|------|",
+    ]
+    # The first part starts after the header, one table row per part and a blank line
+    line = len(header) + len(parts) + 2
+    rows = []
+    for number, (meta, block) in enumerate(parts, 1):
+        rows.append(f"| {number} | {_cell(Path(meta['name']).stem)} | {meta['date']} | {_cell(meta['title'])} "
+                    f"| {_cell(', '.join(meta['tags']))} | {line} |")
+        line += block.count('\n')
+    return '\n'.join(header + rows) + '\n\n' + ''.join(block for _, block in parts)
+
+def is_archive(text):
+    """Whether text is a session archive written by compact."""
+    return _ARCHIVE_MARKER in text[:4096]
+
+# ============================================================================
+# COMPACTION
+# ============================================================================
+def closed_months(project_dir, before):
+    """Month directories under session/ that sort before the given YYYY-MM."""
+    session_dir = Path(project_dir, SESSION_DIR)
+    try:
+        entries = list(os.scandir(session_dir))
+    except OSError:
+        return []
+    return sorted(entry.name for entry in entries
+                  if entry.is_dir(follow_symlinks=False) and _MONTH_RE.match(entry.name) and entry.name < before)
+
+def compact_month(project_dir, month, dry_run=False):
+    """Roll session/<month>/*.md into session/<month>.md; returns stats."""
+    session_dir = Path(project_dir, SESSION_DIR)
+    month_dir = session_dir / month
+    archive_path = session_dir / (month + '.md')
+    stats = {'month': month, 'archive': f"{SESSION_DIR}/{month}.md", 'files': 0, 'bytes': 0,
+             'archive_bytes': 0, 'moved': {}, 'skipped': [], 'error': None}
+
+    existing = []
+    if archive_path.exists():
+        text = archive_path.read_text(encoding='utf-8')
+        if not is_archive(text):
+            stats['error'] = f"{stats['archive']} exists and is not a session archive"
+            return stats
+        existing = split_archive(text)
+    known = {meta['name']: meta['hash'] for meta, _ in existing}
+
+    parts = list(existing)
+    sources = []
+    for entry in sorted(os.scandir(month_dir), key=lambda e: e.name):
+        if not entry.name.endswith('.md') or entry.name.startswith('.') or not entry.is_file(follow_symlinks=False):
+            continue
+        with open(entry.path, 'rb') as f:
+            data = f.read()
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            # Never archive what cannot be reproduced faithfully
+            stats['skipped'].append(entry.name)
+            continue
+        data_hash = content_hash(data)
+        if entry.name in known and known[entry.name] != data_hash:
+            stats['skipped'].append(entry.name)
+            continue
+        if entry.name not in known:
+            parts.append(render_part(entry.name, text, data_hash))
+        sources.append(entry.path)
+        stats['files'] += 1
+        stats['bytes'] += len(data)
+        stats['moved'][f"{SESSION_DIR}/{month}/{entry.name}"] = archive_pointer(month, entry.name)
+
+    if not sources:
+        return stats
+    archive = render_archive(month, parts).encode('utf-8')
+    stats['archive_bytes'] = len(archive)
+    if dry_run:
+        return stats
+
+    atomic_write_bytes(archive_path, archive)
+    written = {attributes.get('name') for _, _, attributes in iter_archive_parts(archive_path.read_text(encoding='utf-8'))}
+    if not {Path(source).name for source in sources} <= written:
+        stats['error'] = f"{stats['archive']} did not read back correctly; session files were kept"
+        return stats
+    for source in sources:
+        os.unlink(source)
+    try:
+        os.rmdir(month_dir)
+    except OSError:
+        pass  # Other files (attachments, skipped sessions) stay where they are
+    return stats
+
+def rewrite_pointers(value, moved):
+    """Replace archived file paths in a JSON value with section pointers."""
+    if isinstance(value, str):
+        return moved.get(value, value)
+    if isinstance(value, list):
+        return [rewrite_pointers(item, moved) for item in value]
+    if isinstance(value, dict):
+        return {key: rewrite_pointers(item, moved) for key, item in value.items()}
+    return value
+
+@trace.traced('compact.project')
+def compact_project(project_dir, before, dry_run=False):
+    """Compact every closed month of a project and re-index it; returns month stats."""
+    results = [compact_month(project_dir, month, dry_run) for month in closed_months(project_dir, before)]
+    moved = {}
+    for result in results:
+        moved.update(result['moved'] if not result['error'] else {})
+    if moved and not dry_run:
+        index_project(project_dir)
+        project_dir = Path(project_dir)
+        index_file = project_dir / MEMORY_INDEX
+        with file_lock(project_dir.parent, f"{project_dir.name}/{MEMORY_INDEX}"):
+            document = load_json(index_file, {})
+            # Generated entries are already current; only hand-written references move
+            rewritten = {key: value if key == 'files' else rewrite_pointers(value, moved)
+                         for key, value in document.items()}
+            if rewritten != document:
+                write_json(index_file, rewritten, pretty=True)
+    return results
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def run(args, memory_root):
+    """memory.py compact [project ...] [--before YYYY-MM] [--dry-run]"""
+    before = args.before or date.today().strftime('%Y-%m')
+    if not _MONTH_RE.match(before):
+        print(f"✗ Error: --before must look like YYYY-MM: {before}")
+        return 1
+    projects = args.projects or list_projects(memory_root)
+    started = time.perf_counter()
+    status = 0
+    files = archives = 0
+    for name in projects:
+        project_dir = memory_root / name
+        if not project_dir.is_dir():
+            print(f"✗ Project directory not found: {project_dir}")
+            status = 1
+            continue
+        for result in compact_project(project_dir, before, dry_run=args.dry_run):
+            if result['error']:
+                print(f"✗ {name}: {result['month']}: {result['error']}")
+                status = 1
+                continue
+            for skipped in result['skipped']:
+                print(f"  {name}: kept {SESSION_DIR}/{result['month']}/{skipped} (not valid UTF-8 or differs "
+                      f"from the archived copy)")
+            if not result['files']:
+                continue
+            files += result['files']
+            archives += 1
+            action = "would roll" if args.dry_run else "rolled"
+            print(f"{name}: {action} {result['files']} files ({result['bytes'] / 1024:.1f} KB) into "
+                  f"{result['archive']} ({result['archive_bytes'] / 1024:.1f} KB)")
+    if files:
+        summary = "Dry run: nothing was written." if args.dry_run else "Compaction complete."
+        print(f"{summary} {files} session files -> {archives} archives ({time.perf_counter() - started:.3f}s)")
+    else:
+        print(f"No closed session months before {before} to compact.")
+    return status
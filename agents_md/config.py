@@ -0,0 +1,160 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+MEMORY_PATH configuration parser.
+
+Finds the configured memory root (and the language) in AGENTS.md /
+GEMINI.md content. The canonical definition
+
+    **MEMORY_PATH**: `/path/to/memory-root`
+
+is searched for first with one precompiled pattern. The older line-by-line
+heuristics (a "Memory root: `...`" line in a hand-edited file) only run when
+a file has no canonical definition at all, and then only on lines that
+contain "memory", a path separator and a root/path hint. Content may be str
+or bytes, so read_memory_path() can search large files through a memory map
+without decoding them.
+"""
+
+import mmap
+import os
+import re
+
+from . import trace
+
+PLACEHOLDER_MEMORY_PATH = "/path/to/your/memory-root"
+MEMORY_PATH_PLACEHOLDER = "{MEMORY_PATH}"
+
+# Files at least this large are memory-mapped instead of read
+MMAP_THRESHOLD = 1 << 20
+# Heuristic scans lowercase this much of a file at a time
+CHUNK_SIZE = 1 << 20
+
+_DEFINITION = r'\*\*MEMORY_PATH\*\*:\s*`([^`\n]+)`'
+_DEFINITION_RE = re.compile(_DEFINITION)
+_DEFINITION_BYTES_RE = re.compile(_DEFINITION.encode('ascii'))
+
+# Heuristics for files without a canonical definition, applied per line
+_BACKTICK_RE = re.compile(r'`([^`]+)`')
+_ROOT_PATTERNS = (
+    re.compile(r'(?:ルート|Root):\s*[`"]?([^`"\n]+(?:memory|cursor-memory)[^`"\n]*)', re.IGNORECASE),
+    re.compile(r'[`"]([^`"]+memory[^`"]*)[`"]', re.IGNORECASE),
+)
+_LINE_HINTS = ('root', 'path', 'ルート', 'パス', 'cursor-memory')
+_LINE_HINTS_BYTES_RE = re.compile(b'|'.join(re.escape(hint.encode('utf-8')) for hint in _LINE_HINTS))
+
+# ============================================================================
+# PARSING
+# ============================================================================
+def detect_language(lines):
+    """Detect the language of AGENTS.md content from its memory heading."""
+    # The heading comes after the workspace-check preamble, so stop at it
+    for line in lines:
+        if line.startswith('# Memory System Guidelines'):
+            return 'en'
+        elif line.startswith('# メモリシステムガイドライン'):
+            return 'ja'
+    return 'unknown'
+
+def _configured(path):
+    """A definition value, or None when it is still a placeholder."""
+    path = path.strip()
+    if not path or path == PLACEHOLDER_MEMORY_PATH or MEMORY_PATH_PLACEHOLDER in path:
+        return None
+    return path
+
+def _is_path(value):
+    return '/' in value or '\\' in value
+
+def match_line(line):
+    """Apply the legacy heuristics to one line containing "memory"."""
+    # Every result is a path, so lines without a separator are rejected first
+    if '/' not in line and '\\' not in line:
+        return None
+    lowered = line.lower()
+    if not any(hint in lowered for hint in _LINE_HINTS):
+        return None
+    for match in _BACKTICK_RE.findall(line):
+        if _is_path(match) and MEMORY_PATH_PLACEHOLDER not in match:
+            if 'memory' in match.lower() or match.startswith(('/', '~')) or len(match) > 20:
+                return match.strip()
+    for pattern in _ROOT_PATTERNS:
+        for match in pattern.findall(line):
+            match = match.strip()
+            if match and _is_path(match) and MEMORY_PATH_PLACEHOLDER not in match:
+                if 'memory' in match.lower() or (len(match) > 15 and match.startswith('/')):
+                    return match
+    return None
+
+def _candidate_lines(content):
+    """Yield lines containing "memory", a path separator and a hint, in order.
+
+    Works on bytes in chunks: each chunk is lowercased once (ASCII only, so
+    offsets stay valid) and only candidate lines are decoded.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    size = len(content)
+    start = 0
+    while start < size:
+        end = content.find(b'\n', min(start + CHUNK_SIZE, size))
+        end = size if end < 0 else end + 1
+        chunk = content[start:end]
+        lowered = chunk.lower()
+        position = lowered.find(b'memory')
+        while position >= 0:
+            line_start = lowered.rfind(b'\n', 0, position) + 1
+            line_end = lowered.find(b'\n', position)
+            if line_end < 0:
+                line_end = len(chunk)
+            line = lowered[line_start:line_end]
+            if (b'/' in line or b'\\' in line) and _LINE_HINTS_BYTES_RE.search(line):
+                yield chunk[line_start:line_end].decode('utf-8', errors='replace')
+            position = lowered.find(b'memory', line_end)
+        start = end
+
+def find_memory_path(content, heuristics=True):
+    """Configured MEMORY_PATH in content (str, bytes or a memory map), or None.
+
+    The canonical definition wins wherever it is; a definition still holding
+    the placeholder means "not configured". Heuristics only run when there is
+    no definition and the content is not an unrendered template.
+    """
+    if isinstance(content, str):
+        match = _DEFINITION_RE.search(content)
+        if match:
+            return _configured(match.group(1))
+        placeholder = MEMORY_PATH_PLACEHOLDER
+    else:
+        match = _DEFINITION_BYTES_RE.search(content)
+        if match:
+            return _configured(match.group(1).decode('utf-8', errors='replace'))
+        placeholder = MEMORY_PATH_PLACEHOLDER.encode('ascii')
+    if not heuristics or content.find(placeholder) >= 0:
+        return None
+    for line in _candidate_lines(content):
+        path = match_line(line)
+        if path:
+            return path
+    return None
+
+def read_memory_path(path, heuristics=True):
+    """Configured MEMORY_PATH of a file, or None if unset or unreadable.
+
+    Large files are searched through a memory map, so only the lines that
+    are inspected are ever decoded.
+    """
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return None
+            trace.add(reads=1, bytes_read=size)
+            if size < MMAP_THRESHOLD:
+                return find_memory_path(f.read(), heuristics)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return find_memory_path(mapped, heuristics)
+    except OSError:
+        return None
@@ -0,0 +1,767 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Configuration of agents-md workspaces: language and MEMORY_PATH.
+
+Backs the `configure` and `switch-lang` commands (agents_md/cli.py), which
+`agents-md` and setup.py run:
+
+- CLI localization support (en/ja) via command-line argument; messages come
+  from the active language's catalog only (agents_md/i18n/)
+- Handles shell-escaped paths automatically (e.g., spaces, special characters)
+- Expands ~ for home directory and environment variables
+- Creates directories if they don't exist
+- Cross-platform path handling
+- Updates MEMORY_PATH variable definition in both AGENTS.md and GEMINI.md
+- Ensures both files exist for dual editor support (Cursor + Antigravity)
+- Headless batch mode: configure many workspaces in parallel (--workspace)
+- Scan mode: find AGENTS.md/GEMINI.md copies across large directory trees,
+  report their language, MEMORY_PATH and template status, and optionally
+  upgrade outdated ones (--scan DIR [--upgrade])
+- Atomic writes: files are rendered once, unchanged files are not rewritten,
+  and --dry-run prints a diff instead of writing
+
+Interactive flow:
+    1. Select language (en/ja) - or use --lang parameter
+    2. Configure memory root path
+
+Without --workspace, the agents-md checkout the package runs from is
+configured; an installed package has none and configures the current
+directory instead. AGENTS.md.en / AGENTS.md.ja are taken from the workspace,
+then from the checkout, then from the copies packaged in the wheel.
+"""
+
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from . import trace
+from .common import get_repo_directory
+from .config import detect_language, find_memory_path
+from .i18n import t
+from .render import (
+    commit_plan, diff_plan, has_memory_path_definition, plan_writes,
+    read_bytes, render_memory_path,
+)
+
+# Constants for language switching
+AGENTS_EN = "AGENTS.md.en"
+AGENTS_JA = "AGENTS.md.ja"
+AGENTS_TARGET = "AGENTS.md"
+AGENTS_BACKUP = "AGENTS.md.backup"
+GEMINI_TARGET = "GEMINI.md"
+GEMINI_BACKUP = "GEMINI.md.backup"
+# Where wheels carry the language sources (see pyproject.toml)
+TEMPLATE_DIR = "templates"
+
+# ============================================================================
+# UTILITY FUNCTIONS
+# ============================================================================
+def default_workspace():
+    """Workspace configured when none is given: the checkout, else the current directory."""
+    repo_dir = get_repo_directory()
+    if (repo_dir / AGENTS_EN).exists():
+        return repo_dir
+    return Path.cwd()
+
+def get_template_directory():
+    """Directory holding the AGENTS.md.en / AGENTS.md.ja sources."""
+    repo_dir = get_repo_directory()
+    if (repo_dir / AGENTS_EN).exists():
+        return repo_dir
+    return Path(__file__).resolve().parent / TEMPLATE_DIR
+
+def decode_shell_escaped_string(s):
+    """Decode basic shell-style escaped characters in paths."""
+    if '\\' not in s:
+        return s
+    result = s.replace('\\ ', ' ')
+    result = result.replace('\\\\', '\\')
+    return result
+
+def find_agents_file(base_dir=None):
+    """Find AGENTS.md file (in base_dir, defaulting to the script directory)."""
+    script_dir = Path(base_dir) if base_dir else default_workspace()
+    agents_file = script_dir / "AGENTS.md"
+    if not agents_file.exists():
+        agents_file = script_dir / "AGENTS.md.wip"
+        if not agents_file.exists():
+            return None
+    return agents_file
+
+@trace.traced('setup.get_current_language')
+def get_current_language(base_dir=None):
+    """Detect current language by checking if AGENTS.md exists and finding its memory heading."""
+    script_dir = Path(base_dir) if base_dir else default_workspace()
+    agents_file = script_dir / AGENTS_TARGET
+    if not agents_file.exists():
+        return None
+    try:
+        trace.add(reads=1)
+        with open(agents_file, 'r', encoding='utf-8') as f:
+            return detect_language(f)
+    except Exception:
+        pass
+    return 'unknown'
+
+@trace.traced('setup.extract_memory_path')
+def extract_memory_path(content):
+    """Extract configured MEMORY_PATH from content if it exists.
+    
+    The **MEMORY_PATH** definition is looked up first; line heuristics are
+    only used for files that do not have one (see agents_md/config.py).
+    """
+    return find_memory_path(content)
+
+def normalize_memory_path(memory_path):
+    """Expand ~, environment variables and shell escapes into an absolute path."""
+    memory_path = decode_shell_escaped_string(memory_path)
+    memory_path = os.path.expanduser(memory_path)
+    memory_path = os.path.expandvars(memory_path)
+    
+    # Convert to absolute path (handles both Unix and Windows paths)
+    try:
+        memory_path = str(Path(memory_path).resolve())
+    except (OSError, ValueError) as e:
+        # On Windows, if path doesn't exist yet, resolve() might fail
+        # Try to normalize the path manually
+        if sys.platform == 'win32':
+            # Normalize Windows path separators
+            memory_path = os.path.normpath(memory_path)
+            # Convert to absolute if relative
+            if not os.path.isabs(memory_path):
+                memory_path = os.path.abspath(memory_path)
+        else:
+            memory_path = str(Path(memory_path).resolve())
+    return memory_path
+
+# ============================================================================
+# LANGUAGE SELECTION
+# ============================================================================
+def get_language_preference(cli_lang=None, current_lang=None):
+    """Prompt user for language preference or use CLI argument."""
+    if cli_lang:
+        if cli_lang.lower() in ['en', 'ja']:
+            return cli_lang.lower()
+        print(f"Warning: Invalid language '{cli_lang}'. Using interactive selection.")
+    
+    print("\n" + "="*60)
+    print(t('lang_selection_title', locale=current_lang or 'en'))
+    print("="*60)
+    
+    if current_lang:
+        display_lang = current_lang.upper()
+        print(f"\n{t('lang_current', locale=current_lang or 'en', lang=display_lang)}")
+    
+    print(f"\n{t('lang_select', locale=current_lang or 'en')}")
+    print(f"  {t('lang_option_1', locale=current_lang or 'en')}")
+    print(f"  {t('lang_option_2', locale=current_lang or 'en')}")
+    
+    while True:
+        choice = input(f"\n{t('lang_prompt', locale=current_lang or 'en')}").strip().lower()
+        if choice in ['1', 'en', 'english']:
+            return 'en'
+        elif choice in ['2', 'ja', 'japanese', '日本語']:
+            return 'ja'
+        else:
+            print(t('lang_invalid', locale=current_lang or 'en'))
+
+# ============================================================================
+# LANGUAGE SWITCHING
+# ============================================================================
+@trace.traced('setup.switch_to_language')
+def switch_to_language(target_lang, preserve_memory_path=None, cli_lang='en', base_dir=None, dry_run=False,
+                       backup=False, template=None):
+    """Switch AGENTS.md and GEMINI.md to the specified language.
+    
+    base_dir is the workspace to update (defaults to the script directory).
+    Language sources are taken from the workspace when it has them, otherwise
+    from this script's checkout; template is source text to use instead
+    (scan upgrades pass the templates they classified with). The new content is rendered once and both
+    files are written atomically; with dry_run a diff is printed instead.
+    Replaced files are kept as AGENTS.md.backup / GEMINI.md.backup when the
+    language changes, or always with backup.
+    """
+    script_dir = Path(base_dir) if base_dir else default_workspace()
+    source_name = AGENTS_JA if target_lang == 'ja' else AGENTS_EN
+    source_file = script_dir / source_name
+    if not source_file.exists():
+        source_file = get_template_directory() / source_name
+    target_file = script_dir / AGENTS_TARGET
+    gemini_file = script_dir / GEMINI_TARGET
+    
+    if template is not None:
+        new_content = template
+    elif not source_file.exists():
+        print(t('lang_switch_error', locale=cli_lang, file=source_file.name))
+        return False
+    else:
+        with open(source_file, 'r', encoding='utf-8') as f:
+            new_content = f.read()
+        trace.add(reads=1, bytes_read=len(new_content.encode('utf-8')))
+    
+    # Each target is read once: for its MEMORY_PATH, its language and the unchanged check
+    current = {target_file: read_bytes(target_file), gemini_file: read_bytes(gemini_file)}
+    current_content = None
+    if current[target_file] is not None:
+        current_content = current[target_file].decode('utf-8', errors='replace')
+    
+    configured_path = preserve_memory_path
+    if not configured_path and current_content is not None:
+        configured_path = extract_memory_path(current_content)
+    new_content = render_memory_path(new_content, configured_path)
+    
+    backups = {}
+    current_lang = detect_language(current_content.splitlines()) if current_content is not None else None
+    if backup or (current_lang and current_lang != target_lang):
+        backups = {target_file: script_dir / AGENTS_BACKUP, gemini_file: script_dir / GEMINI_BACKUP}
+    
+    plan = plan_writes({target_file: new_content, gemini_file: new_content}, current)
+    if dry_run:
+        return print_dry_run(plan, cli_lang)
+    try:
+        commit_plan(plan, backups)
+    except OSError as e:
+        print(t('file_error_update', locale=cli_lang, file=target_file.name, error=e))
+        return False
+    
+    if current[gemini_file] is None:
+        print(t('lang_switch_gemini_created', locale=cli_lang, file=GEMINI_TARGET))
+    print(t('lang_switch_success', locale=cli_lang, lang=target_lang.upper()))
+    if configured_path:
+        # Normalize to Unix-style paths (forward slashes) for display
+        # AI agents understand Unix-style paths universally
+        normalized_display_path = configured_path.replace('\\', '/')
+        print(t('lang_switch_preserved', locale=cli_lang, path=normalized_display_path))
+    print_unchanged(plan, cli_lang)
+    
+    return True
+
+# ============================================================================
+# CONTINUE/QUIT PROMPT
+# ============================================================================
+def ask_continue_or_quit(cli_lang='en'):
+    """Ask user if they want to continue with memory path configuration or quit."""
+    print()
+    while True:
+        choice = input(t('continue_prompt', locale=cli_lang)).strip().lower()
+        
+        if choice in ['yes', 'y']:
+            return True
+        elif choice in ['no', 'n']:
+            return False
+        else:
+            print(t('continue_invalid', locale=cli_lang))
+
+# ============================================================================
+# MEMORY PATH CONFIGURATION
+# ============================================================================
+def get_memory_path(cli_lang='en'):
+    """Prompt user for memory root path."""
+    print("\n" + "="*60)
+    print(t('memory_title', locale=cli_lang))
+    print("="*60)
+    print(f"\n{t('memory_description', locale=cli_lang)}")
+    print(t('memory_description_detail', locale=cli_lang))
+    print(f"\n{t('memory_examples', locale=cli_lang)}")
+    print(t('memory_example_1', locale=cli_lang))
+    print(t('memory_example_2', locale=cli_lang))
+    print(t('memory_example_3', locale=cli_lang))
+    print(t('memory_example_4', locale=cli_lang))
+    print(f"\n{t('memory_note', locale=cli_lang)}")
+    print(t('memory_note_detail', locale=cli_lang))
+    print()
+    
+    while True:
+        memory_path = input(t('memory_prompt', locale=cli_lang)).strip()
+        
+        if (memory_path.startswith('"') and memory_path.endswith('"')) or \
+           (memory_path.startswith("'") and memory_path.endswith("'")):
+            memory_path = memory_path[1:-1]
+        
+        if not memory_path:
+            print(t('memory_error_empty', locale=cli_lang) + "\n")
+            continue
+        
+        memory_path = normalize_memory_path(memory_path)
+        
+        path_obj = Path(memory_path)
+        if not path_obj.exists():
+            print(f"\n{t('memory_path_not_exists', locale=cli_lang, path=memory_path)}")
+            create = input(t('memory_create_prompt', locale=cli_lang)).strip().lower()
+            if create in ['yes', 'y']:
+                try:
+                    path_obj.mkdir(parents=True, exist_ok=True)
+                    print(t('memory_create_success', locale=cli_lang, path=memory_path))
+                except Exception as e:
+                    print(t('memory_create_error', locale=cli_lang, error=e) + "\n")
+                    continue
+            else:
+                print(t('memory_retry', locale=cli_lang) + "\n")
+                continue
+        
+        # Normalize to Unix-style paths (forward slashes) for display and storage
+        # Windows accepts forward slashes, and this avoids escape sequence issues in markdown
+        # AI agents understand Unix-style paths universally
+        normalized_display_path = memory_path.replace('\\', '/')
+        print(f"\n{t('memory_confirm_path', locale=cli_lang, path=normalized_display_path)}")
+        print(t('memory_confirm_structure', locale=cli_lang))
+        confirm = input(t('memory_confirm_prompt', locale=cli_lang)).strip().lower()
+        
+        if confirm in ['yes', 'y']:
+            return memory_path
+        elif confirm in ['no', 'n']:
+            print(t('memory_confirm_retry', locale=cli_lang) + "\n")
+        else:
+            print(t('memory_confirm_invalid', locale=cli_lang) + "\n")
+
+# ============================================================================
+# FILE OPERATIONS
+# ============================================================================
+def print_dry_run(plan, cli_lang='en'):
+    """Print the diff a plan would apply instead of writing it."""
+    diff = diff_plan(plan)
+    if diff:
+        print(diff, end='')
+        print(t('dry_run_notice', locale=cli_lang))
+    else:
+        print(t('dry_run_no_changes', locale=cli_lang))
+    return True
+
+def print_unchanged(plan, cli_lang='en'):
+    """Report targets that were skipped because their content did not change."""
+    for entry in plan:
+        if not entry['changed']:
+            print(t('file_unchanged', locale=cli_lang, file=entry['path'].name))
+
+def read_config_file(file_path, cli_lang='en'):
+    """Read a configuration file as (bytes, text), or (None, None) after reporting an error."""
+    try:
+        data = read_bytes(file_path)
+        if data is None:
+            raise FileNotFoundError(file_path)
+        return data, data.decode('utf-8')
+    except (OSError, UnicodeDecodeError) as e:
+        print(t('file_error_update', locale=cli_lang, file=file_path.name, error=e))
+        return None, None
+
+@trace.traced('setup.replace_memory_path')
+def replace_memory_path(file_path, memory_path, cli_lang='en', dry_run=False):
+    """Replace MEMORY_PATH variable definition in a file."""
+    data, content = read_config_file(file_path, cli_lang)
+    if content is None:
+        return False
+    if not has_memory_path_definition(content):
+        print(f"\n{t('file_warning_no_memory_path', locale=cli_lang, file=file_path.name)}")
+        print(t('file_warning_format', locale=cli_lang))
+        return False
+    
+    plan = plan_writes({file_path: render_memory_path(content, memory_path)}, {file_path: data})
+    if dry_run:
+        return print_dry_run(plan, cli_lang)
+    try:
+        commit_plan(plan)
+    except OSError as e:
+        print(t('file_error_update', locale=cli_lang, file=file_path.name, error=e))
+        return False
+    return True
+
+@trace.traced('setup.update_both_files')
+def update_both_files(agents_file, gemini_file, memory_path, cli_lang='en', dry_run=False):
+    """Update MEMORY_PATH in both AGENTS.md and GEMINI.md.
+    
+    Both files are rendered first and then written together atomically; a
+    missing GEMINI.md is created from the rendered AGENTS.md.
+    """
+    agents_data, agents_content = read_config_file(agents_file, cli_lang)
+    if agents_content is None:
+        return False
+    if not has_memory_path_definition(agents_content):
+        print(f"\n{t('file_warning_no_memory_path', locale=cli_lang, file=agents_file.name)}")
+        print(t('file_warning_format', locale=cli_lang))
+        return False
+    targets = {agents_file: render_memory_path(agents_content, memory_path)}
+    current = {agents_file: agents_data}
+    
+    success_gemini = False
+    gemini_created = False
+    try:
+        gemini_data = read_bytes(gemini_file)
+    except OSError as e:
+        print(t('file_warning_gemini_error', locale=cli_lang, error=e))
+        gemini_data = b''
+    if gemini_data is None:
+        targets[gemini_file] = targets[agents_file]
+        current[gemini_file] = None
+        success_gemini = gemini_created = True
+    else:
+        gemini_content = gemini_data.decode('utf-8', errors='replace')
+        if has_memory_path_definition(gemini_content):
+            targets[gemini_file] = render_memory_path(gemini_content, memory_path)
+            current[gemini_file] = gemini_data
+            success_gemini = True
+        else:
+            print(f"\n{t('file_warning_no_memory_path', locale=cli_lang, file=gemini_file.name)}")
+            print(t('file_warning_format', locale=cli_lang))
+    
+    plan = plan_writes(targets, current)
+    if dry_run:
+        return print_dry_run(plan, cli_lang)
+    try:
+        commit_plan(plan)
+    except OSError as e:
+        print(t('file_error_update', locale=cli_lang, file=agents_file.name, error=e))
+        return False
+    if gemini_created:
+        print(t('file_success_gemini_created', locale=cli_lang))
+    
+    print(f"\n{t('memory_update_success', locale=cli_lang)}")
+    # Normalize to Unix-style paths (forward slashes) for display
+    normalized_display_path = memory_path.replace('\\', '/')
+    print(t('memory_update_path', locale=cli_lang, path=normalized_display_path))
+    if success_gemini:
+        print(t('memory_update_both', locale=cli_lang))
+    else:
+        print(t('memory_update_agents_only', locale=cli_lang))
+        print(t('memory_update_gemini_later', locale=cli_lang))
+    print_unchanged(plan, cli_lang)
+    print(f"\n{t('memory_update_note', locale=cli_lang)}")
+    return True
+
+# ============================================================================
+# BATCH MODE
+# ============================================================================
+@trace.traced('setup.configure_workspace')
+def configure_workspace(workspace, target_lang=None, memory_path=None, cli_lang='en', dry_run=False, backup=False,
+                        templates=None):
+    """Switch language and/or MEMORY_PATH of one workspace without prompting.
+    
+    backup keeps the replaced files of a language switch (see
+    switch_to_language) even when the language stays the same; templates
+    ({language: text}) replaces the workspace's own language sources.
+    Returns a JSON-serializable result. Console output of the regular steps is
+    captured into 'messages' so parallel workers do not interleave.
+    """
+    started = time.perf_counter()
+    result = {'workspace': str(workspace), 'ok': False, 'language': None,
+              'memory_path': None, 'error': None}
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            workspace = Path(workspace)
+            if not workspace.is_dir():
+                raise FileNotFoundError(f"Not a directory: {workspace}")
+            if target_lang:
+                # Switching renders the new language with the new path in one go
+                if not switch_to_language(target_lang, preserve_memory_path=memory_path, cli_lang=cli_lang,
+                                          base_dir=workspace, dry_run=dry_run, backup=backup,
+                                          template=(templates or {}).get(target_lang)):
+                    raise RuntimeError(t('batch_error_switch', locale=cli_lang))
+            elif memory_path:
+                agents_file = find_agents_file(workspace)
+                if not agents_file:
+                    raise RuntimeError(t('file_error_not_found', locale=cli_lang).lstrip('✗ '))
+                if not update_both_files(agents_file, workspace / GEMINI_TARGET, memory_path,
+                                         cli_lang=cli_lang, dry_run=dry_run):
+                    raise RuntimeError(t('batch_error_update', locale=cli_lang))
+            if not dry_run and not find_agents_file(workspace):
+                raise RuntimeError(t('batch_error_no_agents', locale=cli_lang))
+        result['language'] = get_current_language(workspace)
+        result['memory_path'] = memory_path.replace('\\', '/') if memory_path else None
+        result['ok'] = True
+    except Exception as e:
+        result['error'] = str(e)
+    result['seconds'] = round(time.perf_counter() - started, 4)
+    result['messages'] = output.getvalue().splitlines()
+    return result
+
+def expand_workspaces(patterns):
+    """Expand workspace paths and glob patterns into unique directories."""
+    workspaces = []
+    seen = set()
+    for pattern in patterns:
+        pattern = os.path.expandvars(os.path.expanduser(pattern))
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            if glob.has_magic(pattern) and not os.path.isdir(match):
+                continue
+            key = os.path.realpath(match)
+            if key not in seen:
+                seen.add(key)
+                workspaces.append(match)
+    return workspaces
+
+def has_config_files(workspace):
+    """Whether a workspace already has AGENTS.md (or AGENTS.md.wip) or GEMINI.md."""
+    return bool(find_agents_file(workspace)) or (Path(workspace) / GEMINI_TARGET).exists()
+
+def configure_workspaces(tasks, jobs=None, cli_lang='en', dry_run=False, backup=False, templates=None):
+    """Run configure_workspace for each (workspace, language, memory path) task on a worker pool."""
+    if jobs == 1 or len(tasks) <= 1:
+        return [configure_workspace(workspace, target_lang, memory_path, cli_lang, dry_run, backup, templates)
+                for workspace, target_lang, memory_path in tasks]
+    # Imported here: multiprocessing is the heaviest import of a configure run
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(configure_workspace, workspace, target_lang, memory_path, cli_lang, dry_run, backup,
+                               templates)
+                   for workspace, target_lang, memory_path in tasks]
+        return [future.result() for future in futures]
+
+def report_workspaces(results, elapsed, cli_lang='en'):
+    """Print per-workspace progress and the batch total to stderr; returns the success count."""
+    for result in results:
+        if result['ok']:
+            print(t('batch_workspace_ok', locale=cli_lang, workspace=result['workspace'],
+                    seconds=result['seconds']), file=sys.stderr)
+        else:
+            print(t('batch_workspace_failed', locale=cli_lang, workspace=result['workspace'],
+                    error=result['error']), file=sys.stderr)
+    succeeded = sum(1 for result in results if result['ok'])
+    print(t('batch_complete', locale=cli_lang, ok=succeeded, total=len(results), seconds=elapsed), file=sys.stderr)
+    return succeeded
+
+@trace.traced('setup.run_batch')
+def run_batch(patterns, target_lang=None, memory_path=None, jobs=None, cli_lang='en', dry_run=False, create=False):
+    """Configure many workspaces on a worker pool and print a JSON summary.
+    
+    Per-workspace progress goes to stderr; the summary goes to stdout. With
+    dry_run each workspace's diff is reported in its messages instead.
+    Directories with neither AGENTS.md nor GEMINI.md are skipped (listed
+    under 'skipped'), so a broad glob cannot drop templates into unrelated
+    checkouts; create writes both files into them instead, in target_lang or
+    else the CLI language.
+    Returns the process exit code.
+    """
+    if not target_lang and not memory_path:
+        print(t('batch_error_nothing_to_do', locale=cli_lang), file=sys.stderr)
+        return 2
+    workspaces = expand_workspaces(patterns)
+    if not workspaces:
+        print(t('batch_error_no_workspaces', locale=cli_lang, patterns=', '.join(patterns)), file=sys.stderr)
+        return 2
+    skipped = []
+    if not create:
+        skipped = [workspace for workspace in workspaces
+                   if os.path.isdir(workspace) and not has_config_files(workspace)]
+        workspaces = [workspace for workspace in workspaces if workspace not in skipped]
+        for workspace in skipped:
+            print(t('batch_workspace_skipped', locale=cli_lang, workspace=workspace), file=sys.stderr)
+    if memory_path:
+        memory_path = normalize_memory_path(memory_path)
+    if memory_path and not dry_run and workspaces:
+        try:
+            Path(memory_path).mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            print(t('memory_create_error', locale=cli_lang, error=e), file=sys.stderr)
+            return 1
+    
+    tasks = []
+    for workspace in workspaces:
+        language = target_lang
+        if not language and create and not find_agents_file(workspace):
+            # Nothing to keep the language of: created files use the CLI language
+            language = cli_lang
+        tasks.append((workspace, language, memory_path))
+    
+    started = time.perf_counter()
+    results = configure_workspaces(tasks, jobs, cli_lang, dry_run)
+    elapsed = time.perf_counter() - started
+    succeeded = report_workspaces(results, elapsed, cli_lang)
+    
+    summary = {
+        'ok': succeeded == len(results),
+        'language': target_lang,
+        'dry_run': dry_run,
+        'memory_path': memory_path.replace('\\', '/') if memory_path else None,
+        'total': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'seconds': round(elapsed, 4),
+        'workspaces': results,
+        'skipped': skipped,
+    }
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0 if summary['ok'] else 1
+
+# ============================================================================
+# SCAN MODE
+# ============================================================================
+@trace.traced('setup.run_scan')
+def run_scan(roots, upgrade=False, target_lang=None, memory_path=None, jobs=None, cli_lang='en', dry_run=False):
+    """Find AGENTS.md / GEMINI.md copies below roots and optionally upgrade them.
+    
+    Every file is listed on stderr with its status (see agents_md/scan.py);
+    with upgrade, outdated directories are re-rendered through batch mode
+    from the same templates they were classified with, keeping each file's
+    MEMORY_PATH and the replaced files as backups, and are classified again
+    afterwards: a directory whose files are still not current counts as
+    failed. memory_path fills in the directories that still hold the
+    placeholder.
+    Directories that hold a foreign or hand-modified file are never
+    written; they are listed under 'held'.
+    A JSON summary goes to stdout. Returns the process exit code.
+    """
+    from . import scan
+    roots = [os.path.expandvars(os.path.expanduser(root)) for root in roots]
+    for root in roots:
+        if not os.path.isdir(root):
+            print(t('scan_error_not_dir', locale=cli_lang, path=root), file=sys.stderr)
+            return 2
+    threads = jobs or min(32, (os.cpu_count() or 1) * 4)
+    templates = scan.load_templates(get_template_directory())
+    results, stats = scan.scan(roots, templates, jobs=threads)
+    for result in results:
+        memory = f"  → {result['memory_path']}" if result['memory_path'] else ''
+        print(t('scan_file', locale=cli_lang, status=result['status'], language=result['language'] or '--',
+                path=result['path'], memory_path=memory), file=sys.stderr)
+    print(t('scan_complete', locale=cli_lang, seconds=stats['seconds'] + stats['classify_seconds'], **{
+        key: stats[key] for key in ('directories', 'entries', 'files', 'current', 'outdated', 'modified', 'foreign',
+                                    'placeholder')
+    }), file=sys.stderr)
+    
+    summary = {'ok': True, 'dry_run': dry_run, 'roots': roots, 'stats': stats, 'files': results,
+               'upgraded': [], 'held': []}
+    if upgrade:
+        if memory_path:
+            memory_path = normalize_memory_path(memory_path)
+            if not dry_run:
+                try:
+                    Path(memory_path).mkdir(parents=True, exist_ok=True)
+                except OSError as e:
+                    print(t('memory_create_error', locale=cli_lang, error=e), file=sys.stderr)
+                    return 1
+        targets, held = scan.upgrade_targets(results, target_lang, memory_path)
+        for directory in held:
+            print(t('scan_upgrade_held', locale=cli_lang, directory=directory), file=sys.stderr)
+        summary['held'] = held
+        if not targets:
+            print(t('scan_upgrade_none', locale=cli_lang), file=sys.stderr)
+        else:
+            print(t('scan_upgrade_start', locale=cli_lang, count=len(targets)), file=sys.stderr)
+            started = time.perf_counter()
+            tasks = [(directory, language, path) for directory, (language, path) in sorted(targets.items())]
+            upgraded = configure_workspaces(tasks, jobs, cli_lang, dry_run, backup=True, templates=templates)
+            if not dry_run:
+                for result in upgraded:
+                    if result['ok']:
+                        paths = [os.path.join(result['workspace'], name) for name in sorted(scan.TARGET_NAMES)]
+                        stale = [checked['name'] for checked in scan.classify_files(paths, templates)
+                                 if checked['status'] != 'current']
+                        if stale:
+                            result['ok'] = False
+                            result['error'] = t('scan_upgrade_not_current', locale=cli_lang, files=', '.join(stale))
+            succeeded = report_workspaces(upgraded, time.perf_counter() - started, cli_lang)
+            summary['upgraded'] = upgraded
+            summary['ok'] = succeeded == len(upgraded)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0 if summary['ok'] else 1
+
+
+# ============================================================================
+# COMMANDS
+# ============================================================================
+def run_configure(args, memory_root=None):
+    """agents-md configure [--lang en|ja] [--memory-path DIR] [--workspace GLOB ...] [--scan DIR]"""
+    cli_lang = args.lang or 'en'
+    try:
+        return _configure(args, cli_lang)
+    except KeyboardInterrupt:
+        print(f"\n\n{t('error_cancelled', locale=cli_lang)}")
+        return 1
+
+def _configure(args, cli_lang):
+    # Scan mode: find copies across directory trees, optionally upgrade them
+    if args.scan:
+        return run_scan(args.scan, upgrade=args.upgrade, target_lang=args.lang, memory_path=args.memory_path,
+                        jobs=args.jobs, cli_lang=cli_lang, dry_run=args.dry_run)
+
+    # Headless batch mode: no prompts, JSON summary
+    if args.workspace or args.memory_path:
+        patterns = args.workspace or [str(default_workspace())]
+        return run_batch(patterns, target_lang=args.lang, memory_path=args.memory_path,
+                         jobs=args.jobs, cli_lang=cli_lang, dry_run=args.dry_run, create=args.create)
+    current_lang = get_current_language()
+
+    script_dir = default_workspace()
+    agents_file = find_agents_file()
+
+    if not agents_file:
+        print(f"\n{t('file_error_not_found', locale=cli_lang)}")
+        print(t('file_error_location', locale=cli_lang))
+        return 1
+
+    print(t('file_found', locale=cli_lang, file=agents_file.name))
+
+    # Step 1: Get language preference
+    target_lang = get_language_preference(cli_lang=args.lang, current_lang=current_lang)
+    # Update CLI language to match selected language for rest of script
+    cli_lang = target_lang
+
+    # Step 2: Ask if user wants to continue with memory path configuration
+    if not ask_continue_or_quit(cli_lang=cli_lang):
+        # Step 3: Write only the language
+        print(f"\n{'='*60}")
+        print(t('lang_switch_title', locale=cli_lang))
+        print("="*60)
+        if not switch_to_language(target_lang, cli_lang=cli_lang, dry_run=args.dry_run):
+            print(f"\n{t('error_lang_switch_failed', locale=cli_lang)}")
+            return 1
+        print(f"\n{t('exiting', locale=cli_lang)}")
+        print(t('exiting_summary', locale=cli_lang, lang=target_lang.upper()))
+        return 0
+
+    # Step 3: Get memory root path
+    memory_path = get_memory_path(cli_lang=cli_lang)
+
+    # Step 4: Render the selected language with the new MEMORY_PATH into both files in one pass
+    print(f"\n{'='*60}")
+    print(t('lang_switch_title', locale=cli_lang))
+    print("="*60)
+    if not switch_to_language(target_lang, preserve_memory_path=memory_path, cli_lang=cli_lang,
+                              dry_run=args.dry_run):
+        print(f"\n{t('error_config_failed', locale=cli_lang)}")
+        return 1
+    if args.dry_run:
+        return 0
+
+    gemini_file = script_dir / GEMINI_TARGET
+    # Normalize to Unix-style paths (forward slashes) for display
+    # Windows accepts forward slashes, and AI agents understand Unix-style paths universally
+    normalized_display_path = memory_path.replace('\\', '/')
+
+    print(f"\n{t('complete_title', locale=cli_lang)}")
+    print(f"\n{t('complete_summary', locale=cli_lang)}")
+    print(t('complete_lang', locale=cli_lang, lang=target_lang.upper()))
+    print(t('complete_memory_path', locale=cli_lang, path=normalized_display_path))
+    print(t('complete_agents_updated', locale=cli_lang))
+    if gemini_file.exists():
+        print(t('complete_gemini_updated', locale=cli_lang))
+    print(f"\n{t('complete_next_steps', locale=cli_lang)}")
+    print(t('complete_review_agents', locale=cli_lang, file=agents_file.name))
+    if gemini_file.exists():
+        print(t('complete_review_gemini', locale=cli_lang))
+    print(t('complete_copy_files', locale=cli_lang))
+    print(f"\n{t('complete_structure_title', locale=cli_lang)}")
+    print(t('complete_structure_path', locale=cli_lang, path=normalized_display_path))
+    print(t('complete_structure_project', locale=cli_lang))
+    print(t('complete_structure_common', locale=cli_lang))
+    print(t('complete_structure_private', locale=cli_lang))
+    return 0
+
+def run_switch_lang(args, memory_root=None):
+    """agents-md switch-lang en|ja [--workspace GLOB ...] [--dry-run]"""
+    if args.workspace:
+        return run_batch(args.workspace, target_lang=args.language, jobs=args.jobs,
+                         cli_lang=args.language, dry_run=args.dry_run, create=args.create)
+    if not switch_to_language(args.language, cli_lang=args.language, dry_run=args.dry_run):
+        print(f"\n{t('error_lang_switch_failed', locale=args.language)}")
+        return 1
+    return 0
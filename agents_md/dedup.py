@@ -0,0 +1,279 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Near-duplicate detection with MinHash and LSH banding.
+
+organization.md asks for "one file per feature/fix, not multiple
+iterations", but memory roots still collect near-identical topic files that
+inflate every search and every retrieval budget. This scanner reports
+clusters of near-duplicate files (or sections, with --sections) without
+comparing every pair:
+
+    1. Shingle   k consecutive tokenizer terms (default 5), hashed to 64 bits
+    2. MinHash   one-permutation hashing: each shingle hash picks one of
+                 num_perm buckets and keeps the minimum there; empty buckets
+                 borrow from the next filled one (densification), so a
+                 signature costs one pass over the shingles
+    3. LSH       signatures are cut into bands; documents sharing any band
+                 become candidate pairs, so only likely duplicates are ever
+                 compared
+    4. Verify    candidates whose estimated Jaccard similarity (matching
+                 signature slots) reaches --threshold are joined into clusters
+
+Signatures are cached in MEMORY_PATH/.agents-md/dedup.json per file with the
+usual (size, mtime, hash) manifest, and reused by content hash, so a re-scan
+only shingles new or changed files.
+"""
+
+import base64
+import hashlib
+import time
+from array import array
+from collections import defaultdict
+
+from . import trace
+from .common import (
+    PRIVATE_DIR, dump_json, load_json, scan_manifest, state_path, write_json,
+)
+from .markdown import split_sections
+from .text import TOKENIZER_VERSION, estimate_tokens, tokenize
+
+CACHE_VERSION = 1
+CACHE_FILE = "dedup.json"
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+_EMPTY = 0xFFFFFFFF
+# Larger LSH buckets are checked against their first member only
+_PAIRWISE_BUCKET_LIMIT = 50
+
+# ============================================================================
+# SIGNATURES
+# ============================================================================
+def shingle_hashes(terms, size=SHINGLE_SIZE):
+    """64-bit hashes of the distinct k-term shingles of a term sequence."""
+    if len(terms) < size:
+        shingles = {' '.join(terms)} if terms else set()
+    else:
+        shingles = {' '.join(terms[i:i + size]) for i in range(len(terms) - size + 1)}
+    return [int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+            for shingle in shingles]
+
+def minhash(hashes, num_perm=NUM_PERM):
+    """One-permutation MinHash signature (array of 32-bit ints) of shingle hashes."""
+    signature = array('I', [_EMPTY]) * num_perm
+    for value in hashes:
+        bucket = value % num_perm
+        value = (value // num_perm) & 0x7FFFFFFF
+        if value < signature[bucket]:
+            signature[bucket] = value
+    if hashes:
+        # Densify: empty buckets copy the next filled bucket (rotating)
+        for bucket in range(num_perm):
+            if signature[bucket] == _EMPTY:
+                step = 1
+                while signature[(bucket + step) % num_perm] == _EMPTY:
+                    step += 1
+                signature[bucket] = signature[(bucket + step) % num_perm]
+    return signature
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+def choose_bands(num_perm, threshold):
+    """Bands x rows for num_perm whose LSH threshold (1/b)^(1/r) is closest to threshold."""
+    best = None
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        distance = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or distance < best[0]:
+            best = (distance, bands, rows)
+    return best[1], best[2]
+
+def _encode(signature):
+    return base64.b64encode(signature.tobytes()).decode('ascii')
+
+def _decode(text):
+    signature = array('I')
+    signature.frombytes(base64.b64decode(text))
+    return signature
+
+# ============================================================================
+# CACHE
+# ============================================================================
+def build_entry(record, data):
+    """Cache entry (file and per-section signatures) for one file."""
+    text = data.decode('utf-8', errors='replace')
+    terms = tokenize(text)
+    sections = []
+    for number, section in enumerate(split_sections(data)):
+        section_text = data[section['start']:section['end']].decode('utf-8', errors='replace')
+        section_terms = tokenize(section_text)
+        sections.append({
+            'number': number,
+            'title': section['title'],
+            'line': section['line'],
+            'terms': len(section_terms),
+            'tokens': estimate_tokens(section_text),
+            'signature': _encode(minhash(shingle_hashes(section_terms))),
+        })
+    return dict(record, terms=len(terms), tokens=estimate_tokens(text),
+                signature=_encode(minhash(shingle_hashes(terms))), sections=sections)
+
+def _params():
+    return {'num_perm': NUM_PERM, 'shingle_size': SHINGLE_SIZE, 'tokenizer': TOKENIZER_VERSION}
+
+def update_signatures(memory_root, include_private=False):
+    """Bring the signature cache up to date; returns (files, stats)."""
+    started = time.perf_counter()
+    path = state_path(memory_root, CACHE_FILE)
+    cache = load_json(path, {})
+    if not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION or cache.get('params') != _params():
+        cache = {}
+    previous = cache.get('files', {})
+    by_hash = {entry['hash']: entry for entry in previous.values()}
+
+    skip_dirs = () if include_private else (PRIVATE_DIR,)
+    files = {}
+    computed = reused = 0
+    for relpath, record, data in scan_manifest(memory_root, previous, skip_dirs):
+        if data is None:
+            files[relpath] = record
+            continue
+        known = by_hash.get(record['hash'])
+        if known is not None:
+            files[relpath] = dict(known, **record)
+            reused += 1
+        else:
+            files[relpath] = build_entry(record, data)
+            computed += 1
+    if computed or reused or files.keys() != previous.keys():
+        write_json(path, {'version': CACHE_VERSION, 'params': _params(), 'files': files})
+    return files, {'files': len(files), 'computed': computed, 'reused': reused,
+                   'seconds': time.perf_counter() - started}
+
+# ============================================================================
+# CLUSTERING
+# ============================================================================
+def find_clusters(units, threshold, num_perm=NUM_PERM):
+    """Cluster units {key: signature} whose estimated similarity >= threshold.
+
+    Returns (clusters, candidate pairs checked); each cluster is a dict with
+    its members (keys) and the lowest and highest verified similarity.
+    """
+    bands, rows = choose_bands(num_perm, threshold)
+    buckets = defaultdict(list)
+    for key, signature in units.items():
+        for band in range(bands):
+            buckets[(band, signature[band * rows:(band + 1) * rows].tobytes())].append(key)
+
+    parent = {}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    checked = {}
+    edges = []
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        if len(members) <= _PAIRWISE_BUCKET_LIMIT:
+            pairs = [(a, b) for i, a in enumerate(members) for b in members[i + 1:]]
+        else:
+            pairs = [(members[0], b) for b in members[1:]]
+        for a, b in pairs:
+            pair = (a, b) if a < b else (b, a)
+            if pair in checked:
+                continue
+            checked[pair] = score = similarity(units[a], units[b])
+            if score >= threshold:
+                edges.append((a, b, score))
+                parent.setdefault(a, a)
+                parent.setdefault(b, b)
+                root_a, root_b = find(a), find(b)
+                if root_a != root_b:
+                    parent[root_b] = root_a
+
+    groups = defaultdict(lambda: {'members': set(), 'scores': []})
+    for a, b, score in edges:
+        group = groups[find(a)]
+        group['members'].update((a, b))
+        group['scores'].append(score)
+    clusters = [{'members': sorted(group['members']), 'min_similarity': round(min(group['scores']), 3),
+                 'max_similarity': round(max(group['scores']), 3)} for group in groups.values()]
+    return clusters, len(checked)
+
+@trace.traced('dedup.scan')
+def scan(memory_root, threshold=0.7, sections=False, min_terms=20, prefixes=(), include_private=False):
+    """Find near-duplicate files (or sections) under the memory root."""
+    started = time.perf_counter()
+    files, stats = update_signatures(memory_root, include_private)
+    prefixes = tuple(prefix.strip('/') + '/' for prefix in prefixes if prefix.strip('/'))
+    units = {}
+    info = {}
+    for relpath, entry in files.items():
+        if prefixes and not relpath.startswith(prefixes):
+            continue
+        if sections:
+            for section in entry['sections']:
+                if section['terms'] >= min_terms:
+                    key = f"{relpath}#{section['number']}"
+                    units[key] = _decode(section['signature'])
+                    info[key] = {'path': relpath, 'section': section['number'], 'title': section['title'],
+                                 'line': section['line'], 'tokens': section['tokens']}
+        elif entry['terms'] >= min_terms:
+            units[relpath] = _decode(entry['signature'])
+            info[relpath] = {'path': relpath, 'tokens': entry['tokens']}
+
+    clusters, candidates = find_clusters(units, threshold)
+    for cluster in clusters:
+        cluster['members'] = sorted((info[key] for key in cluster['members']), key=lambda item: -item['tokens'])
+        # Tokens an agent would stop paying for if the cluster were consolidated
+        cluster['redundant_tokens'] = sum(member['tokens'] for member in cluster['members'][1:])
+    clusters.sort(key=lambda cluster: -cluster['redundant_tokens'])
+    return {
+        'threshold': threshold,
+        'unit': 'section' if sections else 'file',
+        'units': len(units),
+        'candidate_pairs': candidates,
+        'signatures_computed': stats['computed'],
+        'clusters': clusters,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def run(args, memory_root):
+    """memory.py dedup [path ...] [--threshold T] [--sections] [--json]"""
+    if not 0.0 < args.threshold <= 1.0:
+        print("✗ Error: --threshold must be between 0 and 1.")
+        return 1
+    report = scan(memory_root, threshold=args.threshold, sections=args.sections, min_terms=args.min_terms,
+                  prefixes=args.paths, include_private=args.include_private)
+    if args.json:
+        print(dump_json(report, pretty=True), end='')
+        return 0
+    for number, cluster in enumerate(report['clusters'], 1):
+        similar = f"{cluster['min_similarity']:.2f}"
+        if cluster['max_similarity'] != cluster['min_similarity']:
+            similar += f"-{cluster['max_similarity']:.2f}"
+        print(f"Cluster {number}: {len(cluster['members'])} {report['unit']}s, similarity {similar}, "
+              f"{cluster['redundant_tokens']} redundant tokens")
+        for member in cluster['members']:
+            if 'section' in member:
+                print(f"  {member['path']} #{member['section']} L{member['line']} {member['title']}  "
+                      f"({member['tokens']} tokens)")
+            else:
+                print(f"  {member['path']}  ({member['tokens']} tokens)")
+    print(f"{len(report['clusters'])} clusters among {report['units']} {report['unit']}s "
+          f"({report['candidate_pairs']} candidate pairs checked, {report['signatures_computed']} signatures "
+          f"computed, {report['seconds']:.3f}s)")
+    return 0
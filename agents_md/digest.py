@@ -0,0 +1,299 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Generated status digest in [project]/context.md.
+
+rag.md answers "Quick status?" with context.md (~200 tokens), and the
+recovery flow reads it right after common/preferences.md. Hand-kept
+context.md files drift, so `memory.py digest` maintains a bounded block in
+them, derived from the project's sessions, topic headings and memories.json:
+
+    # Project Context
+
+    <!-- agents-md:digest inputs=3f2a... budget=200 -->
+    ## Status Digest
+
+    - Sessions: 42 (2025-06-02 to 2025-09-14); topics: 7
+    - Recent:
+      - 2025-09-14 Token refresh fix (`session/2025-09/2025-09-14_auth.md`) #auth
+      ...
+    - Tags in recent sessions: auth (4), api (2)
+    - Topics, latest first: Auth flow (`topic/auth.md`), ...
+    <!-- agents-md:digest end -->
+
+    (hand-written context, never touched)
+
+Inputs are the files under topic/ and session/ (packed ones included) and
+the hand-written summary/description fields of memories.json. Their hashes
+form the block's inputs key; when it matches, nothing is regenerated or
+written, so running the digest (or the watcher) on every change is cheap.
+Per-file headings are cached in [project]/.agents-md/digest.json and only
+changed files are parsed again.
+"""
+
+import re
+import time
+from collections import Counter
+from pathlib import Path
+
+from . import trace
+from .common import (
+    COMMON_DIR, MEMORY_INDEX, atomic_write_bytes, content_hash, dump_json, file_lock,
+    list_projects, load_json, state_path, write_json,
+)
+from .indexer import parse_entry
+from .markdown import format_attributes, parse_attributes
+from .pack import scan_with_packs
+from .text import estimate_tokens
+
+DIGEST_VERSION = 1
+DIGEST_STATE = "digest.json"
+CONTEXT_FILE = "context.md"
+DEFAULT_BUDGET = 200
+INPUT_DIRS = ('topic/', 'session/')
+# memories.json fields written by hand that describe a file better than its title
+NOTE_FIELDS = ('summary', 'description')
+RECENT_SESSIONS = 3
+TAG_SESSIONS = 20
+TAG_LIMIT = 6
+
+_BLOCK_RE = re.compile(r'<!-- agents-md:digest (.*?)-->.*?<!-- agents-md:digest end -->\n?', re.DOTALL)
+_SUBHEADING_RE = re.compile(r'^#{2,6}[ \t]', re.MULTILINE)
+
+# ============================================================================
+# INPUTS
+# ============================================================================
+def load_state(project_dir):
+    """Cached digest state, discarded if the format changed."""
+    state = load_json(state_path(project_dir, DIGEST_STATE), {})
+    if not isinstance(state, dict) or state.get('version') != DIGEST_VERSION:
+        return {'files': {}}
+    return state
+
+def scan_inputs(project_dir, previous, paths=None):
+    """(files, parsed) with a memories.json-style entry for every input file."""
+    files = {}
+    parsed = 0
+    if paths is not None:
+        paths = [path for path in paths if path.startswith(INPUT_DIRS)]
+    for relpath, record, data in scan_with_packs(project_dir, previous, paths=paths):
+        if not relpath.startswith(INPUT_DIRS):
+            continue
+        if data is not None:
+            old = previous.get(relpath)
+            if old and old.get('hash') == record['hash'] and 'entry' in old:
+                record['entry'] = old['entry']
+            else:
+                record['entry'] = parse_entry(relpath, data.decode('utf-8', errors='replace'), record['size'])
+                parsed += 1
+        files[relpath] = record
+    return files, parsed
+
+def memory_notes(project_dir):
+    """{relpath: note} from the hand-written fields of memories.json."""
+    document = load_json(Path(project_dir, MEMORY_INDEX), {})
+    entries = document.get('files') if isinstance(document, dict) else None
+    notes = {}
+    for relpath, entry in (entries if isinstance(entries, dict) else {}).items():
+        if not isinstance(entry, dict):
+            continue
+        for field in NOTE_FIELDS:
+            if isinstance(entry.get(field), str) and entry[field].strip():
+                notes[relpath] = ' '.join(entry[field].split())
+                break
+    return notes
+
+def inputs_key(files, notes, budget):
+    """Hash of everything the digest is derived from."""
+    hashes = sorted((relpath, record['hash']) for relpath, record in files.items())
+    return content_hash(dump_json([DIGEST_VERSION, budget, hashes, sorted(notes.items())]).encode('utf-8'))
+
+# ============================================================================
+# RENDERING
+# ============================================================================
+def session_title(entry):
+    """A session's own title, skipping generic "Session Notes - DATE" headings."""
+    title = entry.get('title') or ''
+    date = entry.get('date')
+    if date and date in title and entry.get('headings'):
+        return entry['headings'][0]
+    return title
+
+def collect_sessions(files):
+    """Sessions newest first: (date, title, pointer, tags), archive parts included."""
+    sessions = []
+    for relpath, record in files.items():
+        entry = record['entry']
+        if entry.get('type') != 'session':
+            continue
+        if entry.get('parts'):
+            for part in entry['parts']:
+                sessions.append((part.get('date') or '', part.get('title') or part['pointer'],
+                                 part['pointer'], part.get('tags') or []))
+        else:
+            sessions.append((entry.get('date') or '', session_title(entry), relpath, entry.get('tags') or []))
+    sessions.sort(key=lambda session: (session[0], session[2]), reverse=True)
+    return sessions
+
+def render_digest(files, notes, key, budget):
+    """The digest block, filled in priority order until the token budget is used."""
+    sessions = collect_sessions(files)
+    topics = sorted((relpath for relpath, record in files.items() if record['entry'].get('type') == 'topic'),
+                    key=lambda relpath: (-files[relpath]['mtime_ns'], relpath))
+    dates = [session[0] for session in sessions if session[0]]
+    span = f" ({dates[-1]} to {dates[0]})" if dates else ''
+    lines = [
+        f"<!-- agents-md:digest {format_attributes({'inputs': key, 'budget': budget})} -->",
+        "## Status Digest",
+        "",
+        f"- Sessions: {len(sessions)}{span}; topics: {len(topics)}",
+    ]
+    used = estimate_tokens('\n'.join(lines)) + estimate_tokens("<!-- agents-md:digest end -->")
+
+    def fits(line):
+        nonlocal used
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            return False
+        used += cost
+        lines.append(line)
+        return True
+
+    recent = sessions[:RECENT_SESSIONS]
+    if recent and fits("- Recent:"):
+        for date, title, pointer, tags in recent:
+            title = notes.get(pointer, title)
+            tag_text = ''.join(f" #{tag}" for tag in tags[:2])
+            if not fits(f"  - {date} {title} (`{pointer}`){tag_text}".rstrip()):
+                break
+    tag_counts = Counter(tag for session in sessions[:TAG_SESSIONS] for tag in session[3])
+    if tag_counts:
+        fits("- Tags in recent sessions: " + ', '.join(
+            f"{tag} ({count})" for tag, count in tag_counts.most_common(TAG_LIMIT)))
+    if topics:
+        listed = []
+        for relpath in topics:
+            entry = files[relpath]['entry']
+            item = f"{notes.get(relpath, entry.get('title') or relpath)} (`{relpath}`)"
+            line = "- Topics, latest first: " + ', '.join(listed + [item])
+            if estimate_tokens(line) + 1 + used > budget:
+                break
+            listed.append(item)
+        if listed:
+            fits("- Topics, latest first: " + ', '.join(listed))
+    lines.append("<!-- agents-md:digest end -->")
+    return '\n'.join(lines) + '\n'
+
+def splice_digest(text, block):
+    """context.md text with the digest block replaced, or inserted before the first subheading."""
+    match = _BLOCK_RE.search(text)
+    if match:
+        return text[:match.start()] + block + text[match.end():]
+    heading = _SUBHEADING_RE.search(text)
+    if heading is None:
+        return text.rstrip('\n') + '\n\n' + block if text.strip() else block
+    head = text[:heading.start()].rstrip('\n')
+    return (head + '\n\n' if head else '') + block + '\n' + text[heading.start():]
+
+def current_key(text):
+    """inputs key of the digest block in text (None without a block)."""
+    match = _BLOCK_RE.search(text)
+    return parse_attributes(match.group(1)).get('inputs') if match else None
+
+def current_budget(text):
+    match = _BLOCK_RE.search(text)
+    budget = parse_attributes(match.group(1)).get('budget') if match else None
+    return int(budget) if budget and budget.isdigit() else None
+
+# ============================================================================
+# UPDATE
+# ============================================================================
+@trace.traced('digest.project')
+def update_digest(project_dir, budget=None, paths=None, force=False, dry_run=False):
+    """Regenerate the digest block of one project's context.md if its inputs changed.
+
+    budget defaults to the one the current block was made with. paths limits
+    the scan to project-relative files known to have changed (the watcher
+    passes them). Returns a stats dict: files, parsed, tokens, written and,
+    with dry_run, the block that would be written.
+    """
+    project_dir = Path(project_dir)
+    # Journal merges (journal.py) append to context.md concurrently
+    with file_lock(project_dir.parent, f"{project_dir.name}/{CONTEXT_FILE}"):
+        return _update_digest(project_dir, budget, paths, force, dry_run)
+
+def _update_digest(project_dir, budget, paths, force, dry_run):
+    started = time.perf_counter()
+    context_path = project_dir / CONTEXT_FILE
+    try:
+        data = context_path.read_bytes()
+        trace.add(reads=1, bytes_read=len(data))
+        text = data.decode('utf-8', errors='replace')
+    except FileNotFoundError:
+        text = None
+    budget = budget or (current_budget(text) if text else None) or DEFAULT_BUDGET
+
+    state = load_state(project_dir)
+    files, parsed = scan_inputs(project_dir, state['files'], None if force else paths)
+    notes = memory_notes(project_dir)
+    key = inputs_key(files, notes, budget)
+    stats = {'project': project_dir.name, 'files': len(files), 'parsed': parsed, 'tokens': None,
+             'written': False, 'seconds': 0.0}
+    if not files and text is None:
+        # Nothing to digest (common/, an empty project): do not create context.md
+        return stats
+    if not force and text is not None and current_key(text) == key:
+        if parsed or files.keys() != state['files'].keys() or any(
+                state['files'][relpath].get('mtime_ns') != record['mtime_ns'] for relpath, record in files.items()):
+            write_json(state_path(project_dir, DIGEST_STATE), {'version': DIGEST_VERSION, 'files': files})
+        stats['seconds'] = time.perf_counter() - started
+        return stats
+
+    block = render_digest(files, notes, key, budget)
+    stats['tokens'] = estimate_tokens(block)
+    if dry_run:
+        stats['block'] = block
+    else:
+        new_text = splice_digest(text if text is not None else "# Project Context\n", block)
+        if new_text != text:
+            atomic_write_bytes(context_path, new_text.encode('utf-8'))
+            stats['written'] = True
+        write_json(state_path(project_dir, DIGEST_STATE), {'version': DIGEST_VERSION, 'files': files})
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def run(args, memory_root):
+    """memory.py digest [project ...] [--budget TOKENS] [--force] [--dry-run]"""
+    if args.budget is not None and args.budget < 50:
+        print("✗ Error: --budget must be at least 50 tokens.")
+        return 1
+    projects = args.projects or [name for name in list_projects(memory_root) if name != COMMON_DIR]
+    if not projects:
+        print(f"No project directories found in {memory_root}")
+        return 1
+    status = 0
+    for name in projects:
+        project_dir = memory_root / name
+        if not project_dir.is_dir():
+            print(f"✗ Project directory not found: {project_dir}")
+            status = 1
+            continue
+        stats = update_digest(project_dir, budget=args.budget, force=args.force, dry_run=args.dry_run)
+        if args.dry_run:
+            print(f"{stats['project']}/{CONTEXT_FILE}:")
+            print(stats.get('block') or "  (up to date)\n")
+            continue
+        if stats['written']:
+            state = f"digest updated (~{stats['tokens']} tokens)"
+        elif stats['tokens'] is not None:
+            state = "digest unchanged"
+        else:
+            state = "up to date"
+        print(f"{stats['project']}: {stats['files']} inputs, {stats['parsed']} parsed, "
+              f"{state} ({stats['seconds']:.3f}s)")
+    return status
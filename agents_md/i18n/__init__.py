@@ -0,0 +1,44 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Localized messages of the setup commands.
+
+setup.py used to build one LOCALIZATION table holding every language at
+import time. Each language is now its own catalog module (en.py, ja.py)
+with a MESSAGES dict. Python compiles it to bytecode in __pycache__ on
+first use, so loading a catalog means reading one .pyc file. Only the
+language a run prints in is ever imported:
+
+    from agents_md.i18n import t
+    print(t('lang_switch_success', locale='ja', lang='JA'))
+
+New languages are a new module plus an entry in LANGUAGES.
+"""
+
+import importlib
+
+LANGUAGES = ('en', 'ja')
+DEFAULT_LANGUAGE = 'en'
+
+_catalogs = {}
+
+def catalog(locale):
+    """MESSAGES of a language (English for unknown ones), imported on first use."""
+    if locale not in LANGUAGES:
+        locale = DEFAULT_LANGUAGE
+    messages = _catalogs.get(locale)
+    if messages is None:
+        messages = _catalogs[locale] = importlib.import_module(f"{__name__}.{locale}").MESSAGES
+    return messages
+
+def t(key, locale='en', **kwargs):
+    """Get localized string from the locale's catalog.
+
+    Args:
+        key: Localization key (returned as-is when missing)
+        locale: Language code for selecting localization ('en' or 'ja')
+        **kwargs: Format parameters for the string (including 'lang' for display)
+    """
+    return catalog(locale).get(key, key).format(**kwargs)
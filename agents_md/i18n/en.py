@@ -0,0 +1,118 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""English messages of the setup commands (see agents_md/i18n/__init__.py)."""
+
+MESSAGES = {
+    # Language selection
+    'lang_selection_title': 'Language Selection',
+    'lang_current': 'Current language: {lang}',
+    'lang_select': 'Select language:',
+    'lang_option_1': '1. English (en)',
+    'lang_option_2': '2. Japanese (ja)',
+    'lang_prompt': 'Enter choice (1/2) or language code (en/ja): ',
+    'lang_invalid': "Invalid choice. Please enter 1, 2, 'en', or 'ja'.",
+
+    # Language switching
+    'lang_switch_title': 'Switching Language',
+    'lang_switch_success': '✓ Switched to {lang}',
+    'lang_switch_preserved': '  Preserved MEMORY_PATH: {path}',
+    'lang_switch_error': "Error: Source file '{file}' not found.",
+    'lang_switch_gemini_created': '✓ Created {file} (for Google Antigravity support)',
+    'lang_switch_gemini_warning': 'Warning: Could not create/update {file}: {error}',
+    'continue_prompt': 'Do you want to configure memory path now? (yes/no): ',
+    'continue_invalid': "Please answer 'yes' or 'no'.",
+    'exiting': 'Exiting setup. Language has been switched successfully.',
+    'exiting_summary': 'Language switched to: {lang}',
+
+    # Memory path configuration
+    'memory_title': 'Memory Root Path Configuration',
+    'memory_description': 'Enter the full path where you want to store your memory.',
+    'memory_description_detail': 'This will be the root folder for all memory (projects, common, private).',
+    'memory_examples': 'Examples:',
+    'memory_example_1': '  - ~/Documents/my-memory',
+    'memory_example_2': '  - /Users/username/Documents/my-memory',
+    'memory_example_3': '  - /Users/username/Library/CloudStorage/GoogleDrive-user@gmail.com/My Drive/AI/memory',
+    'memory_example_4': '  - C:/Users/username/Documents/my-memory (Windows)',
+    'memory_note': 'Note: You can use ~ for home directory. Spaces and special characters are handled automatically.',
+    'memory_note_detail': 'No need to quote paths - just type them normally. The folder will be created if it doesn\'t exist.',
+    'memory_prompt': 'Enter memory root path: ',
+    'memory_error_empty': 'Error: Path cannot be empty.',
+    'memory_path_not_exists': 'Path does not exist: {path}',
+    'memory_create_prompt': 'Create this directory? (yes/no): ',
+    'memory_create_success': '✓ Created directory: {path}',
+    'memory_create_error': 'Error: Could not create directory: {error}',
+    'memory_retry': 'Please enter a different path.',
+    'memory_confirm_path': 'Memory root path: {path}',
+    'memory_confirm_structure': 'This folder will contain: [project-name]/, common/, private/',
+    'memory_confirm_prompt': 'Is this correct? (yes/no): ',
+    'memory_confirm_retry': "Let's try again.",
+    'memory_confirm_invalid': "Please answer 'yes' or 'no'.",
+
+    # File operations
+    'file_found': 'Found configuration file: {file}',
+    'file_error_not_found': '✗ Error: Could not find AGENTS.md file.',
+    'file_error_location': "  Make sure you're running this script from the agents-md directory.",
+    'file_warning_no_memory_path': 'Warning: No MEMORY_PATH variable definition found in {file}',
+    'file_warning_format': 'The file may already be configured or uses a different format.',
+    'file_error_update': '✗ Error updating {file}: {error}',
+    'file_success_gemini_created': '✓ Created and configured GEMINI.md',
+    'file_warning_gemini_error': 'Warning: Could not create GEMINI.md: {error}',
+    'file_unchanged': '  {file} is already up to date (not rewritten)',
+    'dry_run_no_changes': 'Dry run: no changes.',
+    'dry_run_notice': 'Dry run: no files were written.',
+
+    # Memory path update
+    'memory_update_success': '✓ Successfully updated MEMORY_PATH variable:',
+    'memory_update_path': '  {path}',
+    'memory_update_both': '  - Updated in both AGENTS.md (Cursor) and GEMINI.md (Antigravity)',
+    'memory_update_agents_only': '  - Updated in AGENTS.md (Cursor)',
+    'memory_update_gemini_later': '  - GEMINI.md will be created when you copy files to your project',
+    'memory_update_note': 'Note: Agents understand this variable applies to all path references in the document.',
+
+    # Completion
+    'complete_title': '✓ Configuration complete!',
+    'complete_summary': 'Configuration summary:',
+    'complete_lang': '  - Language: {lang}',
+    'complete_memory_path': '  - Memory root path: {path}',
+    'complete_agents_updated': '  - AGENTS.md updated (for Cursor)',
+    'complete_gemini_updated': '  - GEMINI.md updated (for Google Antigravity)',
+    'complete_next_steps': 'Next steps:',
+    'complete_review_agents': '  1. Review {file} to verify the changes',
+    'complete_review_gemini': '  2. Review GEMINI.md to verify the changes',
+    'complete_copy_files': '  3. Copy _agents-md/ folder and both AGENTS.md and GEMINI.md to your project',
+    'complete_structure_title': 'Your memory structure will be:',
+    'complete_structure_path': '  {path}/',
+    'complete_structure_project': '  ├── [project-name]/  (project-specific memory)',
+    'complete_structure_common': '  ├── common/          (shared preferences, patterns)',
+    'complete_structure_private': '  └── private/        (credentials, personal info)',
+
+    # Errors
+    'error_lang_switch_failed': '✗ Language switch failed. Please check the errors above.',
+    'error_config_failed': '✗ Configuration failed. Please check the errors above.',
+    'error_cancelled': 'Operation cancelled by user.',
+
+    # Batch mode
+    'batch_error_nothing_to_do': 'Error: Batch mode needs --lang and/or --memory-path.',
+    'batch_error_no_workspaces': 'Error: No workspaces matched: {patterns}',
+    'batch_workspace_ok': '✓ {workspace} ({seconds:.2f}s)',
+    'batch_workspace_failed': '✗ {workspace}: {error}',
+    'batch_workspace_skipped': '- {workspace}: skipped, it has no AGENTS.md or GEMINI.md (--create adds them)',
+    'batch_complete': 'Batch complete: {ok}/{total} workspaces configured in {seconds:.2f}s',
+    'batch_error_no_agents': 'AGENTS.md not found after language switch',
+    'batch_error_switch': 'Language switch failed',
+    'batch_error_update': 'MEMORY_PATH update failed',
+
+    # Scanning
+    'scan_error_not_dir': 'Error: not a directory: {path}',
+    'scan_file': '[{status}] {language} {path}{memory_path}',
+    'scan_complete': ('Scanned {directories} directories ({entries} entries) in {seconds:.2f}s: '
+                      '{files} files, {current} current, {outdated} outdated, {modified} modified, {foreign} foreign, '
+                      '{placeholder} with the placeholder path'),
+    'scan_upgrade_none': 'Nothing to upgrade: every agents-md file is current.',
+    'scan_upgrade_start': 'Upgrading {count} directories...',
+    'scan_upgrade_held': ('Skipped {directory}: it holds a foreign or hand-modified file, '
+                          'which an upgrade would overwrite'),
+    'scan_upgrade_not_current': 'Still not current after the upgrade: {files}',
+}
@@ -0,0 +1,117 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""Japanese messages of the setup commands (see agents_md/i18n/__init__.py)."""
+
+MESSAGES = {
+    # Language selection
+    'lang_selection_title': '言語選択',
+    'lang_current': '現在の言語: {lang}',
+    'lang_select': '言語を選択:',
+    'lang_option_1': '1. 英語 (en)',
+    'lang_option_2': '2. 日本語 (ja)',
+    'lang_prompt': '選択を入力 (1/2) または言語コード (en/ja): ',
+    'lang_invalid': '無効な選択です。1、2、「en」、または「ja」を入力してください。',
+
+    # Language switching
+    'lang_switch_title': '言語を切り替え中',
+    'lang_switch_success': '✓ {lang} に切り替えました',
+    'lang_switch_preserved': '  MEMORY_PATH を保持: {path}',
+    'lang_switch_error': 'エラー: ソースファイル「{file}」が見つかりません。',
+    'lang_switch_gemini_created': '✓ {file} を作成しました（Google Antigravity サポート用）',
+    'lang_switch_gemini_warning': '警告: {file} を作成/更新できませんでした: {error}',
+    'continue_prompt': 'メモリパスを今設定しますか？ (yes/no): ',
+    'continue_invalid': '「yes」または「no」で答えてください。',
+    'exiting': 'セットアップを終了します。言語の切り替えは正常に完了しました。',
+    'exiting_summary': '言語を {lang} に切り替えました',
+
+    # Memory path configuration
+    'memory_title': 'メモリルートパス設定',
+    'memory_description': 'メモリを保存する完全なパスを入力してください。',
+    'memory_description_detail': 'これはすべてのメモリ（プロジェクト、共通、プライベート）のルートフォルダになります。',
+    'memory_examples': '例:',
+    'memory_example_1': '  - ~/Documents/my-memory',
+    'memory_example_2': '  - /Users/username/Documents/my-memory',
+    'memory_example_3': '  - /Users/username/Library/CloudStorage/GoogleDrive-user@gmail.com/My Drive/AI/memory',
+    'memory_example_4': '  - C:/Users/username/Documents/my-memory (Windows)',
+    'memory_note': '注意: ホームディレクトリには ~ を使用できます。スペースや特殊文字は自動的に処理されます。',
+    'memory_note_detail': 'パスを引用符で囲む必要はありません - 通常どおり入力してください。フォルダが存在しない場合は作成されます。',
+    'memory_prompt': 'メモリルートパスを入力: ',
+    'memory_error_empty': 'エラー: パスを空にすることはできません。',
+    'memory_path_not_exists': 'パスが存在しません: {path}',
+    'memory_create_prompt': 'このディレクトリを作成しますか？ (yes/no): ',
+    'memory_create_success': '✓ ディレクトリを作成しました: {path}',
+    'memory_create_error': 'エラー: ディレクトリを作成できませんでした: {error}',
+    'memory_retry': '別のパスを入力してください。',
+    'memory_confirm_path': 'メモリルートパス: {path}',
+    'memory_confirm_structure': 'このフォルダには以下が含まれます: [project-name]/, common/, private/',
+    'memory_confirm_prompt': 'これで正しいですか？ (yes/no): ',
+    'memory_confirm_retry': 'もう一度やり直しましょう。',
+    'memory_confirm_invalid': '「yes」または「no」で答えてください。',
+
+    # File operations
+    'file_found': '設定ファイルが見つかりました: {file}',
+    'file_error_not_found': '✗ エラー: AGENTS.md ファイルが見つかりませんでした。',
+    'file_error_location': '  agents-md ディレクトリからこのスクリプトを実行していることを確認してください。',
+    'file_warning_no_memory_path': '警告: {file} に MEMORY_PATH 変数定義が見つかりませんでした',
+    'file_warning_format': 'ファイルは既に設定されているか、別の形式を使用している可能性があります。',
+    'file_error_update': '✗ {file} の更新エラー: {error}',
+    'file_success_gemini_created': '✓ GEMINI.md を作成して設定しました',
+    'file_warning_gemini_error': '警告: GEMINI.md を作成できませんでした: {error}',
+    'file_unchanged': '  {file} は最新です（書き込みなし）',
+    'dry_run_no_changes': 'ドライラン: 変更はありません。',
+    'dry_run_notice': 'ドライラン: ファイルは書き込まれていません。',
+
+    # Memory path update
+    'memory_update_success': '✓ MEMORY_PATH 変数を正常に更新しました:',
+    'memory_update_path': '  {path}',
+    'memory_update_both': '  - AGENTS.md (Cursor) と GEMINI.md (Antigravity) の両方で更新',
+    'memory_update_agents_only': '  - AGENTS.md (Cursor) で更新',
+    'memory_update_gemini_later': '  - ファイルをプロジェクトにコピーするときに GEMINI.md が作成されます',
+    'memory_update_note': '注意: エージェントは、この変数がドキュメント内のすべてのパス参照に適用されることを理解します。',
+
+    # Completion
+    'complete_title': '✓ 設定が完了しました！',
+    'complete_summary': '設定の概要:',
+    'complete_lang': '  - 言語: {lang}',
+    'complete_memory_path': '  - メモリルートパス: {path}',
+    'complete_agents_updated': '  - AGENTS.md を更新しました（Cursor 用）',
+    'complete_gemini_updated': '  - GEMINI.md を更新しました（Google Antigravity 用）',
+    'complete_next_steps': '次のステップ:',
+    'complete_review_agents': '  1. {file} を確認して変更を確認',
+    'complete_review_gemini': '  2. GEMINI.md を確認して変更を確認',
+    'complete_copy_files': '  3. _agents-md/ フォルダと AGENTS.md および GEMINI.md の両方をプロジェクトにコピー',
+    'complete_structure_title': 'メモリ構造は次のようになります:',
+    'complete_structure_path': '  {path}/',
+    'complete_structure_project': '  ├── [project-name]/  (プロジェクト固有のメモリ)',
+    'complete_structure_common': '  ├── common/          (共有設定、パターン)',
+    'complete_structure_private': '  └── private/        (認証情報、個人情報)',
+
+    # Errors
+    'error_lang_switch_failed': '✗ 言語の切り替えに失敗しました。上記のエラーを確認してください。',
+    'error_config_failed': '✗ 設定に失敗しました。上記のエラーを確認してください。',
+    'error_cancelled': 'ユーザーによって操作がキャンセルされました。',
+
+    # Batch mode
+    'batch_error_nothing_to_do': 'エラー: バッチモードには --lang または --memory-path（あるいは両方）が必要です。',
+    'batch_error_no_workspaces': 'エラー: 一致するワークスペースがありません: {patterns}',
+    'batch_workspace_ok': '✓ {workspace} ({seconds:.2f}秒)',
+    'batch_workspace_failed': '✗ {workspace}: {error}',
+    'batch_workspace_skipped': '- {workspace}: AGENTS.md も GEMINI.md もないためスキップしました（--create で作成します）',
+    'batch_complete': 'バッチ完了: {total} 件中 {ok} 件のワークスペースを {seconds:.2f}秒で設定しました',
+    'batch_error_no_agents': '言語切り替え後に AGENTS.md が見つかりません',
+    'batch_error_switch': '言語の切り替えに失敗しました',
+    'batch_error_update': 'MEMORY_PATH の更新に失敗しました',
+
+    # Scanning
+    'scan_error_not_dir': 'エラー: ディレクトリではありません: {path}',
+    'scan_file': '[{status}] {language} {path}{memory_path}',
+    'scan_complete': ('{directories} 個のディレクトリ（{entries} エントリー）を {seconds:.2f}秒でスキャンしました: '
+                      'ファイル {files} 件、最新 {current} 件、旧版 {outdated} 件、手動編集 {modified} 件、対象外 {foreign} 件、'
+                      'プレースホルダーのパス {placeholder} 件'),
+    'scan_upgrade_none': 'アップグレードするものはありません。agents-md ファイルはすべて最新です。',
+    'scan_upgrade_start': '{count} 個のディレクトリをアップグレードしています...',
+    'scan_upgrade_held': '{directory} をスキップしました: アップグレードで上書きされる無関係なファイルか手で編集されたファイルがあります',
+    'scan_upgrade_not_current': 'アップグレード後も最新になっていません: {files}',
+}
@@ -0,0 +1,230 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Incremental memories.json indexer.
+
+Walks MEMORY_PATH/[project]/ and keeps a per-file (size, mtime, hash) manifest
+in [project]/.agents-md/manifest.json. Only files whose stat changed are read,
+and only files whose content hash changed are re-parsed, so re-indexing after
+editing a single file costs one stat per file plus one parse. Files moved
+into a pack (pack.py) stay listed under their original paths.
+
+memories.json layout (top-level keys other than "files" are left untouched,
+as are extra keys added by hand to a file entry). Projects with a memory
+store (store.py) upsert only the changed entries into it and export
+memories.json from there (deferred for the watcher) instead of merging the
+whole file:
+    {
+      "project": "my-project",
+      "updated": "2025-01-31T10:00:00+00:00",
+      "files": {
+        "topic/auth.md": {"title": "Auth", "type": "topic", "tags": [...],
+                          "keywords": [...], "headings": [...], "date": null,
+                          "size": 1234},
+        "session/2025-09.md": {..., "parts": [{"pointer": "session/2025-09.md#2025-09-03_auth",
+                                               "source": "session/2025-09/2025-09-03_auth.md",
+                                               "title": ..., "date": ..., "tags": [...], "line": 12}]}
+      }
+    }
+"""
+
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import trace
+from .common import (
+    MANIFEST, MEMORY_INDEX, file_lock, list_projects, load_json, state_path, write_json,
+)
+from .markdown import (
+    extract_keywords, extract_tags, iter_archive_parts, iter_headings, session_date,
+)
+from .pack import scan_with_packs
+
+MANIFEST_VERSION = 1
+GENERATED_FIELDS = ('title', 'type', 'tags', 'keywords', 'headings', 'date', 'size')
+
+# ============================================================================
+# PARSING
+# ============================================================================
+def classify_file(relpath):
+    """Memory file type from its location inside the project."""
+    if relpath == 'context.md':
+        return 'context'
+    top = relpath.split('/', 1)[0]
+    if top in ('topic', 'session'):
+        return top
+    return 'other'
+
+def parse_entry(relpath, text, size):
+    """Build the memories.json entry for one memory file."""
+    headings = list(iter_headings(text))
+    title = next((heading for _, level, heading in headings if level == 1), None)
+    if title is None:
+        title = headings[0][2] if headings else Path(relpath).stem
+    file_type = classify_file(relpath)
+    entry = {
+        'title': title,
+        'type': file_type,
+        'tags': extract_tags(text),
+        'keywords': extract_keywords(text),
+        'headings': [heading for _, level, heading in headings if level > 1],
+        'date': session_date(relpath) if file_type == 'session' else None,
+        'size': size,
+    }
+    if file_type == 'session':
+        parts = archive_parts(relpath, text)
+        if parts:
+            entry['parts'] = parts
+    return entry
+
+def archive_parts(relpath, text):
+    """Section pointers of the sessions rolled into a session archive."""
+    month_dir = relpath[:-len('.md')]
+    parts = []
+    for _, line, attributes in iter_archive_parts(text):
+        name = attributes.get('name', '')
+        parts.append({
+            'pointer': f"{relpath}#{Path(name).stem}",
+            'source': f"{month_dir}/{name}",
+            'title': attributes.get('title', ''),
+            'date': attributes.get('date') or None,
+            'tags': [tag for tag in attributes.get('tags', '').split(',') if tag],
+            'line': line,
+        })
+    return parts
+
+# ============================================================================
+# INDEXING
+# ============================================================================
+def load_manifest(project_dir):
+    """Load the per-file manifest, discarding it if the format changed."""
+    manifest = load_json(state_path(project_dir, MANIFEST), {})
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('files', {})
+
+def merge_memories(existing, project_name, entries):
+    """Merge generated entries into an existing memories.json document."""
+    document = existing if isinstance(existing, dict) else {}
+    old_files = document.get('files') if isinstance(document.get('files'), dict) else {}
+    files = {}
+    for relpath in sorted(entries):
+        entry = dict(old_files.get(relpath) or {})
+        entry.update(entries[relpath])
+        files[relpath] = entry
+    document.setdefault('project', project_name)
+    document['updated'] = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    document['files'] = files
+    return document
+
+def sync_store(store, files, previous, full, index_file, defer_export=False):
+    """Upsert changed entries into a memory store; export memories.json if due.
+
+    With defer_export the export is skipped unless the store's last one is
+    EXPORT_INTERVAL old; the entries stay marked for store.export_pending().
+    """
+    changed = {relpath: record['entry'] for relpath, record in files.items()
+               if 'entry' in record and (full or record['entry'] != (previous.get(relpath) or {}).get('entry'))}
+    removed = sorted(previous.keys() - files.keys())
+    with store.transaction():
+        if changed:
+            store.upsert(changed)
+        if removed:
+            store.delete(removed)
+        if changed or removed:
+            store.set_meta('dirty', True)
+    if store.export_mode != 'auto':
+        return False
+    due = store.export_due() if defer_export else store.get_meta('dirty', False)
+    if not (due or full or not index_file.exists()):
+        return False
+    store.sync_hand_edits()
+    store.export()
+    return True
+
+@trace.traced('index.project')
+def index_project(project_dir, full=False, paths=None, defer_export=False):
+    """Bring memories.json of one project up to date.
+
+    paths limits the scan to project-relative files known to have changed
+    (the watcher passes them); by default the whole project is walked.
+    defer_export (the watcher) lets a project with a store export at most
+    once per EXPORT_INTERVAL (see sync_store).
+    Returns a stats dict: files, parsed (content changed), touched (stat
+    changed but content identical), removed, written (memories.json rewritten).
+    """
+    started = time.perf_counter()
+    project_dir = Path(project_dir)
+    previous = {} if full else load_manifest(project_dir)
+    files = {}
+    parsed = touched = 0
+    if full:
+        paths = None
+    for relpath, record, data in scan_with_packs(project_dir, previous, paths=paths):
+        if data is None:
+            files[relpath] = record
+            continue
+        old = previous.get(relpath)
+        if old and old.get('hash') == record['hash'] and 'entry' in old:
+            record['entry'] = dict(old['entry'], size=record['size'])
+            touched += 1
+        else:
+            text = data.decode('utf-8', errors='replace')
+            record['entry'] = parse_entry(relpath, text, record['size'])
+            parsed += 1
+        files[relpath] = record
+    removed = len(previous.keys() - files.keys())
+
+    index_file = project_dir / MEMORY_INDEX
+    written = False
+    from .store import MemoryStore
+    store = MemoryStore.open(project_dir)
+    # Journal merges (journal.py) edit memories.json concurrently
+    with file_lock(project_dir.parent, f"{project_dir.name}/{MEMORY_INDEX}"):
+        if store is not None:
+            try:
+                written = sync_store(store, files, previous, full, index_file, defer_export)
+            finally:
+                store.close()
+        elif parsed or removed or full or not index_file.exists():
+            existing = load_json(index_file, {})
+            entries = {relpath: record['entry'] for relpath, record in files.items()}
+            write_json(index_file, merge_memories(existing, project_dir.name, entries), pretty=True)
+            written = True
+    if parsed or touched or removed or full or not previous:
+        write_json(state_path(project_dir, MANIFEST), {'version': MANIFEST_VERSION, 'files': files})
+
+    return {
+        'project': project_dir.name,
+        'files': len(files),
+        'parsed': parsed,
+        'touched': touched,
+        'removed': removed,
+        'written': written,
+        'seconds': time.perf_counter() - started,
+    }
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def run(args, memory_root):
+    """memory.py index [project ...] [--full]"""
+    projects = args.projects or list_projects(memory_root)
+    if not projects:
+        print(f"No project directories found in {memory_root}")
+        return 1
+    status = 0
+    for name in projects:
+        project_dir = memory_root / name
+        if not project_dir.is_dir():
+            print(f"✗ Project directory not found: {project_dir}")
+            status = 1
+            continue
+        stats = index_project(project_dir, full=args.full)
+        state = f"{MEMORY_INDEX} updated" if stats['written'] else "up to date"
+        print(f"{stats['project']}: {stats['files']} files, {stats['parsed']} parsed, "
+              f"{stats['removed']} removed, {state} ({stats['seconds']:.3f}s)")
+    return status
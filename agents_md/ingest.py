@@ -0,0 +1,267 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Incremental git history ingest into session memory.
+
+commands.md has agents run `git log --since=...` and `git show HEAD --stat`
+into /tmp files and read them back at the start of every session, paying
+for the same history again each time. `memory.py ingest PROJECT` instead
+records, per project and repository, the last commit it has ingested
+([project]/.agents-md/git.json) and reads only the commits after it, in one
+`git log WATERMARK..HEAD --numstat` pass:
+
+    {"version": 1, "repos": {"/path/to/repo": {"head": "3f2a...", "date": "2025-09-14T10:32:00+02:00",
+                                               "commits": 412}}}
+
+Commits are written, oldest first, to one session file per repository and
+day, which the indexer then adds to memories.json:
+
+    session/2025-09/2025-09-14_git_my_repo.md
+
+    # Git Activity - 2025-09-14 (my-repo)
+
+    ## 3f2a9c1 Fix token refresh race
+    - Commit: `3f2a9c1...` by Jane Doe, 10:32
+    - Files (2, +40 -12): `src/auth.py` (+30 -10), `tests/test_auth.py` (+10 -2)
+
+    > Refresh tokens are now rotated under the session lock.
+
+    <!-- #git #my_repo -->
+
+A run with nothing new costs one `git rev-parse`. Commits already present in
+a day file (matched by full hash) are never written twice, so a run that
+was interrupted before saving its watermark can simply be repeated. When
+the watermark is no longer an ancestor of HEAD (history was rewritten),
+commits after its date are ingested instead. Author emails are left out, so
+the privacy scan has nothing to report.
+"""
+
+import json
+import os
+import re
+import subprocess
+import time
+from pathlib import Path
+
+from . import trace
+from .common import atomic_write_bytes, file_lock, load_json, state_path, write_json
+from .indexer import index_project
+
+INGEST_VERSION = 1
+INGEST_STATE = "git.json"
+SESSION_DIR = "session"
+# Without a watermark, history this old is not ingested unless --since/--all say so
+DEFAULT_SINCE = "30 days ago"
+MAX_FILES = 10
+MAX_BODY_LINES = 12
+
+_RECORD = '\x1e'
+_FIELD = '\x1f'
+# hash, parents, author name, author date, commit date, subject, body
+_FORMAT = _RECORD + _FIELD.join(('%H', '%P', '%an', '%aI', '%cI', '%s', '%b')) + _FIELD
+_NAME_RE = re.compile(r'[^A-Za-z0-9]+')
+
+class GitError(RuntimeError):
+    """git failed or is not installed."""
+
+def git(repo, *args):
+    """stdout of a git command run in repo."""
+    try:
+        result = subprocess.run(['git', '-C', str(repo)] + list(args), stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+    except OSError as e:
+        raise GitError(f"cannot run git: {e}")
+    if result.returncode != 0:
+        raise GitError(result.stderr.decode('utf-8', errors='replace').strip() or f"git {args[0]} failed")
+    return result.stdout.decode('utf-8', errors='replace')
+
+# ============================================================================
+# READING HISTORY
+# ============================================================================
+def parse_log(output):
+    """Commits of `git log --format=_FORMAT --numstat` output, in output order."""
+    commits = []
+    for record in output.split(_RECORD)[1:]:
+        fields = record.split(_FIELD)
+        if len(fields) < 8:
+            continue
+        sha, parents, author, authored, committed, subject, body, stat = fields[:8]
+        files = []
+        for line in stat.strip('\n').splitlines():
+            parts = line.split('\t', 2)
+            if len(parts) == 3:
+                added, removed, path = parts
+                files.append((path, int(added) if added.isdigit() else None,
+                              int(removed) if removed.isdigit() else None))
+        commits.append({
+            'sha': sha,
+            'merge': len(parents.split()) > 1,
+            'author': author,
+            'authored': authored,
+            'committed': committed,
+            'subject': subject,
+            'body': body.strip(),
+            'files': files,
+        })
+    return commits
+
+def read_new_commits(repo, watermark, rev='HEAD', since=None, limit=None):
+    """(head, commits oldest first) after the watermark, with a single git log."""
+    head = git(repo, 'rev-parse', '--verify', rev + '^{commit}').strip()
+    if watermark and watermark.get('head') == head:
+        return head, []
+    args = ['log', '--reverse', '--no-renames', '--numstat', '--format=' + _FORMAT]
+    if limit:
+        # --reverse applies after limiting, so this keeps the newest commits
+        args.append(f'--max-count={limit}')
+    if watermark and watermark.get('head'):
+        try:
+            git(repo, 'merge-base', '--is-ancestor', watermark['head'], head)
+            args.append(f"{watermark['head']}..{head}")
+        except GitError:
+            args.extend([f"--since={watermark.get('date') or DEFAULT_SINCE}", head])
+    else:
+        if since:
+            args.append(f'--since={since}')
+        args.append(head)
+    with trace.span('ingest.git_log') as span:
+        commits = parse_log(git(repo, *args))
+        span.set(commits=len(commits))
+    return head, commits
+
+# ============================================================================
+# WRITING SESSIONS
+# ============================================================================
+def repo_slug(repo):
+    return _NAME_RE.sub('_', Path(repo).name).strip('_').lower() or 'repo'
+
+def render_commit(commit):
+    """Markdown section of one commit."""
+    time_of_day = commit['authored'][11:16]
+    lines = [f"## {commit['sha'][:7]} {commit['subject']}".rstrip(),
+             f"- Commit: `{commit['sha']}` by {commit['author']}, {time_of_day}"
+             + (" (merge)" if commit['merge'] else '')]
+    files = commit['files']
+    if files:
+        added = sum(count or 0 for _, count, _ in files)
+        removed = sum(count or 0 for _, _, count in files)
+        listed = ', '.join(f"`{path}`" + (f" (+{a} -{r})" if a is not None else " (binary)")
+                           for path, a, r in files[:MAX_FILES])
+        more = f", and {len(files) - MAX_FILES} more" if len(files) > MAX_FILES else ''
+        lines.append(f"- Files ({len(files)}, +{added} -{removed}): {listed}{more}")
+    text = '\n'.join(lines) + '\n'
+    if commit['body']:
+        body = commit['body'].splitlines()
+        if len(body) > MAX_BODY_LINES:
+            body = body[:MAX_BODY_LINES] + ['...']
+        # Quoted, so '#' lines in messages do not become headings
+        text += '\n' + '\n'.join(('> ' + line).rstrip() for line in body) + '\n'
+    return text + '\n'
+
+def session_relpath(day, slug):
+    return f"{SESSION_DIR}/{day[:7]}/{day}_git_{slug}.md"
+
+def write_day(project_dir, relpath, day, repo_name, slug, commits, dry_run=False):
+    """Append the commits missing from one day file; returns how many were new."""
+    path = project_dir / relpath
+    footer = f"<!-- #git #{slug} -->\n"
+    try:
+        text = path.read_bytes().decode('utf-8', errors='replace')
+    except FileNotFoundError:
+        text = f"# Git Activity - {day} ({repo_name})\n\n"
+    new = [commit for commit in commits if commit['sha'] not in text]
+    if not new or dry_run:
+        return len(new)
+    if text.endswith(footer):
+        text = text[:-len(footer)]
+    text = text.rstrip('\n') + '\n\n' + ''.join(render_commit(commit) for commit in new) + footer
+    atomic_write_bytes(path, text.encode('utf-8'))
+    return len(new)
+
+# ============================================================================
+# INGEST
+# ============================================================================
+@trace.traced('ingest.project')
+def ingest(project_dir, repo, rev='HEAD', since=DEFAULT_SINCE, limit=None, dry_run=False):
+    """Write the repository's new commits into the project's session files.
+
+    since only applies when the project has no watermark for the repository
+    (None ingests the whole history). Returns a stats dict: repo, head,
+    commits, written (new commits), files (session files changed), index.
+    """
+    started = time.perf_counter()
+    project_dir = Path(project_dir)
+    repo = Path(git(repo, 'rev-parse', '--show-toplevel').strip()).resolve()
+    state = load_json(state_path(project_dir, INGEST_STATE), {})
+    if not isinstance(state, dict) or state.get('version') != INGEST_VERSION:
+        state = {'version': INGEST_VERSION, 'repos': {}}
+    watermark = state['repos'].get(str(repo))
+    head, commits = read_new_commits(repo, watermark, rev, since, limit)
+
+    days = {}
+    for commit in commits:
+        days.setdefault(commit['authored'][:10], []).append(commit)
+    slug = repo_slug(repo)
+    written = 0
+    changed = []
+    for day, day_commits in sorted(days.items()):
+        relpath = session_relpath(day, slug)
+        # The same lock journal merges take (memory root is the project's parent)
+        with file_lock(project_dir.parent, f"{project_dir.name}/{relpath}"):
+            count = write_day(project_dir, relpath, day, repo.name, slug, day_commits, dry_run)
+        written += count
+        if count:
+            changed.append(relpath)
+
+    index = None
+    if not dry_run:
+        if changed:
+            index = index_project(project_dir, paths=changed)
+        if watermark is None or watermark.get('head') != head:
+            state['repos'][str(repo)] = {
+                'head': head,
+                'date': commits[-1]['committed'] if commits else (watermark or {}).get('date'),
+                'commits': (watermark or {}).get('commits', 0) + written,
+            }
+            write_json(state_path(project_dir, INGEST_STATE), state, pretty=True)
+    return {
+        'project': project_dir.name,
+        'repo': str(repo),
+        'head': head,
+        'commits': len(commits),
+        'written': written,
+        'files': changed,
+        'index': index,
+        'seconds': time.perf_counter() - started,
+    }
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def run(args, memory_root):
+    """memory.py ingest PROJECT [--repo DIR] [--since WHEN | --all] [--dry-run]"""
+    project_dir = memory_root / args.project
+    if not project_dir.is_dir():
+        print(f"✗ Project directory not found: {project_dir}")
+        return 1
+    since = None if args.all else (args.since or DEFAULT_SINCE)
+    try:
+        stats = ingest(project_dir, args.repo or os.getcwd(), args.rev, since, args.max, args.dry_run)
+    except GitError as e:
+        print(f"✗ Error: {e}")
+        return 1
+    if args.json:
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        return 0
+    if not stats['commits']:
+        print(f"{stats['project']}: {Path(stats['repo']).name} up to date at {stats['head'][:7]} "
+              f"({stats['seconds']:.3f}s)")
+        return 0
+    verb = "would write" if args.dry_run else "wrote"
+    print(f"{stats['project']}: read {stats['commits']} commits of {Path(stats['repo']).name}, "
+          f"{verb} {stats['written']} new into {len(stats['files'])} session files ({stats['seconds']:.3f}s)")
+    for relpath in stats['files']:
+        print(f"  {relpath}")
+    return 0
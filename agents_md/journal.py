@@ -0,0 +1,413 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Write journal for several agents sharing one MEMORY_PATH.
+
+setup.py points AGENTS.md and GEMINI.md at the same memory root, so agents
+running at the same time append to context.md and session notes and edit
+memories.json concurrently; their `echo >>` / `cat >` writes interleave and
+read-modify-write edits of memories.json overwrite each other. Instead,
+writers record their changes in a journal:
+
+    [memory root]/.agents-md/journal/
+        cursor@host.4242.1727000000000000000.jsonl.part   segment still open
+        gemini@host.4301.1727000000500000000.jsonl        closed segment
+
+Every writer (one Journal object, e.g. one `memory.py journal append` run)
+owns its own segment and only ever appends whole JSON lines to it with one
+write each, so writers share no lock and never wait for each other:
+
+    {"ts": 1727000000123456789, "op": "append", "path": "my-project/context.md", "text": "..."}
+    {"ts": ..., "op": "write", "path": "my-project/topic/auth.md", "text": "..."}
+    {"ts": ..., "op": "set", "project": "my-project", "file": "topic/auth.md",
+     "fields": {"summary": "...", "stale": null}}
+
+The merger (`memory.py journal merge`, or the watcher) applies the new lines
+of every segment in timestamp order. Records are grouped by target file and
+each file is rewritten once per batch under its advisory lock (see
+common.file_lock), the same lock the indexer, digest and compact take. Read
+offsets are kept in [memory root]/.agents-md/journal.json; closed segments
+are deleted once applied, as are abandoned open segments of writers that
+died on this host. Delivery is at least once: a merger killed between
+applying a batch and saving the offsets applies that batch again.
+"""
+
+import json
+import os
+import re
+import socket
+import sys
+import time
+from pathlib import Path
+
+from . import trace
+from .common import (
+    MEMORY_INDEX, atomic_write_bytes, file_lock, load_json, state_path, write_json,
+)
+
+JOURNAL_VERSION = 1
+JOURNAL_DIR = "journal"
+JOURNAL_STATE = "journal.json"
+# Lock name (memory-root-relative, like a file) held by the running merger
+MERGE_LOCK = ".agents-md/journal"
+SEGMENT_SUFFIX = ".jsonl"
+OPEN_SUFFIX = ".jsonl.part"
+OPS = ('append', 'write', 'set')
+# Open segments untouched this long whose writer process is gone are removed
+ABANDONED_SECONDS = 3600
+
+_LABEL_RE = re.compile(r'[^A-Za-z0-9_-]+')
+
+class JournalError(ValueError):
+    """A journal record that can never be applied."""
+
+def journal_dir(memory_root):
+    return state_path(memory_root, JOURNAL_DIR)
+
+def check_path(relpath):
+    """Normalized memory-root-relative path of a markdown file writers may change."""
+    parts = relpath.replace('\\', '/').split('/')
+    parts = [part for part in parts if part not in ('', '.')]
+    if not relpath or relpath.startswith(('/', '\\')) or re.match(r'^[A-Za-z]:', relpath):
+        raise JournalError(f"path must be relative to the memory root: {relpath}")
+    if len(parts) < 2 or any(part == '..' or part.startswith('.') for part in parts):
+        raise JournalError(f"path must be a file inside a project directory: {relpath}")
+    if not parts[-1].endswith('.md'):
+        raise JournalError(f"only markdown files can be written through the journal: {relpath}")
+    return '/'.join(parts)
+
+def check_project(project):
+    if not project or '/' in project or '\\' in project or project.startswith('.'):
+        raise JournalError(f"not a project directory name: {project}")
+    return project
+
+# ============================================================================
+# WRITING
+# ============================================================================
+class Journal:
+    """Append-only journal segment of one writer.
+
+    label names the writer in segment file names (e.g. "cursor"); segments
+    are unique per Journal, so the same label can be used by many processes.
+    """
+
+    def __init__(self, memory_root, label=None):
+        self.memory_root = Path(memory_root)
+        label = _LABEL_RE.sub('-', label or os.environ.get('AGENTS_MD_WRITER') or 'agent').strip('-') or 'agent'
+        host = _LABEL_RE.sub('-', socket.gethostname()).strip('-') or 'host'
+        self.name = f"{label}@{host}.{os.getpid()}.{time.time_ns()}"
+        directory = journal_dir(self.memory_root)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / (self.name + OPEN_SUFFIX)
+        self.fd = os.open(str(self.path), os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND
+                          | getattr(os, 'O_BINARY', 0), 0o666)
+        self.records = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _record(self, record):
+        record = dict(ts=time.time_ns(), **record)
+        data = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self.fd, view):]
+        self.records += 1
+        trace.add(writes=1, bytes_written=len(data))
+
+    def append(self, relpath, text):
+        """Append text to a markdown file (created if missing)."""
+        self._record({'op': 'append', 'path': check_path(relpath), 'text': text})
+
+    def write(self, relpath, text):
+        """Replace the content of a markdown file."""
+        self._record({'op': 'write', 'path': check_path(relpath), 'text': text})
+
+    def set(self, project, fields, file=None):
+        """Set hand-written memories.json keys of a file entry (or top-level keys).
+
+        A None value removes the key. Generated entry fields are overwritten
+        by the next index run, as with any hand edit.
+        """
+        if file is not None:
+            file = check_path(f"{project}/{file}").split('/', 1)[1]
+        elif 'files' in fields:
+            raise JournalError("the files map cannot be set directly; name the file entry instead")
+        self._record({'op': 'set', 'project': check_project(project), 'file': file, 'fields': dict(fields)})
+
+    def close(self):
+        """Close the segment; the merger deletes it once applied."""
+        if self.fd is None:
+            return
+        os.close(self.fd)
+        self.fd = None
+        closed = self.path.with_name(self.name + SEGMENT_SUFFIX)
+        if self.records:
+            os.replace(str(self.path), str(closed))
+        else:
+            os.unlink(str(self.path))
+
+# ============================================================================
+# MERGING
+# ============================================================================
+def list_segments(memory_root):
+    """{segment name: (path, closed)} of every journal segment."""
+    segments = {}
+    try:
+        entries = list(os.scandir(str(journal_dir(memory_root))))
+    except OSError:
+        return segments
+    for entry in entries:
+        if entry.name.endswith(OPEN_SUFFIX):
+            segments.setdefault(entry.name[:-len(OPEN_SUFFIX)], (entry.path, False))
+        elif entry.name.endswith(SEGMENT_SUFFIX):
+            # A segment closed between listing both names is taken as closed
+            segments[entry.name[:-len(SEGMENT_SUFFIX)]] = (entry.path, True)
+    return segments
+
+def read_segment(path, offset):
+    """(records, new offset, invalid lines) of the complete lines after offset."""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except OSError:
+        return [], offset, 0
+    trace.add(reads=1, bytes_read=len(data))
+    end = data.rfind(b'\n') + 1
+    records = []
+    invalid = 0
+    for line in data[:end].splitlines():
+        try:
+            record = json.loads(line.decode('utf-8'))
+        except ValueError:
+            invalid += 1
+            continue
+        if isinstance(record, dict) and record.get('op') in OPS:
+            records.append(record)
+        else:
+            invalid += 1
+    return records, offset + end, invalid
+
+def _target(record):
+    """Memory-root-relative file a record changes."""
+    if record['op'] == 'set':
+        return f"{check_project(record.get('project'))}/{MEMORY_INDEX}"
+    return check_path(record.get('path') or '')
+
+def apply_text(path, records):
+    """Apply append/write records to one markdown file with a single write."""
+    if all(record['op'] == 'append' for record in records) and path.exists():
+        data = ''.join(record.get('text') or '' for record in records).encode('utf-8')
+        with open(str(path), 'ab') as f:
+            f.write(data)
+        trace.add(writes=1, bytes_written=len(data))
+        return
+    try:
+        text = path.read_bytes().decode('utf-8', errors='replace')
+    except FileNotFoundError:
+        text = ''
+    for record in records:
+        text = (record.get('text') or '') if record['op'] == 'write' else text + (record.get('text') or '')
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+def apply_sets(path, records):
+    """Apply set records to one memories.json with a single write."""
+    document = load_json(path, {})
+    if not isinstance(document, dict):
+        document = {}
+    for record in records:
+        fields = record.get('fields') if isinstance(record.get('fields'), dict) else {}
+        if record.get('file'):
+            files = document.setdefault('files', {})
+            target = files.setdefault(record['file'], {})
+        else:
+            target = document
+            fields = {key: value for key, value in fields.items() if key != 'files'}
+        for key, value in fields.items():
+            if value is None:
+                target.pop(key, None)
+            else:
+                target[key] = value
+    write_json(path, document, pretty=True)
+
+def _writer_gone(name):
+    """True if an open segment's writer process no longer runs on this host."""
+    try:
+        label_host, pid, _ = name.rsplit('.', 2)
+        host = label_host.rsplit('@', 1)[1]
+        pid = int(pid)
+    except (ValueError, IndexError):
+        return False
+    if host != (_LABEL_RE.sub('-', socket.gethostname()).strip('-') or 'host'):
+        return False
+    if sys.platform == 'win32':
+        return False  # os.kill(pid, 0) would terminate the process there
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+@trace.traced('journal.merge')
+def merge_journals(memory_root, blocking=False):
+    """Apply every new journal record to the memory files.
+
+    Returns a stats dict: records, files, segments, removed, invalid,
+    errors (list of messages) and busy (another merger holds the lock and
+    blocking is False).
+    """
+    started = time.perf_counter()
+    memory_root = Path(memory_root)
+    stats = {'records': 0, 'files': 0, 'segments': 0, 'removed': 0, 'invalid': 0, 'errors': [],
+             'busy': False, 'seconds': 0.0}
+    segments = list_segments(memory_root)
+    if not segments:
+        return stats
+    with file_lock(memory_root, MERGE_LOCK, blocking=blocking) as acquired:
+        if not acquired:
+            stats['busy'] = True
+            return stats
+        state = load_json(state_path(memory_root, JOURNAL_STATE), {})
+        offsets = state.get('offsets', {}) if state.get('version') == JOURNAL_VERSION else {}
+        segments = list_segments(memory_root)
+        pending = []
+        new_offsets = {}
+        for name, (path, closed) in sorted(segments.items()):
+            records, offset, invalid = read_segment(path, offsets.get(name, 0))
+            new_offsets[name] = offset
+            stats['invalid'] += invalid
+            if records:
+                stats['segments'] += 1
+            pending.extend((record.get('ts', 0), name, index, record) for index, record in enumerate(records))
+
+        by_target = {}
+        for _, name, _, record in sorted(pending, key=lambda item: item[:3]):
+            try:
+                by_target.setdefault(_target(record), []).append(record)
+            except JournalError as e:
+                stats['errors'].append(f"{name}: {e}")
+        for relpath, records in sorted(by_target.items()):
+            path = memory_root / relpath
+            with file_lock(memory_root, relpath):
+                if relpath.endswith('/' + MEMORY_INDEX):
+                    apply_sets(path, records)
+                else:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    apply_text(path, records)
+            stats['records'] += len(records)
+            stats['files'] += 1
+
+        for name, (path, closed) in segments.items():
+            try:
+                size = os.stat(path).st_size
+                idle = time.time() - os.stat(path).st_mtime
+            except OSError:
+                continue
+            consumed = new_offsets[name] >= size
+            if consumed and (closed or (idle > ABANDONED_SECONDS and _writer_gone(name))):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                new_offsets.pop(name)
+                stats['removed'] += 1
+        if new_offsets != offsets:
+            write_json(state_path(memory_root, JOURNAL_STATE), {'version': JOURNAL_VERSION, 'offsets': new_offsets})
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+def journal_status(memory_root):
+    """[(segment, closed, pending bytes)] of every segment."""
+    state = load_json(state_path(memory_root, JOURNAL_STATE), {})
+    offsets = state.get('offsets', {}) if state.get('version') == JOURNAL_VERSION else {}
+    status = []
+    for name, (path, closed) in sorted(list_segments(memory_root).items()):
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            continue
+        status.append((name, closed, size - offsets.get(name, 0)))
+    return status
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def _read_text(words):
+    if words:
+        return ' '.join(words)
+    return sys.stdin.read()
+
+def _parse_fields(items):
+    fields = {}
+    for item in items:
+        key, separator, value = item.partition('=')
+        if not separator or not key:
+            raise JournalError(f"expected KEY=VALUE: {item}")
+        try:
+            fields[key] = json.loads(value)
+        except ValueError:
+            fields[key] = value
+    return fields
+
+def _print_merge(stats):
+    if stats['busy']:
+        print("Another merger is running; it will apply the new records.")
+        return
+    for error in stats['errors']:
+        print(f"✗ {error}")
+    invalid = f", {stats['invalid']} unreadable lines skipped" if stats['invalid'] else ''
+    print(f"Merged {stats['records']} records from {stats['segments']} segments into {stats['files']} files, "
+          f"removed {stats['removed']} segments{invalid} ({stats['seconds']:.3f}s)")
+
+def run(args, memory_root):
+    """memory.py journal append|write|set|merge|status ..."""
+    try:
+        if args.action in ('append', 'write', 'set'):
+            if not args.items:
+                print(f"✗ Error: journal {args.action} needs a target.")
+                return 1
+            target, rest = args.items[0], args.items[1:]
+            with Journal(memory_root, args.writer) as journal:
+                if args.action == 'set':
+                    project, _, file = target.replace('\\', '/').partition('/')
+                    journal.set(project, _parse_fields(rest), file or None)
+                else:
+                    text = _read_text(rest)
+                    if args.action == 'append' and text and not text.endswith('\n'):
+                        text += '\n'
+                    getattr(journal, args.action)(target, text)
+            if args.merge:
+                _print_merge(merge_journals(memory_root))
+            return 0
+    except (JournalError, OSError) as e:
+        print(f"✗ Error: {e}")
+        return 1
+
+    if args.action == 'status':
+        status = journal_status(memory_root)
+        if args.json:
+            print(json.dumps([{'segment': name, 'closed': closed, 'pending_bytes': pending}
+                              for name, closed, pending in status], indent=2))
+            return 0
+        for name, closed, pending in status:
+            print(f"{name}: {'closed' if closed else 'open'}, {pending} bytes pending")
+        print(f"{len(status)} segments, {sum(pending for _, _, pending in status)} bytes pending")
+        return 0
+
+    while True:
+        stats = merge_journals(memory_root, blocking=args.watch)
+        if not args.watch:
+            _print_merge(stats)
+            return 1 if stats['errors'] else 0
+        if stats['records'] or stats['errors']:
+            _print_merge(stats)
+        time.sleep(args.interval)
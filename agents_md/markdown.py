@@ -0,0 +1,180 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Minimal markdown parsing for memory files.
+
+Only what the memory tools need: ATX headings (outside fenced code) and the
+sections they delimit, the trailing <!-- #tag ... --> footers,
+Tags:/Keywords: lines, and the <!-- agents-md:... --> markers of session
+archives.
+"""
+
+import re
+
+_HEADING_RE = re.compile(r'^(#{1,6})[ \t]+(.+?)[ \t]*#*[ \t]*$')
+_FENCE_RE = re.compile(r'^[ \t]{0,3}(```|~~~)')
+_COMMENT_RE = re.compile(r'<!--(.*?)-->', re.DOTALL)
+_TAG_RE = re.compile(r'(?<![\w#&])#([^\s#<>,;]+)')
+_LABEL_RE = re.compile(
+    r'^[ \t]*[-*]?[ \t]*\**(tags|keywords|タグ|キーワード)\**[ \t]*[:：]\**[ \t]*(.+)$',
+    re.IGNORECASE | re.MULTILINE,
+)
+_SESSION_DATE_RE = re.compile(r'(\d{4}-\d{2}-\d{2})')
+_ARCHIVE_PART_RE = re.compile(r'^<!-- agents-md:part (.*?) -->[ \t]*\r?$', re.MULTILINE)
+_ATTRIBUTE_RE = re.compile(r'([\w-]+)=(?:"([^"]*)"|(\S+))')
+
+def iter_headings(text):
+    """Yield (line_index, level, title) for each ATX heading outside code fences."""
+    in_fence = None
+    for index, line in enumerate(text.split('\n')):
+        fence = _FENCE_RE.match(line)
+        if fence:
+            if in_fence is None:
+                in_fence = fence.group(1)
+            elif fence.group(1) == in_fence:
+                in_fence = None
+            continue
+        if in_fence is not None or not line.startswith('#'):
+            continue
+        match = _HEADING_RE.match(line.rstrip('\r'))
+        if match:
+            yield index, len(match.group(1)), match.group(2).strip()
+
+def split_sections(data):
+    """Split raw file bytes into heading-delimited sections.
+
+    Returns a list of dicts with level, title, line (1-based), start and end
+    byte offsets of the section's own content (up to the next heading of any
+    level) and subtree_end (up to the next heading of the same or a higher
+    level). Text before the first heading becomes a level-0 section with an
+    empty title when it is not blank.
+    """
+    headings = []
+    in_fence = None
+    offset = 0
+    for index, raw in enumerate(data.split(b'\n')):
+        line_start = offset
+        offset += len(raw) + 1
+        if not raw.lstrip(b' \t').startswith((b'#', b'`', b'~')):
+            continue
+        line = raw.decode('utf-8', errors='replace')
+        fence = _FENCE_RE.match(line)
+        if fence:
+            if in_fence is None:
+                in_fence = fence.group(1)
+            elif fence.group(1) == in_fence:
+                in_fence = None
+            continue
+        if in_fence is not None or not line.startswith('#'):
+            continue
+        match = _HEADING_RE.match(line.rstrip('\r'))
+        if match:
+            headings.append((len(match.group(1)), match.group(2).strip(), index + 1, line_start))
+
+    size = len(data)
+    sections = []
+    if not headings or headings[0][3] > 0:
+        preamble_end = headings[0][3] if headings else size
+        if data[:preamble_end].strip():
+            sections.append({'level': 0, 'title': '', 'line': 1, 'start': 0,
+                             'end': preamble_end, 'subtree_end': preamble_end})
+    open_sections = []
+    for position, (level, title, line, start) in enumerate(headings):
+        while open_sections and open_sections[-1]['level'] >= level:
+            open_sections.pop()['subtree_end'] = start
+        end = headings[position + 1][3] if position + 1 < len(headings) else size
+        section = {'level': level, 'title': title, 'line': line, 'start': start,
+                   'end': end, 'subtree_end': size}
+        sections.append(section)
+        open_sections.append(section)
+    return sections
+
+def extract_tags(text):
+    """Extract tags from <!-- #tag ... --> comments and Tags: lines, in order."""
+    tags = []
+    for body in _COMMENT_RE.findall(text):
+        if body.strip().startswith('#'):
+            tags.extend(_TAG_RE.findall(body))
+    for label, value in _LABEL_RE.findall(text):
+        if label.lower() in ('tags', 'タグ'):
+            tags.extend(_split_label_values(value))
+    return _unique([tag.lower() for tag in tags])
+
+def iter_tag_lines(text):
+    """Yield (line, tags) for each tag comment and Tags: line; line is 1-based.
+
+    Finds the same tags as extract_tags, with where they were written.
+    """
+    found = []
+    for match in _COMMENT_RE.finditer(text):
+        body = match.group(1)
+        if body.strip().startswith('#'):
+            found.append((match.start(), [tag.lower() for tag in _TAG_RE.findall(body)]))
+    for match in _LABEL_RE.finditer(text):
+        if match.group(1).lower() in ('tags', 'タグ'):
+            found.append((match.start(), [tag.lower() for tag in _split_label_values(match.group(2))]))
+    line = 1
+    position = 0
+    for start, tags in sorted(found, key=lambda item: item[0]):
+        line += text.count('\n', position, start)
+        position = start
+        if tags:
+            yield line, _unique(tags)
+
+def extract_keywords(text):
+    """Extract comma-separated values from Keywords: lines."""
+    keywords = []
+    for label, value in _LABEL_RE.findall(text):
+        if label.lower() in ('keywords', 'キーワード'):
+            keywords.extend(_split_label_values(value))
+    return _unique(keywords)
+
+def session_date(relpath):
+    """Date (YYYY-MM-DD) encoded in a session file name, if any."""
+    match = _SESSION_DATE_RE.search(relpath.rsplit('/', 1)[-1])
+    return match.group(1) if match else None
+
+def format_attributes(attributes):
+    """Render key=value pairs for an agents-md marker comment."""
+    pairs = []
+    for key, value in attributes.items():
+        value = str(value).replace('"', "'").replace('-->', '->').replace('\n', ' ')
+        pairs.append(f'{key}="{value}"' if not value or re.search(r'\s', value) else f'{key}={value}')
+    return ' '.join(pairs)
+
+def parse_attributes(text):
+    """Parse key=value / key="value" pairs of an agents-md marker comment."""
+    return {key: quoted if quoted or not bare else bare for key, quoted, bare in _ATTRIBUTE_RE.findall(text)}
+
+def iter_archive_parts(text):
+    """Yield (start, line, attributes) for each part of a session archive.
+
+    Every part is a heading line directly followed by its marker comment;
+    start is the character offset of that heading and line its 1-based line.
+    """
+    line = 1
+    position = 0
+    for match in _ARCHIVE_PART_RE.finditer(text):
+        start = text.rfind('\n', 0, max(match.start() - 1, 0)) + 1
+        line += text.count('\n', position, start)
+        position = start
+        yield start, line, parse_attributes(match.group(1))
+
+def _split_label_values(value):
+    values = []
+    for item in re.split(r'[,、，]|\s+(?=#)', value):
+        item = item.strip().strip('*`').lstrip('#').strip()
+        if item:
+            values.append(item)
+    return values
+
+def _unique(items):
+    seen = set()
+    result = []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            result.append(item)
+    return result
@@ -0,0 +1,336 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Two-way block-level sync between a local mirror and a slow MEMORY_PATH.
+
+A MEMORY_PATH on a cloud-synced mount (Google Drive, OneDrive, Dropbox)
+makes every agent read and `grep -r` go through a slow FUSE layer. The
+mirror is a plain local copy of the memory root that agents point at
+instead; `memory.py mirror LOCAL` keeps the two in step:
+
+    python3 memory.py mirror ~/.cache/agents-memory            # one sync
+    python3 memory.py mirror ~/.cache/agents-memory --watch    # keep syncing
+
+The last synced state of every file is kept in LOCAL/.agents-md/mirror.json:
+    {"version": 1, "remote": "/path/to/memory", "block_size": 4096,
+     "files": {"proj/topic/auth.md": {"hash": ..., "size": ...,
+        "local": [size, mtime_ns], "remote": [size, mtime_ns],
+        "blocks": ["a1b2c3d4e5f60718", ...]}}}
+
+A side whose stat matches the state is unchanged and is never read, so a
+sync with nothing to do costs one stat per file on each side. Local changes
+are pushed by comparing the new content block by block with the synced
+block hashes: the remote file is patched in place, writing only the blocks
+that differ (an append writes just the last block or two) and without
+reading the remote copy at all. Rolling checksums as in rsync are not
+needed because both sides are reachable from this machine; what crosses the
+slow mount is what has to be written. Remote changes are read once and
+written locally in full.
+
+A file changed on both sides since the last sync is a conflict: the remote
+version wins and the local one is kept as NAME.conflict-YYYYMMDD-HHMMSS.md
+on both sides. Tool state (.agents-md/) and other hidden files are not
+synced. A side that suddenly lists no files, or has lost more than half of
+them, is treated as unmounted and nothing is deleted (--force overrides).
+"""
+
+import hashlib
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from . import trace
+from .common import (
+    STATE_DIR, atomic_write_bytes, content_hash, dump_json, iter_markdown_files,
+    load_json, remove_quietly, write_json,
+)
+
+STATE_VERSION = 1
+STATE_FILE = "mirror.json"
+BLOCK_SIZE = 4096
+# Patch in place only while it saves most of the writing
+PATCH_RATIO = 0.5
+# Every file type is mirrored, not only markdown
+ALL_SUFFIXES = ('',)
+
+# ============================================================================
+# BLOCKS
+# ============================================================================
+def block_hashes(data, block_size=BLOCK_SIZE):
+    """Short hash of each fixed-size block of data."""
+    return [hashlib.blake2b(data[start:start + block_size], digest_size=8).hexdigest()
+            for start in range(0, len(data), block_size)]
+
+def changed_ranges(blocks, old_blocks, size, block_size=BLOCK_SIZE):
+    """Byte ranges [start, end) of a new version whose blocks differ from old_blocks.
+
+    Adjacent changed blocks are merged into one range.
+    """
+    ranges = []
+    for number, block in enumerate(blocks):
+        if number < len(old_blocks) and old_blocks[number] == block:
+            continue
+        start = number * block_size
+        end = min(start + block_size, size)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return ranges
+
+def patch_file(path, data, ranges):
+    """Write only ranges of data into path in place, then cut it to len(data)."""
+    with open(path, 'r+b') as f:
+        for start, end in ranges:
+            f.seek(start)
+            f.write(data[start:end])
+        f.truncate(len(data))
+        f.flush()
+        os.fsync(f.fileno())
+    trace.add(writes=1, bytes_written=sum(end - start for start, end in ranges))
+
+# ============================================================================
+# SYNC
+# ============================================================================
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+def _read(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    trace.add(reads=1, bytes_read=len(data))
+    return data
+
+def list_files(base):
+    """{relpath: [size, mtime_ns]} of every visible file below base."""
+    return {relpath: [st.st_size, st.st_mtime_ns]
+            for relpath, st in iter_markdown_files(base, suffixes=ALL_SUFFIXES)}
+
+def conflict_name(relpath, now=None):
+    """Path the local version of a conflicting file is kept under."""
+    stamp = (now or datetime.now()).strftime('%Y%m%d-%H%M%S')
+    directory, _, name = relpath.rpartition('/')
+    stem, dot, suffix = name.rpartition('.')
+    if not stem:
+        stem, dot, suffix = name, '', ''
+    name = f"{stem}.conflict-{stamp}{dot}{suffix}"
+    return f"{directory}/{name}" if directory else name
+
+def _remove_empty_dirs(directory, root):
+    directory = Path(directory)
+    while directory != Path(root):
+        try:
+            directory.rmdir()
+        except OSError:
+            return
+        directory = directory.parent
+
+class Mirror:
+    """Sync state of one local mirror of a remote memory root."""
+
+    def __init__(self, local, remote, block_size=BLOCK_SIZE):
+        self.local = Path(local)
+        self.remote = Path(remote)
+        self.state_path = self.local / STATE_DIR / STATE_FILE
+        state = load_json(self.state_path, {})
+        if (not isinstance(state, dict) or state.get('version') != STATE_VERSION
+                or state.get('remote') != str(self.remote) or state.get('block_size') != block_size):
+            state = {'version': STATE_VERSION, 'remote': str(self.remote), 'block_size': block_size, 'files': {}}
+        self.state = state
+        self.files = state['files']
+        self.block_size = block_size
+
+    def save(self):
+        write_json(self.state_path, self.state)
+
+    def _record(self, relpath, data, blocks=None):
+        self.files[relpath] = {
+            'hash': content_hash(data),
+            'size': len(data),
+            'local': _stat(self.local / relpath),
+            'remote': _stat(self.remote / relpath),
+            'blocks': blocks if blocks is not None else block_hashes(data, self.block_size),
+        }
+
+    def push(self, relpath, data, stats):
+        """Write a local version to the remote side, patching blocks when possible."""
+        target = self.remote / relpath
+        base = self.files.get(relpath)
+        blocks = block_hashes(data, self.block_size)
+        ranges = None
+        if base and base['remote'] is not None and _stat(target) == base['remote']:
+            ranges = changed_ranges(blocks, base['blocks'], len(data), self.block_size)
+            if sum(end - start for start, end in ranges) > PATCH_RATIO * len(data):
+                ranges = None
+        mtime_ns = os.stat(self.local / relpath).st_mtime_ns
+        if ranges is not None:
+            patch_file(target, data, ranges)
+            stats['bytes_written'] += sum(end - start for start, end in ranges)
+            stats['patched'] += 1
+        else:
+            atomic_write_bytes(target, data)
+            stats['bytes_written'] += len(data)
+        os.utime(target, ns=(mtime_ns, mtime_ns))
+        stats['bytes_changed'] += len(data)
+        self._record(relpath, data, blocks)
+
+    def pull(self, relpath, data, stats):
+        """Write a remote version to the local side."""
+        target = self.local / relpath
+        atomic_write_bytes(target, data)
+        mtime_ns = os.stat(self.remote / relpath).st_mtime_ns
+        os.utime(target, ns=(mtime_ns, mtime_ns))
+        stats['bytes_read'] += len(data)
+        self._record(relpath, data)
+
+    def delete(self, root, relpath):
+        path = Path(root, relpath)
+        remove_quietly(path)
+        _remove_empty_dirs(path.parent, root)
+        self.files.pop(relpath, None)
+
+    @trace.traced('mirror.sync')
+    def sync(self, dry_run=False, force=False):
+        """Sync both ways once; returns a stats dict."""
+        started = time.perf_counter()
+        stats = {'pushed': [], 'pulled': [], 'deleted_local': [], 'deleted_remote': [], 'conflicts': [],
+                 'patched': 0, 'bytes_written': 0, 'bytes_changed': 0, 'bytes_read': 0, 'error': None}
+        if not self.remote.is_dir():
+            stats['error'] = f"remote memory root is not available: {self.remote}"
+            return stats
+        local = list_files(self.local)
+        remote = list_files(self.remote)
+        for name, listing in (('local', local), ('remote', remote)):
+            known = sum(1 for entry in self.files.values() if entry.get(name) is not None)
+            missing = sum(1 for relpath in self.files if relpath not in listing)
+            if not force and known and (not listing or missing * 2 > known):
+                stats['error'] = (f"{missing} of {known} synced files are gone from the {name} side; "
+                                  f"is it mounted? (use --force to sync the deletions)")
+                return stats
+
+        for relpath in sorted(local.keys() | remote.keys() | self.files.keys()):
+            base = self.files.get(relpath)
+            local_stat = local.get(relpath)
+            remote_stat = remote.get(relpath)
+            local_changed = base is None or local_stat != base['local']
+            remote_changed = base is None or remote_stat != base['remote']
+            if not local_changed and not remote_changed:
+                continue
+            if local_stat is None and remote_stat is None:
+                self.files.pop(relpath, None)
+                continue
+            local_data = _read(self.local / relpath) if local_changed and local_stat is not None else None
+            if base and local_data is not None and not remote_changed and content_hash(local_data) == base['hash']:
+                # Touched but not modified
+                if not dry_run:
+                    base['local'] = local_stat
+                continue
+
+            if local_changed and not remote_changed:
+                if local_stat is None:
+                    stats['deleted_remote'].append(relpath)
+                    if not dry_run:
+                        self.delete(self.remote, relpath)
+                else:
+                    stats['pushed'].append(relpath)
+                    if not dry_run:
+                        self.push(relpath, local_data, stats)
+                continue
+            remote_data = _read(self.remote / relpath) if remote_stat is not None else None
+            if not local_changed:
+                if remote_stat is None:
+                    stats['deleted_local'].append(relpath)
+                    if not dry_run:
+                        self.delete(self.local, relpath)
+                elif base and content_hash(remote_data) == base['hash']:
+                    if not dry_run:
+                        base['remote'] = remote_stat
+                else:
+                    stats['pulled'].append(relpath)
+                    if not dry_run:
+                        self.pull(relpath, remote_data, stats)
+                continue
+
+            # Changed on both sides (or new on both, or changed on one and deleted on the other)
+            if local_data is not None and remote_data is not None and content_hash(local_data) == content_hash(remote_data):
+                if not dry_run:
+                    self._record(relpath, local_data)
+                continue
+            if remote_data is None:
+                # Deleted remotely but edited locally: keep the edit
+                stats['pushed'].append(relpath)
+                if not dry_run:
+                    self.files.pop(relpath, None)
+                    self.push(relpath, local_data, stats)
+                continue
+            if local_data is None:
+                stats['pulled'].append(relpath)
+                if not dry_run:
+                    self.pull(relpath, remote_data, stats)
+                continue
+            copy = conflict_name(relpath)
+            stats['conflicts'].append({'path': relpath, 'kept_as': copy})
+            if not dry_run:
+                atomic_write_bytes(self.local / copy, local_data)
+                self.push(copy, local_data, stats)
+                self.pull(relpath, remote_data, stats)
+        if not dry_run:
+            self.save()
+        stats['seconds'] = time.perf_counter() - started
+        return stats
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def _report(stats, dry_run):
+    if stats['error']:
+        print(f"✗ Error: {stats['error']}")
+        return
+    prefix = 'Would sync' if dry_run else 'Synced'
+    print(f"{prefix}: {len(stats['pushed'])} pushed, {len(stats['pulled'])} pulled, "
+          f"{len(stats['deleted_remote'])} deleted remotely, {len(stats['deleted_local'])} deleted locally, "
+          f"{len(stats['conflicts'])} conflicts ({stats['seconds']:.2f}s)")
+    if stats['pushed'] and not dry_run:
+        print(f"  Wrote {stats['bytes_written']} of {stats['bytes_changed']} changed bytes to the memory root "
+              f"({stats['patched']} files patched in place)")
+    for conflict in stats['conflicts']:
+        print(f"  ⚠ Conflict: {conflict['path']} changed on both sides; local version kept as {conflict['kept_as']}")
+
+def run(args, memory_root):
+    """memory.py mirror LOCAL [--watch] [--interval S] [--dry-run] [--force] [--json]"""
+    local = Path(os.path.expandvars(os.path.expanduser(args.local))).absolute()
+    remote = Path(memory_root).absolute()
+    if local == remote or remote in local.parents or local in remote.parents:
+        print("✗ Error: the mirror must be outside the memory root (and not contain it).")
+        return 1
+    if args.block_size < 512:
+        print("✗ Error: --block-size must be at least 512 bytes.")
+        return 1
+    local.mkdir(parents=True, exist_ok=True)
+    mirror = Mirror(local, remote, block_size=args.block_size)
+    if not args.watch:
+        stats = mirror.sync(dry_run=args.dry_run, force=args.force)
+        if args.json:
+            print(dump_json(stats, pretty=True), end='')
+        else:
+            _report(stats, args.dry_run)
+        return 1 if stats['error'] or stats['conflicts'] else 0
+
+    print(f"Mirroring {remote} <-> {local} every {args.interval:g}s (Ctrl+C to stop)", file=sys.stderr)
+    while True:
+        stats = mirror.sync(force=args.force)
+        changed = any(stats[key] for key in ('pushed', 'pulled', 'deleted_local', 'deleted_remote', 'conflicts'))
+        if args.json and changed:
+            print(dump_json(stats), flush=True)
+        elif stats['error'] or changed:
+            _report(stats, False)
+            sys.stdout.flush()
+        time.sleep(args.interval)
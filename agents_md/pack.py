@@ -0,0 +1,373 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Compressed packs for cold memory files.
+
+Old sessions and topics are rarely read but still sit as loose markdown on
+cloud-synced storage. `memory.py pack my-project/session/2025-01` moves the
+markdown files below a directory into one container next to it,
+my-project/session/2025-01.mdpack:
+
+    header   b'AMDPACK1', index offset and length (<8sQQ)
+    frames   zlib-compressed slices of member files of up to FRAME_SIZE
+             bytes, cut at heading boundaries where possible
+    index    zlib-compressed JSON: {"version": 1, "members": {name: {
+             "size", "mtime_ns", "hash", "frames": [[raw_start, offset,
+             compressed_length], ...]}}}
+
+Reading a section decompresses only the frames it overlaps, never the whole
+pack. Packed files keep their paths: my-project/session/2025-01/x.md resolves
+to member "x.md" of my-project/session/2025-01.mdpack, so the search index,
+section index and memories.json keep listing (and reading) them as before.
+A loose file with the same path takes precedence over a packed one.
+"""
+
+import json
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+
+from . import trace
+from .common import (
+    PACK_SUFFIX, atomic_write_bytes, content_hash, iter_markdown_files,
+    scan_manifest,
+)
+from .markdown import split_sections
+
+PACK_VERSION = 1
+PACK_MAGIC = b'AMDPACK1'
+_HEADER = struct.Struct('<8sQQ')
+# Sections are grouped into frames of about this many uncompressed bytes
+FRAME_SIZE = 16 * 1024
+COMPRESSION_LEVEL = 9
+
+# Open packs by path, reused while the file's (size, mtime) is unchanged
+_OPEN_PACKS = {}
+
+# ============================================================================
+# FORMAT
+# ============================================================================
+def frame_boundaries(data):
+    """Raw offsets where frames start.
+
+    Consecutive sections share a frame while it stays within FRAME_SIZE; a
+    new frame starts at the next heading, and a larger section is cut every
+    FRAME_SIZE bytes so reading it never inflates more than it needs.
+    """
+    if not data:
+        return []
+    starts = sorted({0} | {section['start'] for section in split_sections(data)})
+    cuts = [0]
+    for position, start in enumerate(starts):
+        end = starts[position + 1] if position + 1 < len(starts) else len(data)
+        if start > cuts[-1] and end - cuts[-1] > FRAME_SIZE:
+            cuts.append(start)
+        cuts.extend(range(cuts[-1] + FRAME_SIZE, end, FRAME_SIZE))
+    return cuts
+
+def build_pack(members):
+    """Pack bytes for members, a list of (name, record, data)."""
+    out = bytearray(_HEADER.size)
+    index = {}
+    for name, record, data in sorted(members, key=lambda member: member[0]):
+        frames = []
+        cuts = frame_boundaries(data)
+        for position, raw_start in enumerate(cuts):
+            raw_end = cuts[position + 1] if position + 1 < len(cuts) else len(data)
+            compressed = zlib.compress(data[raw_start:raw_end], COMPRESSION_LEVEL)
+            frames.append([raw_start, len(out), len(compressed)])
+            out += compressed
+        index[name] = {'size': len(data), 'mtime_ns': record['mtime_ns'], 'hash': record['hash'], 'frames': frames}
+    table = zlib.compress(json.dumps({'version': PACK_VERSION, 'members': index},
+                                     ensure_ascii=False, separators=(',', ':')).encode('utf-8'), COMPRESSION_LEVEL)
+    _HEADER.pack_into(out, 0, PACK_MAGIC, len(out), len(table))
+    out += table
+    return bytes(out)
+
+class PackFile:
+    """Read access to one pack: its member table and random-access reads."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            magic, offset, length = _HEADER.unpack(f.read(_HEADER.size).ljust(_HEADER.size, b'\0'))
+            if magic != PACK_MAGIC:
+                raise ValueError(f"not a memory pack: {self.path}")
+            f.seek(offset)
+            try:
+                table = json.loads(zlib.decompress(f.read(length)).decode('utf-8'))
+            except (zlib.error, ValueError) as e:
+                raise ValueError(f"damaged memory pack: {self.path} ({e})")
+        if table.get('version') != PACK_VERSION:
+            raise ValueError(f"unsupported memory pack version: {self.path}")
+        self.members = table['members']
+
+    def record(self, name):
+        """Manifest-style record {size, mtime_ns, hash} of a member."""
+        member = self.members[name]
+        return {'size': member['size'], 'mtime_ns': member['mtime_ns'], 'hash': member['hash']}
+
+    def read(self, name, start=0, end=None):
+        """Bytes [start, end) of a member, decompressing only the frames they span."""
+        member = self.members[name]
+        size = member['size']
+        end = size if end is None else min(end, size)
+        frames = member['frames']
+        pieces = []
+        first = None
+        with open(self.path, 'rb') as f:
+            for position, (raw_start, offset, length) in enumerate(frames):
+                raw_end = frames[position + 1][0] if position + 1 < len(frames) else size
+                if raw_end <= start or raw_start >= end:
+                    continue
+                f.seek(offset)
+                pieces.append(zlib.decompress(f.read(length)))
+                trace.add(reads=1, bytes_read=length)
+                if first is None:
+                    first = raw_start
+        if first is None:
+            return b''
+        return b''.join(pieces)[start - first:end - first]
+
+def open_pack(path):
+    """Open a pack, reusing the parsed table while the file is unchanged."""
+    path = str(path)
+    st = os.stat(path)
+    key = (st.st_size, st.st_mtime_ns)
+    cached = _OPEN_PACKS.get(path)
+    if cached is None or cached[0] != key:
+        cached = (key, PackFile(path))
+        _OPEN_PACKS[path] = cached
+    return cached[1]
+
+def find_packed(base, relpath):
+    """(pack relpath, member name) holding a base-relative path, or None."""
+    parts = relpath.strip('/').split('/')
+    for split in range(len(parts) - 1, 0, -1):
+        pack_relpath = '/'.join(parts[:split]) + PACK_SUFFIX
+        try:
+            pack = open_pack(os.path.join(str(base), pack_relpath))
+        except (OSError, ValueError):
+            continue
+        name = '/'.join(parts[split:])
+        if name in pack.members:
+            return pack_relpath, name
+    return None
+
+# ============================================================================
+# SCANNING
+# ============================================================================
+def scan_packs(base, manifest, skip_dirs=()):
+    """Yield (relpath, record, data) for every packed member below base.
+
+    Mirrors scan_manifest: members whose hash and pack match the manifest
+    are yielded with data None and never decompressed. Records carry the
+    pack's relpath under "pack".
+    """
+    for pack_relpath, _ in iter_markdown_files(base, skip_dirs, suffixes=(PACK_SUFFIX,)):
+        try:
+            pack = open_pack(os.path.join(str(base), pack_relpath))
+        except (OSError, ValueError):
+            continue
+        prefix = pack_relpath[:-len(PACK_SUFFIX)] + '/'
+        for name in pack.members:
+            record = dict(pack.record(name), pack=pack_relpath)
+            previous = manifest.get(prefix + name)
+            if previous and previous.get('hash') == record['hash'] and previous.get('pack') == pack_relpath:
+                yield prefix + name, previous, None
+            else:
+                yield prefix + name, record, pack.read(name)
+
+def scan_with_packs(base, manifest, skip_dirs=(), paths=None):
+    """scan_manifest over loose files plus scan_packs over packed members.
+
+    With paths, packs are only opened when one of the paths is a pack;
+    otherwise packed entries of the manifest are yielded as unchanged.
+    """
+    loose = {relpath: record for relpath, record in manifest.items() if 'pack' not in record}
+    packed = {relpath: record for relpath, record in manifest.items() if 'pack' in record}
+    loose_paths = None if paths is None else [path for path in paths if not path.endswith(PACK_SUFFIX)]
+    seen = set()
+    for relpath, record, data in scan_manifest(base, loose, skip_dirs, loose_paths):
+        seen.add(relpath)
+        yield relpath, record, data
+    if paths is None or len(loose_paths) != len(set(paths)):
+        members = scan_packs(base, packed, skip_dirs)
+    else:
+        members = ((relpath, record, None) for relpath, record in packed.items())
+    for relpath, record, data in members:
+        if relpath not in seen:
+            yield relpath, record, data
+
+# ============================================================================
+# PACK / UNPACK
+# ============================================================================
+def _remove_empty_dirs(directory, stop):
+    """Remove directory and its empty parents up to (not including) stop."""
+    directory = Path(directory)
+    while directory != stop and stop in directory.parents:
+        try:
+            directory.rmdir()
+        except OSError:
+            return
+        directory = directory.parent
+
+@trace.traced('pack.directory')
+def pack_directory(directory, older_than=0, dry_run=False):
+    """Move markdown files below directory into directory.mdpack; returns stats.
+
+    Only files not modified for older_than days are packed. Files already
+    in the pack are replaced by their loose version.
+    """
+    directory = Path(directory)
+    pack_path = directory.parent / (directory.name + PACK_SUFFIX)
+    stats = {'pack': pack_path.name, 'files': 0, 'bytes': 0, 'pack_bytes': 0, 'members': 0, 'error': None}
+    members = {}
+    if pack_path.exists():
+        try:
+            pack = PackFile(pack_path)
+        except (OSError, ValueError) as e:
+            stats['error'] = str(e)
+            return stats
+        members = {name: (name, pack.record(name), pack.read(name)) for name in pack.members}
+
+    cutoff = time.time_ns() - int(older_than * 86400 * 1e9)
+    sources = []
+    for relpath, record, data in scan_manifest(directory, {}):
+        if record['mtime_ns'] > cutoff:
+            continue
+        members[relpath] = (relpath, record, data)
+        sources.append(relpath)
+        stats['files'] += 1
+        stats['bytes'] += len(data)
+    stats['members'] = len(members)
+    if not sources:
+        return stats
+    packed = build_pack(list(members.values()))
+    stats['pack_bytes'] = len(packed)
+    if dry_run:
+        return stats
+
+    atomic_write_bytes(pack_path, packed)
+    check = PackFile(pack_path)
+    for relpath in sources:
+        if content_hash(check.read(relpath)) != members[relpath][1]['hash']:
+            stats['error'] = f"{pack_path.name} did not read back correctly; files were kept"
+            return stats
+    for relpath in sources:
+        path = directory / relpath
+        os.unlink(path)
+        _remove_empty_dirs(path.parent, directory.parent)
+    return stats
+
+@trace.traced('pack.unpack')
+def unpack(pack_path, names=None, dry_run=False):
+    """Restore members (all when names is None) as loose files; returns stats.
+
+    Restored members are removed from the pack, and the pack is deleted once
+    it is empty. A loose file that already exists with other content is kept
+    and its member stays packed.
+    """
+    pack_path = Path(pack_path)
+    directory = pack_path.parent / pack_path.name[:-len(PACK_SUFFIX)]
+    pack = PackFile(pack_path)
+    wanted = list(pack.members) if names is None else names
+    stats = {'pack': pack_path.name, 'files': 0, 'bytes': 0, 'missing': [], 'conflicts': []}
+    restored = set()
+    for name in wanted:
+        if name not in pack.members:
+            stats['missing'].append(name)
+            continue
+        data = pack.read(name)
+        target = directory / name
+        record = pack.record(name)
+        if target.exists():
+            if content_hash(target.read_bytes()) != record['hash']:
+                stats['conflicts'].append(name)
+                continue
+        elif not dry_run:
+            atomic_write_bytes(target, data)
+            os.utime(target, ns=(record['mtime_ns'], record['mtime_ns']))
+        restored.add(name)
+        stats['files'] += 1
+        stats['bytes'] += len(data)
+    if dry_run or not restored:
+        return stats
+    remaining = [(name, pack.record(name), pack.read(name)) for name in pack.members if name not in restored]
+    if remaining:
+        atomic_write_bytes(pack_path, build_pack(remaining))
+    else:
+        os.unlink(pack_path)
+    return stats
+
+# ============================================================================
+# COMMANDS
+# ============================================================================
+def _target(memory_root, path):
+    """Memory-root-relative directory for a pack/unpack argument, or None."""
+    relpath = Path(path).as_posix().strip('/')
+    if Path(path).is_absolute():
+        try:
+            relpath = Path(path).relative_to(memory_root).as_posix()
+        except ValueError:
+            return None
+    if relpath.endswith(PACK_SUFFIX):
+        relpath = relpath[:-len(PACK_SUFFIX)]
+    if not relpath or relpath == '.' or any(part.startswith('.') for part in relpath.split('/')):
+        return None
+    return relpath
+
+def run_pack(args, memory_root):
+    """memory.py pack DIR [DIR ...] [--older-than DAYS] [--dry-run]"""
+    status = 0
+    for path in args.directories:
+        relpath = _target(memory_root, path)
+        if relpath is None or not (memory_root / relpath).is_dir():
+            print(f"✗ Not a directory inside the memory root: {path}")
+            status = 1
+            continue
+        stats = pack_directory(memory_root / relpath, older_than=args.older_than, dry_run=args.dry_run)
+        if stats['error']:
+            print(f"✗ {relpath}: {stats['error']}")
+            status = 1
+        elif not stats['files']:
+            print(f"{relpath}: nothing to pack")
+        else:
+            action = "would pack" if args.dry_run else "packed"
+            ratio = stats['pack_bytes'] / stats['bytes'] * 100 if stats['bytes'] else 0
+            print(f"{relpath}: {action} {stats['files']} files ({stats['bytes'] / 1024:.1f} KB) into "
+                  f"{relpath}{PACK_SUFFIX} ({stats['members']} members, {stats['pack_bytes'] / 1024:.1f} KB, "
+                  f"{ratio:.0f}%)")
+    if not args.dry_run:
+        print("Run `memory.py index` and `memory.py search --refresh` (or keep `memory.py watch` running) "
+              "to pick up the packs.")
+    return status
+
+def run_unpack(args, memory_root):
+    """memory.py unpack PACK [member ...] [--list] [--dry-run]"""
+    relpath = _target(memory_root, args.pack)
+    pack_path = memory_root / (str(relpath) + PACK_SUFFIX)
+    if relpath is None or not pack_path.is_file():
+        print(f"✗ Pack not found: {args.pack}")
+        return 1
+    try:
+        if args.list:
+            pack = PackFile(pack_path)
+            for name, member in sorted(pack.members.items()):
+                print(f"{relpath}/{name}  ({member['size']} bytes, {len(member['frames'])} frames)")
+            return 0
+        stats = unpack(pack_path, names=args.members or None, dry_run=args.dry_run)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    for name in stats['missing']:
+        print(f"✗ Not in {relpath}{PACK_SUFFIX}: {name}")
+    for name in stats['conflicts']:
+        print(f"✗ {relpath}/{name} exists with different content; kept it packed")
+    action = "Would restore" if args.dry_run else "Restored"
+    print(f"{action} {stats['files']} files ({stats['bytes'] / 1024:.1f} KB) from {relpath}{PACK_SUFFIX}")
+    return 1 if stats['missing'] or stats['conflicts'] else 0
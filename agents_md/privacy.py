@@ -0,0 +1,308 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Privacy scanner for memory files outside private/.
+
+The "Privacy Check (MANDATORY FIRST)" rule keeps credentials, emails, names
+and API keys in private/ only, but nothing verified it. `memory.py privacy`
+scans every other markdown file (topic/, session/, common/, ...) and reports
+file:line:column spans with the matched text masked:
+
+    my-project/topic/deploy.md:12:9: aws-access-key AKIA****************
+
+One combined trigger pattern (an alternation of literal anchors) finds
+candidate lines in a single pass per file; only those lines are checked with
+the exact rule patterns:
+
+    private-value   literal values found in private/ files ("- **Email**: ...",
+                    `backticked` values), so a leaked name or password is
+                    found wherever it was copied
+    known formats   private keys, AWS/GitHub/Slack/Google keys, sk- API keys,
+                    JWTs, emails, "password: ..." style assignments
+    high-entropy    long base64/hex-like tokens, kept only when their Shannon
+                    entropy and character mix look random
+
+Findings are cached in MEMORY_PATH/.agents-md/privacy.json per file hash, so
+a re-scan only reads new or changed files (and everything again when private/
+or the rules change). Changed files are spread over a process pool. A line
+containing <!-- privacy:ignore --> is never reported.
+"""
+
+import hashlib
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import trace
+from .common import (
+    PRIVATE_DIR, content_hash, dump_json, iter_markdown_files, load_json,
+    state_path, write_json,
+)
+
+CACHE_VERSION = 1
+CACHE_FILE = "privacy.json"
+# Bump when RULES or the filters change so cached findings are recomputed
+RULES_VERSION = 1
+IGNORE_MARKER = "privacy:ignore"
+# Below this many changed files the scan runs in-process
+PARALLEL_MIN_FILES = 256
+BATCH_SIZE = 128
+ENTROPY_MIN_LENGTH = 24
+ENTROPY_THRESHOLD = 4.0
+
+# name, lowercase trigger literals, exact pattern (run on lines with a trigger)
+RULES = (
+    ('private-key', ('-----begin',), r'-----BEGIN (?:[A-Z]+ )*PRIVATE KEY-----'),
+    ('aws-access-key', ('akia', 'asia'), r'\b(?:AKIA|ASIA)[0-9A-Z]{16}\b'),
+    ('github-token', ('ghp_', 'gho_', 'ghu_', 'ghs_', 'ghr_', 'github_pat_'),
+     r'\b(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{22,})'),
+    ('slack-token', ('xox',), r'\bxox[abposr]-[A-Za-z0-9-]{10,}'),
+    ('google-api-key', ('aiza',), r'\bAIza[0-9A-Za-z_-]{35}'),
+    ('api-key', ('sk-',), r'\bsk-(?:[a-z]+-)?[A-Za-z0-9_-]{20,}'),
+    ('jwt', ('eyj',), r'\beyJ[A-Za-z0-9_-]{8,}\.eyJ[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]{8,}'),
+    ('credential', ('passw', 'pwd', 'secret', 'apikey', 'api_key', 'api-key', 'token'),
+     r'(?i:\b(?:password|passwd|pwd|secret|api[_-]?key|access[_-]?token|auth[_-]?token|client[_-]?secret)\b)'
+     r'["\'`*]*[ \t]*[:=][ \t]*["\'`]?[^\s"\'`]{6,}'),
+    ('email', ('@',), r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b'),
+)
+_ENTROPY_TOKEN_RE = re.compile(r'(?<![A-Za-z0-9_+/=-])[A-Za-z0-9_+/=-]{%d,}(?![A-Za-z0-9_+/=-])' % ENTROPY_MIN_LENGTH)
+
+_PLACEHOLDER_RE = re.compile(r'^(?:<.*>|\$\{?\w+\}?|\{.*\}|x+|\.+|(?:your|my|example|dummy|placeholder)\b.*'
+                             r'|.*\*\*\*.*|.*(?:hidden|redacted|masked).*)$', re.IGNORECASE)
+_EXAMPLE_DOMAINS = ('example.com', 'example.org', 'example.net', 'localhost', 'users.noreply.github.com')
+_LABEL_VALUE_RE = re.compile(r'^\s*(?:[-*+]\s+)?(?:\*\*)?[^:\n*`]{1,40}?(?:\*\*)?\s*[:：]\s*(.+?)\s*$', re.MULTILINE)
+_BACKTICK_RE = re.compile(r'`([^`\n]+)`')
+_TRIVIAL_VALUES = frozenset(('yes', 'no', 'true', 'false', 'none', 'null', 'n/a', 'todo', 'tbd', 'unknown'))
+
+# Compiled matcher of the current process (set by the pool initializer)
+_MATCHER = None
+
+# ============================================================================
+# RULES
+# ============================================================================
+def private_literals(memory_root):
+    """Values worth protecting, collected from the markdown files in private/.
+
+    Takes the value of every "Label: value" line and every `backticked`
+    value, skipping placeholders and values too short to be distinctive.
+    """
+    literals = set()
+    private_dir = os.path.join(str(memory_root), PRIVATE_DIR)
+    for relpath, _ in iter_markdown_files(private_dir):
+        try:
+            with open(os.path.join(private_dir, relpath), 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+        except OSError:
+            continue
+        values = [value.strip('`"\' ') for value in _LABEL_VALUE_RE.findall(text)]
+        values.extend(value.strip() for value in _BACKTICK_RE.findall(text))
+        for value in values:
+            if len(value) < 4 or len(value) > 200 or value.startswith('#') or value.lower() in _TRIVIAL_VALUES:
+                continue
+            if value.startswith(('<!--', '//')) or _PLACEHOLDER_RE.match(value):
+                continue
+            literals.add(value)
+    return sorted(literals)
+
+def rules_digest(literals):
+    """Cache key for a rule set; a hash, so private values are never stored."""
+    data = '\0'.join([str(RULES_VERSION), str(ENTROPY_THRESHOLD)] + sorted(literals)).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def shannon_entropy(value):
+    """Bits per character of value."""
+    counts = {}
+    for char in value:
+        counts[char] = counts.get(char, 0) + 1
+    size = len(value)
+    return -sum(count / size * math.log2(count / size) for count in counts.values())
+
+def _looks_random(value):
+    # Paths, URLs and identifiers are long too; secrets mix cases and digits
+    if value.count('/') > 1 or value.count('-') > 3 or value.count('_') > 3:
+        return False
+    classes = sum((any(c.islower() for c in value), any(c.isupper() for c in value), any(c.isdigit() for c in value)))
+    return classes == 3 and shannon_entropy(value) >= ENTROPY_THRESHOLD
+
+def _accept(rule, value):
+    """Filter out matches that are formats of non-secrets."""
+    if rule == 'high-entropy':
+        return _looks_random(value)
+    if rule == 'email':
+        user, domain = value.lower().split('@', 1)
+        # git@github.com:org/repo is a remote, not an address
+        return user != 'git' and not domain.endswith(_EXAMPLE_DOMAINS)
+    if rule == 'credential':
+        secret = re.split(r'[:=]', value, 1)[1].strip(' \t"\'`')
+        return not _PLACEHOLDER_RE.match(secret)
+    return True
+
+def mask(value, keep=4):
+    """Masked form of a match for reports: its first characters, then stars."""
+    if len(value) <= keep * 2:
+        return '*' * len(value)
+    return value[:keep] + '*' * min(len(value) - keep, 24)
+
+# ============================================================================
+# SCANNING
+# ============================================================================
+class Matcher:
+    """Combined matcher for all rules and the private literals.
+
+    A single alternation of lowercase trigger literals (rule anchors such as
+    "akia" or "@", and the private values) runs over the lowercased text;
+    only lines with a trigger are checked against the exact rule patterns.
+    Long tokens are collected by one more pass for the entropy check.
+    """
+
+    def __init__(self, literals=()):
+        # Trigger text -> rule; plain alternation without groups keeps re fast
+        self.kinds = {}
+        self.rules = []
+        for number, (name, triggers, pattern) in enumerate(RULES):
+            self.rules.append((name, re.compile(pattern)))
+            for trigger in triggers:
+                self.kinds[trigger] = number
+        for literal in literals:
+            self.kinds[literal.lower()] = None
+        alternatives = sorted(self.kinds, key=lambda value: (-len(value), value))
+        self.triggers = re.compile('|'.join(re.escape(value) for value in alternatives))
+
+    def find(self, text):
+        """Yield (rule, offset, matched text) for every finding in text."""
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters change length when lowercased; keep offsets exact
+            lowered = ''.join(char if len(char.lower()) != 1 else char.lower() for char in text)
+        checked = set()
+        for trigger in self.triggers.finditer(lowered):
+            kind = self.kinds[trigger.group()]
+            start = trigger.start()
+            if kind is None:
+                end = trigger.end()
+                if start > 0 and text[start - 1].isalnum() and text[start].isalnum():
+                    continue
+                if end < len(text) and text[end].isalnum() and text[end - 1].isalnum():
+                    continue
+                yield 'private-value', start, text[start:end]
+                continue
+            line_start = text.rfind('\n', 0, start) + 1
+            if (kind, line_start) in checked:
+                continue
+            checked.add((kind, line_start))
+            line_end = text.find('\n', start)
+            line_end = len(text) if line_end < 0 else line_end
+            name, pattern = self.rules[kind]
+            for match in pattern.finditer(text, line_start, line_end):
+                yield name, match.start(), match.group()
+        for match in _ENTROPY_TOKEN_RE.finditer(text):
+            yield 'high-entropy', match.start(), match.group()
+
+def find_secrets(text, matcher):
+    """Findings (rule, line, column, masked match) in one file's text, in order."""
+    findings = []
+    seen = set()
+    for rule, start, value in sorted(matcher.find(text), key=lambda hit: hit[1]):
+        if start in seen or not _accept(rule, value):
+            continue
+        seen.add(start)
+        line_start = text.rfind('\n', 0, start) + 1
+        line_end = text.find('\n', start)
+        if IGNORE_MARKER in text[line_start:line_end if line_end >= 0 else len(text)]:
+            continue
+        findings.append({'rule': rule, 'line': text.count('\n', 0, start) + 1,
+                         'column': start - line_start + 1, 'match': mask(value)})
+    return findings
+
+def _init_worker(literals):
+    global _MATCHER
+    _MATCHER = Matcher(literals)
+
+def scan_files(base, relpaths):
+    """Read, hash and scan files; returns [(relpath, record, findings)]."""
+    results = []
+    for relpath in relpaths:
+        path = os.path.join(base, relpath)
+        try:
+            with open(path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                data = f.read()
+        except OSError:
+            continue
+        record = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': content_hash(data)}
+        results.append((relpath, record, find_secrets(data.decode('utf-8', errors='replace'), _MATCHER)))
+    return results
+
+@trace.traced('privacy.scan')
+def scan(memory_root, prefixes=(), full=False, jobs=None):
+    """Scan memory files outside private/; returns a report dict."""
+    started = time.perf_counter()
+    literals = private_literals(memory_root)
+    digest = rules_digest(literals)
+    path = state_path(memory_root, CACHE_FILE)
+    cache = load_json(path, {})
+    if full or not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION or cache.get('rules') != digest:
+        cache = {}
+    previous = cache.get('files', {})
+
+    files = {}
+    changed = []
+    for relpath, st in iter_markdown_files(memory_root, (PRIVATE_DIR,)):
+        entry = previous.get(relpath)
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            files[relpath] = entry
+        else:
+            changed.append(relpath)
+
+    base = str(memory_root)
+    if jobs == 1 or len(changed) < PARALLEL_MIN_FILES:
+        _init_worker(literals)
+        results = scan_files(base, changed)
+    else:
+        batches = [changed[i:i + BATCH_SIZE] for i in range(0, len(changed), BATCH_SIZE)]
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(literals,)) as pool:
+            results = [result for batch in pool.map(scan_files, [base] * len(batches), batches) for result in batch]
+    for relpath, record, findings in results:
+        files[relpath] = dict(record, findings=findings)
+    if changed or files.keys() != previous.keys():
+        write_json(path, {'version': CACHE_VERSION, 'rules': digest, 'files': files})
+
+    prefixes = tuple(prefix.strip('/') + '/' for prefix in prefixes if prefix.strip('/'))
+    findings = []
+    for relpath in sorted(files):
+        if prefixes and not relpath.startswith(prefixes):
+            continue
+        findings.extend(dict(finding, path=relpath) for finding in files[relpath]['findings'])
+    return {
+        'files': len(files),
+        'scanned': len(results),
+        'findings': findings,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def run(args, memory_root):
+    """memory.py privacy [path ...] [--full] [--jobs N] [--json]"""
+    if args.jobs is not None and args.jobs < 1:
+        print("✗ Error: --jobs must be at least 1.")
+        return 1
+    report = scan(memory_root, prefixes=args.paths, full=args.full, jobs=args.jobs)
+    if args.json:
+        print(dump_json(report, pretty=True), end='')
+    else:
+        for finding in report['findings']:
+            print(f"{finding['path']}:{finding['line']}:{finding['column']}: {finding['rule']} {finding['match']}")
+        files = len({finding['path'] for finding in report['findings']})
+        if report['findings']:
+            print(f"⚠️  {len(report['findings'])} possible private values in {files} files; "
+                  f"move them to {PRIVATE_DIR}/ or mark the line with <!-- {IGNORE_MARKER} -->")
+        else:
+            print("✓ No private values found outside private/")
+        print(f"{report['files']} files checked, {report['scanned']} scanned ({report['seconds']:.3f}s)")
+    return 1 if report['findings'] else 0
@@ -0,0 +1,166 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Render-and-write pipeline for AGENTS.md / GEMINI.md.
+
+Each target is rendered once in memory (template plus MEMORY_PATH), compared
+with what is on disk by content hash, and only changed targets are written.
+Writes are transactional: every changed target is first written to a temp
+file next to it, and only when all of them succeeded are they renamed over
+the originals. Readers (editors, agents, a network home directory) therefore
+see either the old or the new file, never a half-written one.
+"""
+
+import difflib
+import os
+import re
+import shutil
+from pathlib import Path
+
+from . import trace
+from .common import content_hash, remove_quietly, write_temp_file
+
+MEMORY_PATH_PLACEHOLDER = "{MEMORY_PATH}"
+MEMORY_PATH_DEFINITION_RE = re.compile(r'\*\*MEMORY_PATH\*\*:\s*`?([^`\n]+)`?')
+# Placeholders and the definition line are substituted in a single pass
+_RENDER_RE = re.compile(re.escape(MEMORY_PATH_PLACEHOLDER) + '|' + MEMORY_PATH_DEFINITION_RE.pattern)
+
+# ============================================================================
+# RENDERING
+# ============================================================================
+def render_memory_path(content, memory_path):
+    """Fill {MEMORY_PATH} placeholders and the first **MEMORY_PATH** definition.
+
+    Paths are written with forward slashes, which Windows accepts and AI
+    agents understand everywhere. Content is returned unchanged when
+    memory_path is empty.
+    """
+    if not memory_path:
+        return content
+    normalized_path = memory_path.replace('\\', '/')
+    definition_done = False
+
+    def replace(match):
+        nonlocal definition_done
+        if match.group(0) == MEMORY_PATH_PLACEHOLDER:
+            return normalized_path
+        if definition_done:
+            return match.group(0)
+        definition_done = True
+        return f'**MEMORY_PATH**: `{normalized_path}`'
+
+    return _RENDER_RE.sub(replace, content)
+
+def has_memory_path_definition(content):
+    """Whether content has a **MEMORY_PATH** definition line to update."""
+    return MEMORY_PATH_DEFINITION_RE.search(content) is not None
+
+# ============================================================================
+# PLANNING
+# ============================================================================
+def read_bytes(path):
+    """Current bytes of a file, or None when it does not exist."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    trace.add(reads=1, bytes_read=len(data))
+    return data
+
+@trace.traced('render.plan_writes')
+def plan_writes(targets, current=None):
+    """Plan writing rendered text to each target path.
+
+    targets maps paths to their rendered text; current maps paths the caller
+    has already read to their bytes (None for missing files), so no target is
+    read twice. Returns one dict per target with path, old and new bytes and
+    whether it changed.
+    """
+    current = current or {}
+    plan = []
+    for path, text in targets.items():
+        new = text.encode('utf-8')
+        old = current[path] if path in current else read_bytes(path)
+        plan.append({
+            'path': Path(path),
+            'old': old,
+            'new': new,
+            'changed': old is None or content_hash(old) != content_hash(new),
+        })
+    return plan
+
+def diff_plan(plan):
+    """Unified diff of every changed target in a plan."""
+    chunks = []
+    for entry in plan:
+        if not entry['changed']:
+            continue
+        name = entry['path'].name
+        old_lines = [] if entry['old'] is None else entry['old'].decode('utf-8', errors='replace').splitlines(True)
+        new_lines = entry['new'].decode('utf-8').splitlines(True)
+        from_file = '/dev/null' if entry['old'] is None else 'a/' + name
+        lines = difflib.unified_diff(old_lines, new_lines, fromfile=from_file, tofile='b/' + name)
+        chunks.append(''.join(line if line.endswith('\n') else line + '\n' for line in lines))
+    return ''.join(chunks)
+
+# ============================================================================
+# COMMIT
+# ============================================================================
+def backup_file(path, backup_path):
+    """Keep the current version of path as backup_path.
+
+    A hard link costs no data copy and stays valid because the new version
+    is renamed over path (a new inode); filesystems without links get a copy.
+    """
+    with trace.span('render.backup', path=str(backup_path)) as span:
+        remove_quietly(backup_path)
+        try:
+            os.link(path, backup_path)
+            span.set(method='link')
+        except OSError:
+            shutil.copy2(path, backup_path)
+            span.set(method='copy')
+            trace.add(writes=1, bytes_written=os.path.getsize(backup_path))
+        trace.add(backups=1)
+
+@trace.traced('render.commit_plan')
+def commit_plan(plan, backups=None):
+    """Write every changed target of a plan atomically.
+
+    All temp files are written before the first rename, so a failure (disk
+    full, permission denied) leaves every target untouched. backups maps
+    target paths to backup paths made of changed targets before they are
+    replaced; a failed backup never blocks the update. Symlinked targets are
+    written through to the file they point at. Returns the written paths.
+    """
+    backups = backups or {}
+    pending = []
+    try:
+        for entry in plan:
+            if entry['changed']:
+                real_path = os.path.realpath(entry['path'])
+                pending.append((write_temp_file(real_path, entry['new']), real_path, entry))
+    except BaseException:
+        for tmp_path, _, _ in pending:
+            remove_quietly(tmp_path)
+        raise
+
+    written = []
+    for position, (tmp_path, real_path, entry) in enumerate(pending):
+        backup_path = backups.get(entry['path'])
+        if backup_path and entry['old'] is not None:
+            try:
+                backup_file(real_path, backup_path)
+            except OSError:
+                pass
+        try:
+            os.replace(tmp_path, real_path)
+        except BaseException:
+            for rest, _, _ in pending[position:]:
+                remove_quietly(rest)
+            raise
+        written.append(entry['path'])
+    return written
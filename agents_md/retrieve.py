@@ -0,0 +1,219 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Token-budgeted retrieval planner.
+
+Runs the rag.md decision tree under a hard token budget:
+
+    1. Index Lookup    match the query against memories.json titles/tags/keywords
+    2. Search          BM25 over the search index
+    3. Header Scan     section lists of the best candidate files
+    4. Selective Read  pack the best-scoring sections into what is left
+
+Every stage is charged the estimated tokens of what it would put in an
+agent's context, so the report shows what each level really costs and how
+much was saved against reading the candidate files in full. The first three
+stages only lead to sections, so together they may spend at most
+STAGE_CEILINGS of the budget; at least the rest is left for reading.
+"""
+
+import math
+import sys
+import time
+
+from . import trace
+from .common import MEMORY_INDEX, dump_json, list_projects, load_json
+from .search import SearchIndex, update_search_index
+from .sections import SectionIndex
+from .text import estimate_tokens, tokenize
+
+INDEX_MATCH_LIMIT = 10
+SEARCH_LIMIT = 10
+# Share of the budget that the stages up to and including each one may
+# spend; what an earlier stage leaves unused carries over to the next
+STAGE_CEILINGS = {'index': 0.15, 'search': 0.3, 'headers': 0.45}
+
+# ============================================================================
+# STAGES
+# ============================================================================
+def _index_lookup(memory_root, projects, terms):
+    """Stage 1: score memories.json entries by title/tag/keyword/heading overlap."""
+    matches = []
+    for project in projects:
+        document = load_json(memory_root / project / MEMORY_INDEX, {})
+        files = document.get('files') if isinstance(document, dict) else None
+        if not isinstance(files, dict):
+            continue
+        for relpath, entry in files.items():
+            if not isinstance(entry, dict):
+                continue
+            labels = ' '.join([str(entry.get('title', ''))] + list(entry.get('tags', [])) + list(entry.get('keywords', [])))
+            score = 2 * len(terms.intersection(tokenize(labels)))
+            score += len(terms.intersection(tokenize(' '.join(entry.get('headings', [])))))
+            if score:
+                line = f"{project}/{relpath}: {entry.get('title', '')} [{', '.join(entry.get('tags', []))}]"
+                matches.append((score, f"{project}/{relpath}", line))
+    matches.sort(key=lambda match: -match[0])
+    return matches[:INDEX_MATCH_LIMIT]
+
+def _section_score(text, title, terms, idf):
+    """BM25-style score of one section for the query terms."""
+    counts = {}
+    for token in tokenize(text):
+        if token in terms:
+            counts[token] = counts.get(token, 0) + 1
+    title_terms = terms.intersection(tokenize(title))
+    score = 0.0
+    for term, tf in counts.items():
+        score += idf.get(term, 1.0) * tf * 2.2 / (tf + 1.2)
+    for term in title_terms:
+        score += idf.get(term, 1.0)
+    return score
+
+# ============================================================================
+# PLANNER
+# ============================================================================
+@trace.traced('retrieve.plan')
+def plan_retrieval(memory_root, query, budget, projects=None, max_files=5):
+    """Retrieve the best sections for query within budget tokens.
+
+    Returns a dict with the selected sections, per-stage token spend and the
+    baseline cost of reading the candidate files in full.
+    """
+    started = time.perf_counter()
+    terms = set(tokenize(query))
+    restrict = bool(projects)
+    projects = projects or list_projects(memory_root)
+    stages = []
+    spent = 0
+
+    def charge(stage, blocks, elapsed):
+        """Charge whole blocks of context lines until the stage's ceiling is reached."""
+        nonlocal spent
+        ceiling = int(budget * STAGE_CEILINGS[stage])
+        kept = 0
+        tokens = 0
+        for block in blocks:
+            cost = sum(estimate_tokens(line) + 1 for line in block)
+            if spent + tokens + cost > ceiling:
+                break
+            kept += 1
+            tokens += cost
+        spent += tokens
+        stages.append({'stage': stage, 'tokens': tokens, 'items': kept, 'ms': round(elapsed * 1000, 2)})
+        return kept
+
+    # 1. Index Lookup
+    stage_started = time.perf_counter()
+    matches = _index_lookup(memory_root, projects, terms)
+    kept = charge('index', [[line] for _, _, line in matches], time.perf_counter() - stage_started)
+    candidates = {}
+    for score, relpath, _ in matches[:kept]:
+        candidates[relpath] = candidates.get(relpath, 0.0) + score
+
+    # 2. Search
+    stage_started = time.perf_counter()
+    index = SearchIndex.open(memory_root)
+    if index is None:
+        update_search_index(memory_root)
+        index = SearchIndex.open(memory_root)
+    # Filtered while ranking: the top hits of the whole root may all be elsewhere
+    prefixes = tuple(project + '/' for project in projects)
+    results = index.search(query, limit=SEARCH_LIMIT,
+                           accept=(lambda path: path.startswith(prefixes)) if restrict else None)
+    idf = {}
+    for term in terms:
+        entry = index.lookup(term)
+        if entry is not None:
+            idf[term] = math.log(1.0 + (index.doc_count - entry[0] + 0.5) / (entry[0] + 0.5))
+    index.close()
+    kept = charge('search', [[f"{result['path']}: {result['title']}"] for result in results],
+                  time.perf_counter() - stage_started)
+    top_score = results[0]['score'] if results else 1.0
+    for result in results[:kept]:
+        candidates[result['path']] = candidates.get(result['path'], 0.0) + 2.0 * result['score'] / (top_score or 1.0)
+
+    # 3. Header Scan
+    stage_started = time.perf_counter()
+    sections_index = SectionIndex(memory_root)
+    ranked_files = sorted(candidates, key=lambda relpath: -candidates[relpath])[:max_files]
+    header_blocks = []
+    listed = []
+    for relpath in ranked_files:
+        sections = sections_index.sections(relpath)
+        if sections:
+            listed.append((relpath, sections))
+            header_blocks.append([relpath] + [f"  L{section['line']} {'#' * section['level']} {section['title']}"
+                                              for section in sections])
+    kept = charge('headers', header_blocks, time.perf_counter() - stage_started)
+    file_sections = dict(listed[:kept])
+    baseline = sum(section['tokens'] for _, sections in listed for section in sections)
+
+    # 4. Selective Read
+    stage_started = time.perf_counter()
+    scored = []
+    for relpath, sections in file_sections.items():
+        prior = candidates[relpath]
+        for number, section in enumerate(sections):
+            text = sections_index.read(relpath, section)
+            score = _section_score(text, section['title'], terms, idf)
+            if score > 0:
+                scored.append((score * (1.0 + 0.1 * prior), relpath, number, section, text))
+    sections_index.save()
+    scored.sort(key=lambda item: -item[0])
+    selected = []
+    read_tokens = 0
+    for score, relpath, number, section, text in scored:
+        cost = estimate_tokens(text)
+        if spent + read_tokens + cost > budget:
+            continue
+        read_tokens += cost
+        selected.append({'path': relpath, 'section': number, 'title': section['title'],
+                         'line': section['line'], 'tokens': cost, 'score': round(score, 4), 'text': text})
+    spent += read_tokens
+    stages.append({'stage': 'sections', 'tokens': read_tokens, 'items': len(selected),
+                   'ms': round((time.perf_counter() - stage_started) * 1000, 2)})
+
+    return {
+        'query': query,
+        'budget': budget,
+        'spent': spent,
+        'baseline': baseline,
+        'reduction': round(1.0 - spent / baseline, 4) if baseline else None,
+        'stages': stages,
+        'sections': selected,
+        'ms': round((time.perf_counter() - started) * 1000, 2),
+    }
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def run(args, memory_root):
+    """memory.py retrieve QUERY --budget N [--project NAME] [--json]"""
+    query = ' '.join(args.query)
+    if args.budget <= 0:
+        print("✗ Error: --budget must be a positive number of tokens.")
+        return 1
+    plan = plan_retrieval(memory_root, query, args.budget, projects=args.project, max_files=args.max_files)
+    if args.json:
+        print(dump_json(plan, pretty=True), end='')
+        return 0
+
+    for section in plan['sections']:
+        print(f"=== {section['path']} #{section['section']} (L{section['line']}, {section['tokens']} tokens)")
+        print(section['text'].rstrip('\n'))
+        print()
+    # The report goes to stderr so stdout stays pasteable context
+    report = sys.stderr
+    print(f"Token budget: {plan['spent']}/{plan['budget']} spent in {plan['ms']:.1f} ms", file=report)
+    for stage in plan['stages']:
+        print(f"  {stage['stage']:<9} {stage['tokens']:>6} tokens  {stage['items']:>4} items  {stage['ms']:>8.2f} ms",
+              file=report)
+    if plan['sections'] and plan['reduction'] is not None:
+        print(f"  Full read of candidate files: {plan['baseline']} tokens "
+              f"({plan['reduction'] * 100:.0f}% reduction)", file=report)
+    if not plan['sections']:
+        print("No matching sections fit the budget.", file=report)
+    return 0
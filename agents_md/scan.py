@@ -0,0 +1,265 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Scanner for AGENTS.md / GEMINI.md copies across large directory trees.
+
+setup.py only looks at its own checkout, but copies of the two files end
+up in every repository of a monorepo and in many checkouts, at different
+template versions and languages, some still holding the placeholder path.
+`setup.py --scan DIR` finds them all:
+
+    walk      os.scandir, no stat calls (the directory entry type is enough),
+              never descending into SKIP_DIRS (.git, node_modules, build
+              output, virtualenvs) or symlinked directories; with jobs > 1
+              directories are listed on a thread pool, which pays off on
+              network and cloud-synced filesystems
+    classify  each file is read once, on the same pool, for its language
+              (the memory heading), its MEMORY_PATH and whether it is
+              exactly the current template of its language rendered with
+              that path, or else exactly a released older one
+
+Statuses:
+    current   identical to what setup.py would write today
+    outdated  byte for byte an older released template (RELEASED_TEMPLATES),
+              once its MEMORY_PATH is put back to the placeholder
+    modified  an agents-md file that differs from every released template,
+              i.e. edited by hand; never upgraded, and neither is its
+              directory, so the edits are not lost
+    foreign   an unrelated AGENTS.md: no agents-md heading or MEMORY_PATH;
+              never upgraded, and neither is its directory (an upgrade
+              writes both files)
+
+Upgrading (setup.py --scan DIR --upgrade) re-renders the outdated
+directories through the regular batch mode, keeping each file's MEMORY_PATH
+and the replaced files as AGENTS.md.backup / GEMINI.md.backup.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from . import trace
+from .common import content_hash
+from .config import PLACEHOLDER_MEMORY_PATH, detect_language, find_memory_path
+from .render import has_memory_path_definition, render_memory_path
+
+TARGET_NAMES = frozenset(("AGENTS.md", "GEMINI.md"))
+SKIP_DIRS = frozenset((
+    ".git", ".hg", ".svn", "node_modules", "bower_components", "__pycache__",
+    ".venv", "venv", ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache",
+    ".gradle", ".idea", ".next", ".nuxt", ".cache", "dist", "build", "target",
+    "vendor", "Pods", "DerivedData", ".terraform", ".agents-md",
+))
+STATUSES = ('current', 'outdated', 'modified', 'foreign')
+# template_digest() of every released AGENTS.md.en / AGENTS.md.ja older than
+# the current ones. When a template changes, add the digest of the version it
+# replaces, so copies of that release are upgraded instead of held.
+RELEASED_TEMPLATES = frozenset()
+
+# ============================================================================
+# WALKING
+# ============================================================================
+def _list_directory(directory, names, skip_dirs):
+    """(matching files, subdirectories, entries) of one directory."""
+    files = []
+    subdirs = []
+    entries = 0
+    try:
+        iterator = os.scandir(directory)
+    except OSError:
+        return files, subdirs, entries
+    with iterator:
+        for entry in iterator:
+            entries += 1
+            name = entry.name
+            try:
+                if name in names:
+                    if entry.is_file():
+                        files.append(entry.path)
+                elif name not in skip_dirs and entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+            except OSError:
+                continue
+    return files, subdirs, entries
+
+def find_config_files(roots, jobs=1, names=TARGET_NAMES, skip_dirs=SKIP_DIRS):
+    """Sorted paths of every AGENTS.md / GEMINI.md below roots, plus walk stats."""
+    started = time.perf_counter()
+    found = []
+    directories = entries = 0
+    pending = [str(root) for root in roots]
+    with trace.span('scan.walk', roots=len(pending), jobs=jobs) as span:
+        if jobs <= 1:
+            while pending:
+                files, subdirs, count = _list_directory(pending.pop(), names, skip_dirs)
+                found.extend(files)
+                pending.extend(subdirs)
+                directories += 1
+                entries += count
+        else:
+            found, directories, entries = _walk_threaded(pending, jobs, names, skip_dirs)
+        span.set(directories=directories, entries=entries, found=len(found))
+    stats = {'directories': directories, 'entries': entries, 'seconds': time.perf_counter() - started}
+    return sorted(found), stats
+
+def _walk_threaded(roots, jobs, names, skip_dirs):
+    """Breadth-first walk with jobs threads listing directories concurrently."""
+    work = queue.Queue()
+    lock = threading.Lock()
+    totals = {'found': [], 'directories': 0, 'entries': 0}
+
+    def worker():
+        while True:
+            directory = work.get()
+            if directory is None:
+                work.task_done()
+                return
+            files, subdirs, count = _list_directory(directory, names, skip_dirs)
+            for subdir in subdirs:
+                work.put(subdir)
+            with lock:
+                totals['found'].extend(files)
+                totals['directories'] += 1
+                totals['entries'] += count
+            work.task_done()
+
+    for root in roots:
+        work.put(root)
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(jobs)]
+    for thread in threads:
+        thread.start()
+    work.join()
+    for _ in threads:
+        work.put(None)
+    for thread in threads:
+        thread.join()
+    return totals['found'], totals['directories'], totals['entries']
+
+# ============================================================================
+# CLASSIFYING
+# ============================================================================
+def load_templates(source_dir):
+    """{language: template text} of the AGENTS.md.en / .ja sources in source_dir."""
+    templates = {}
+    for language in ('en', 'ja'):
+        try:
+            with open(Path(source_dir, f"AGENTS.md.{language}"), 'rb') as f:
+                templates[language] = f.read().decode('utf-8')
+        except (OSError, UnicodeDecodeError):
+            continue
+    return templates
+
+def template_digest(text):
+    """Digest of a template or rendered file with its MEMORY_PATH put back to the placeholder."""
+    return content_hash(render_memory_path(text, PLACEHOLDER_MEMORY_PATH).encode('utf-8'))
+
+def classify_file(path, templates, released=None):
+    """Language, MEMORY_PATH and template status of one AGENTS.md / GEMINI.md.
+
+    released holds template_digest() values of older templates (default
+    RELEASED_TEMPLATES); a file that is neither the current template nor one
+    of those is 'modified'.
+    """
+    result = {'path': str(path), 'name': os.path.basename(path), 'language': None,
+              'memory_path': None, 'placeholder': False, 'status': 'foreign', 'error': None}
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        result['error'] = str(e)
+        return result
+    trace.add(reads=1, bytes_read=len(data))
+    text = data.decode('utf-8', errors='replace')
+    language = detect_language(text.splitlines())
+    defined = has_memory_path_definition(text)
+    if language == 'unknown' and not defined:
+        return result
+    result['language'] = None if language == 'unknown' else language
+    memory_path = find_memory_path(text)
+    result['memory_path'] = memory_path.replace('\\', '/') if memory_path else None
+    result['placeholder'] = defined and memory_path is None and PLACEHOLDER_MEMORY_PATH in text
+    template = templates.get(language)
+    if template is not None and render_memory_path(template, memory_path) == text:
+        result['status'] = 'current'
+    elif template_digest(text) in (RELEASED_TEMPLATES if released is None else released):
+        result['status'] = 'outdated'
+    else:
+        result['status'] = 'modified'
+    return result
+
+@trace.traced('scan.classify')
+def classify_files(paths, templates, jobs=1, released=None):
+    """classify_file over paths, on a thread pool when jobs > 1."""
+    if jobs <= 1 or len(paths) < 2:
+        return [classify_file(path, templates, released) for path in paths]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(lambda path: classify_file(path, templates, released), paths))
+
+def scan(roots, templates, jobs=1, released=None):
+    """Find and classify every AGENTS.md / GEMINI.md below roots.
+
+    Returns (results, stats); stats has the walk counters plus per-status
+    and per-language counts.
+    """
+    paths, stats = find_config_files(roots, jobs=jobs)
+    started = time.perf_counter()
+    results = classify_files(paths, templates, jobs=jobs, released=released)
+    stats['classify_seconds'] = time.perf_counter() - started
+    stats['files'] = len(results)
+    for status in STATUSES:
+        stats[status] = sum(1 for result in results if result['status'] == status)
+    stats['placeholder'] = sum(1 for result in results if result['placeholder'])
+    stats['languages'] = dict(Counter(result['language'] for result in results if result['language']))
+    return results, stats
+
+def upgrade_targets(results, target_lang=None, memory_path=None):
+    """(targets, held) of the directories that are not current.
+
+    targets is {directory: (language, memory path)}. A directory is upgraded
+    to target_lang, or else to the language of its AGENTS.md (of its
+    GEMINI.md when it has no AGENTS.md), keeping the MEMORY_PATH of either
+    file; memory_path only fills in directories that still hold the
+    placeholder. Directories whose language is unknown are left alone unless
+    target_lang is given. A directory with only one of the two files gets
+    the other one, as setup.py always writes both.
+
+    held lists the directories that would be upgraded but also hold a
+    foreign or modified file: an upgrade writes both files, so they are
+    left alone.
+    """
+    directories = {}
+    for result in results:
+        directory = os.path.dirname(result['path'])
+        entry = directories.setdefault(directory, {'outdated': False, 'languages': {}, 'paths': {}, 'foreign': False,
+                                                   'modified': False})
+        if result['status'] == 'foreign':
+            entry['foreign'] = True
+            continue
+        entry['outdated'] |= result['status'] == 'outdated'
+        entry['modified'] |= result['status'] == 'modified'
+        entry['languages'][result['name']] = result['language']
+        entry['paths'][result['name']] = result['memory_path']
+    targets = {}
+    held = []
+    for directory, entry in sorted(directories.items()):
+        languages = entry['languages']
+        if not languages:
+            continue
+        language = target_lang or languages.get("AGENTS.md") or languages.get("GEMINI.md")
+        missing_pair = len(languages) + entry['foreign'] < len(TARGET_NAMES)
+        switching = target_lang and any(found != target_lang for found in languages.values())
+        configured = entry['paths'].get("AGENTS.md") or entry['paths'].get("GEMINI.md")
+        filling = memory_path and not configured
+        if not (language and (entry['outdated'] or entry['modified'] or missing_pair or switching or filling)):
+            continue
+        if entry['foreign'] or entry['modified']:
+            held.append(directory)
+        else:
+            targets[directory] = (language, configured or memory_path)
+    return targets, held
@@ -0,0 +1,355 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Persistent BM25 full-text search over the memory root.
+
+Replaces `codebase_search` / `grep -r` for rag.md levels 1-2. The index lives
+in MEMORY_PATH/.agents-md/search/ as immutable generations; CURRENT names the
+active one, so a query never sees a half-written index:
+
+    gen-<n>/meta.json      document count, average length, tokenizer version
+    gen-<n>/lexicon.bin    sorted term records <QIIQ: term offset, term length,
+                           document frequency, first posting
+    gen-<n>/terms.bin      UTF-8 term bytes referenced by the lexicon
+    gen-<n>/postings.bin   <IIf entries: document, term frequency, BM25 weight
+    gen-<n>/docs.bin       <QII per document: name offset, name length, length
+    gen-<n>/names.bin      "path\\0title" UTF-8 records referenced by docs.bin
+    gen-<n>/manifest.json  per-file size/mtime/hash, only read when updating
+
+Queries memory-map the binary files and binary-search the lexicon, so their
+cost depends on the postings of the query terms, not on the size of the root.
+Updates re-tokenize only changed files and merge the remaining postings from
+the previous generation. Members of packs (pack.py) are indexed under their
+original paths; moving a file into a pack does not re-tokenize it.
+"""
+
+import heapq
+import math
+import mmap
+import os
+import shutil
+import struct
+import time
+from collections import Counter
+from pathlib import Path
+
+from . import trace
+from .common import (
+    PRIVATE_DIR, STATE_DIR, atomic_write_bytes, dump_json, load_json,
+    write_json,
+)
+from .markdown import iter_headings
+from .pack import scan_with_packs
+from .text import TOKENIZER_VERSION, tokenize
+
+INDEX_VERSION = 1
+SEARCH_DIR = "search"
+CURRENT = "CURRENT"
+
+# BM25 parameters (Robertson/Sparck Jones defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_LEXICON = struct.Struct('<QIIQ')
+_POSTING = struct.Struct('<IIf')
+_DOC = struct.Struct('<QII')
+
+# ============================================================================
+# READING
+# ============================================================================
+def _map_file(path):
+    """Memory-map a file read-only; empty files map to b''."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def search_directory(memory_root):
+    """Directory holding the search index generations."""
+    return Path(memory_root, STATE_DIR, SEARCH_DIR)
+
+def current_generation(memory_root):
+    """Path of the active index generation, or None if there is none."""
+    index_dir = search_directory(memory_root)
+    try:
+        name = (index_dir / CURRENT).read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+    generation = index_dir / name
+    return generation if name and generation.is_dir() else None
+
+class SearchIndex:
+    """Read-only view of one index generation."""
+
+    def __init__(self, generation):
+        self.generation = Path(generation)
+        self.meta = load_json(self.generation / 'meta.json', {})
+        self.lexicon = _map_file(self.generation / 'lexicon.bin')
+        self.terms = _map_file(self.generation / 'terms.bin')
+        self.postings_data = _map_file(self.generation / 'postings.bin')
+        self.docs = _map_file(self.generation / 'docs.bin')
+        self.names = _map_file(self.generation / 'names.bin')
+        self.term_count = len(self.lexicon) // _LEXICON.size
+        self.doc_count = len(self.docs) // _DOC.size
+
+    @classmethod
+    def open(cls, memory_root):
+        """Open the active generation, or return None when no index exists."""
+        generation = current_generation(memory_root)
+        if generation is None:
+            return None
+        index = cls(generation)
+        if index.meta.get('version') != INDEX_VERSION or index.meta.get('tokenizer') != TOKENIZER_VERSION:
+            index.close()
+            return None
+        return index
+
+    def close(self):
+        for data in (self.lexicon, self.terms, self.postings_data, self.docs, self.names):
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+    def term_at(self, position):
+        """(term bytes, df, first posting) of the lexicon record at position."""
+        offset, length, df, first = _LEXICON.unpack_from(self.lexicon, position * _LEXICON.size)
+        return self.terms[offset:offset + length], df, first
+
+    def lookup(self, term):
+        """Binary-search the lexicon; returns (df, first posting) or None."""
+        key = term.encode('utf-8')
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            candidate, df, first = self.term_at(middle)
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return df, first
+        return None
+
+    def iter_postings(self, df, first):
+        """Iterate (doc, tf, weight) for a lexicon entry."""
+        start = first * _POSTING.size
+        return _POSTING.iter_unpack(self.postings_data[start:start + df * _POSTING.size])
+
+    def document(self, doc):
+        """(path, title, length) of a document."""
+        offset, length, tokens = _DOC.unpack_from(self.docs, doc * _DOC.size)
+        path, _, title = bytes(self.names[offset:offset + length]).decode('utf-8').partition('\0')
+        return path, title, tokens
+
+    @trace.traced('search.query')
+    def search(self, query, limit=10, accept=None):
+        """Rank documents for query with BM25; returns a list of result dicts.
+
+        accept, when given, is called with the path of every matching
+        document; only the ones it accepts are ranked.
+        """
+        scores = {}
+        for term in dict.fromkeys(tokenize(query)):
+            entry = self.lookup(term)
+            if entry is None:
+                continue
+            for doc, _, weight in self.iter_postings(*entry):
+                scores[doc] = scores.get(doc, 0.0) + weight
+        if accept is not None:
+            scores = {doc: score for doc, score in scores.items() if accept(self.document(doc)[0])}
+        results = []
+        for doc, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1]):
+            path, title, tokens = self.document(doc)
+            results.append({'path': path, 'title': title, 'score': round(score, 4), 'tokens': tokens})
+        return results
+
+# ============================================================================
+# WRITING
+# ============================================================================
+def _document_title(text, relpath):
+    headings = list(iter_headings(text))
+    for _, level, title in headings:
+        if level == 1:
+            return title
+    return headings[0][2] if headings else Path(relpath).stem
+
+def _next_generation(index_dir):
+    numbers = [-1]
+    if index_dir.is_dir():
+        for entry in os.scandir(index_dir):
+            prefix, _, number = entry.name.partition('-')
+            if prefix == 'gen' and number.isdigit():
+                numbers.append(int(number))
+    return max(numbers) + 1
+
+def write_generation(generation, documents, postings, manifest, include_private):
+    """Write one index generation.
+
+    documents is a list of (path, title, length); postings maps term bytes to
+    a doc-ordered list of (doc, tf).
+    """
+    generation.mkdir(parents=True)
+    total = len(documents)
+    avgdl = (sum(length for _, _, length in documents) / total) if total else 0.0
+    lengths = [length for _, _, length in documents]
+
+    lexicon = bytearray()
+    terms = bytearray()
+    posting_chunks = []
+    first = 0
+    for term in sorted(postings):
+        entries = postings[term]
+        df = len(entries)
+        idf = math.log(1.0 + (total - df + 0.5) / (df + 0.5))
+        chunk = bytearray(df * _POSTING.size)
+        for position, (doc, tf) in enumerate(entries):
+            norm = tf + BM25_K1 * (1.0 - BM25_B + BM25_B * lengths[doc] / avgdl)
+            _POSTING.pack_into(chunk, position * _POSTING.size, doc, tf, idf * tf * (BM25_K1 + 1.0) / norm)
+        posting_chunks.append(chunk)
+        lexicon += _LEXICON.pack(len(terms), len(term), df, first)
+        terms += term
+        first += df
+
+    docs = bytearray()
+    names = bytearray()
+    for path, title, length in documents:
+        name = (path + '\0' + title).encode('utf-8')
+        docs += _DOC.pack(len(names), len(name), length)
+        names += name
+
+    for filename, data in (('lexicon.bin', lexicon), ('terms.bin', terms), ('docs.bin', docs), ('names.bin', names)):
+        with open(generation / filename, 'wb') as f:
+            f.write(data)
+        trace.add(writes=1, bytes_written=len(data))
+    with open(generation / 'postings.bin', 'wb') as f:
+        for chunk in posting_chunks:
+            f.write(chunk)
+        trace.add(writes=1, bytes_written=f.tell())
+    write_json(generation / 'manifest.json', manifest)
+    write_json(generation / 'meta.json', {
+        'version': INDEX_VERSION,
+        'tokenizer': TOKENIZER_VERSION,
+        'include_private': include_private,
+        'documents': total,
+        'terms': len(postings),
+        'postings': first,
+        'avgdl': avgdl,
+    })
+
+@trace.traced('search.update')
+def update_search_index(memory_root, include_private=False, full=False, paths=None):
+    """Bring the search index up to date with the memory root.
+
+    paths limits the scan to memory-root-relative files known to have changed
+    (the watcher passes them); by default the whole root is walked.
+
+    Returns a stats dict: documents, tokenized, removed, written, seconds.
+    """
+    started = time.perf_counter()
+    index_dir = search_directory(memory_root)
+    previous = None if full else SearchIndex.open(memory_root)
+    if previous is not None and previous.meta.get('include_private') != include_private:
+        previous.close()
+        previous = None
+    old_manifest = load_json(previous.generation / 'manifest.json', {}) if previous else {}
+
+    skip_dirs = () if include_private else (PRIVATE_DIR,)
+    kept = []       # (relpath, record) of unchanged documents, in old doc order
+    changed = []    # (relpath, record, title, Counter) of new or modified documents
+    if previous is None:
+        paths = None
+    for relpath, record, data in scan_with_packs(memory_root, old_manifest, skip_dirs, paths):
+        old = old_manifest.get(relpath)
+        if old is not None and (data is None or old.get('hash') == record['hash']):
+            kept.append((relpath, dict(record, doc=old['doc'])))
+            continue
+        text = data.decode('utf-8', errors='replace')
+        changed.append((relpath, record, _document_title(text, relpath), Counter(tokenize(text))))
+    removed = len(old_manifest.keys() - {relpath for relpath, _ in kept} - {c[0] for c in changed})
+    touched = any(old_manifest.get(relpath, {}).get('mtime_ns') != record['mtime_ns']
+                  or old_manifest.get(relpath, {}).get('pack') != record.get('pack') for relpath, record in kept)
+
+    if previous is not None and not changed and not removed:
+        if touched:
+            # Only mtimes (or packs) moved; refresh the manifest so the files are not re-read
+            manifest = dict(old_manifest)
+            manifest.update(kept)
+            write_json(previous.generation / 'manifest.json', manifest)
+        stats = {'documents': previous.doc_count, 'tokenized': 0, 'removed': 0, 'written': False}
+        previous.close()
+        stats['seconds'] = time.perf_counter() - started
+        return stats
+
+    # Renumber: unchanged documents keep their relative order, changed ones follow
+    kept.sort(key=lambda item: item[1]['doc'])
+    remap = {}
+    documents = []
+    manifest = {}
+    for relpath, record in kept:
+        remap[record['doc']] = len(documents)
+        documents.append(previous.document(record['doc']))
+        manifest[relpath] = dict(record, doc=remap[record['doc']])
+
+    postings = {}
+    if previous is not None and remap:
+        for position in range(previous.term_count):
+            term, df, first = previous.term_at(position)
+            entries = [(remap[doc], tf) for doc, tf, _ in previous.iter_postings(df, first) if doc in remap]
+            if entries:
+                postings[bytes(term)] = entries
+    for relpath, record, title, counts in changed:
+        doc = len(documents)
+        documents.append((relpath, title, sum(counts.values())))
+        manifest[relpath] = dict(record, doc=doc)
+        for term, tf in counts.items():
+            postings.setdefault(term.encode('utf-8'), []).append((doc, tf))
+
+    if previous is not None:
+        previous.close()
+    generation = index_dir / f'gen-{_next_generation(index_dir):06d}'
+    write_generation(generation, documents, postings, manifest, include_private)
+    atomic_write_bytes(index_dir / CURRENT, generation.name.encode('utf-8'))
+    for entry in os.scandir(index_dir):
+        if entry.is_dir() and entry.name != generation.name:
+            # Windows keeps mapped files locked; leftovers go on the next update
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    return {
+        'documents': len(documents),
+        'tokenized': len(changed),
+        'removed': removed,
+        'written': True,
+        'seconds': time.perf_counter() - started,
+    }
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def run(args, memory_root):
+    """memory.py search [query] [--refresh] [--limit N] [--json]"""
+    index = None if args.refresh else SearchIndex.open(memory_root)
+    if index is None:
+        stats = update_search_index(memory_root, include_private=args.include_private, full=args.full)
+        if stats['written']:
+            print(f"Search index: {stats['documents']} documents, {stats['tokenized']} tokenized, "
+                  f"{stats['removed']} removed ({stats['seconds']:.3f}s)")
+        if not args.query:
+            return 0
+        index = SearchIndex.open(memory_root)
+    if not args.query:
+        print("Nothing to search for. Pass a query or --refresh.")
+        return 1
+
+    started = time.perf_counter()
+    results = index.search(' '.join(args.query), limit=args.limit)
+    elapsed = time.perf_counter() - started
+    index.close()
+
+    if args.json:
+        print(dump_json(results, pretty=True), end='')
+        return 0
+    for result in results:
+        print(f"{result['score']:8.3f}  {result['path']}  {result['title']}")
+    print(f"{len(results)} results in {elapsed * 1000:.1f} ms")
+    return 0
@@ -0,0 +1,322 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Header/section offset index for selective reads.
+
+Turns rag.md levels 3-4 ("Header Scan" then "Selective Read" with
+offset/limit) into index lookups. For every memory file the index records each
+heading's level, title, 1-based line, byte offsets and estimated token count,
+so listing headers never opens the file and reading a section is one stat plus
+one memory-mapped slice.
+
+The index is sharded by top-level directory (one project per shard) in
+MEMORY_PATH/.agents-md/sections/<project>.json:
+    {"version": 1, "files": {"proj/topic/auth.md": {
+        "size": ..., "mtime_ns": ..., "hash": ...,
+        "sections": [{"level": 2, "title": "Token refresh", "line": 5,
+                      "start": 70, "end": 133, "subtree_end": 133,
+                      "tokens": 15}, ...]}}}
+
+"end" stops at the next heading of any level; "subtree_end" includes nested
+subsections. A file whose size or mtime no longer matches is re-parsed on
+access, so lookups never return stale offsets. Files moved into a pack
+(pack.py) keep their path; their entries carry "pack" and reads decompress
+only the frames of the requested section.
+"""
+
+import mmap
+import os
+import time
+from pathlib import Path
+
+from . import trace
+from .common import (
+    PACK_SUFFIX, PRIVATE_DIR, STATE_DIR, content_hash, dump_json, load_json,
+    write_json,
+)
+from .markdown import split_sections
+from .pack import find_packed, open_pack, scan_with_packs
+from .text import estimate_tokens
+
+INDEX_VERSION = 1
+SECTIONS_DIR = "sections"
+ROOT_SHARD = "_root"
+
+# ============================================================================
+# PARSING
+# ============================================================================
+def build_file_entry(record, data):
+    """Section entry for one file from its manifest record and bytes."""
+    sections = split_sections(data)
+    for section in sections:
+        section['tokens'] = estimate_tokens(data[section['start']:section['end']].decode('utf-8', errors='replace'))
+    return dict(record, sections=sections)
+
+def shard_name(relpath):
+    """Shard holding a memory-root-relative path."""
+    top, separator, _ = relpath.partition('/')
+    return top if separator else ROOT_SHARD
+
+def read_slice(path, start, end):
+    """Decode bytes [start, end) of a file through a memory map."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ''
+        trace.add(reads=1, bytes_read=max(0, end - start))
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[start:end].decode('utf-8', errors='replace')
+
+# ============================================================================
+# INDEX
+# ============================================================================
+class SectionIndex:
+    """Lazily loaded, sharded section index of one memory root."""
+
+    def __init__(self, memory_root):
+        self.memory_root = Path(memory_root)
+        self.directory = Path(memory_root, STATE_DIR, SECTIONS_DIR)
+        self._shards = {}
+        self._dirty = set()
+
+    def _shard(self, name):
+        shard = self._shards.get(name)
+        if shard is None:
+            shard = load_json(self.directory / (name + '.json'), {})
+            if not isinstance(shard, dict) or shard.get('version') != INDEX_VERSION:
+                shard = {'version': INDEX_VERSION, 'files': {}}
+            self._shards[name] = shard
+        return shard
+
+    def _set(self, relpath, entry):
+        name = shard_name(relpath)
+        files = self._shard(name)['files']
+        if entry is None:
+            if files.pop(relpath, None) is not None:
+                self._dirty.add(name)
+        else:
+            files[relpath] = entry
+            self._dirty.add(name)
+
+    def entry(self, relpath):
+        """Current section entry of a file, re-parsing it if it changed."""
+        path = self.memory_root / relpath
+        entry = self._shard(shard_name(relpath))['files'].get(relpath)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return self._packed_entry(relpath, entry)
+        if entry and 'pack' not in entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return entry
+        with open(path, 'rb') as f:
+            data = f.read()
+        record = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': content_hash(data)}
+        if entry and entry['hash'] == record['hash']:
+            entry = dict(entry, **record)
+            entry.pop('pack', None)
+        else:
+            entry = build_file_entry(record, data)
+        self._set(relpath, entry)
+        return entry
+
+    def _packed_entry(self, relpath, entry):
+        """Entry of a file that only exists inside a pack (None if nowhere)."""
+        located = find_packed(self.memory_root, relpath)
+        if located is None:
+            self._set(relpath, None)
+            return None
+        pack_relpath, name = located
+        pack = open_pack(self.memory_root / pack_relpath)
+        record = dict(pack.record(name), pack=pack_relpath)
+        if entry and entry.get('pack') == pack_relpath and entry['hash'] == record['hash']:
+            return entry
+        if entry and entry['hash'] == record['hash']:
+            entry = dict(entry, **record)
+        else:
+            entry = build_file_entry(record, pack.read(name))
+        self._set(relpath, entry)
+        return entry
+
+    def exists(self, relpath):
+        """Whether relpath is a loose or packed memory file."""
+        return (self.memory_root / relpath).is_file() or find_packed(self.memory_root, relpath) is not None
+
+    def sections(self, relpath):
+        """Section list of a file ([] if it does not exist)."""
+        entry = self.entry(relpath)
+        return entry['sections'] if entry else []
+
+    def files(self, prefix=''):
+        """Indexed paths under a directory prefix (whole root when empty)."""
+        prefix = prefix.strip('/')
+        if prefix:
+            names = [shard_name(prefix + '/x')]
+        else:
+            names = sorted(path.stem for path in self.directory.glob('*.json'))
+        result = []
+        for name in names:
+            for relpath in self._shard(name)['files']:
+                if not prefix or relpath == prefix or relpath.startswith(prefix + '/'):
+                    result.append(relpath)
+        return sorted(result)
+
+    def find(self, relpath, selector):
+        """Find a section by number ("3" or "#3") or title; returns (number, section)."""
+        sections = self.sections(relpath)
+        selector = str(selector).strip()
+        if selector.lstrip('#').isdigit():
+            number = int(selector.lstrip('#'))
+            if number < len(sections):
+                return number, sections[number]
+            return None, None
+        wanted = selector.lstrip('#').strip().lower()
+        for matcher in (lambda title: title == wanted, lambda title: wanted in title):
+            for number, section in enumerate(sections):
+                if matcher(section['title'].lower()):
+                    return number, section
+        return None, None
+
+    def loaded(self):
+        """Number of files in the shards loaded so far (without touching the disk)."""
+        return sum(len(shard['files']) for shard in list(self._shards.values()))
+
+    def read(self, relpath, section, subtree=False):
+        """Text of one section (with nested subsections when subtree is set)."""
+        end = section['subtree_end'] if subtree else section['end']
+        entry = self._shard(shard_name(relpath))['files'].get(relpath)
+        if entry and 'pack' in entry:
+            pack = open_pack(self.memory_root / entry['pack'])
+            name = relpath[len(entry['pack']) - len(PACK_SUFFIX) + 1:]
+            return pack.read(name, section['start'], end).decode('utf-8', errors='replace')
+        return read_slice(self.memory_root / relpath, section['start'], end)
+
+    @trace.traced('sections.update')
+    def update(self, include_private=False, full=False, paths=None):
+        """Re-index every changed file under the memory root; returns stats.
+
+        paths limits the scan to memory-root-relative files known to have
+        changed (the watcher passes them).
+        """
+        started = time.perf_counter()
+        if full:
+            paths = None
+            self._shards = {path.stem: {'version': INDEX_VERSION, 'files': {}}
+                            for path in self.directory.glob('*.json')}
+            self._dirty = set(self._shards)
+        else:
+            for path in self.directory.glob('*.json'):
+                self._shard(path.stem)
+        previous = {}
+        for shard in self._shards.values():
+            previous.update(shard['files'])
+
+        skip_dirs = () if include_private else (PRIVATE_DIR,)
+        seen = set()
+        parsed = 0
+        for relpath, record, data in scan_with_packs(self.memory_root, previous, skip_dirs, paths):
+            seen.add(relpath)
+            if data is None:
+                continue
+            old = previous.get(relpath)
+            if old and old['hash'] == record['hash']:
+                old = {key: value for key, value in old.items() if key != 'pack'}
+                self._set(relpath, dict(old, **record))
+            else:
+                self._set(relpath, build_file_entry(record, data))
+                parsed += 1
+        removed = previous.keys() - seen
+        for relpath in removed:
+            self._set(relpath, None)
+        written = len(self._dirty)
+        self.save()
+        return {
+            'files': len(seen),
+            'parsed': parsed,
+            'removed': len(removed),
+            'shards_written': written,
+            'seconds': time.perf_counter() - started,
+        }
+
+    def save(self):
+        """Write the shards changed since loading."""
+        for name in sorted(self._dirty):
+            shard = self._shard(name)
+            path = self.directory / (name + '.json')
+            if shard['files']:
+                write_json(path, shard)
+            elif path.exists():
+                path.unlink()
+        self._dirty.clear()
+
+# ============================================================================
+# COMMANDS
+# ============================================================================
+def _relative(memory_root, path):
+    """Accept absolute paths inside the memory root as well as relative ones.
+
+    None for a path outside the root, including one that climbs out with '..'.
+    """
+    candidate = Path(path)
+    if candidate.is_absolute():
+        try:
+            candidate = candidate.relative_to(memory_root)
+        except ValueError:
+            return None
+    if '..' in candidate.parts:
+        return None
+    relpath = candidate.as_posix().strip('/')
+    return '' if relpath == '.' else relpath
+
+def run_headers(args, memory_root):
+    """memory.py headers [path ...] [--refresh] [--json]"""
+    index = SectionIndex(memory_root)
+    if args.refresh:
+        stats = index.update(include_private=args.include_private, full=args.full)
+        print(f"Section index: {stats['files']} files, {stats['parsed']} parsed, "
+              f"{stats['removed']} removed ({stats['seconds']:.3f}s)")
+    listing = {}
+    for path in args.paths or ([] if args.refresh else ['']):
+        relpath = _relative(memory_root, path)
+        if relpath is None:
+            print(f"✗ Not inside the memory root: {path}")
+            index.save()
+            return 1
+        if relpath and index.exists(relpath):
+            targets = [relpath]
+        else:
+            targets = index.files(relpath)
+        for target in targets:
+            listing[target] = index.sections(target)
+    index.save()
+
+    if args.json:
+        print(dump_json(listing, pretty=True), end='')
+        return 0
+    for relpath, sections in listing.items():
+        print(relpath)
+        for number, section in enumerate(sections):
+            marker = '#' * section['level'] if section['level'] else '(preamble)'
+            print(f"  #{number:<3} L{section['line']:<5} {marker} {section['title']}  ({section['tokens']} tokens)")
+    return 0
+
+def run_section(args, memory_root):
+    """memory.py section PATH SECTION [--subsections] [--include-private]"""
+    relpath = _relative(memory_root, args.path)
+    if relpath is None:
+        print(f"✗ Not inside the memory root: {args.path}")
+        return 1
+    if not args.include_private and relpath.split('/', 1)[0] == PRIVATE_DIR:
+        print(f"✗ Private path: {relpath} (pass --include-private to read private/)")
+        return 1
+    index = SectionIndex(memory_root)
+    if not index.exists(relpath):
+        print(f"✗ File not found: {args.path}")
+        return 1
+    _, section = index.find(relpath, args.section)
+    index.save()
+    if section is None:
+        print(f"✗ Section not found in {relpath}: {args.section}")
+        return 1
+    print(index.read(relpath, section, subtree=args.subsections), end='')
+    return 0
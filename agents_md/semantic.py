@@ -0,0 +1,478 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Offline semantic search over memory sections.
+
+rag.md level 2 relies on the editor's `codebase_search`, which headless
+agents and CI do not have, and memory must not be sent to an embedding
+service. This index embeds every section locally:
+
+    features   words, CJK bigrams, word bigrams and 5-character word
+               prefixes (so "migrate" meets "migration"); the title counts
+               twice
+    weights    (1 + log tf) * idf, idf frozen at the last full build
+    vector     the features hashed with random signs into HASH_DIM buckets;
+               with --svd, a projection to --dim learned from the Gram
+               matrix of a sample of sections (latent semantic analysis),
+               otherwise hashed straight into --dim buckets
+               rows are L2-normalized, so cosine similarity is a dot product
+
+The index lives in MEMORY_PATH/.agents-md/semantic/ as immutable
+generations, like the search index; CURRENT names the active one:
+
+    gen-<n>/meta.json       dimensions, counts, tokenizer version
+    gen-<n>/vectors.f32     float32 section vectors (sections x dim), memory-mapped
+    gen-<n>/idf.f32         float32 idf per feature bucket
+    gen-<n>/projection.f32  float32 HASH_DIM x dim (with --svd)
+    gen-<n>/units.bin       <QI per section: name offset, name length
+    gen-<n>/names.bin       "path\\0section\\0line\\0title" UTF-8 records
+    gen-<n>/manifest.json   per-file size/mtime/hash and rows, only read when updating
+
+A query is one matrix-vector product over the memory-mapped vectors plus a
+partial sort, a few milliseconds for 100k sections; several queries are
+answered by one matrix product. Updates embed only the sections of changed
+files and copy the other rows; once a quarter of the sections changed, the
+idf table (and projection) are rebuilt from scratch.
+
+Needs NumPy (pip install numpy); the other memory tools do not.
+"""
+
+import os
+import shutil
+import struct
+import sys
+import time
+import zlib
+from array import array
+from collections import Counter
+from pathlib import Path
+
+from . import trace
+from .common import (
+    PACK_SUFFIX, PRIVATE_DIR, STATE_DIR, atomic_write_bytes, dump_json,
+    load_json, write_json,
+)
+from .markdown import split_sections
+from .pack import open_pack, scan_with_packs
+from .text import TOKENIZER_VERSION, tokenize
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, checked by run()
+    np = None
+
+INDEX_VERSION = 1
+SEMANTIC_DIR = "semantic"
+CURRENT = "CURRENT"
+DEFAULT_DIM = 256
+# Hashed feature space: idf buckets, and the input of the SVD projection
+IDF_BUCKETS = 1 << 18
+HASH_DIM = 2048
+SVD_SAMPLE = 20000
+PREFIX_LENGTH = 5
+# Rebuild idf/projection once this share of the sections changed
+REBUILD_RATIO = 0.25
+CHUNK_ROWS = 8192
+
+_UNIT = struct.Struct('<QI')
+
+# ============================================================================
+# FEATURES
+# ============================================================================
+def features(text, title=''):
+    """Counter of hashed features (crc32 values) of a piece of text."""
+    tokens = tokenize(title) * 2 + tokenize(text)
+    keys = list(tokens)
+    keys.extend(first + ' ' + second for first, second in zip(tokens, tokens[1:]))
+    keys.extend('^' + token[:PREFIX_LENGTH] for token in tokens if len(token) > PREFIX_LENGTH)
+    return Counter(zlib.crc32(key.encode('utf-8')) for key in keys)
+
+class FeatureTable:
+    """Hashed features of many sections in flat arrays (6 bytes per feature)."""
+
+    def __init__(self):
+        self.hashes = array('I')
+        self.counts = array('H')
+        self.offsets = [0]
+
+    def append(self, counter):
+        self.hashes.extend(counter.keys())
+        self.counts.extend(min(count, 65535) for count in counter.values())
+        self.offsets.append(len(self.hashes))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+def compute_idf(table):
+    """Smoothed idf per feature bucket from the document frequencies in table."""
+    hashes = np.frombuffer(table.hashes, dtype=np.uint32) if len(table.hashes) else np.zeros(0, np.uint32)
+    df = np.bincount(hashes % IDF_BUCKETS, minlength=IDF_BUCKETS).astype(np.float32)
+    return np.log((1.0 + len(table)) / (1.0 + df)).astype(np.float32) + 1.0
+
+def hashed_rows(table, first, last, idf, width):
+    """Dense (last - first) x width matrix of weighted, sign-hashed features."""
+    start, end = table.offsets[first], table.offsets[last]
+    matrix = np.zeros((last - first, width), dtype=np.float32)
+    if start == end:
+        return matrix
+    hashes = np.frombuffer(table.hashes, dtype=np.uint32)[start:end]
+    counts = np.frombuffer(table.counts, dtype=np.uint16)[start:end].astype(np.float32)
+    rows = np.repeat(np.arange(last - first), np.diff(np.asarray(table.offsets[first:last + 1])))
+    weights = (1.0 + np.log(counts)) * idf[hashes % IDF_BUCKETS]
+    signs = np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32)
+    np.add.at(matrix, (rows, (hashes % width).astype(np.intp)), weights * signs)
+    return matrix
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def fit_projection(table, idf, dim):
+    """HASH_DIM x dim projection onto the top singular directions of a sample.
+
+    The sample is centered first, so the direction shared by every section
+    (boilerplate such as "Session Notes") does not dominate the projection.
+    """
+    step = max(1, len(table) // SVD_SAMPLE)
+    sample = FeatureTable()
+    for row in range(0, len(table), step):
+        start, end = table.offsets[row], table.offsets[row + 1]
+        sample.hashes.extend(table.hashes[start:end])
+        sample.counts.extend(table.counts[start:end])
+        sample.offsets.append(len(sample.hashes))
+    gram = np.zeros((HASH_DIM, HASH_DIM), dtype=np.float64)
+    total = np.zeros(HASH_DIM, dtype=np.float64)
+    for start in range(0, len(sample), CHUNK_ROWS):
+        rows = normalize_rows(hashed_rows(sample, start, min(start + CHUNK_ROWS, len(sample)), idf, HASH_DIM))
+        gram += rows.T.astype(np.float64) @ rows
+        total += rows.sum(axis=0)
+    mean = total / len(sample)
+    gram -= len(sample) * np.outer(mean, mean)
+    _, vectors = np.linalg.eigh(gram)
+    return np.ascontiguousarray(vectors[:, ::-1][:, :dim], dtype=np.float32)
+
+def embed(table, first, last, idf, projection, dim):
+    """Vectors of sections first..last-1, at most unit length.
+
+    Projected vectors keep the length of the part of the section the
+    projection captures, so a section made of words the sample never saw
+    (a bare "Session Notes" heading) is not blown up to a confident match.
+    """
+    if projection is None:
+        return normalize_rows(hashed_rows(table, first, last, idf, dim))
+    return normalize_rows(hashed_rows(table, first, last, idf, HASH_DIM)) @ projection
+
+# ============================================================================
+# READING
+# ============================================================================
+def semantic_directory(memory_root):
+    """Directory holding the semantic index generations."""
+    return Path(memory_root, STATE_DIR, SEMANTIC_DIR)
+
+def current_generation(memory_root):
+    """Path of the active index generation, or None if there is none."""
+    index_dir = semantic_directory(memory_root)
+    try:
+        name = (index_dir / CURRENT).read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+    generation = index_dir / name
+    return generation if name and generation.is_dir() else None
+
+def _load_matrix(path, columns):
+    """Memory-map a float32 matrix file (an empty array for an empty file)."""
+    if os.path.getsize(path) == 0:
+        return np.zeros((0, columns), dtype=np.float32)
+    return np.memmap(path, dtype=np.float32, mode='r').reshape(-1, columns)
+
+class SemanticIndex:
+    """Read-only view of one semantic index generation."""
+
+    def __init__(self, generation):
+        self.generation = Path(generation)
+        self.meta = load_json(self.generation / 'meta.json', {})
+        self.dim = self.meta['dim']
+        self.vectors = _load_matrix(self.generation / 'vectors.f32', self.dim)
+        self.idf = np.fromfile(self.generation / 'idf.f32', dtype=np.float32)
+        self.projection = None
+        if self.meta.get('svd'):
+            self.projection = _load_matrix(self.generation / 'projection.f32', self.dim)
+        self.units = _load_bytes(self.generation / 'units.bin')
+        self.names = _load_bytes(self.generation / 'names.bin')
+        self.count = len(self.vectors)
+
+    @classmethod
+    def open(cls, memory_root):
+        """Open the active generation, or return None when no index exists."""
+        generation = current_generation(memory_root)
+        if generation is None:
+            return None
+        meta = load_json(generation / 'meta.json', {})
+        if meta.get('version') != INDEX_VERSION or meta.get('tokenizer') != TOKENIZER_VERSION:
+            return None
+        return cls(generation)
+
+    def unit(self, row):
+        """(path, section number, line, title) of a vector row."""
+        offset, length = _UNIT.unpack_from(self.units, row * _UNIT.size)
+        path, section, line, title = bytes(self.names[offset:offset + length]).decode('utf-8').split('\0', 3)
+        return path, int(section), int(line), title
+
+    def embed_queries(self, queries):
+        table = FeatureTable()
+        for query in queries:
+            table.append(features(query))
+        return embed(table, 0, len(table), self.idf, self.projection, self.dim)
+
+    @trace.traced('semantic.query')
+    def search(self, queries, limit=10):
+        """Top sections for each query by cosine similarity; one result list per query."""
+        if not self.count or not queries:
+            return [[] for _ in queries]
+        matrix = self.embed_queries(queries)
+        limit = min(limit, self.count)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+        # Chunked, so the scores of a huge index never need one big temporary
+        for start in range(0, self.count, 1 << 18):
+            scores = (self.vectors[start:start + (1 << 18)] @ matrix.T).T
+            keep = min(limit, scores.shape[1])
+            top = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+            best_rows = np.concatenate([best_rows, top + start], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            if best_rows.shape[1] > limit:
+                top = np.argpartition(-best_scores, limit - 1, axis=1)[:, :limit]
+                best_rows = np.take_along_axis(best_rows, top, axis=1)
+                best_scores = np.take_along_axis(best_scores, top, axis=1)
+        results = []
+        for rows, scores in zip(best_rows, best_scores):
+            order = np.argsort(-scores)
+            hits = []
+            for row, score in zip(rows[order], scores[order]):
+                if score <= 0:
+                    break
+                path, section, line, title = self.unit(int(row))
+                hits.append({'path': path, 'section': section, 'line': line, 'title': title,
+                             'score': round(float(score), 4)})
+            results.append(hits)
+        return results
+
+def _load_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+# ============================================================================
+# WRITING
+# ============================================================================
+def _next_generation(index_dir):
+    numbers = [-1]
+    if index_dir.is_dir():
+        for entry in os.scandir(index_dir):
+            prefix, _, number = entry.name.partition('-')
+            if prefix == 'gen' and number.isdigit():
+                numbers.append(int(number))
+    return max(numbers) + 1
+
+def _file_sections(data):
+    """(section number, line, title, text) of every section with a body.
+
+    Heading-only sections ("# Session Notes - 2025-10-13" directly followed
+    by a subheading) are skipped: a few words hashed into a short vector
+    collide with almost any query.
+    """
+    for number, section in enumerate(split_sections(data)):
+        text = data[section['start']:section['end']].decode('utf-8', errors='replace')
+        body = text.partition('\n')[2] if section['level'] else text
+        if body.strip():
+            yield number, section['line'], section['title'], text
+
+@trace.traced('semantic.update')
+def update_semantic_index(memory_root, include_private=False, full=False, paths=None, dim=DEFAULT_DIM, svd=False):
+    """Bring the semantic index up to date; returns a stats dict.
+
+    dim and svd only apply when the index is (re)built from scratch.
+    """
+    started = time.perf_counter()
+    index_dir = semantic_directory(memory_root)
+    previous = None if full else SemanticIndex.open(memory_root)
+    if previous is not None and previous.meta.get('include_private') != include_private:
+        previous = None
+    old_manifest = load_json(previous.generation / 'manifest.json', {}) if previous else {}
+    if previous is None:
+        paths = None
+
+    skip_dirs = () if include_private else (PRIVATE_DIR,)
+    kept = []
+    changed = []
+    for relpath, record, data in scan_with_packs(memory_root, old_manifest, skip_dirs, paths):
+        old = old_manifest.get(relpath)
+        if old is not None and (data is None or old.get('hash') == record['hash']):
+            kept.append((relpath, dict(record, rows=old['rows'])))
+        else:
+            changed.append((relpath, record, list(_file_sections(data))))
+    removed = len(old_manifest.keys() - {relpath for relpath, _ in kept} - {item[0] for item in changed})
+
+    if previous is not None and not changed and not removed:
+        if any(old_manifest[relpath].get('mtime_ns') != record['mtime_ns'] for relpath, record in kept):
+            write_json(previous.generation / 'manifest.json', dict(old_manifest, **dict(kept)))
+        return {'sections': previous.count, 'embedded': 0, 'removed': 0, 'rebuilt': False, 'written': False,
+                'seconds': time.perf_counter() - started}
+
+    changed_sections = sum(len(sections) for _, _, sections in changed)
+    rebuild = previous is None or changed_sections > REBUILD_RATIO * max(1, previous.count)
+    if rebuild and previous is not None:
+        # Re-read the unchanged files too: the idf table is recomputed from everything
+        for relpath, record in kept:
+            data = _read_member(memory_root, relpath, record)
+            if data is not None:
+                changed.append((relpath, record, list(_file_sections(data))))
+        dim = previous.dim
+        svd = bool(previous.meta.get('svd'))
+        kept = []
+
+    table = FeatureTable()
+    new_units = []
+    for relpath, record, sections in changed:
+        for number, line, title, text in sections:
+            table.append(features(text, title))
+            new_units.append((relpath, number, line, title))
+    if rebuild:
+        idf = compute_idf(table)
+        projection = fit_projection(table, idf, dim) if svd and len(table) else None
+    else:
+        idf, projection, dim, svd = previous.idf, previous.projection, previous.dim, bool(previous.meta.get('svd'))
+
+    generation = index_dir / f'gen-{_next_generation(index_dir):06d}'
+    generation.mkdir(parents=True)
+    kept.sort(key=lambda item: item[1]['rows'][0])
+    total = sum(item[1]['rows'][1] for item in kept) + len(table)
+    manifest = {}
+    units = bytearray()
+    names = bytearray()
+    vectors_path = generation / 'vectors.f32'
+    vectors = np.memmap(vectors_path, dtype=np.float32, mode='w+', shape=(total, dim)) if total else None
+    row = 0
+    for relpath, record in kept:
+        first, count = record['rows']
+        if count:
+            vectors[row:row + count] = previous.vectors[first:first + count]
+            for offset in range(first, first + count):
+                name = '\0'.join(map(str, previous.unit(offset))).encode('utf-8')
+                units += _UNIT.pack(len(names), len(name))
+                names += name
+        manifest[relpath] = dict(record, rows=[row, count])
+        row += count
+    position = 0
+    for relpath, record, sections in changed:
+        manifest[relpath] = dict(record, rows=[row + position, len(sections)])
+        position += len(sections)
+    for start in range(0, len(table), CHUNK_ROWS):
+        end = min(start + CHUNK_ROWS, len(table))
+        vectors[row + start:row + end] = embed(table, start, end, idf, projection, dim)
+    for unit in new_units:
+        name = '\0'.join(map(str, unit)).encode('utf-8')
+        units += _UNIT.pack(len(names), len(name))
+        names += name
+    if vectors is not None:
+        vectors.flush()
+        del vectors
+    else:
+        vectors_path.write_bytes(b'')
+    idf.astype(np.float32).tofile(str(generation / 'idf.f32'))
+    if projection is not None:
+        np.ascontiguousarray(projection, dtype=np.float32).tofile(str(generation / 'projection.f32'))
+    (generation / 'units.bin').write_bytes(bytes(units))
+    (generation / 'names.bin').write_bytes(bytes(names))
+    trace.add(writes=4, bytes_written=total * dim * 4 + len(units) + len(names))
+    write_json(generation / 'manifest.json', manifest)
+    write_json(generation / 'meta.json', {
+        'version': INDEX_VERSION,
+        'tokenizer': TOKENIZER_VERSION,
+        'include_private': include_private,
+        'dim': dim,
+        'svd': svd,
+        'sections': total,
+        'files': len(manifest),
+    })
+    previous = None
+    atomic_write_bytes(index_dir / CURRENT, generation.name.encode('utf-8'))
+    for entry in os.scandir(index_dir):
+        if entry.is_dir() and entry.name != generation.name:
+            shutil.rmtree(entry.path, ignore_errors=True)
+    return {'sections': total, 'embedded': len(table), 'removed': removed, 'rebuilt': rebuild, 'written': True,
+            'seconds': time.perf_counter() - started}
+
+def _read_member(memory_root, relpath, record):
+    """Bytes of a loose or packed file (None when it is gone)."""
+    if 'pack' in record:
+        name = relpath[len(record['pack']) - len(PACK_SUFFIX) + 1:]
+        return open_pack(Path(memory_root, record['pack'])).read(name)
+    try:
+        with open(Path(memory_root, relpath), 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def run(args, memory_root):
+    """memory.py semantic QUERY [--refresh] [--svd] [--batch FILE] [--json]"""
+    if np is None:
+        print("✗ Error: semantic search needs NumPy. Install it with: pip install numpy")
+        return 1
+    if not 8 <= args.dim <= HASH_DIM:
+        print(f"✗ Error: --dim must be between 8 and {HASH_DIM}.")
+        return 1
+    # Queries are read first, so a bad --batch file fails before any indexing
+    if args.batch == '-':
+        queries = [line.strip() for line in sys.stdin if line.strip()]
+    elif args.batch:
+        try:
+            with open(args.batch, encoding='utf-8') as f:
+                queries = [line.strip() for line in f if line.strip()]
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"✗ Error: cannot read {args.batch}: {e}")
+            return 1
+    else:
+        queries = [' '.join(args.query)] if args.query else []
+    index = None if args.refresh else SemanticIndex.open(memory_root)
+    if index is None:
+        stats = update_semantic_index(memory_root, include_private=args.include_private, full=args.full,
+                                      dim=args.dim, svd=args.svd)
+        if stats['written']:
+            print(f"Semantic index: {stats['sections']} sections, {stats['embedded']} embedded, "
+                  f"{stats['removed']} files removed ({stats['seconds']:.3f}s)", file=sys.stderr)
+        index = SemanticIndex.open(memory_root)
+        if index is None:
+            print("✗ Error: the semantic index could not be built.")
+            return 1
+
+    if not queries:
+        if args.refresh:
+            return 0
+        print("Nothing to search for. Pass a query, --batch FILE or --refresh.")
+        return 1
+
+    started = time.perf_counter()
+    results = index.search(queries, limit=args.limit)
+    elapsed = time.perf_counter() - started
+    if args.batch:
+        for query, hits in zip(queries, results):
+            print(dump_json({'query': query, 'results': hits}))
+        print(f"{len(queries)} queries over {index.count} sections in {elapsed * 1000:.1f} ms", file=sys.stderr)
+        return 0
+    if args.json:
+        print(dump_json(results[0], pretty=True), end='')
+        return 0
+    if not results[0]:
+        print("No matches.")
+        return 0
+    for hit in results[0]:
+        print(f"{hit['score']:7.4f}  {hit['path']} #{hit['section']} L{hit['line']}  {hit['title']}")
+    print(f"{index.count} sections searched in {elapsed * 1000:.1f} ms "
+          f"(read one with: python3 memory.py section PATH NUMBER)")
+    return 0
@@ -0,0 +1,661 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Warm memory query server over a Unix domain socket.
+
+Every retrieval through memory.py starts a new process, which imports the
+tools, opens the indexes and parses memories.json again before answering.
+`memory.py serve` does that once and keeps it resident: the memories.json
+entries of every project (with tag and keyword maps), the tag posting lists,
+the memory-mapped search index and the section offsets. It then answers
+newline-delimited JSON-RPC 2.0 requests on a Unix domain socket in
+$XDG_RUNTIME_DIR or the temp directory (client.socket_path(); memory roots
+are often on cloud-synced or FUSE mounts that cannot hold one):
+
+    agents-md-[hash of the memory root].sock
+
+    -> {"jsonrpc": "2.0", "id": 1, "method": "search", "params": {"query": "token refresh"}}
+    <- {"jsonrpc": "2.0", "id": 1, "result": [...], "elapsed_ms": 0.41}
+
+Methods:
+    lookup   memories.json entries by path, tags, keywords, prefix and type
+    search   BM25 search (search.py)
+    tags     tag expression query, or tag counts (tags.py)
+    headers  section lists of a file or directory (sections.py)
+    section  text of one section
+    stats    per-method request counts and latency percentiles
+    ping, shutdown
+
+Any number of clients can stay connected, and a client may pipeline several
+requests on one connection. lookup, search, tags, stats and ping are
+answered on the event loop from the resident data. Everything that reads
+files leaves the loop through run_in_executor: section, headers and tags
+with section titles run one at a time on a disk thread, and the stat and
+reload of an index before lookup, search or tags on a worker thread (one
+reload at a time). A slow read (a section of a huge file on a FUSE mount,
+a reload after an index update) thus no longer holds up the other
+clients' in-memory queries. A reload swaps the replaced index in whole, so
+a query running on the loop keeps the one it started with.
+
+Nothing is re-read unless it changed. Before a request, the server stats
+the files it depends on and reloads only what a newer index generation, tag
+index or memories.json replaced. Sections are checked per file as in
+sections.py. Run `memory.py watch` alongside to keep the indexes themselves
+up to date.
+
+private/ is never served unless the server is started with
+--include-private: paths under it are refused, and results from indexes a
+--include-private run built are filtered.
+
+The server's pid and socket are recorded in [memory root]/.agents-md/server.json;
+`memory.py serve --status` prints its latency stats, and `--stop` shuts it
+down. client.py is the thin client (`memory.py call`).
+"""
+
+import asyncio
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import trace
+from .client import Connection, ServerError, print_stats, socket_path
+from .common import (
+    MEMORY_INDEX, PRIVATE_DIR, dump_json, list_projects, load_json, state_path,
+    write_json,
+)
+from .search import CURRENT, SearchIndex, search_directory, update_search_index
+from .sections import SectionIndex
+from .tags import TagIndex, normalize_tag, tag_directory, update_tag_index
+
+STATUS_FILE = "server.json"
+# Latency percentiles are taken over the most recent requests of each method
+LATENCY_WINDOW = 2000
+MAX_REQUEST_BYTES = 1 << 20
+DEFAULT_LIMIT = 50
+# Answered on the event loop from resident data (after a reload on the disk thread)
+LOOP_METHODS = ('lookup', 'search', 'tags', 'stats', 'ping', 'shutdown')
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+REQUEST_FAILED = -32000
+
+class RequestError(Exception):
+    """A request that cannot be answered; becomes a JSON-RPC error."""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+def _stamp(path):
+    """(mtime, size, inode) of a file, or None; changes whenever it is replaced."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+def _param(params, name, kind, default=RequestError):
+    value = params.get(name, default)
+    if value is RequestError:
+        raise RequestError(INVALID_PARAMS, f"missing parameter: {name}")
+    if value is not default and not isinstance(value, kind):
+        raise RequestError(INVALID_PARAMS, f"invalid parameter: {name}")
+    return value
+
+def _relpath(params, name='path'):
+    """A memory-root-relative path parameter that stays inside the root."""
+    relpath = _param(params, name, str).strip().strip('/')
+    if '..' in relpath.split('/') or Path(relpath).is_absolute():
+        raise RequestError(INVALID_PARAMS, f"path outside the memory root: {relpath}")
+    return relpath
+
+def _private(relpath):
+    return relpath.split('/', 1)[0] == PRIVATE_DIR
+
+def _error(e):
+    """JSON-RPC error object of an exception raised while answering."""
+    if isinstance(e, RequestError):
+        return {'code': e.code, 'message': str(e)}
+    # A broken file must not take the server down
+    return {'code': REQUEST_FAILED, 'message': f"{type(e).__name__}: {e}"}
+
+def _now():
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+# ============================================================================
+# RESIDENT INDEXES
+# ============================================================================
+class MemoryService:
+    """Resident indexes of one memory root and the methods served from them."""
+
+    def __init__(self, memory_root, include_private=False):
+        self.memory_root = Path(memory_root)
+        self.include_private = include_private
+        self.sections = SectionIndex(memory_root)
+        self._search = None
+        self._search_stamp = None
+        self._tags = None
+        self._tags_stamp = None
+        # Search generations a reload replaced, closed on the loop once no query uses them
+        self._retired = []
+        # project -> (stamp, files, {tag: {relpath}}, {keyword: {relpath}})
+        self._projects = {}
+        self.methods = {
+            'lookup': self.lookup,
+            'search': self.search,
+            'tags': self.tags,
+            'headers': self.headers,
+            'section': self.section,
+            'stats': self.stats,
+            'ping': lambda params: 'pong',
+        }
+        # What a method reads from the resident data, reloaded first if an update replaced it
+        self.loaders = {
+            'lookup': self.memories,
+            'search': self.search_index,
+            'tags': self.tag_index,
+        }
+        self.reloading = threading.Lock()
+        self.started = time.time()
+        self.latency = {}
+        self.counts = {}
+
+    def warm(self):
+        """Build missing indexes and load everything; returns seconds taken."""
+        started = time.perf_counter()
+        self.search_index()
+        self.tag_index()
+        self.memories()
+        self.sections.update(include_private=self.include_private)
+        return time.perf_counter() - started
+
+    def close(self):
+        self.close_retired()
+        if self._search is not None:
+            self._search.close()
+        self.sections.save()
+
+    def close_retired(self):
+        while self._retired:
+            self._retired.pop().close()
+
+    def search_index(self):
+        """The active search generation, reopened when an update replaced it."""
+        current = search_directory(self.memory_root) / CURRENT
+        stamp = _stamp(current)
+        if stamp is None or stamp != self._search_stamp:
+            index = SearchIndex.open(self.memory_root)
+            if index is None:
+                update_search_index(self.memory_root, include_private=self.include_private)
+                index = SearchIndex.open(self.memory_root)
+            if self._search is not None:
+                self._retired.append(self._search)
+            self._search = index
+            self._search_stamp = _stamp(current)
+        return self._search
+
+    def tag_index(self):
+        """The tag index, reloaded when an update replaced it."""
+        path = tag_directory(self.memory_root) / 'index.json'
+        stamp = _stamp(path)
+        if stamp is None or stamp != self._tags_stamp:
+            index = TagIndex.open(self.memory_root)
+            if index is None:
+                update_tag_index(self.memory_root, include_private=self.include_private)
+                index = TagIndex.open(self.memory_root)
+            self._tags = index
+            self._tags_stamp = _stamp(path)
+        return self._tags
+
+    def memories(self):
+        """Current memories.json entries and tag/keyword maps of every project.
+
+        A changed project list or memories.json replaces the whole map, so a
+        lookup on the event loop never sees it half updated.
+        """
+        projects = {}
+        for project in list_projects(self.memory_root, include_private=self.include_private):
+            path = self.memory_root / project / MEMORY_INDEX
+            stamp = _stamp(path)
+            cached = self._projects.get(project)
+            if cached is not None and cached[0] == stamp:
+                projects[project] = cached
+                continue
+            document = load_json(path, {}) if stamp else {}
+            files = document.get('files') if isinstance(document, dict) else None
+            files = {relpath: entry for relpath, entry in (files or {}).items() if isinstance(entry, dict)}
+            by_tag = {}
+            by_keyword = {}
+            for relpath, entry in files.items():
+                for tag in entry.get('tags', []):
+                    by_tag.setdefault(normalize_tag(str(tag)), set()).add(relpath)
+                for keyword in entry.get('keywords', []):
+                    by_keyword.setdefault(str(keyword).lower(), set()).add(relpath)
+            projects[project] = (stamp, files, by_tag, by_keyword)
+        self._projects = projects
+        return projects
+
+    def relpath(self, params, name='path'):
+        """_relpath, refusing private/ unless the server runs with include_private."""
+        relpath = _relpath(params, name)
+        if not self.include_private and _private(relpath):
+            raise RequestError(INVALID_PARAMS, f"private path: {relpath} (the server runs without --include-private)")
+        return relpath
+
+    def visible(self, relpath):
+        """Whether a path may be served; the indexes on disk can be shared with --include-private runs."""
+        return self.include_private or not _private(relpath)
+
+    # ------------------------------------------------------------------ methods
+    def lookup(self, params):
+        """memories.json entries having every tag and keyword, under prefix, of type."""
+        tags = [normalize_tag(tag) for tag in _param(params, 'tags', list, [])]
+        keywords = [str(keyword).lower() for keyword in _param(params, 'keywords', list, [])]
+        project_filter = _param(params, 'project', str, None)
+        prefix = _param(params, 'prefix', str, '').strip('/')
+        file_type = _param(params, 'type', str, None)
+        limit = _param(params, 'limit', int, DEFAULT_LIMIT)
+        if 'path' in params:
+            project_filter, _, exact = self.relpath(params).partition('/')
+        else:
+            exact = None
+        results = []
+        for project, (_, files, by_tag, by_keyword) in sorted(self._projects.items()):
+            if project_filter and project != project_filter:
+                continue
+            if exact is not None:
+                candidates = {exact} if exact in files else set()
+            elif tags or keywords:
+                sets = [by_tag.get(tag, set()) for tag in tags] + [by_keyword.get(keyword, set()) for keyword in keywords]
+                candidates = set.intersection(*sets)
+            else:
+                candidates = files.keys()
+            for relpath in sorted(candidates):
+                path = f"{project}/{relpath}"
+                entry = files[relpath]
+                if prefix and not (path == prefix or path.startswith(prefix + '/')):
+                    continue
+                if file_type and entry.get('type') != file_type:
+                    continue
+                results.append(dict(entry, path=path))
+                if limit and len(results) >= limit:
+                    return results
+        return results
+
+    def search(self, params):
+        query = _param(params, 'query', str)
+        limit = _param(params, 'limit', int, 10)
+        index = self._search
+        if index is None:
+            return []
+        return index.search(query, limit=limit, accept=None if self.include_private else self.visible)
+
+    def tags(self, params):
+        expression = _param(params, 'expression', str, '')
+        as_sections = _param(params, 'sections', bool, False)
+        limit = _param(params, 'limit', int, 0)
+        index = self._tags
+        if index is None:
+            raise RequestError(REQUEST_FAILED, "the tag index could not be built")
+        if not expression:
+            counts = index.counts()
+            return dict(counts[:limit] if limit else counts)
+        try:
+            matches = index.query(expression, sections=as_sections)
+        except ValueError as e:
+            raise RequestError(INVALID_PARAMS, f"invalid tag expression: {e}")
+        if not self.include_private:
+            matches = [match for match in matches if self.visible(match[0] if as_sections else match)]
+        if limit:
+            matches = matches[:limit]
+        if not as_sections:
+            return [{'path': relpath} for relpath in matches]
+        results = []
+        for relpath, number in matches:
+            sections = self.sections.sections(relpath)
+            section = sections[number] if number < len(sections) else {'line': 0, 'title': ''}
+            results.append({'path': relpath, 'section': number, 'line': section['line'], 'title': section['title']})
+        return results
+
+    def headers(self, params):
+        relpath = self.relpath(params) if 'path' in params else ''
+        if relpath and self.sections.exists(relpath):
+            targets = [relpath]
+        else:
+            targets = [target for target in self.sections.files(relpath) if self.visible(target)]
+        if not targets:
+            raise RequestError(REQUEST_FAILED, f"file not found: {relpath}")
+        return {target: self.sections.sections(target) for target in targets}
+
+    def section(self, params):
+        relpath = self.relpath(params)
+        selector = _param(params, 'section', (str, int))
+        subsections = _param(params, 'subsections', bool, False)
+        if not self.sections.exists(relpath):
+            raise RequestError(REQUEST_FAILED, f"file not found: {relpath}")
+        number, section = self.sections.find(relpath, selector)
+        if section is None:
+            raise RequestError(REQUEST_FAILED, f"section not found in {relpath}: {selector}")
+        return {'path': relpath, 'section': number, 'title': section['title'], 'line': section['line'],
+                'text': self.sections.read(relpath, section, subtree=subsections)}
+
+    def stats(self, params):
+        methods = {}
+        for method, samples in self.latency.items():
+            ordered = sorted(samples)
+            count, errors = self.counts[method]
+
+            def percentile(fraction):
+                return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+
+            methods[method] = {
+                'count': count,
+                'errors': errors,
+                'mean_ms': round(sum(ordered) / len(ordered), 3),
+                'p50_ms': percentile(0.5),
+                'p95_ms': percentile(0.95),
+                'p99_ms': percentile(0.99),
+                'max_ms': round(ordered[-1], 3),
+            }
+        return {
+            'pid': os.getpid(),
+            'memory_path': str(self.memory_root),
+            'uptime': round(time.time() - self.started, 1),
+            'requests': sum(count for count, _ in self.counts.values()),
+            'errors': sum(errors for _, errors in self.counts.values()),
+            'methods': methods,
+            'resident': {
+                'projects': len(self._projects),
+                'files': sum(len(files) for _, files, _, _ in self._projects.values()),
+                'tags': len(self._tags.files) if self._tags is not None else 0,
+                'search_documents': self._search.doc_count if self._search is not None else 0,
+                'section_files': self.sections.loaded(),
+            },
+        }
+
+    # ----------------------------------------------------------------- dispatch
+    def record(self, method, elapsed_ms, failed):
+        samples = self.latency.get(method)
+        if samples is None:
+            samples = self.latency[method] = deque(maxlen=LATENCY_WINDOW)
+            self.counts[method] = [0, 0]
+        samples.append(elapsed_ms)
+        self.counts[method][0] += 1
+        self.counts[method][1] += 1 if failed else 0
+
+    def parse(self, line):
+        """Request of one line: a dict of its id, method and params, or of the error to answer."""
+        request = {'started': time.perf_counter(), 'id': None, 'method': None, 'params': {},
+                   'notification': False, 'error': None}
+        try:
+            try:
+                message = json.loads(line.decode('utf-8'))
+            except ValueError as e:
+                raise RequestError(PARSE_ERROR, f"parse error: {e}")
+            if not isinstance(message, dict) or not isinstance(message.get('method'), str):
+                raise RequestError(INVALID_REQUEST, "expected an object with a method")
+            request['id'] = message.get('id')
+            request['notification'] = 'id' not in message
+            request['method'] = method = message['method']
+            params = request['params'] = message.get('params') or {}
+            if not isinstance(params, dict):
+                raise RequestError(INVALID_PARAMS, "params must be an object")
+            if method not in self.methods and method != 'shutdown':
+                raise RequestError(METHOD_NOT_FOUND, f"unknown method: {method}")
+        except RequestError as e:
+            request['error'] = _error(e)
+        return request
+
+    def on_loop(self, request):
+        """Whether a request is answered on the event loop (its reload aside) rather than the disk thread."""
+        if request['error'] is not None:
+            return True
+        if request['method'] == 'tags' and request['params'].get('sections'):
+            return False  # Section titles come from the section index
+        return request['method'] in LOOP_METHODS
+
+    def refresh(self, request):
+        """Reload what a request reads from the resident data if an update replaced it."""
+        loader = self.loaders.get(request['method'])
+        if loader is None or request['error'] is not None:
+            return
+        try:
+            with self.reloading:
+                loader()
+        except Exception as e:
+            request['error'] = _error(e)
+
+    def answer(self, request):
+        """Run the method of a parsed request, storing its 'result' or 'error'."""
+        if request['error'] is not None:
+            return
+        method = request['method']
+        handler = self.methods.get(method)
+        try:
+            with trace.span('server.' + method):
+                request['result'] = handler(request['params']) if handler else 'stopping'
+        except Exception as e:
+            request['error'] = _error(e)
+
+    def work(self, request):
+        """Reload, answer and save the section index: everything of a request that touches the disk."""
+        self.refresh(request)
+        self.answer(request)
+        self.sections.save()
+
+    def respond(self, request):
+        """(response bytes or None for notifications, method) of an answered request."""
+        self.close_retired()
+        method = request['method']
+        if request['error'] is not None:
+            response = {'jsonrpc': '2.0', 'id': request['id'], 'error': request['error']}
+        else:
+            response = {'jsonrpc': '2.0', 'id': request['id'], 'result': request['result']}
+        elapsed_ms = (time.perf_counter() - request['started']) * 1000
+        response['elapsed_ms'] = round(elapsed_ms, 3)
+        if method in self.methods:
+            self.record(method, elapsed_ms, 'error' in response)
+        if request['notification']:
+            return None, method
+        return (dump_json(response) + '\n').encode('utf-8'), method
+
+    def handle(self, line):
+        """(response bytes or None for notifications, method) of one request line, answered on this thread."""
+        request = self.parse(line)
+        self.work(request)
+        return self.respond(request)
+
+# ============================================================================
+# SERVER
+# ============================================================================
+def read_status(memory_root):
+    """Status written by the last server, with 'running' checked against its socket."""
+    status = load_json(state_path(memory_root, STATUS_FILE), None)
+    if not isinstance(status, dict):
+        return None
+    if status.get('running'):
+        try:
+            with Connection(status.get('socket') or socket_path(memory_root), timeout=2.0) as connection:
+                connection.call('ping')
+        except (OSError, ServerError, ValueError):
+            status['running'] = False
+            status['stale'] = True
+    return status
+
+class MemoryServer:
+    """asyncio Unix socket server around a MemoryService."""
+
+    def __init__(self, service, path):
+        self.service = service
+        self.path = Path(path)
+        self.stopping = None
+        self.connections = 0
+        # One worker: section index updates and reloads must not run concurrently
+        self.disk = None
+
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than MAX_REQUEST_BYTES; the stream cannot be resynchronized
+                    error = {'code': INVALID_REQUEST, 'message': "request too large"}
+                    writer.write((dump_json({'jsonrpc': '2.0', 'id': None, 'error': error}) + '\n').encode('utf-8'))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response, method = await self.answer(line)
+                if response is not None:
+                    writer.write(response)
+                    await writer.drain()
+                if method == 'shutdown':
+                    self.stopping.set()
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def answer(self, line):
+        """Answer one request line, sending its disk work to the disk thread."""
+        loop = asyncio.get_event_loop()
+        request = self.service.parse(line)
+        if not self.service.on_loop(request):
+            await loop.run_in_executor(self.disk, self.service.work, request)
+        else:
+            if request['method'] in self.service.loaders:
+                await loop.run_in_executor(None, self.service.refresh, request)
+            self.service.answer(request)
+        return self.service.respond(request)
+
+    async def serve(self, on_ready=None):
+        self.stopping = asyncio.Event()
+        self.disk = ThreadPoolExecutor(max_workers=1, thread_name_prefix='agents-md-disk')
+        server = await asyncio.start_unix_server(self.handle_connection, path=str(self.path),
+                                                 limit=MAX_REQUEST_BYTES)
+        os.chmod(str(self.path), 0o600)
+        loop = asyncio.get_event_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stopping.set)
+        if on_ready:
+            on_ready()
+        try:
+            await self.stopping.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            self.disk.shutdown(wait=True)
+
+def _claim_socket(path):
+    """Remove a socket left by a dead server; False if a live one answers."""
+    try:
+        with Connection(path, timeout=2.0) as connection:
+            connection.call('ping')
+        return False
+    except (OSError, ServerError, ValueError):
+        pass
+    try:
+        os.unlink(str(path))
+    except FileNotFoundError:
+        pass
+    return True
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def _print_status(status, stats):
+    state = 'running' if status.get('running') else ('stopped (stale status)' if status.get('stale') else 'stopped')
+    print(f"Memory server: {state} (pid {status.get('pid')})")
+    print(f"  Socket: {status.get('socket')}")
+    print(f"  Started: {status.get('started')}  Warm-up: {status.get('warm_seconds')}s")
+    if stats is not None:
+        print_stats(stats)
+
+def run(args, memory_root):
+    """memory.py serve [--socket PATH] [--status | --stop] [--json]"""
+    path = Path(args.socket) if args.socket else socket_path(memory_root)
+    if args.status or args.stop:
+        status = read_status(memory_root)
+        if status is None:
+            print(f"No memory server status in {state_path(memory_root, STATUS_FILE)}")
+            return 1
+        if not status.get('running'):
+            if args.json:
+                print(dump_json(status, pretty=True), end='')
+            else:
+                _print_status(status, None)
+            return 1
+        try:
+            with Connection(status.get('socket') or path) as connection:
+                result = connection.call('shutdown' if args.stop else 'stats')['result']
+        except (OSError, ServerError, ValueError) as e:
+            print(f"✗ Error: {e}")
+            return 1
+        if args.stop:
+            print(f"Memory server (pid {status.get('pid')}) is stopping.")
+        elif args.json:
+            print(dump_json(dict(status, stats=result), pretty=True), end='')
+        else:
+            _print_status(status, result)
+        return 0
+
+    if not hasattr(asyncio, 'start_unix_server'):
+        print("✗ Error: the memory server needs Unix domain sockets, which this platform lacks.")
+        return 1
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not _claim_socket(path):
+        print(f"✗ A memory server is already listening on {path}.")
+        return 1
+
+    service = MemoryService(memory_root, include_private=args.include_private)
+    warm_seconds = service.warm()
+    status = {
+        'pid': os.getpid(),
+        'running': True,
+        'socket': str(path),
+        'memory_path': str(memory_root),
+        'include_private': args.include_private,
+        'started': _now(),
+        'warm_seconds': round(warm_seconds, 3),
+    }
+    status_path = state_path(memory_root, STATUS_FILE)
+
+    def ready():
+        write_json(status_path, status, pretty=True)
+        if not args.quiet:
+            resident = service.stats({})['resident']
+            print(f"Serving {memory_root} on {path} ({resident['files']} indexed files, "
+                  f"{resident['search_documents']} search documents; warm-up {warm_seconds:.3f}s). "
+                  f"Ctrl+C to stop.", file=sys.stderr)
+
+    try:
+        asyncio.run(MemoryServer(service, path).serve(on_ready=ready))
+    except OSError as e:
+        print(f"✗ Error: cannot listen on {path}: {e}")
+        return 1
+    finally:
+        service.close()
+        try:
+            os.unlink(str(path))
+        except OSError:
+            pass
+        if status_path.exists():
+            write_json(status_path, dict(status, running=False, stopped=_now()), pretty=True)
+    return 0
@@ -0,0 +1,375 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+SQLite store for memories.json entries.
+
+Without a store, every index sync reads, merges and rewrites the whole of
+[project]/memories.json. Once a project has a store (created by `memory.py
+store init`), the indexer upserts only the entries of changed files, each in
+O(log n), and lookups by tag, keyword, type or path prefix use the table
+indexes:
+
+    files     (path PRIMARY KEY, type, date, title, entry JSON)
+    tags      (tag, path)       one row per tag of a file
+    keywords  (keyword, path)   one row per keyword of a file
+    meta      (key, value JSON) top-level memories.json keys, export state
+
+memories.json stays the file agents read: it is exported from the store
+after an index run that changed something (or only by `memory.py store
+export` when the store was created with --manual-export). Exporting rewrites
+the whole file, so the watcher, which indexes every few changed files,
+exports at most once per EXPORT_INTERVAL and writes what is left once the
+changes stop (export_pending); `memory.py index` and the other commands
+export right away. Hand edits to the exported file (extra keys on an entry,
+top-level notes, compact's rewritten pointers) are noticed by its changed
+size/mtime and merged back into the store before the next export, so they
+are never lost.
+
+The database is kept per machine, outside the memory root
+(stores/[project]-[hash].db in common.local_state_path()): SQLite must not
+sit on a network or cloud-synced mount, whose sync clients can also copy
+the database without its -journal file. memories.json is what syncs; on a
+machine without a store it is maintained as a plain file.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import trace
+from .common import (
+    MEMORY_INDEX, atomic_write_bytes, content_hash, file_lock, list_projects, load_json, local_state_path,
+)
+from .indexer import GENERATED_FIELDS, index_project
+
+STORE_DIR = "stores"
+SCHEMA_VERSION = 1
+EXPORT_MODES = ('auto', 'manual')
+# Seconds between deferred exports of a changing store (see index_project)
+EXPORT_INTERVAL = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, type TEXT, date TEXT, title TEXT, entry TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL, path TEXT NOT NULL, PRIMARY KEY (tag, path)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS keywords (
+    keyword TEXT NOT NULL, path TEXT NOT NULL, PRIMARY KEY (keyword, path)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_path ON tags (path);
+CREATE INDEX IF NOT EXISTS keywords_path ON keywords (path);
+CREATE INDEX IF NOT EXISTS files_type_date ON files (type, date);
+"""
+
+def store_path(project_dir):
+    """Database of a project's store: [project]-[hash of its path].db in the local state directory."""
+    project_dir = Path(project_dir).absolute()
+    digest = content_hash(str(project_dir).encode('utf-8'))
+    return local_state_path(STORE_DIR, f"{project_dir.name}-{digest}.db")
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+def _lowered(values):
+    return sorted({str(value).lower() for value in values or () if str(value).strip()})
+
+# ============================================================================
+# STORE
+# ============================================================================
+class MemoryStore:
+    """memories.json entries of one project in an SQLite database."""
+
+    def __init__(self, project_dir, create=False):
+        self.project_dir = Path(project_dir)
+        self.path = store_path(self.project_dir)
+        if create:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        elif not self.path.exists():
+            raise FileNotFoundError(self.path)
+        self.db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        self.db.executescript(_SCHEMA)
+        version = self.get_meta('schema')
+        if version is None:
+            self.set_meta('schema', SCHEMA_VERSION)
+        elif version != SCHEMA_VERSION:
+            self.db.close()
+            raise ValueError(f"unsupported memory store version {version}: {self.path}")
+
+    @classmethod
+    def open(cls, project_dir):
+        """The project's store, or None when it has none."""
+        if not store_path(project_dir).exists():
+            return None
+        return cls(project_dir)
+
+    def close(self):
+        self.db.close()
+
+    def transaction(self):
+        """Context manager grouping writes into one transaction."""
+        return _Transaction(self.db)
+
+    # ------------------------------------------------------------------ meta
+    def get_meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, _dumps(value)))
+
+    @property
+    def export_mode(self):
+        return self.get_meta('export', 'auto')
+
+    def export_due(self, interval=EXPORT_INTERVAL):
+        """Whether an auto-export store has unexported changes and exported last interval seconds ago."""
+        return (self.export_mode == 'auto' and self.get_meta('dirty', False)
+                and time.time() - (self.get_meta('exported_at') or 0) >= interval)
+
+    # --------------------------------------------------------------- entries
+    def get(self, relpath):
+        """Stored entry of a file, or None."""
+        row = self.db.execute("SELECT entry FROM files WHERE path = ?", (relpath,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, relpath, entry):
+        self.db.execute("INSERT OR REPLACE INTO files (path, type, date, title, entry) VALUES (?, ?, ?, ?, ?)",
+                        (relpath, entry.get('type'), entry.get('date'), entry.get('title'), _dumps(entry)))
+        self.db.execute("DELETE FROM tags WHERE path = ?", (relpath,))
+        self.db.execute("DELETE FROM keywords WHERE path = ?", (relpath,))
+        self.db.executemany("INSERT OR IGNORE INTO tags (tag, path) VALUES (?, ?)",
+                            [(tag, relpath) for tag in _lowered(entry.get('tags'))])
+        self.db.executemany("INSERT OR IGNORE INTO keywords (keyword, path) VALUES (?, ?)",
+                            [(keyword, relpath) for keyword in _lowered(entry.get('keywords'))])
+
+    def upsert(self, entries):
+        """Store generated entries {relpath: entry}, keeping keys added by hand."""
+        with self.transaction():
+            for relpath, generated in entries.items():
+                entry = self.get(relpath) or {}
+                entry.update(generated)
+                self._write(relpath, entry)
+
+    def delete(self, relpaths):
+        """Forget the entries of removed files."""
+        relpaths = [(relpath,) for relpath in relpaths]
+        with self.transaction():
+            for table in ('files', 'tags', 'keywords'):
+                self.db.executemany(f"DELETE FROM {table} WHERE path = ?", relpaths)
+
+    def paths(self):
+        return [row[0] for row in self.db.execute("SELECT path FROM files ORDER BY path")]
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def find(self, tags=(), keywords=(), prefix=None, file_type=None):
+        """[(relpath, entry)] having every tag and keyword, under prefix, of file_type."""
+        clauses = []
+        params = []
+        for tag in _lowered(tags):
+            clauses.append("path IN (SELECT path FROM tags WHERE tag = ?)")
+            params.append(tag)
+        for keyword in _lowered(keywords):
+            clauses.append("path IN (SELECT path FROM keywords WHERE keyword = ?)")
+            params.append(keyword)
+        if prefix:
+            # A range on the primary key instead of LIKE, so the index is used
+            clauses.append("path >= ? AND path < ?")
+            params.extend((prefix, prefix + '\U0010ffff'))
+        if file_type:
+            clauses.append("type = ?")
+            params.append(file_type)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        rows = self.db.execute(f"SELECT path, entry FROM files{where} ORDER BY path", params)
+        return [(path, json.loads(entry)) for path, entry in rows]
+
+    def tag_counts(self):
+        """[(tag, files)] most used first."""
+        return self.db.execute("SELECT tag, COUNT(*) FROM tags GROUP BY tag ORDER BY 2 DESC, 1").fetchall()
+
+    # ------------------------------------------------------ memories.json view
+    def import_document(self, document):
+        """Replace the store's content with a memories.json document."""
+        document = document if isinstance(document, dict) else {}
+        files = document.get('files') if isinstance(document.get('files'), dict) else {}
+        with self.transaction():
+            for table in ('files', 'tags', 'keywords'):
+                self.db.execute(f"DELETE FROM {table}")
+            self.set_meta('document', {key: value for key, value in document.items() if key != 'files'})
+            for relpath, entry in files.items():
+                if isinstance(entry, dict):
+                    self._write(relpath, entry)
+
+    @trace.traced('store.export')
+    def export(self, path=None):
+        """Write the memories.json view (to path, default the project's memories.json)."""
+        document = dict(self.get_meta('document', {}))
+        document.setdefault('project', self.project_dir.name)
+        document['updated'] = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+        document.pop('files', None)
+        # Streamed entry by entry, formatted exactly like json.dump(indent=2)
+        head = json.dumps(document, ensure_ascii=False, indent=2)
+        pieces = [head[:-2] + ',\n' if document else '{\n', '  "files": {']
+        first = True
+        for relpath, entry in self.db.execute("SELECT path, entry FROM files ORDER BY path"):
+            body = json.dumps(json.loads(entry), ensure_ascii=False, indent=2).replace('\n', '\n    ')
+            pieces.append(('\n' if first else ',\n') + '    ' + json.dumps(relpath, ensure_ascii=False) + ': ' + body)
+            first = False
+        pieces.append('\n  }\n}\n' if not first else '}\n}\n')
+        target = Path(path) if path else self.project_dir / MEMORY_INDEX
+        atomic_write_bytes(target, ''.join(pieces).encode('utf-8'))
+        if path is None:
+            with self.transaction():
+                self.set_meta('document', dict(document))
+                self.set_meta('exported', _stat_key(target))
+                self.set_meta('exported_at', time.time())
+                self.set_meta('dirty', False)
+        return target
+
+    def sync_hand_edits(self):
+        """Merge hand edits of the exported memories.json back into the store.
+
+        Only reads the file when its size or mtime changed since the last
+        export. Returns True when something was merged.
+        """
+        index_file = self.project_dir / MEMORY_INDEX
+        current = _stat_key(index_file)
+        if current is None or current == self.get_meta('exported'):
+            return False
+        document = load_json(index_file, None)
+        if not isinstance(document, dict):
+            return False
+        files = document.get('files') if isinstance(document.get('files'), dict) else {}
+        with self.transaction():
+            self.set_meta('document', {key: value for key, value in document.items() if key != 'files'})
+            for relpath, stored in self.find():
+                edited = files.get(relpath)
+                if not isinstance(edited, dict):
+                    continue
+                entry = {key: value for key, value in stored.items() if key in GENERATED_FIELDS}
+                entry.update((key, value) for key, value in edited.items() if key not in GENERATED_FIELDS)
+                if entry != stored:
+                    self._write(relpath, entry)
+            self.set_meta('exported', current)
+        return True
+
+def export_pending(memory_root, force=False):
+    """Export memories.json of every store with deferred changes; returns the projects written.
+
+    Only stores whose last export is EXPORT_INTERVAL old are written, unless
+    force (the watcher passes it once changes have stopped and on exit).
+    """
+    written = []
+    for name in list_projects(memory_root, include_private=True):
+        project_dir = Path(memory_root, name)
+        store = MemoryStore.open(project_dir)
+        if store is None:
+            continue
+        try:
+            if store.export_due(0.0 if force else EXPORT_INTERVAL):
+                with file_lock(project_dir.parent, f"{name}/{MEMORY_INDEX}"):
+                    store.sync_hand_edits()
+                    store.export()
+                written.append(name)
+        finally:
+            store.close()
+    return written
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, or ROLLBACK on error; nests as a no-op."""
+
+    def __init__(self, db):
+        self.db = db
+        self.outer = False
+
+    def __enter__(self):
+        if not self.db.in_transaction:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.outer = True
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.outer:
+            self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def _projects(args, memory_root):
+    projects = args.projects or list_projects(memory_root)
+    missing = [name for name in projects if not (memory_root / name).is_dir()]
+    for name in missing:
+        print(f"✗ Project directory not found: {memory_root / name}")
+    return [name for name in projects if name not in missing], 1 if missing else 0
+
+def run(args, memory_root):
+    """memory.py store init|query|export|drop [project ...]"""
+    projects, status = _projects(args, memory_root)
+    if args.action == 'init':
+        for name in projects:
+            project_dir = memory_root / name
+            started = time.perf_counter()
+            store = MemoryStore(project_dir, create=True)
+            store.import_document(load_json(project_dir / MEMORY_INDEX, {}))
+            store.set_meta('export', 'manual' if args.manual_export else 'auto')
+            store.set_meta('exported', None)
+            store.close()
+            stats = index_project(project_dir, full=True)
+            print(f"{name}: store created with {stats['files']} files, {stats['parsed']} re-parsed "
+                  f"({time.perf_counter() - started:.3f}s)")
+        return status
+
+    if args.action == 'drop':
+        for name in projects:
+            store = MemoryStore.open(memory_root / name)
+            if store is None:
+                continue
+            store.export()
+            store.close()
+            os.unlink(str(store_path(memory_root / name)))
+            print(f"{name}: store removed; {MEMORY_INDEX} is maintained as a file again")
+        return status
+
+    results = []
+    elapsed = 0.0
+    for name in projects:
+        store = MemoryStore.open(memory_root / name)
+        if store is None:
+            if args.projects:
+                print(f"✗ {name} has no store. Create one with: python3 memory.py store init {name}")
+                status = 1
+            continue
+        if args.action == 'export':
+            store.sync_hand_edits()
+            target = store.export(args.output if args.output and len(projects) == 1 else None)
+            print(f"{name}: exported {store.count()} entries to {target}")
+        else:
+            started = time.perf_counter()
+            store.sync_hand_edits()
+            found = store.find(args.tag, args.keyword, args.path, args.type)
+            elapsed += time.perf_counter() - started
+            results.extend((name, relpath, entry) for relpath, entry in found)
+        store.close()
+    if args.action == 'query':
+        if args.json:
+            print(json.dumps([{'path': f"{name}/{relpath}", **entry} for name, relpath, entry in results],
+                             ensure_ascii=False, indent=2))
+            return status
+        for name, relpath, entry in results:
+            print(f"{name}/{relpath}: {entry.get('title', '')} [{', '.join(entry.get('tags', []))}]")
+        print(f"{len(results)} entries in {elapsed * 1000:.1f} ms")
+    return status
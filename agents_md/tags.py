@@ -0,0 +1,408 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Tag posting-list index and boolean tag queries.
+
+Memory files end with <!-- #tag ... --> footers (and may have Tags: lines),
+and the tags of memories.json entries (which may have been edited by hand)
+are merged in as file tags. This index turns them
+into posting lists so a tag lookup never scans files:
+
+    MEMORY_PATH/.agents-md/tags/index.json     read by queries
+        {"version": 1, "docs": ["proj/topic/auth.md", ...],
+         "files": {tag: [doc, ...]},           sorted doc ids
+         "sections": {tag: [doc << 16 | section, ...]}}
+    MEMORY_PATH/.agents-md/tags/manifest.json  per-file size/mtime/hash and
+                                               tags, only read when updating
+
+A tag applies to the file, and to the sections of the top-level (#) section
+it was written in (the whole file when it has no top-level heading). A
+normal file's footer therefore tags all of its sections, while each part of
+a session archive keeps its own tags.
+
+Queries combine tags with AND, OR, NOT and parentheses (adjacent tags mean
+AND, -tag means NOT tag, tag* matches every tag with that prefix) and are
+answered by intersecting, merging and subtracting sorted posting lists:
+
+    memory.py tags "auth AND (api OR token) AND NOT deprecated"
+"""
+
+import bisect
+import heapq
+import re
+import time
+from pathlib import Path
+
+from . import trace
+from .common import (
+    MEMORY_INDEX, PRIVATE_DIR, STATE_DIR, dump_json, list_projects, load_json,
+    write_json,
+)
+from .markdown import extract_tags, iter_tag_lines, split_sections
+from .pack import scan_with_packs
+
+INDEX_VERSION = 1
+TAGS_DIR = "tags"
+# Section postings pack (doc, section) into one int
+SECTION_BITS = 16
+_SECTION_MASK = (1 << SECTION_BITS) - 1
+
+_QUERY_TOKEN_RE = re.compile(r'\(|\)|[^\s()]+')
+
+# ============================================================================
+# POSTING LISTS
+# ============================================================================
+def intersect(first, second):
+    """Intersection of two sorted lists; gallops through the longer one."""
+    if len(first) > len(second):
+        first, second = second, first
+    result = []
+    low = 0
+    for value in first:
+        low = bisect.bisect_left(second, value, low)
+        if low == len(second):
+            break
+        if second[low] == value:
+            result.append(value)
+    return result
+
+def union(lists):
+    """Union of sorted lists, sorted and without duplicates."""
+    result = []
+    for value in heapq.merge(*lists):
+        if not result or result[-1] != value:
+            result.append(value)
+    return result
+
+def difference(first, second):
+    """Values of sorted first that are not in sorted second."""
+    result = []
+    position = 0
+    for value in first:
+        position = bisect.bisect_left(second, value, position)
+        if position == len(second) or second[position] != value:
+            result.append(value)
+    return result
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+def normalize_tag(tag):
+    return tag.lstrip('#').strip().lower()
+
+def parse_query(text):
+    """Parse a tag expression into nested tuples.
+
+    ('tag', name) | ('prefix', name) | ('not', node) | ('and', [nodes]) |
+    ('or', [nodes]). NOT binds tightest, then AND (explicit or implied by
+    adjacent terms), then OR. Raises ValueError on malformed input.
+    """
+    tokens = _QUERY_TOKEN_RE.findall(text)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        nodes = [parse_and()]
+        while peek() is not None and peek().upper() == 'OR':
+            take()
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and():
+        nodes = [parse_not()]
+        while peek() is not None and peek() != ')' and peek().upper() != 'OR':
+            if peek().upper() == 'AND':
+                take()
+            nodes.append(parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not():
+        token = peek()
+        if token is None:
+            raise ValueError("expression ends too early")
+        if token.upper() == 'NOT':
+            take()
+            return ('not', parse_not())
+        if token.startswith('-') and len(token) > 1:
+            take()
+            return ('not', _term(token[1:]))
+        return parse_atom()
+
+    def parse_atom():
+        token = take()
+        if token == '(':
+            node = parse_or()
+            if peek() != ')':
+                raise ValueError("missing ')'")
+            take()
+            return node
+        if token == ')' or token.upper() in ('AND', 'OR'):
+            raise ValueError(f"unexpected '{token}'")
+        return _term(token)
+
+    if not tokens:
+        raise ValueError("empty expression")
+    node = parse_or()
+    if position != len(tokens):
+        raise ValueError(f"unexpected '{tokens[position]}'")
+    return node
+
+def _term(token):
+    name = normalize_tag(token)
+    if name.endswith('*'):
+        return ('prefix', name[:-1])
+    if not name:
+        raise ValueError(f"not a tag: '{token}'")
+    return ('tag', name)
+
+def query_tags(node):
+    """Positive tag names and prefixes a parsed query mentions."""
+    kind = node[0]
+    if kind in ('tag', 'prefix'):
+        return [node[1] + ('*' if kind == 'prefix' else '')]
+    if kind == 'not':
+        return []
+    return [tag for child in node[1] for tag in query_tags(child)]
+
+def evaluate(node, postings, universe):
+    """Sorted ids matching a parsed query.
+
+    postings maps tag -> sorted ids (a sorted tag list is derived for
+    prefixes); universe is the sorted list of every id.
+    """
+    kind = node[0]
+    if kind == 'tag':
+        return postings.get(node[1], [])
+    if kind == 'prefix':
+        names = sorted(postings)
+        start = bisect.bisect_left(names, node[1])
+        matched = []
+        for name in names[start:]:
+            if not name.startswith(node[1]):
+                break
+            matched.append(postings[name])
+        return union(matched)
+    if kind == 'not':
+        return difference(universe, evaluate(node[1], postings, universe))
+    if kind == 'or':
+        return union([evaluate(child, postings, universe) for child in node[1]])
+    # AND: intersect the positive operands smallest first, then subtract negations
+    positive = [evaluate(child, postings, universe) for child in node[1] if child[0] != 'not']
+    negative = [evaluate(child[1], postings, universe) for child in node[1] if child[0] == 'not']
+    positive.sort(key=len)
+    result = positive[0] if positive else universe
+    for ids in positive[1:]:
+        if not result:
+            break
+        result = intersect(result, ids)
+    for ids in negative:
+        if not result:
+            break
+        result = difference(result, ids)
+    return result
+
+# ============================================================================
+# INDEX
+# ============================================================================
+def tag_directory(memory_root):
+    """Directory holding the tag index."""
+    return Path(memory_root, STATE_DIR, TAGS_DIR)
+
+def file_tags(data):
+    """(file tags, {section number: tags}) of one memory file."""
+    text = data.decode('utf-8', errors='replace')
+    sections = split_sections(data)
+    lines = [section['line'] for section in sections]
+    top_level = [number for number, section in enumerate(sections) if section['level'] == 1]
+    section_tags = {}
+    for line, tags in iter_tag_lines(text):
+        number = bisect.bisect_right(lines, line) - 1
+        owner = [top for top in top_level if top <= number]
+        if owner:
+            first = owner[-1]
+            following = [top for top in top_level if top > first]
+            last = following[0] if following else len(sections)
+        else:
+            first, last = 0, len(sections)
+        for target in range(first, min(last, _SECTION_MASK + 1)):
+            section_tags.setdefault(target, [])
+            section_tags[target].extend(tag for tag in tags if tag not in section_tags[target])
+    return extract_tags(text), section_tags
+
+def _memories_tags(memory_root, include_private):
+    """Tags of memories.json entries by memory-root-relative path, plus file mtimes."""
+    extra = {}
+    stamps = {}
+    for project in list_projects(memory_root, include_private):
+        path = Path(memory_root, project, MEMORY_INDEX)
+        try:
+            stamps[project] = path.stat().st_mtime_ns
+        except OSError:
+            continue
+        document = load_json(path, {})
+        files = document.get('files') if isinstance(document, dict) else None
+        if not isinstance(files, dict):
+            continue
+        for relpath, entry in files.items():
+            if isinstance(entry, dict) and isinstance(entry.get('tags'), list):
+                extra[f"{project}/{relpath}"] = [normalize_tag(str(tag)) for tag in entry['tags'] if str(tag).strip()]
+    return extra, stamps
+
+@trace.traced('tags.update')
+def update_tag_index(memory_root, include_private=False, full=False, paths=None):
+    """Bring the tag index up to date; returns a stats dict."""
+    started = time.perf_counter()
+    directory = tag_directory(memory_root)
+    if full:
+        paths = None
+    manifest = {} if full else load_json(directory / 'manifest.json', {})
+    if not isinstance(manifest, dict) or manifest.get('version') != INDEX_VERSION \
+            or manifest.get('include_private') != include_private:
+        manifest = {}
+        paths = None
+    previous = manifest.get('files', {})
+
+    skip_dirs = () if include_private else (PRIVATE_DIR,)
+    files = {}
+    parsed = 0
+    for relpath, record, data in scan_with_packs(memory_root, previous, skip_dirs, paths):
+        old = previous.get(relpath)
+        if data is None:
+            files[relpath] = old
+        elif old and old['hash'] == record['hash']:
+            files[relpath] = dict(old, **record) if 'pack' in record else {
+                key: value for key, value in dict(old, **record).items() if key != 'pack'}
+        else:
+            tags, section_tags = file_tags(data)
+            files[relpath] = dict(record, tags=tags, sections={str(k): v for k, v in section_tags.items()})
+            parsed += 1
+    removed = len(previous.keys() - files.keys())
+    extra, stamps = _memories_tags(memory_root, include_private)
+    changed = bool(parsed or removed or stamps != manifest.get('memories') or not manifest
+                   or not (directory / 'index.json').exists())
+    if not changed:
+        if files != previous:
+            write_json(directory / 'manifest.json', dict(manifest, files=files))
+        return {'files': len(files), 'parsed': 0, 'removed': 0, 'tags': None, 'written': False,
+                'seconds': time.perf_counter() - started}
+
+    docs = sorted(files)
+    postings = {}
+    section_postings = {}
+    for doc, relpath in enumerate(docs):
+        entry = files[relpath]
+        for tag in dict.fromkeys(entry['tags'] + extra.get(relpath, [])):
+            postings.setdefault(tag, []).append(doc)
+        for number, tags in sorted(entry['sections'].items(), key=lambda item: int(item[0])):
+            for tag in tags:
+                section_postings.setdefault(tag, []).append(doc << SECTION_BITS | int(number))
+    for ids in section_postings.values():
+        ids.sort()
+    write_json(directory / 'index.json', {'version': INDEX_VERSION, 'docs': docs,
+                                          'files': postings, 'sections': section_postings})
+    write_json(directory / 'manifest.json', {'version': INDEX_VERSION, 'include_private': include_private,
+                                             'memories': stamps, 'files': files})
+    return {'files': len(files), 'parsed': parsed, 'removed': removed, 'tags': len(postings), 'written': True,
+            'seconds': time.perf_counter() - started}
+
+class TagIndex:
+    """Read-only view of the tag index."""
+
+    def __init__(self, document):
+        self.docs = document['docs']
+        self.files = document['files']
+        self.sections = document['sections']
+
+    @classmethod
+    def open(cls, memory_root):
+        """Load the index, or return None when there is none."""
+        document = load_json(tag_directory(memory_root) / 'index.json')
+        if not isinstance(document, dict) or document.get('version') != INDEX_VERSION:
+            return None
+        return cls(document)
+
+    @trace.traced('tags.query')
+    def query(self, expression, sections=False):
+        """Paths (or (path, section number) pairs) matching a tag expression.
+
+        Sections without any tag are not indexed, so NOT only excludes
+        sections from the tagged ones.
+        """
+        node = parse_query(expression)
+        if sections:
+            universe = union(self.sections.values())
+            return [(self.docs[value >> SECTION_BITS], value & _SECTION_MASK)
+                    for value in evaluate(node, self.sections, universe)]
+        universe = list(range(len(self.docs)))
+        return [self.docs[doc] for doc in evaluate(node, self.files, universe)]
+
+    def counts(self):
+        """(tag, number of files) pairs, most used first."""
+        return sorted(((tag, len(ids)) for tag, ids in self.files.items()), key=lambda item: (-item[1], item[0]))
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def run(args, memory_root):
+    """memory.py tags [EXPRESSION] [--sections] [--refresh] [--json]"""
+    index = None if args.refresh else TagIndex.open(memory_root)
+    if index is None:
+        stats = update_tag_index(memory_root, include_private=args.include_private, full=args.full)
+        if stats['written']:
+            print(f"Tag index: {stats['files']} files, {stats['parsed']} parsed, {stats['removed']} removed, "
+                  f"{stats['tags']} tags ({stats['seconds']:.3f}s)")
+        index = TagIndex.open(memory_root)
+        if index is None:
+            print("✗ Error: the tag index could not be built.")
+            return 1
+
+    expression = ' '.join(args.expression)
+    if not expression:
+        counts = index.counts()[:args.limit] if args.limit else index.counts()
+        if args.json:
+            print(dump_json(dict(counts), pretty=True), end='')
+        else:
+            for tag, count in counts:
+                print(f"{count:6}  #{tag}")
+        return 0
+
+    started = time.perf_counter()
+    try:
+        matches = index.query(expression, sections=args.sections)
+    except ValueError as e:
+        print(f"✗ Invalid tag expression: {e}")
+        return 1
+    elapsed = time.perf_counter() - started
+    if args.sections:
+        from .sections import SectionIndex
+        section_index = SectionIndex(memory_root)
+        results = []
+        for relpath, number in matches:
+            sections = section_index.sections(relpath)
+            section = sections[number] if number < len(sections) else {'line': 0, 'title': ''}
+            results.append({'path': relpath, 'section': number, 'line': section['line'], 'title': section['title']})
+        section_index.save()
+    else:
+        results = [{'path': relpath} for relpath in matches]
+    if args.limit:
+        results = results[:args.limit]
+
+    if args.json:
+        print(dump_json(results, pretty=True), end='')
+        return 0
+    for result in results:
+        if args.sections:
+            print(f"{result['path']} #{result['section']} L{result['line']} {result['title']}")
+        else:
+            print(result['path'])
+    print(f"{len(matches)} matches in {elapsed * 1000:.1f} ms")
+    return 0
@@ -0,0 +1,67 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Tokenization and token estimates shared by the memory indexes.
+
+English (and other space-separated scripts) is split into lowercase words with
+a small stopword list. Japanese and Chinese have no spaces, so runs of
+kana/kanji are indexed as overlapping character bigrams, which needs no
+dictionary and matches any substring of two or more characters.
+"""
+
+import re
+import unicodedata
+
+# Bump when tokenization changes so persisted indexes get rebuilt
+TOKENIZER_VERSION = 1
+
+_CJK_RANGES = (
+    '\u3040-\u309f'   # Hiragana
+    '\u30a0-\u30ff'   # Katakana (including the prolonged sound mark)
+    '\u3400-\u4dbf'   # CJK Extension A
+    '\u4e00-\u9fff'   # CJK Unified Ideographs
+    '\uf900-\ufaff'   # CJK Compatibility Ideographs
+)
+_WORD_RE = re.compile(r'[^\W_' + _CJK_RANGES + r']+')
+_ASCII_WORD_RE = re.compile(r'[a-z0-9]+')
+_CJK_RE = re.compile(r'[' + _CJK_RANGES + r']+')
+
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has',
+    'in', 'is', 'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was',
+    'were', 'will', 'with',
+))
+
+def normalize(text):
+    """NFKC-normalize (full-width to half-width) and lowercase."""
+    return unicodedata.normalize('NFKC', text).lower()
+
+def tokenize(text):
+    """Split text into index terms.
+
+    Returns a bag of terms: words first, then CJK bigrams, so only term counts
+    (not positions) are meaningful.
+    """
+    if text.isascii():
+        # Fast path for plain English memory files
+        return [word for word in _ASCII_WORD_RE.findall(text.lower()) if word not in STOPWORDS]
+    text = normalize(text)
+    tokens = [word for word in _WORD_RE.findall(text) if word not in STOPWORDS]
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend([run[i:i + 2] for i in range(len(run) - 1)])
+    return tokens
+
+def estimate_tokens(text):
+    """Estimate LLM tokens without a tokenizer.
+
+    About four characters per token for ASCII text and one token per
+    character for everything else (Japanese, emoji), which is close enough
+    for budgeting and costs two C-level passes over the string.
+    """
+    non_ascii = len(text) - len(text.encode('ascii', 'ignore'))
+    return (len(text) - non_ascii + 3) // 4 + non_ascii
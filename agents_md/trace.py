@@ -0,0 +1,272 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Opt-in timing and file-operation tracing for setup.py and the memory tools.
+
+Tracing is off unless a run asks for it, and then costs one global check
+per hook:
+
+    python3 setup.py --trace setup-trace.jsonl
+    python3 memory.py search auth --refresh --trace search-trace.json
+    AGENTS_MD_TRACE=/var/log/agents-md/trace.jsonl python3 memory.py index
+
+--trace starts a new file; AGENTS_MD_TRACE appends to it, so a fleet can
+point every run at one file. Worker processes (setup.py --jobs) inherit the
+setting and append their own spans.
+
+Each span (a step such as "setup.switch_to_language" or "search.update")
+records its wall time and the file operations made while it was open:
+reads/bytes_read, writes/bytes_written, stats and backups. Counters include
+those of nested spans. Two formats are written, one event per line:
+
+    jsonl   {"name": ..., "ts": unix seconds, "ms": ..., "pid": ..., "depth": ...,
+             "parent": ..., "args": {...}, "counters": {...}}
+    chrome  Trace Event Format ("ph": "X"), for chrome://tracing or Perfetto
+
+The format follows the file name (.json means chrome) unless
+--trace-format or AGENTS_MD_TRACE_FORMAT says otherwise. A chrome file that
+--trace started is closed into a valid JSON array when the run exits (its
+workers have finished by then). Files that AGENTS_MD_TRACE appends to stay
+open arrays, which trace viewers accept but json.load does not, since
+another run may append at any time; feed fleet metrics from jsonl. Hooks for
+new code:
+
+    with trace.span('tool.step', files=len(paths)) as span:
+        ...
+        trace.add(reads=1, bytes_read=len(data))
+        span.set(parsed=parsed)
+
+    @trace.traced('tool.update')
+    def update(...): ...
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+TRACE_ENV = "AGENTS_MD_TRACE"
+TRACE_FORMAT_ENV = "AGENTS_MD_TRACE_FORMAT"
+FORMATS = ('jsonl', 'chrome')
+
+# ============================================================================
+# SPANS
+# ============================================================================
+class _NullSpan:
+    """Stand-in returned while tracing is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **args):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    """One timed step; counters collect file operations made while it is open."""
+
+    __slots__ = ('tracer', 'name', 'args', 'counters', 'ts', 'started', 'parent', 'depth')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.counters = {}
+
+    def __enter__(self):
+        stack = self.tracer.stack()
+        self.parent = stack[-1].name if stack else None
+        self.depth = len(stack)
+        stack.append(self)
+        self.ts = time.time()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.started
+        stack = self.tracer.stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is SystemExit:
+            self.args['exit'] = exc.code
+        elif exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        if stack:
+            parent = stack[-1].counters
+            for key, value in self.counters.items():
+                parent[key] = parent.get(key, 0) + value
+        self.tracer.emit(self, seconds)
+        return False
+
+    def set(self, **args):
+        """Attach results (counts, sizes) to the span."""
+        self.args.update(args)
+
+# ============================================================================
+# TRACER
+# ============================================================================
+class Tracer:
+    """Writes finished spans to a trace file, one event per line."""
+
+    def __init__(self, path, trace_format=None, append=True):
+        self.path = str(path)
+        self.format = trace_format or ('chrome' if self.path.endswith('.json') else 'jsonl')
+        if self.format not in FORMATS:
+            raise ValueError(f"unknown trace format: {self.format}")
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | (0 if append else os.O_TRUNC)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.fd = os.open(self.path, flags, 0o644)
+        self.pid = os.getpid()
+        self._local = threading.local()
+        # Only a run that started the file may close its array: appenders come and go
+        self.finish_pid = None
+        if self.format == 'chrome' and os.fstat(self.fd).st_size == 0:
+            # JSON array format; the closing bracket is optional for trace viewers
+            os.write(self.fd, b'[\n')
+            if not append:
+                self.finish_pid = self.pid
+        elif self.format == 'chrome':
+            self._reopen_array()
+
+    def stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def emit(self, span, seconds):
+        if self.format == 'chrome':
+            event = {'name': span.name, 'cat': 'agents-md', 'ph': 'X', 'ts': int(span.ts * 1e6),
+                     'dur': int(seconds * 1e6), 'pid': os.getpid(), 'tid': threading.get_ident(),
+                     'args': dict(span.args, **span.counters)}
+            line = json.dumps(event, ensure_ascii=False, default=str) + ',\n'
+        else:
+            event = {'name': span.name, 'ts': round(span.ts, 6), 'ms': round(seconds * 1000, 3),
+                     'pid': os.getpid(), 'depth': span.depth, 'parent': span.parent,
+                     'args': span.args, 'counters': span.counters}
+            line = json.dumps(event, ensure_ascii=False, default=str) + '\n'
+        if self.fd is None:
+            return
+        # One write per event: O_APPEND keeps lines of concurrent processes whole
+        try:
+            os.write(self.fd, line.encode('utf-8'))
+        except OSError:
+            pass
+
+    def close(self):
+        if self.fd is None:
+            return
+        try:
+            os.close(self.fd)
+            if self.finish_pid == os.getpid():
+                self._finish_array()
+        except OSError:
+            pass
+        self.fd = None
+
+    def _reopen_array(self):
+        """Let events follow an array a --trace run finished (its ']' becomes a comma)."""
+        with open(self.path, 'r+b') as f:
+            end = f.seek(0, os.SEEK_END)
+            f.seek(max(0, end - 3))
+            tail = f.read()
+            if tail.endswith(b']\n'):
+                f.seek(end - (3 if tail == b'\n]\n' else 2))
+                f.truncate()
+                f.write(b',\n' if end > 4 else b'')
+
+    def _finish_array(self):
+        """Turn the open event array into valid JSON: drop the last comma, add ']'."""
+        with open(self.path, 'r+b') as f:
+            end = f.seek(0, os.SEEK_END)
+            f.seek(max(0, end - 2))
+            if f.read() == b',\n':
+                f.seek(end - 2)
+                f.truncate()
+                f.write(b'\n')
+            f.write(b']\n')
+
+_tracer = None
+_checked_env = False
+
+def enable(path, trace_format=None, append=False):
+    """Start tracing to path (a new file unless append); child processes inherit it."""
+    global _tracer, _checked_env
+    if _tracer is not None:
+        _tracer.close()
+    _tracer = Tracer(path, trace_format, append=append)
+    atexit.register(_tracer.close)
+    _checked_env = True
+    os.environ[TRACE_ENV] = _tracer.path
+    os.environ[TRACE_FORMAT_ENV] = _tracer.format
+    return _tracer
+
+def active():
+    """The running tracer, enabling it from AGENTS_MD_TRACE on first use (None when off)."""
+    global _tracer, _checked_env
+    if _checked_env:
+        return _tracer
+    _checked_env = True
+    path = os.environ.get(TRACE_ENV)
+    if path:
+        try:
+            _tracer = Tracer(path, os.environ.get(TRACE_FORMAT_ENV) or None, append=True)
+        except (OSError, ValueError):
+            _tracer = None
+    return _tracer
+
+def reset_after_fork():
+    """Forget the tracer's span stack in a forked child."""
+    tracer = _tracer
+    if tracer is not None and tracer.pid != os.getpid():
+        tracer.pid = os.getpid()
+        tracer._local = threading.local()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_after_fork)
+
+# ============================================================================
+# HOOKS
+# ============================================================================
+def span(name, **args):
+    """Context manager timing one step (a no-op when tracing is off)."""
+    tracer = _tracer if _checked_env else active()
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, args)
+
+def add(**counters):
+    """Count file operations against the innermost open span."""
+    tracer = _tracer if _checked_env else active()
+    if tracer is None:
+        return
+    stack = tracer.stack()
+    if stack:
+        totals = stack[-1].counters
+        for key, value in counters.items():
+            totals[key] = totals.get(key, 0) + value
+
+def traced(name=None):
+    """Decorator running a function inside a span named name (default: its qualified name)."""
+    def decorate(function):
+        span_name = name or f"{function.__module__}.{function.__qualname__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer if _checked_env else active()
+            if tracer is None:
+                return function(*args, **kwargs)
+            with Span(tracer, span_name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
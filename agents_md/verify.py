@@ -0,0 +1,492 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Verifier for code references cited in memory files.
+
+AGENTS.md and hallucination-prevention.md require agents to verify that
+code exists before referencing it, yet memory files collect file paths and
+function names that go stale as the code moves on, and each agent checks
+them again with full-repository searches. `memory.py verify PROJECT
+--workspace DIR` does it in bulk:
+
+    workspace index  every file of the workspace (git ls-files, or a walk
+                     skipping scan.SKIP_DIRS) with its size and mtime, plus
+                     the definitions in Python / JavaScript / TypeScript
+                     sources found by regex (functions, classes, methods,
+                     constants, interfaces, types). Kept in SQLite,
+                     [memory root]/.agents-md/workspaces/<hash>.db
+    references       paths (in `code spans`, or bare with a source suffix)
+                     and symbols (`name()`, `Class.method`, snake_case and
+                     CamelCase code spans) of the project's memory files,
+                     outside fenced code blocks; cached per file in
+                     [project]/.agents-md/refs.json
+
+A path matches when it is a workspace file or directory, or a trailing part
+of one (`auth/jwt.py` matches `src/auth/jwt.py`); a symbol when any source
+file defines it. Both lookups are single index probes, so answering one
+costs the same on a workspace of any size. Paths of the memory
+project itself (topic/..., session/..., context.md) are not checked, nor are
+dotted names rooted in a module the workspace does not have (`os.path`).
+
+Refreshing is incremental: in a git checkout, only files changed between
+the indexed commit and HEAD, files git status reports and files that were
+dirty last time are looked at, so a refresh after a pull costs about as
+much as the diff; elsewhere every file is stat-ed and only changed sources
+are parsed again.
+"""
+
+import bisect
+import json
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+from . import trace
+from .common import (
+    content_hash, list_projects, load_json, state_path, write_json,
+)
+from .ingest import GitError, git
+from .pack import scan_with_packs
+from .scan import SKIP_DIRS
+
+INDEX_VERSION = 1
+REFS_VERSION = 1
+WORKSPACE_DIR = "workspaces"
+REFS_STATE = "refs.json"
+SOURCE_SUFFIXES = ('.py', '.pyi', '.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx', '.mts', '.cts')
+# Bare (unquoted) paths in prose are only taken with one of these suffixes
+PATH_SUFFIXES = SOURCE_SUFFIXES + (
+    '.json', '.toml', '.yaml', '.yml', '.cfg', '.ini', '.sh', '.go', '.rs', '.java', '.kt', '.rb',
+    '.php', '.c', '.h', '.cc', '.cpp', '.hpp', '.cs', '.swift', '.sql', '.html', '.css', '.scss', '.vue',
+)
+# A `name.ext` code span with one of these is a file name, not `module.attribute`
+FILE_SUFFIXES = PATH_SUFFIXES + ('.md', '.txt', '.rst', '.lock', '.xml', '.csv', '.env', '.cfg', '.mdpack')
+# Larger sources are listed but not parsed (minified bundles, generated code)
+MAX_SOURCE_BYTES = 1024 * 1024
+# Top-level directories of a memory project; references into them are memory files
+MEMORY_DIRS = ('topic', 'session')
+
+_PYTHON_RES = (
+    (re.compile(r'^[ \t]*(?:async[ \t]+)?def[ \t]+([A-Za-z_]\w*)', re.MULTILINE), 'function'),
+    (re.compile(r'^[ \t]*class[ \t]+([A-Za-z_]\w*)', re.MULTILINE), 'class'),
+    (re.compile(r'^([A-Z][A-Z0-9_]+)[ \t]*(?::[^=\n]+)?=(?!=)', re.MULTILINE), 'constant'),
+)
+_SCRIPT_RES = (
+    (re.compile(r'\bfunction\b\*?[ \t]*([A-Za-z_$][\w$]*)'), 'function'),
+    (re.compile(r'\bclass[ \t]+([A-Za-z_$][\w$]*)'), 'class'),
+    (re.compile(r'\b(?:const|let|var)[ \t]+([A-Za-z_$][\w$]*)[ \t]*(?::[^=\n]+)?=(?!=)'), 'variable'),
+    (re.compile(r'\binterface[ \t]+([A-Za-z_$][\w$]*)'), 'interface'),
+    (re.compile(r'^[ \t]*(?:export[ \t]+)?type[ \t]+([A-Za-z_$][\w$]*)[ \t]*(?:<[^=\n]*>)?[ \t]*=',
+                re.MULTILINE), 'type'),
+    (re.compile(r'\benum[ \t]+([A-Za-z_$][\w$]*)'), 'enum'),
+    (re.compile(r'^[ \t]+(?:(?:public|private|protected|static|async|readonly|override|get|set)[ \t]+)*'
+                r'([A-Za-z_$][\w$]*)[ \t]*(?:<[^>\n]*>)?\([^)\n]*\)[ \t]*(?::[^{\n]+)?\{', re.MULTILINE), 'method'),
+)
+_NOT_METHODS = frozenset(('if', 'for', 'while', 'switch', 'catch', 'return', 'function', 'with', 'else', 'do'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS suffixes (suffix TEXT NOT NULL, path TEXT NOT NULL, PRIMARY KEY (suffix, path)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS symbols (name TEXT NOT NULL, path TEXT NOT NULL, kind TEXT, line INTEGER);
+CREATE INDEX IF NOT EXISTS suffixes_path ON suffixes (path);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name);
+CREATE INDEX IF NOT EXISTS symbols_path ON symbols (path);
+"""
+
+_NEWLINE_RE = re.compile(r'\n')
+_FENCE_RE = re.compile(r'^[ \t]{0,3}(```|~~~)')
+_CODE_SPAN_RE = re.compile(r'(`+)([^`\n]+?)\1')
+_COMMENT_RE = re.compile(r'<!--.*?-->')
+_BARE_PATH_RE = re.compile(r'(?<![\w/.:@-])((?:\./)?(?:[\w.-]+/)+[\w.-]+(?:%s))(?::\d+)?(?![\w/])'
+                           % '|'.join(re.escape(suffix) for suffix in PATH_SUFFIXES))
+_SYMBOL_RE = re.compile(r'^([A-Za-z_$][\w$]*(?:(?:\.|::|#)[A-Za-z_$][\w$]*)*)(\([^()]*\))?$')
+_FILE_NAME_RE = re.compile(r'^[\w.-]+\.[A-Za-z][A-Za-z0-9]{0,5}$')
+
+# ============================================================================
+# WORKSPACE INDEX
+# ============================================================================
+def extract_symbols(relpath, text):
+    """[(name, kind, line)] of the definitions in a Python or JS/TS source."""
+    patterns = _PYTHON_RES if relpath.endswith(('.py', '.pyi')) else _SCRIPT_RES
+    newlines = [match.start() for match in _NEWLINE_RE.finditer(text)]
+    found = {}
+    for pattern, kind in patterns:
+        for match in pattern.finditer(text):
+            name = match.group(1)
+            if kind == 'method' and name in _NOT_METHODS:
+                continue
+            line = bisect.bisect_left(newlines, match.start(1)) + 1
+            if name not in found or line < found[name][1]:
+                found[name] = (kind, line)
+    return sorted(((name, kind, line) for name, (kind, line) in found.items()), key=lambda item: item[2])
+
+def _walk_files(root):
+    """{relpath: (size, mtime_ns)} of every file below root, skipping SKIP_DIRS."""
+    files = {}
+    stack = [('', str(root))]
+    while stack:
+        prefix, directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        stack.append((prefix + entry.name + '/', entry.path))
+                elif entry.is_file():
+                    st = entry.stat()
+                    files[prefix + entry.name] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                continue
+    return files
+
+def _git_paths(root, *args):
+    return [path for path in git(root, *args).split('\0') if path]
+
+def _git_status_paths(root):
+    """Paths git status reports as changed or untracked."""
+    entries = _git_paths(root, 'status', '--porcelain', '-z', '--no-renames', '--untracked-files=all')
+    return {entry[3:] for entry in entries if len(entry) > 3}
+
+class WorkspaceIndex:
+    """Paths and source definitions of one workspace in SQLite, with indexed lookups.
+
+    Tables: files (path, size, mtime_ns), suffixes (every trailing part of
+    every file path), symbols (name, path, kind, line) and meta (root, head,
+    dirty). Lookups are single index probes, so nothing is loaded up front.
+    """
+
+    def __init__(self, memory_root, workspace):
+        self.root = Path(workspace).resolve()
+        self.path = state_path(memory_root, WORKSPACE_DIR, content_hash(str(self.root).encode('utf-8')) + '.db')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        self.db.executescript(_SCHEMA)
+        if self._meta('version') != INDEX_VERSION or self._meta('root') != str(self.root):
+            self._reset()
+
+    def close(self):
+        self.db.close()
+
+    def _meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def _reset(self):
+        for table in ('meta', 'files', 'suffixes', 'symbols'):
+            self.db.execute(f"DELETE FROM {table}")
+        self._set_meta('version', INDEX_VERSION)
+        self._set_meta('root', str(self.root))
+
+    def _parse(self, relpath, size):
+        """Replace the definitions of one file; returns True if it is a parsed source."""
+        self.db.execute("DELETE FROM symbols WHERE path = ?", (relpath,))
+        if not relpath.endswith(SOURCE_SUFFIXES) or size > MAX_SOURCE_BYTES:
+            return False
+        try:
+            with open(os.path.join(str(self.root), relpath), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return False
+        trace.add(reads=1, bytes_read=len(data))
+        symbols = extract_symbols(relpath, data.decode('utf-8', errors='replace'))
+        self.db.executemany("INSERT INTO symbols (name, path, kind, line) VALUES (?, ?, ?, ?)",
+                            [(name, relpath, kind, line) for name, kind, line in symbols])
+        return True
+
+    def _update(self, relpath, record, known):
+        """Record a file's (size, mtime_ns); True/False whether it was parsed, None if unchanged."""
+        if known.get(relpath) == record:
+            return None
+        if relpath not in known:
+            parts = relpath.split('/')
+            self.db.executemany("INSERT OR IGNORE INTO suffixes (suffix, path) VALUES (?, ?)",
+                                [('/'.join(parts[start:]), relpath) for start in range(len(parts))])
+        self.db.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns) VALUES (?, ?, ?)", (relpath,) + record)
+        known[relpath] = record
+        return self._parse(relpath, record[0])
+
+    def _remove(self, relpaths):
+        rows = [(relpath,) for relpath in relpaths]
+        for table in ('files', 'suffixes', 'symbols'):
+            self.db.executemany(f"DELETE FROM {table} WHERE path = ?", rows)
+
+    @staticmethod
+    def _count(stats, parsed):
+        if parsed is not None:
+            stats['updated'] += 1
+            stats['parsed'] += parsed
+
+    @trace.traced('verify.workspace')
+    def refresh(self, full=False):
+        """Bring the index up to date; returns a stats dict."""
+        started = time.perf_counter()
+        stats = {'mode': 'walk', 'checked': 0, 'updated': 0, 'parsed': 0, 'removed': 0}
+        try:
+            head = git(self.root, 'rev-parse', '--verify', '-q', 'HEAD').strip()
+            listing = set(_git_paths(self.root, 'ls-files', '-z', '--cached', '--others', '--exclude-standard'))
+        except GitError:
+            head = listing = None
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            if full:
+                self._reset()
+            known = {path: (size, mtime_ns) for path, size, mtime_ns in self.db.execute("SELECT * FROM files")}
+            indexed_head = self._meta('head')
+            if listing is not None:
+                stats['mode'] = 'git'
+                status = _git_status_paths(self.root)
+                candidates = None
+                if indexed_head:
+                    try:
+                        changed = _git_paths(self.root, 'diff', '--name-only', '-z', '--no-renames',
+                                             indexed_head, head)
+                        candidates = (set(changed) | status | set(self._meta('dirty', []))
+                                      | (listing - known.keys())) & listing
+                    except GitError:
+                        candidates = None  # The indexed commit is gone (rewritten history)
+                gone = known.keys() - listing
+                for relpath in sorted(listing if candidates is None else candidates):
+                    try:
+                        st = os.stat(os.path.join(str(self.root), relpath))
+                    except OSError:
+                        gone.add(relpath)
+                        continue
+                    stats['checked'] += 1
+                    self._count(stats, self._update(relpath, (st.st_size, st.st_mtime_ns), known))
+                self._set_meta('head', head)
+                self._set_meta('dirty', sorted(status))
+            else:
+                current = _walk_files(self.root)
+                gone = known.keys() - current.keys()
+                for relpath, record in current.items():
+                    stats['checked'] += 1
+                    self._count(stats, self._update(relpath, record, known))
+                self._set_meta('head', None)
+            gone &= known.keys()
+            self._remove(gone)
+            stats['removed'] = len(gone)
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        stats['seconds'] = time.perf_counter() - started
+        return stats
+
+    def find_path(self, reference):
+        """Workspace file or directory a referenced path resolves to, or None."""
+        reference = reference.strip('/')
+        row = self.db.execute("SELECT path FROM suffixes WHERE suffix = ? LIMIT 1", (reference,)).fetchone()
+        if row:
+            return row[0]
+        # A directory is a trailing part of some file path followed by '/'
+        row = self.db.execute("SELECT suffix, path FROM suffixes WHERE suffix > ? AND suffix < ? LIMIT 1",
+                              (reference + '/', reference + '0')).fetchone()
+        return row[1][:len(row[1]) - len(row[0]) + len(reference)] if row else None
+
+    def find_symbol(self, name):
+        """[(relpath, kind, line)] defining name (the last part of a dotted name)."""
+        return self.db.execute("SELECT path, kind, line FROM symbols WHERE name = ? ORDER BY path, line",
+                               (re.split(r'\.|::|#', name)[-1],)).fetchall()
+
+    def is_external(self, name):
+        """True for a dotted name rooted outside the workspace (`os.path`, `json.dumps`)."""
+        parts = re.split(r'\.|::|#', name)
+        if len(parts) < 2:
+            return False
+        first = parts[0]
+        if self.db.execute("SELECT 1 FROM symbols WHERE name = ? LIMIT 1", (first,)).fetchone():
+            return False
+        # A module file (first.py, first.ts) or package directory (first/) of that name
+        for low, high in ((first + '.', first + '/'), (first + '/', first + '0')):
+            if self.db.execute("SELECT 1 FROM suffixes WHERE suffix > ? AND suffix < ? LIMIT 1",
+                               (low, high)).fetchone():
+                return False
+        return True
+
+    def counts(self):
+        return (self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0],
+                self.db.execute("SELECT COUNT(*) FROM symbols").fetchone()[0])
+
+# ============================================================================
+# REFERENCES IN MEMORY FILES
+# ============================================================================
+def _code_reference(span):
+    """(kind, reference) for the content of a code span, or None."""
+    span = span.strip()
+    if not span or any(char.isspace() for char in span) or '://' in span or span[0] in '-$<>@~':
+        return None
+    path = re.sub(r'(?::\d+(?:-\d+)?|#L?\d+.*)$', '', span)
+    if '/' in path and not path.startswith('/'):
+        return ('path', path[2:] if path.startswith('./') else path)
+    if _FILE_NAME_RE.match(path) and path.endswith(FILE_SUFFIXES):
+        return ('path', path)
+    match = _SYMBOL_RE.match(span)
+    if not match:
+        return None
+    name = match.group(1)
+    last = re.split(r'\.|::|#', name)[-1]
+    # Plain words (`index`, `true`) are too often not code at all
+    if match.group(2) is None and name == last and '_' not in name and not re.search(r'[a-z][A-Z]', name):
+        return None
+    return ('symbol', name)
+
+def extract_references(text):
+    """[(kind, reference, line)] of paths and symbols cited in a memory file."""
+    references = []
+    in_fence = None
+    for number, line in enumerate(text.split('\n'), 1):
+        fence = _FENCE_RE.match(line)
+        if fence:
+            if in_fence is None:
+                in_fence = fence.group(1)
+            elif fence.group(1) == in_fence:
+                in_fence = None
+            continue
+        if in_fence is not None or '`' not in line and '/' not in line:
+            continue
+        line = _COMMENT_RE.sub('', line)
+        for match in _CODE_SPAN_RE.finditer(line):
+            reference = _code_reference(match.group(2))
+            if reference:
+                references.append(reference + (number,))
+        for match in _BARE_PATH_RE.finditer(_CODE_SPAN_RE.sub('', line)):
+            path = match.group(1)
+            references.append(('path', path[2:] if path.startswith('./') else path, number))
+    return references
+
+def scan_references(project_dir):
+    """{relpath: [(kind, reference, line)]} of a project's memory files, cached per file."""
+    state_file = state_path(project_dir, REFS_STATE)
+    state = load_json(state_file, {})
+    previous = state.get('files', {}) if isinstance(state, dict) and state.get('version') == REFS_VERSION else {}
+    files = {}
+    parsed = 0
+    for relpath, record, data in scan_with_packs(project_dir, previous):
+        if data is not None:
+            old = previous.get(relpath)
+            if old and old.get('hash') == record['hash'] and 'refs' in old:
+                record['refs'] = old['refs']
+            else:
+                record['refs'] = extract_references(data.decode('utf-8', errors='replace'))
+                parsed += 1
+        files[relpath] = record
+    if parsed or files.keys() != previous.keys() or any(
+            previous[relpath].get('mtime_ns') != record['mtime_ns'] for relpath, record in files.items()):
+        write_json(state_file, dict(state if isinstance(state, dict) else {}, version=REFS_VERSION, files=files))
+    return {relpath: [tuple(ref) for ref in record.get('refs', [])] for relpath, record in files.items()}, parsed
+
+def _memory_reference(reference, memory_files, memory_dirs):
+    """True for references to the memory system's own files."""
+    first = reference.split('/', 1)[0]
+    return first in memory_dirs or reference in memory_files or reference.split('#', 1)[0] in memory_files
+
+@trace.traced('verify.project')
+def verify_project(project_dir, index):
+    """Check every reference of a project against a refreshed WorkspaceIndex.
+
+    Returns a report dict: files, references, paths, symbols (checked),
+    dangling [(relpath, line, kind, reference)], parsed.
+    """
+    project_dir = Path(project_dir)
+    references, parsed = scan_references(project_dir)
+    memory_files = set(references) | {'context.md', 'memories.json'}
+    memory_dirs = set(MEMORY_DIRS) | set(list_projects(project_dir.parent, include_private=True)) | {'.agents-md'}
+    dangling = []
+    counts = {'path': 0, 'symbol': 0}
+    resolved = {}
+    for relpath, refs in sorted(references.items()):
+        for kind, reference, line in refs:
+            if kind == 'path' and _memory_reference(reference, memory_files, memory_dirs):
+                continue
+            if kind == 'symbol' and index.is_external(reference):
+                continue
+            counts[kind] += 1
+            key = (kind, reference)
+            if key not in resolved:
+                resolved[key] = bool(index.find_path(reference) if kind == 'path' else index.find_symbol(reference))
+            if not resolved[key]:
+                dangling.append((relpath, line, kind, reference))
+    return {
+        'project': project_dir.name,
+        'files': len(references),
+        'parsed': parsed,
+        'references': counts['path'] + counts['symbol'],
+        'paths': counts['path'],
+        'symbols': counts['symbol'],
+        'dangling': dangling,
+    }
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def run(args, memory_root):
+    """memory.py verify PROJECT [--workspace DIR] [--lookup NAME ...] [--full] [--json]"""
+    project_dir = memory_root / args.project
+    if not project_dir.is_dir():
+        print(f"✗ Project directory not found: {project_dir}")
+        return 1
+    state = load_json(state_path(project_dir, REFS_STATE), {})
+    workspace = args.workspace or (state.get('workspace') if isinstance(state, dict) else None)
+    if not workspace:
+        print("✗ Error: No workspace known for this project. Pass --workspace DIR once; it is remembered.")
+        return 1
+    if not Path(workspace).is_dir():
+        print(f"✗ Error: Workspace does not exist: {workspace}")
+        return 1
+    index = WorkspaceIndex(memory_root, workspace)
+    try:
+        return _report(args, project_dir, state, index)
+    finally:
+        index.close()
+
+def _report(args, project_dir, state, index):
+    refresh = index.refresh(full=args.full)
+    if args.workspace and (not isinstance(state, dict) or state.get('workspace') != str(index.root)):
+        state = state if isinstance(state, dict) else {}
+        state.update(version=state.get('version', REFS_VERSION), workspace=str(index.root))
+        write_json(state_path(project_dir, REFS_STATE), state)
+
+    files, symbols = index.counts()
+    if args.lookup:
+        found = {}
+        for name in args.lookup:
+            path = index.find_path(name)
+            found[name] = {'path': path, 'definitions': [
+                {'path': relpath, 'kind': kind, 'line': line} for relpath, kind, line in index.find_symbol(name)]}
+        if args.json:
+            print(json.dumps(found, ensure_ascii=False, indent=2))
+        else:
+            for name, result in found.items():
+                if result['path']:
+                    print(f"{name}: {result['path']}")
+                for definition in result['definitions']:
+                    print(f"{name}: {definition['kind']} at {definition['path']}:{definition['line']}")
+                if not result['path'] and not result['definitions']:
+                    print(f"{name}: not found")
+        return 0 if all(result['path'] or result['definitions'] for result in found.values()) else 1
+
+    report = verify_project(project_dir, index)
+    if args.json:
+        print(json.dumps(dict(report, workspace=str(index.root), workspace_files=files, workspace_symbols=symbols,
+                              refresh=refresh), ensure_ascii=False, indent=2))
+        return 1 if report['dangling'] else 0
+    print(f"{report['project']}: {report['references']} references ({report['paths']} paths, "
+          f"{report['symbols']} symbols) in {report['files']} files against {index.root}")
+    print(f"  Workspace: {files} files, {symbols} definitions; {refresh['mode']} refresh checked "
+          f"{refresh['checked']}, parsed {refresh['parsed']}, removed {refresh['removed']} ({refresh['seconds']:.3f}s)")
+    for relpath, line, kind, reference in report['dangling']:
+        what = "not found" if kind == 'path' else "not defined"
+        print(f"✗ {relpath}:{line}  {kind} `{reference}` {what}")
+    print(f"{len(report['dangling'])} dangling references" if report['dangling'] else "✓ No dangling references")
+    return 1 if report['dangling'] else 0
@@ -0,0 +1,457 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Filesystem watcher that keeps the memory indexes live.
+
+Agents append to session/ and topic/ files with `cat >>` and `echo >>`, so
+any index goes stale right away. The watcher follows the memory root and, a
+moment after writes stop, updates memories.json and the context.md digest of
+the affected projects and the search, section and tag indexes for just the
+files that changed. Queries never have to pay for a rebuild.
+
+Backends:
+    inotify  Linux, through ctypes (no dependencies); one watch per directory
+    poll     everywhere else: a stat walk every --interval seconds
+
+Events are collected into a batch and flushed once the tree has been quiet
+for --debounce seconds, or at the latest --max-delay seconds after the first
+event of the batch, so a continuous stream of appends still gets indexed.
+
+While running, the watcher keeps MEMORY_PATH/.agents-md/watcher.json up to
+date with its queue depth (changed paths waiting for the next flush), lag
+(age of the oldest unflushed change) and the last batch; `memory.py watch
+--status` prints it.
+
+Records written through the journal (journal.py) are merged into the memory
+files on every wake-up, so agents sharing the root only need the watcher.
+
+Projects with a memory store (store.py) get their memories.json exported at
+most once per store.EXPORT_INTERVAL while changes keep coming, and once more
+EXPORT_QUIET seconds after they stop, instead of after every batch.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import signal
+import struct
+import sys
+import time
+from datetime import datetime, timezone
+
+from . import trace
+from .common import (
+    MARKDOWN_SUFFIXES, PACK_SUFFIX, PRIVATE_DIR, dump_json,
+    iter_markdown_files, list_projects, load_json, state_path, write_json,
+)
+from .digest import update_digest
+from .indexer import index_project
+from .journal import merge_journals
+from .search import update_search_index
+from .sections import SectionIndex
+from .store import export_pending
+from .tags import update_tag_index
+
+STATUS_FILE = "watcher.json"
+STATUS_INTERVAL = 1.0
+# Quiet seconds after which memories.json exports deferred by batches are written
+EXPORT_QUIET = 10.0
+# Packs are watched too, so packing or unpacking a directory is picked up
+WATCHED_SUFFIXES = MARKDOWN_SUFFIXES + (PACK_SUFFIX,)
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT = struct.Struct('iIII')
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+class InotifyBackend:
+    """Recursive inotify watches on every indexed directory of the memory root."""
+
+    name = 'inotify'
+
+    def __init__(self, memory_root, skip_dirs=()):
+        self.memory_root = str(memory_root)
+        self.skip_dirs = skip_dirs
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._dirs = {}
+        self.add_tree('')
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _watchable(self, relpath):
+        parts = relpath.split('/') if relpath else []
+        if any(part.startswith('.') for part in parts):
+            return False
+        return not (parts and parts[0] in self.skip_dirs)
+
+    def add_tree(self, relpath):
+        """Watch a directory and everything below it; returns the markdown files found."""
+        found = []
+        stack = [relpath]
+        while stack:
+            current = stack.pop()
+            if not self._watchable(current):
+                continue
+            path = os.path.join(self.memory_root, current) if current else self.memory_root
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOSPC:
+                    raise OSError(error, 'inotify watch limit reached (fs.inotify.max_user_watches)')
+                continue
+            self._dirs[wd] = current
+            try:
+                entries = list(os.scandir(path))
+            except OSError:
+                continue
+            for entry in entries:
+                child = current + '/' + entry.name if current else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(child)
+                    elif entry.name.endswith(WATCHED_SUFFIXES):
+                        found.append(child)
+                except OSError:
+                    continue
+        return found
+
+    def read(self, timeout):
+        """Wait up to timeout seconds; returns (changed relpaths, rescan needed)."""
+        changed = set()
+        rescan = False
+        ready, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not ready:
+            return changed, rescan
+        try:
+            buffer = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return changed, rescan
+        offset = 0
+        while offset + _EVENT.size <= len(buffer):
+            wd, mask, _, length = _EVENT.unpack_from(buffer, offset)
+            offset += _EVENT.size
+            name = buffer[offset:offset + length].rstrip(b'\0').decode('utf-8', errors='surrogateescape')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name or name.startswith('.'):
+                continue
+            relpath = directory + '/' + name if directory else name
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may have been written before the new watch existed
+                    changed.update(self.add_tree(relpath))
+                elif mask & IN_MOVED_FROM:
+                    # The manifests know what was below it; a rescan finds it gone
+                    rescan = True
+            elif name.endswith(WATCHED_SUFFIXES):
+                changed.add(relpath)
+        return changed, rescan
+
+class PollingBackend:
+    """Portable fallback: compare (size, mtime) of every file each interval."""
+
+    name = 'poll'
+
+    def __init__(self, memory_root, skip_dirs=(), interval=2.0):
+        self.memory_root = memory_root
+        self.skip_dirs = skip_dirs
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next = time.monotonic() + interval
+
+    def close(self):
+        pass
+
+    def _scan(self):
+        return {relpath: (st.st_size, st.st_mtime_ns)
+                for relpath, st in iter_markdown_files(self.memory_root, self.skip_dirs, WATCHED_SUFFIXES)}
+
+    def read(self, timeout):
+        """Wait up to timeout seconds; returns (changed relpaths, rescan needed)."""
+        wait = self._next - time.monotonic()
+        if wait > timeout:
+            time.sleep(max(timeout, 0))
+            return set(), False
+        time.sleep(max(wait, 0))
+        self._next = time.monotonic() + self.interval
+        snapshot = self._scan()
+        changed = {relpath for relpath, state in snapshot.items() if self._snapshot.get(relpath) != state}
+        changed.update(self._snapshot.keys() - snapshot.keys())
+        self._snapshot = snapshot
+        return changed, False
+
+def open_backend(memory_root, skip_dirs=(), backend='auto', interval=2.0):
+    """Open the requested backend; 'auto' prefers inotify and falls back to polling."""
+    if backend in ('auto', 'inotify') and sys.platform.startswith('linux'):
+        try:
+            return InotifyBackend(memory_root, skip_dirs)
+        except (OSError, AttributeError) as e:
+            if backend == 'inotify':
+                raise
+            print(f"inotify unavailable ({e}); polling every {interval:g}s instead.", file=sys.stderr)
+    elif backend == 'inotify':
+        raise OSError(errno.ENOSYS, 'inotify is only available on Linux')
+    return PollingBackend(memory_root, skip_dirs, interval)
+
+# ============================================================================
+# INDEX UPDATES
+# ============================================================================
+@trace.traced('watch.update_indexes')
+def update_indexes(memory_root, paths=None, include_private=False, defer_export=False):
+    """Update memories.json, context.md digests and the search, section and tag indexes.
+
+    paths are memory-root-relative files that changed; None walks everything.
+    defer_export rate-limits memories.json exports of projects with a store
+    (see indexer.index_project). Returns a stats dict.
+    """
+    started = time.perf_counter()
+    if paths is None:
+        projects = {name: None for name in list_projects(memory_root, include_private)}
+    else:
+        projects = {}
+        for relpath in paths:
+            project, separator, rest = relpath.partition('/')
+            if separator and (include_private or project != PRIVATE_DIR):
+                projects.setdefault(project, set()).add(rest)
+    parsed = digests = 0
+    for project, project_paths in sorted(projects.items()):
+        project_dir = memory_root / project
+        if project_dir.is_dir():
+            parsed += index_project(project_dir, paths=project_paths, defer_export=defer_export)['parsed']
+            digests += update_digest(project_dir, paths=project_paths)['written']
+    search = update_search_index(memory_root, include_private=include_private, paths=paths)
+    sections = SectionIndex(memory_root).update(include_private=include_private, paths=paths)
+    tags = update_tag_index(memory_root, include_private=include_private, paths=paths)
+    return {
+        'projects': len(projects),
+        'parsed': parsed,
+        'digests': digests,
+        'tokenized': search['tokenized'],
+        'sections_parsed': sections['parsed'],
+        'tags_parsed': tags['parsed'],
+        'seconds': time.perf_counter() - started,
+    }
+
+# ============================================================================
+# WATCHER
+# ============================================================================
+def _now():
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+def read_status(memory_root):
+    """Last status written by a watcher, with 'running' checked against its pid."""
+    status = load_json(state_path(memory_root, STATUS_FILE), None)
+    if not isinstance(status, dict):
+        return None
+    if status.get('running') and not _process_alive(status.get('pid', 0)):
+        status['running'] = False
+        status['stale'] = True
+    return status
+
+class Watcher:
+    """Debounced, batched index updates driven by a filesystem backend."""
+
+    def __init__(self, memory_root, include_private=False, backend='auto',
+                 debounce=0.5, max_delay=5.0, interval=2.0):
+        self.memory_root = memory_root
+        self.include_private = include_private
+        self.debounce = debounce
+        self.max_delay = max_delay
+        skip_dirs = () if include_private else (PRIVATE_DIR,)
+        self.backend = open_backend(memory_root, skip_dirs, backend, interval)
+        self.pending = set()
+        self.rescan = False
+        self.first_event = None
+        self.last_event = None
+        self.status = {
+            'pid': os.getpid(),
+            'running': True,
+            'backend': self.backend.name,
+            'memory_path': str(memory_root),
+            'include_private': include_private,
+            'started': _now(),
+            'events': 0,
+            'batches': 0,
+            'journal_records': 0,
+            'queue_depth': 0,
+            'lag_ms': 0.0,
+            'last_batch': None,
+        }
+        self._status_written = 0.0
+        # Stores may hold deferred memories.json exports (store.export_pending)
+        self.exports_pending = False
+        self.last_flush = 0.0
+
+    def write_status(self, force=False):
+        """Refresh queue depth and lag in the status file (at most once a second)."""
+        now = time.monotonic()
+        if not force and now - self._status_written < STATUS_INTERVAL:
+            return
+        self.status['queue_depth'] = len(self.pending) + (1 if self.rescan else 0)
+        self.status['lag_ms'] = round((now - self.first_event) * 1000, 1) if self.first_event else 0.0
+        self.status['updated'] = _now()
+        write_json(state_path(self.memory_root, STATUS_FILE), self.status, pretty=True)
+        self._status_written = now
+
+    def flush(self):
+        """Apply the pending batch to the indexes."""
+        paths = None if self.rescan else sorted(self.pending)
+        count = len(self.pending)
+        first_event = self.first_event
+        self.pending = set()
+        self.rescan = False
+        self.first_event = self.last_event = None
+        stats = update_indexes(self.memory_root, paths, self.include_private, defer_export=True)
+        self.exports_pending = True
+        self.last_flush = time.monotonic()
+        self.status['batches'] += 1
+        self.status['last_batch'] = {
+            'finished': _now(),
+            'paths': count,
+            'rescan': paths is None,
+            'parsed': stats['parsed'],
+            'index_ms': round(stats['seconds'] * 1000, 1),
+            # From the first change of the batch until it was searchable
+            'lag_ms': round((time.monotonic() - first_event) * 1000, 1) if first_event else 0.0,
+        }
+        self.write_status(force=True)
+        return stats
+
+    def run(self, quiet=False):
+        """Index once, then follow changes until interrupted."""
+        stats = update_indexes(self.memory_root, None, self.include_private)
+        self.write_status(force=True)
+        if not quiet:
+            print(f"Watching {self.memory_root} ({self.backend.name}); "
+                  f"initial sync {stats['seconds']:.3f}s. Ctrl+C to stop.", file=sys.stderr)
+        try:
+            while True:
+                timeout = STATUS_INTERVAL
+                if self.last_event is not None:
+                    quiet_for = time.monotonic() - self.last_event
+                    waited = time.monotonic() - self.first_event
+                    timeout = max(0.0, min(self.debounce - quiet_for, self.max_delay - waited))
+                changed, rescan = self.backend.read(timeout)
+                merged = merge_journals(self.memory_root)
+                self.status['journal_records'] += merged['records']
+                if merged['records'] and not quiet:
+                    print(f"Merged {merged['records']} journal records into {merged['files']} files",
+                          file=sys.stderr)
+                if changed or rescan:
+                    now = time.monotonic()
+                    self.pending.update(changed)
+                    self.rescan = self.rescan or rescan
+                    self.first_event = self.first_event or now
+                    self.last_event = now
+                    self.status['events'] += len(changed) + (1 if rescan else 0)
+                if self.last_event is not None:
+                    now = time.monotonic()
+                    if now - self.last_event >= self.debounce or now - self.first_event >= self.max_delay:
+                        stats = self.flush()
+                        if not quiet:
+                            batch = self.status['last_batch']
+                            scope = 'rescan' if batch['rescan'] else f"{batch['paths']} files"
+                            print(f"Indexed {scope}: {stats['parsed']} parsed in {batch['index_ms']:.1f} ms "
+                                  f"(lag {batch['lag_ms']:.0f} ms)", file=sys.stderr)
+                        continue
+                elif self.exports_pending and time.monotonic() - self.last_flush >= EXPORT_QUIET:
+                    # Changes have stopped: write the exports the batches deferred
+                    self.exports_pending = False
+                    export_pending(self.memory_root, force=True)
+                self.write_status()
+        finally:
+            if self.exports_pending:
+                export_pending(self.memory_root, force=True)
+            self.backend.close()
+            self.status['running'] = False
+            self.write_status(force=True)
+
+# ============================================================================
+# COMMAND
+# ============================================================================
+def _print_status(status):
+    state = 'running' if status.get('running') else ('stopped (stale status)' if status.get('stale') else 'stopped')
+    print(f"Watcher: {state} (pid {status.get('pid')}, {status.get('backend')})")
+    print(f"  Memory path: {status.get('memory_path')}")
+    print(f"  Updated: {status.get('updated')}")
+    print(f"  Queue depth: {status.get('queue_depth')}  Lag: {status.get('lag_ms')} ms")
+    print(f"  Events: {status.get('events')}  Batches: {status.get('batches')}  "
+          f"Journal records: {status.get('journal_records', 0)}")
+    batch = status.get('last_batch')
+    if batch:
+        scope = 'rescan' if batch.get('rescan') else f"{batch.get('paths')} files"
+        print(f"  Last batch: {scope}, {batch.get('parsed')} parsed, {batch.get('index_ms')} ms to index, "
+              f"{batch.get('lag_ms')} ms from change to index ({batch.get('finished')})")
+
+def run(args, memory_root):
+    """memory.py watch [--status] [--backend auto|inotify|poll]"""
+    if args.status:
+        status = read_status(memory_root)
+        if status is None:
+            print(f"No watcher status in {state_path(memory_root, STATUS_FILE)}")
+            return 1
+        if args.json:
+            print(dump_json(status, pretty=True), end='')
+        else:
+            _print_status(status)
+        return 0 if status.get('running') else 1
+
+    status = read_status(memory_root)
+    if status and status.get('running') and status.get('pid') != os.getpid():
+        print(f"✗ A watcher is already running for this memory root (pid {status['pid']}).")
+        return 1
+    if args.debounce < 0 or args.max_delay <= 0 or args.interval <= 0:
+        print("✗ Error: --debounce must be >= 0, --max-delay and --interval > 0.")
+        return 1
+    try:
+        watcher = Watcher(memory_root, include_private=args.include_private, backend=args.backend,
+                          debounce=args.debounce, max_delay=args.max_delay, interval=args.interval)
+    except OSError as e:
+        print(f"✗ Error: cannot watch {memory_root}: {e}")
+        return 1
+    # Stop cleanly (and mark the status file) on SIGTERM as well as Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    watcher.run(quiet=args.quiet)
+    return 0
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Benchmark: MEMORY_PATH extraction before/after the compiled parser.
+
+Builds customized AGENTS.md files of several sizes (the English template with
+MEMORY_PATH configured, followed by megabytes of appended project rules that
+mention memory paths) and times:
+
+    legacy   the line-by-line extract_memory_path() setup.py used to ship
+    parser   agents_md.config.find_memory_path() on the same str
+    file     agents_md.config.read_memory_path() on the file (mmap when large)
+
+Two layouts are measured: "canonical" (the normal **MEMORY_PATH** line near
+the top) and "fallback" (a hand-written file with no definition and the path
+only in a prose line at the end, so the heuristics have to scan everything).
+
+Usage:
+    python3 benchmarks/bench_extract_memory_path.py [--sizes 1 4 16] [--repeat 5] [--json]
+"""
+
+import argparse
+import json
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from agents_md.config import find_memory_path, read_memory_path  # noqa: E402
+
+CONFIGURED_PATH = "/home/dev/Documents/agents-memory"
+# Rules mention memory and paths a lot, but none of them configures MEMORY_PATH
+RULE_LINES = [
+    "- Keep build artifacts out of the memory root; use the build folder for those.",
+    "- Session notes go to the session folder with the date in the file name.",
+    "- Do not store API tokens in memory files outside private/.",
+    "- The in-memory cache lives in `src/services/cache.py`.",
+    "- Run the linter before committing; paths under `vendor/` are excluded.",
+    "- プロジェクトのメモリはセッションごとに更新してください。",
+]
+
+# ============================================================================
+# LEGACY IMPLEMENTATION (setup.py before the compiled parser)
+# ============================================================================
+def legacy_extract_memory_path(content):
+    """Extract configured MEMORY_PATH from content if it exists."""
+    if '{MEMORY_PATH}' in content:
+        return None
+    lines = content.split('\n')
+    for line in lines:
+        if ('memory' in line.lower() and ('root' in line.lower() or 'path' in line.lower() or 'ルート' in line or 'パス' in line)) or 'cursor-memory' in line.lower():
+            backtick_pattern = r'`([^`]+)`'
+            backtick_matches = re.findall(backtick_pattern, line)
+            for match in backtick_matches:
+                if ('/' in match or '\\' in match) and '{MEMORY_PATH}' not in match:
+                    if 'memory' in match.lower() or match.startswith('/') or match.startswith('~') or (len(match) > 20 and ('/' in match or '\\' in match)):
+                        return match.strip()
+            root_patterns = [
+                r'(?:ルート|Root):\s*[`"]?([^`"\n]+(?:memory|cursor-memory)[^`"\n]*)',
+                r'[`"]([^`"]+memory[^`"]*)[`"]',
+            ]
+            for pattern in root_patterns:
+                matches = re.findall(pattern, line, re.IGNORECASE)
+                for match in matches:
+                    match = match.strip()
+                    if match and ('/' in match or '\\' in match) and '{MEMORY_PATH}' not in match:
+                        if 'memory' in match.lower() or (len(match) > 15 and match.startswith('/')):
+                            return match
+    pattern = r'\*\*MEMORY_PATH\*\*:\s*`([^`]+)`'
+    match = re.search(pattern, content)
+    if match:
+        path = match.group(1).strip()
+        if path and path != '/path/to/your/memory-root' and '{MEMORY_PATH}' not in path:
+            return path
+    return None
+
+# ============================================================================
+# INPUTS
+# ============================================================================
+def build_content(size_mb, layout):
+    """Template plus appended rules, about size_mb megabytes."""
+    if layout == 'canonical':
+        template = (REPO_DIR / "AGENTS.md.en").read_text(encoding='utf-8')
+        head = template.replace('/path/to/your/memory-root', CONFIGURED_PATH)
+        tail = ''
+    else:
+        # A hand-written file without the definition line; the memory root is
+        # only documented in prose at the very end
+        head = "# Agent Rules\n"
+        tail = f"\nMemory root: `{CONFIGURED_PATH}`\n"
+    rules = '\n'.join(RULE_LINES) + '\n'
+    target = size_mb * 1024 * 1024
+    repeat = max(1, (target - len(head)) // len(rules.encode('utf-8')))
+    return head + '\n## Project Rules\n\n' + rules * repeat + tail
+
+def best_of(repeat, function, *args):
+    """Best wall time of repeat calls, with the (stable) result."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+# ============================================================================
+# MAIN
+# ============================================================================
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Benchmark MEMORY_PATH extraction')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 4, 16], help='File sizes in MB (default: 1 4 16)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the best is kept (default: 5)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for layout in ('canonical', 'fallback'):
+            for size_mb in args.sizes:
+                content = build_content(size_mb, layout)
+                path = Path(directory, f"AGENTS-{layout}-{size_mb}.md")
+                path.write_text(content, encoding='utf-8')
+                legacy, legacy_result = best_of(args.repeat, legacy_extract_memory_path, content)
+                parsed, parsed_result = best_of(args.repeat, find_memory_path, content)
+                read, read_result = best_of(args.repeat, read_memory_path, path)
+                rows.append({
+                    'layout': layout,
+                    'size_mb': round(len(content.encode('utf-8')) / 1024 / 1024, 2),
+                    'legacy_ms': round(legacy * 1000, 3),
+                    'parser_ms': round(parsed * 1000, 3),
+                    'file_ms': round(read * 1000, 3),
+                    'speedup': round(legacy / parsed, 1) if parsed else None,
+                    'results': [legacy_result, parsed_result, read_result],
+                })
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return 0
+    print(f"{'layout':<10} {'MB':>6} {'legacy ms':>10} {'parser ms':>10} {'file ms':>9} {'speedup':>8}  result")
+    for row in rows:
+        results = set(row['results'])
+        result = results.pop() if len(results) == 1 else ' / '.join(map(str, row['results']))
+        print(f"{row['layout']:<10} {row['size_mb']:>6.2f} {row['legacy_ms']:>10.3f} {row['parser_ms']:>10.3f} "
+              f"{row['file_ms']:>9.3f} {row['speedup']:>7}x  {result}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,609 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Benchmark: setup command rewrites and the memory tools on synthetic memory roots.
+
+Generates memory trees with memory_tree.py (1k files by default; 100k and 1M
+on request) and times:
+
+    setup.*     replace_memory_path, update_both_files, switch_to_language
+                and configure_workspace on a scratch workspace
+    ingest.*    git history ingest of a generated repository: every commit
+                into an empty project, no-op rerun
+    index.*     memories.json of every project: full rebuild, no-op refresh;
+                one changed file of the largest project, as the watcher indexes it
+    search.*    BM25 index: full build, no-op refresh, queries
+    sections.*  section index: full build, header lookups
+    retrieve    token-budgeted retrieval
+    tags.*      tag index: full build, boolean queries
+    semantic.*  semantic section index: full build, no-op refresh, batch
+                queries (skipped without NumPy)
+    dedup.*     MinHash scan: cold (no cache), warm
+    privacy.*   privacy scan: full, warm
+    watch.one   update_indexes() for one changed file, as the watcher runs it
+    server.*    query server: warm-up, lookup / search / headers + section
+                requests handled in process, search requests over the Unix
+                socket of a `memory.py serve` process
+    journal.*   write journal: appends by one writer, merge of the records of
+                several writers into one file per project
+    verify.*    code reference verifier against a generated Python workspace:
+                workspace index full build, no-op refresh, references of
+                every project (cold and cached), lookups
+    store.*     SQLite store of every project: import of memories.json,
+                lookups, export, index.one and watch.one with the stores
+
+Each measurement keeps the best of --repeat runs (full rebuilds run
+--cold-repeat times). Results are JSON with the commit, Python version and
+tree sizes, so runs of different releases can be compared with --compare.
+
+Usage:
+    python3 benchmarks/bench_memory_tools.py [--sizes 1k 100k 1M] [--trees DIR]
+        [--only search tags] [--repeat 3] [--output results.json] [--compare old.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from agents_md import configure  # noqa: E402
+from agents_md.client import Connection  # noqa: E402
+from agents_md.common import MEMORY_INDEX, list_projects, load_json, state_path  # noqa: E402
+from agents_md.dedup import CACHE_FILE as DEDUP_CACHE  # noqa: E402
+from agents_md.dedup import scan as dedup_scan  # noqa: E402
+from agents_md.indexer import index_project  # noqa: E402
+from agents_md.ingest import INGEST_STATE, SESSION_DIR, ingest  # noqa: E402
+from agents_md.journal import JOURNAL_STATE, Journal, journal_dir, merge_journals  # noqa: E402
+from agents_md.privacy import scan as privacy_scan  # noqa: E402
+from agents_md.retrieve import plan_retrieval  # noqa: E402
+from agents_md.search import SearchIndex, update_search_index  # noqa: E402
+from agents_md.semantic import SemanticIndex, np, update_semantic_index  # noqa: E402
+from agents_md.sections import SectionIndex  # noqa: E402
+from agents_md.server import STATUS_FILE, MemoryService  # noqa: E402
+from agents_md.store import MemoryStore, store_path  # noqa: E402
+from agents_md.tags import TagIndex, update_tag_index  # noqa: E402
+from agents_md.verify import REFS_STATE, WorkspaceIndex, verify_project  # noqa: E402
+from agents_md.watcher import update_indexes  # noqa: E402
+from memory_tree import TREE_VERSION, WORDS, generate, parse_size, tree_info  # noqa: E402
+
+RESULTS_VERSION = 1
+QUERIES = (
+    "auth token refresh", "database migration schema", "deploy pipeline docker",
+    "memory leak profile", "認証トークンの更新", "メモリリークの調査",
+)
+TAG_QUERIES = (
+    "auth AND token", "deploy OR release", "(api OR endpoint) AND NOT test", "cache -redis", "auth*",
+)
+LOOKUPS = (
+    {'tags': ['auth']}, {'tags': ['auth', 'token'], 'limit': 20}, {'keywords': ['latency'], 'type': 'session'},
+    {'prefix': 'project-0000/topic'},
+)
+STORE_QUERIES = (
+    {'tags': ['auth']}, {'tags': ['auth', 'token']}, {'keywords': ['latency']},
+    {'prefix': 'topic/'}, {'file_type': 'session', 'tags': ['cache']},
+)
+HEADER_SAMPLE = 100
+JOURNAL_RECORDS = 1000
+INGEST_COMMITS = 500
+VERIFY_SOURCES = 2000
+SCRATCH_FILE = "topic/bench_scratch.md"
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+def measure(function, repeat, prepare=None):
+    """(best seconds, median seconds, last result) of repeat calls.
+
+    prepare runs untimed before every call.
+    """
+    times = []
+    result = None
+    for _ in range(max(1, repeat)):
+        if prepare:
+            prepare()
+        started = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - started)
+    times.sort()
+    return times[0], times[len(times) // 2], result
+
+def quietly(function, *args, **kwargs):
+    """Call function with its console output swallowed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(REPO_DIR),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+def setup_benchmarks(repeat):
+    """(name, callable, prepare, repeat, per) rows for the setup rewrite functions (agents_md/configure.py)."""
+    workspace = Path(tempfile.mkdtemp(prefix='agents-md-bench-setup-'))
+    for name in (configure.AGENTS_EN, configure.AGENTS_JA):
+        shutil.copy(REPO_DIR / name, workspace / name)
+    quietly(configure.switch_to_language, 'en', preserve_memory_path='/tmp/memory-a', base_dir=workspace)
+    paths = iter(['/tmp/memory-b', '/tmp/memory-a'] * repeat * 4)
+    languages = iter(['ja', 'en'] * repeat * 4)
+    agents = workspace / configure.AGENTS_TARGET
+    gemini = workspace / configure.GEMINI_TARGET
+    workspaces = []
+    for number in range(20):
+        directory = workspace / f"workspace-{number:02d}"
+        directory.mkdir()
+        for name in (configure.AGENTS_EN, configure.AGENTS_JA):
+            shutil.copy(REPO_DIR / name, directory / name)
+        workspaces.append(directory)
+    batch_languages = iter(['ja', 'en'] * repeat * 4)
+
+    def configure_all():
+        language = next(batch_languages)
+        return [configure.configure_workspace(directory, language, '/tmp/memory-c') for directory in workspaces]
+
+    rows = [
+        ('setup.replace_memory_path', lambda: quietly(configure.replace_memory_path, agents, next(paths)), None, repeat, 1),
+        ('setup.update_both_files', lambda: quietly(configure.update_both_files, agents, gemini, next(paths)), None, repeat, 1),
+        ('setup.switch_to_language', lambda: quietly(configure.switch_to_language, next(languages), base_dir=workspace),
+         None, repeat, 1),
+        ('setup.configure_workspace', configure_all, None, repeat, len(workspaces)),
+    ]
+    return rows, workspace
+
+def ingest_benchmarks(repeat, cold_repeat):
+    """(name, callable, prepare, repeat, per) rows for the git history ingest (agents_md/ingest.py)."""
+    workspace = Path(tempfile.mkdtemp(prefix='agents-md-bench-ingest-'))
+    repo = workspace / 'repo'
+    project_dir = workspace / 'memory' / 'bench-project'
+    project_dir.mkdir(parents=True)
+    subprocess.run(['git', 'init', '-q', str(repo)], check=True)
+    # One fast-import stream instead of a git commit per commit
+    started = 1727000000
+    stream = []
+    for number in range(INGEST_COMMITS):
+        when = started + number * 3 * 3600
+        message = f"Change {number}: auth token refresh\n\nTouches module {number % 40}.\n".encode('utf-8')
+        content = f"value = {number}\n".encode('utf-8')
+        stream.append(f"commit refs/heads/main\nauthor Bench <bench@example.invalid> {when} +0000\n"
+                      f"committer Bench <bench@example.invalid> {when} +0000\ndata {len(message)}\n".encode('utf-8')
+                      + message + f"M 100644 inline src/module_{number % 40}.py\ndata {len(content)}\n".encode('utf-8')
+                      + content + b"\n")
+    subprocess.run(['git', 'fast-import', '--quiet'], input=b''.join(stream), cwd=str(repo), check=True)
+    subprocess.run(['git', 'checkout', '-q', 'main'], cwd=str(repo), check=True)
+
+    def forget():
+        shutil.rmtree(project_dir / SESSION_DIR, ignore_errors=True)
+        _remove(state_path(project_dir, INGEST_STATE))
+
+    rows = [
+        ('ingest.full', lambda: ingest(project_dir, repo, since=None), forget, cold_repeat, INGEST_COMMITS),
+        ('ingest.noop', lambda: ingest(project_dir, repo, since=None), None, repeat, 1),
+    ]
+    return rows, workspace
+
+def tree_benchmarks(root, repeat, cold_repeat):
+    """(name, callable, prepare, repeat, per) rows for the memory tools on one tree, and a cleanup.
+
+    cleanup removes what the rows added (the scratch files, the journal, the
+    workspace index, the stores) and stops the query server, so a tree kept
+    with --trees stays reusable.
+    """
+    projects = list_projects(root)
+    # The scratch file goes into the largest project, where rewriting memories.json costs most
+    busiest = max(projects, key=lambda project: len(load_json(root / project / MEMORY_INDEX, {}).get('files', {})))
+    scratch = f"{busiest}/{SCRATCH_FILE}"
+    # The journal rows write the scratch file of every project
+    scratches = [f"{project}/{SCRATCH_FILE}" for project in projects]
+    writes = iter(range(10 ** 9))
+    # Exported stores, the verify workspace and the server socket
+    temporary = Path(tempfile.mkdtemp(prefix='agents-md-bench-tree-'))
+    workspace = temporary / 'workspace'
+    verifier = {}
+    served = {}
+
+    def index_all(full):
+        return [index_project(root / project, full=full) for project in projects]
+
+    def search_queries():
+        index = SearchIndex.open(root)
+        try:
+            return [index.search(query) for query in QUERIES]
+        finally:
+            index.close()
+
+    def header_lookups():
+        index = SectionIndex(root)
+        sample = index.files()[::max(1, len(index.files()) // HEADER_SAMPLE)][:HEADER_SAMPLE]
+        return [index.sections(relpath) for relpath in sample]
+
+    def tag_queries():
+        index = TagIndex.open(root)
+        return [index.query(expression) for expression in TAG_QUERIES]
+
+    def semantic_queries():
+        # One batch, as `semantic --batch` runs them
+        return SemanticIndex.open(root).search(list(QUERIES))
+
+    def ensure_semantic():
+        if SemanticIndex.open(root) is None:
+            update_semantic_index(root)
+
+    def service():
+        if 'service' not in served:
+            served['service'] = MemoryService(root)
+            served['service'].warm()
+        return served['service']
+
+    def warm_service():
+        started = MemoryService(root)
+        try:
+            return started.warm()
+        finally:
+            started.close()
+
+    def handle_all(requests):
+        memory = service()
+        lines = [json.dumps({'jsonrpc': '2.0', 'id': number, 'method': method, 'params': params}).encode('utf-8')
+                 for number, (method, params) in enumerate(requests)]
+        return [memory.handle(line) for line in lines]
+
+    def section_requests():
+        sample = service().sections.files()
+        sample = sample[::max(1, len(sample) // HEADER_SAMPLE)][:HEADER_SAMPLE]
+        return [request for relpath in sample
+                for request in (('headers', {'path': relpath}), ('section', {'path': relpath, 'section': 0}))]
+
+    def start_server():
+        if 'process' in served:
+            return
+        path = temporary / 'server.sock'
+        served['process'] = subprocess.Popen(
+            [sys.executable, str(REPO_DIR / 'memory.py'), 'serve', '--memory-path', str(root), '--socket', str(path),
+             '--quiet'], stdout=subprocess.DEVNULL)
+        deadline = time.monotonic() + 120
+        while True:
+            try:
+                served['connection'] = Connection(path)
+                return
+            except OSError:
+                if served['process'].poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("the memory server did not start")
+                time.sleep(0.05)
+
+    def remote_searches():
+        return [served['connection'].call('search', {'query': query}) for query in QUERIES]
+
+    def stop_server():
+        if 'service' in served:
+            served.pop('service').close()
+        if 'process' in served:
+            with contextlib.suppress(OSError):
+                served['connection'].call('shutdown')
+                served['connection'].close()
+            try:
+                served['process'].wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                served['process'].kill()
+                served['process'].wait()
+            served.clear()
+        _remove(state_path(root, STATUS_FILE))
+
+    def clear_journal():
+        shutil.rmtree(journal_dir(root), ignore_errors=True)
+        _remove(state_path(root, JOURNAL_STATE))
+
+    def journal_appends():
+        with Journal(root, 'bench') as journal:
+            for number in range(JOURNAL_RECORDS):
+                journal.append(scratch, f"- {number}: auth token refresh noted by the benchmark\n")
+
+    def journal_writers():
+        clear_journal()
+        for writer in range(4):
+            with Journal(root, f"bench{writer}") as journal:
+                for number in range(JOURNAL_RECORDS // 4):
+                    relpath = scratches[(writer + number) % len(scratches)]
+                    if number < len(scratches):
+                        journal.write(relpath, f"# Scratch {writer}\n\n")
+                    else:
+                        journal.append(relpath, f"- {writer}.{number}: deploy pipeline noted by the benchmark\n")
+
+    def open_workspace():
+        if 'index' not in verifier:
+            make_workspace(workspace, VERIFY_SOURCES)
+            verifier['index'] = WorkspaceIndex(root, workspace)
+        return verifier['index']
+
+    def ensure_workspace():
+        open_workspace().refresh()
+
+    def forget_references():
+        for project in projects:
+            _remove(state_path(root / project, REFS_STATE))
+
+    def forget_references_cold():
+        ensure_workspace()
+        forget_references()
+
+    def verify_all():
+        index = open_workspace()
+        return [verify_project(root / project, index) for project in projects]
+
+    def workspace_lookups():
+        index = open_workspace()
+        return [(index.find_path(f"{word}/{word}.py"), index.find_symbol(f"handle_{word}")) for word in WORDS]
+
+    def drop_stores():
+        for project in projects:
+            _remove(store_path(root / project))
+
+    def import_stores():
+        for project in projects:
+            store = MemoryStore(root / project, create=True)
+            store.import_document(load_json(root / project / MEMORY_INDEX, {}))
+            store.close()
+
+    def store_queries():
+        found = []
+        for project in projects:
+            store = MemoryStore(root / project)
+            found.extend(store.find(**query) for query in STORE_QUERIES)
+            store.close()
+        return found
+
+    def export_stores():
+        for project in projects:
+            store = MemoryStore(root / project)
+            store.export(temporary / f"{project}.json")
+            store.close()
+
+    def ensure_stores():
+        if not all(store_path(root / project).exists() for project in projects):
+            import_stores()
+
+    def write_scratch():
+        path = root / scratch
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# Scratch {next(writes)}\n\nauth token refresh edited by the benchmark\n\n<!-- #auth -->\n",
+                        encoding='utf-8')
+
+    def index_one():
+        return index_project(root / busiest, paths={SCRATCH_FILE}, defer_export=True)
+
+    def write_scratch_with_stores():
+        ensure_stores()
+        write_scratch()
+
+    rows = [
+        ('index.full', lambda: index_all(True), None, cold_repeat, 1),
+        ('index.noop', lambda: index_all(False), None, repeat, 1),
+        ('search.build', lambda: update_search_index(root, full=True), None, cold_repeat, 1),
+        ('search.noop', lambda: update_search_index(root), None, repeat, 1),
+        ('search.query', search_queries, None, repeat, len(QUERIES)),
+        ('sections.build', lambda: SectionIndex(root).update(full=True), None, cold_repeat, 1),
+        ('sections.headers', header_lookups, None, repeat, HEADER_SAMPLE),
+        ('retrieve', lambda: [plan_retrieval(root, query, 2000) for query in QUERIES], None, repeat, len(QUERIES)),
+        ('tags.build', lambda: update_tag_index(root, full=True), None, cold_repeat, 1),
+        ('tags.query', tag_queries, None, repeat, len(TAG_QUERIES)),
+    ]
+    if np is not None:
+        rows += [
+            ('semantic.build', lambda: update_semantic_index(root, full=True), None, cold_repeat, 1),
+            ('semantic.noop', lambda: update_semantic_index(root), None, repeat, 1),
+            ('semantic.query', semantic_queries, ensure_semantic, repeat, len(QUERIES)),
+        ]
+    rows += [
+        ('dedup.cold', lambda: dedup_scan(root), lambda: _remove(state_path(root, DEDUP_CACHE)), cold_repeat, 1),
+        ('dedup.warm', lambda: dedup_scan(root), None, repeat, 1),
+        ('privacy.full', lambda: privacy_scan(root, full=True), None, cold_repeat, 1),
+        ('privacy.warm', lambda: privacy_scan(root), None, repeat, 1),
+        ('index.one', index_one, write_scratch, repeat, 1),
+        ('watch.one', lambda: update_indexes(root, paths=[scratch], defer_export=True), write_scratch, repeat, 1),
+    ]
+    rows += [
+        ('server.warm', warm_service, None, cold_repeat, 1),
+        ('server.lookup', lambda: handle_all([('lookup', params) for params in LOOKUPS]), service, repeat,
+         len(LOOKUPS)),
+        ('server.search', lambda: handle_all([('search', {'query': query}) for query in QUERIES]), service, repeat,
+         len(QUERIES)),
+        ('server.section', lambda: handle_all(section_requests()), service, repeat, 2 * HEADER_SAMPLE),
+        ('server.socket', remote_searches, start_server, repeat, len(QUERIES)),
+    ]
+    rows += [
+        ('journal.append', journal_appends, clear_journal, repeat, JOURNAL_RECORDS),
+        ('journal.merge', lambda: merge_journals(root, blocking=True), journal_writers, repeat, JOURNAL_RECORDS),
+    ]
+    rows += [
+        ('verify.index_full', lambda: open_workspace().refresh(full=True), open_workspace, cold_repeat, 1),
+        ('verify.index_noop', lambda: open_workspace().refresh(), ensure_workspace, repeat, 1),
+        ('verify.refs_cold', verify_all, forget_references_cold, cold_repeat, 1),
+        ('verify.projects', verify_all, ensure_workspace, repeat, 1),
+        ('verify.lookup', workspace_lookups, ensure_workspace, repeat, len(WORDS)),
+    ]
+    rows += [
+        ('store.init', import_stores, drop_stores, cold_repeat, 1),
+        ('store.query', store_queries, ensure_stores, repeat, len(STORE_QUERIES)),
+        ('store.export', export_stores, ensure_stores, repeat, 1),
+        ('store.index_one', index_one, write_scratch_with_stores, repeat, 1),
+        ('store.watch_one', lambda: update_indexes(root, paths=[scratch], defer_export=True), write_scratch_with_stores,
+         repeat, 1),
+    ]
+
+    def cleanup():
+        stop_server()
+        clear_journal()
+        if 'index' in verifier:
+            verifier['index'].close()
+            _remove(verifier['index'].path)
+            with contextlib.suppress(OSError):
+                verifier['index'].path.parent.rmdir()
+            forget_references()
+        drop_stores()
+        shutil.rmtree(temporary, ignore_errors=True)
+        written = [relpath for relpath in scratches if (root / relpath).exists()]
+        for relpath in written:
+            (root / relpath).unlink()
+        if written:
+            update_indexes(root, paths=written)
+
+    return rows, cleanup
+
+def make_workspace(directory, files):
+    """Write a Python workspace of files modules, src/WORD/WORD.py first (the paths tree files cite)."""
+    pairs = [(package, module) for module in WORDS for package in WORDS]
+    pairs.sort(key=lambda pair: pair[0] != pair[1])
+    for package, module in pairs[:files]:
+        path = directory / 'src' / package / f"{module}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"MAX_{module.upper()} = 10\n\n\nclass {module.title()}Handler:\n"
+                        f"    def handle_{module}(self, request):\n        return request\n\n\n"
+                        f"def load_{package}(path):\n    return path\n", encoding='utf-8')
+
+def _remove(path):
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+def run_rows(tree, rows, only, results, log):
+    for name, function, prepare, repeat, per in rows:
+        if only and not any(name == prefix or name.startswith(prefix + '.') for prefix in only):
+            continue
+        best, median, _ = measure(function, repeat, prepare)
+        results.append({'tree': tree, 'benchmark': name, 'seconds': round(best / per, 6),
+                        'median': round(median / per, 6), 'runs': repeat, 'per': per})
+        log(f"  {name:<28} {best / per * 1000:>11.3f} ms")
+
+# ============================================================================
+# TREES
+# ============================================================================
+def prepare_tree(directory, label, files, seed, log):
+    """Reuse a generated tree with the same parameters or generate it."""
+    root = Path(directory, f"{label}-seed{seed}")
+    info = tree_info(root)
+    if info and info.get('version') == TREE_VERSION and info.get('files') == files and info.get('seed') == seed:
+        return root, info
+    if root.exists():
+        if info is None and any(root.iterdir()):
+            raise RuntimeError(f"{root} exists and was not generated by memory_tree.py")
+        shutil.rmtree(root)
+    log(f"Generating {label} tree ({files} files) in {root}")
+    return root, generate(root, files, seed=seed, log=log)
+
+# ============================================================================
+# COMPARISON
+# ============================================================================
+def compare(baseline, current):
+    """Print current results next to a baseline results file."""
+    old = {(row['tree'], row['benchmark']): row['seconds'] for row in baseline.get('results', [])}
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} ({baseline.get('created', '?')}):")
+    print(f"{'tree':<6} {'benchmark':<28} {'before ms':>11} {'after ms':>11} {'change':>8}")
+    for row in current['results']:
+        before = old.get((row['tree'], row['benchmark']))
+        after = row['seconds']
+        change = f"{after / before:>7.2f}x" if before else '     new'
+        before_text = f"{before * 1000:>11.3f}" if before is not None else f"{'-':>11}"
+        print(f"{row['tree'] or '-':<6} {row['benchmark']:<28} {before_text} {after * 1000:>11.3f} {change}")
+
+# ============================================================================
+# MAIN
+# ============================================================================
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Benchmark the setup commands and the memory tools')
+    parser.add_argument('--sizes', nargs='+', default=['1k'], help='Tree sizes: 1k, 100k, 1M, ... (default: 1k)')
+    parser.add_argument('--trees', help='Directory to keep generated trees in for reuse (default: a temporary one)')
+    parser.add_argument('--seed', type=int, default=0, help='Tree generator seed (default: 0)')
+    parser.add_argument('--only', nargs='+', help='Run only these benchmarks or groups (e.g. setup search.query)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the best is kept (default: 3)')
+    parser.add_argument('--cold-repeat', type=int, default=1, help='Runs of full rebuilds and cold scans (default: 1)')
+    parser.add_argument('--output', help='Write the results JSON to this file')
+    parser.add_argument('--compare', help='Results JSON of an earlier run to compare with')
+    parser.add_argument('--json', action='store_true', help='Print the results JSON instead of the table')
+    args = parser.parse_args()
+
+    try:
+        sizes = [(label, parse_size(label)) for label in args.sizes]
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    baseline = None
+    if args.compare:
+        try:
+            baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            print(f"✗ Error: cannot read {args.compare}: {e}")
+            return 1
+
+    def log(message):
+        print(message, file=sys.stderr if args.json else sys.stdout, flush=True)
+
+    report = {
+        'version': RESULTS_VERSION,
+        'created': datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'trees': {},
+        'results': [],
+    }
+    temporary = None if args.trees else tempfile.mkdtemp(prefix='agents-md-bench-')
+    trees_dir = Path(args.trees or temporary)
+    try:
+        rows, workspace = setup_benchmarks(args.repeat)
+        try:
+            log("setup")
+            run_rows(None, rows, args.only, report['results'], log)
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+        if not args.only or any(name.split('.')[0] == 'ingest' for name in args.only):
+            rows, workspace = ingest_benchmarks(args.repeat, args.cold_repeat)
+            try:
+                log("ingest")
+                run_rows(None, rows, args.only, report['results'], log)
+            finally:
+                shutil.rmtree(workspace, ignore_errors=True)
+        tree_groups = ('index', 'search', 'sections', 'retrieve', 'tags', 'semantic', 'dedup', 'privacy', 'watch',
+                       'server', 'journal', 'verify', 'store')
+        if args.only and not any(name.split('.')[0] in tree_groups for name in args.only):
+            sizes = []
+        for label, files in sizes:
+            root, info = prepare_tree(trees_dir, label, files, args.seed, log)
+            report['trees'][label] = {key: info[key] for key in ('files', 'projects', 'bytes', 'seed')}
+            log(f"{label}: {info['files']} files, {info['bytes'] / 1024 / 1024:.1f} MB")
+            rows, cleanup = tree_benchmarks(root, args.repeat, args.cold_repeat)
+            try:
+                run_rows(label, rows, args.only, report['results'], log)
+            finally:
+                cleanup()
+    finally:
+        if temporary:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    if baseline and not args.json:
+        compare(baseline, report)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Benchmark: cold start of the agents-md command line.
+
+Runs each command in a fresh interpreter with `python -X importtime` and
+`-m agents_md ...` semantics, and reports the wall time, the import time and
+the number of modules it loaded:
+
+    python          the bare interpreter (python -c pass), for reference
+    help            agents-md --help
+    configure.help  agents-md configure --help
+    switch-lang     agents-md switch-lang ja --dry-run on a scratch workspace
+    search.help     agents-md search --help
+    call.help       agents-md call --help
+
+It also checks the lazy imports the command line relies on: no command
+above may load the worker pool (concurrent.futures), the AGENTS.md scanner
+or the query server, and switch-lang ja must not load the English catalog.
+A failed check, or a command slower than --max-ms, makes the exit code 1,
+so the benchmark can guard a CI job.
+
+Bytecode is written by one untimed run of every command first
+(PYTHONDONTWRITEBYTECODE is cleared for the runs), so the timings are
+those of an installed package, not of compiling it.
+
+Usage:
+    python3 benchmarks/bench_startup.py [--only help switch-lang] [--repeat 10] [--top 5]
+        [--max-ms 200] [--output results.json] [--compare old.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+RESULTS_VERSION = 1
+ALWAYS_LAZY = ('concurrent.futures', 'agents_md.scan', 'agents_md.server', 'asyncio')
+COMMANDS = (
+    # (name, agents-md arguments, modules that must not be imported)
+    ('help', ['--help'], ALWAYS_LAZY + ('agents_md.configure', 'agents_md.i18n')),
+    ('configure.help', ['configure', '--help'], ALWAYS_LAZY + ('agents_md.configure', 'agents_md.i18n')),
+    ('switch-lang', ['switch-lang', 'ja', '--dry-run', '--workspace', '{workspace}'], ALWAYS_LAZY + ('agents_md.i18n.en',)),
+    ('search.help', ['search', '--help'], ALWAYS_LAZY + ('agents_md.search',)),
+    ('call.help', ['call', '--help'], ALWAYS_LAZY + ('agents_md.client',)),
+)
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+MODULES_PREFIX = 'loaded modules:'
+# -X importtime does not log modules loaded with importlib.import_module (the
+# subcommand handlers, the locale catalogs), so sys.modules is listed at exit
+MODULES_HOOK = (
+    "import atexit, sys; atexit.register(lambda: sys.stderr.write("
+    f"{MODULES_PREFIX!r} + ' '.join(sorted(sys.modules)) + '\\n'))"
+)
+RUN_MODULE = "; import runpy; runpy.run_module('agents_md', run_name='__main__', alter_sys=True)"
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+def parse_importtime(stderr):
+    """(total import µs, loaded module names, top-level (module, cumulative µs) list) of a run's stderr."""
+    modules = []
+    top_level = []
+    for line in stderr.splitlines():
+        if line.startswith(MODULES_PREFIX):
+            modules = line[len(MODULES_PREFIX):].split()
+            continue
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        if len(indent) == 1:
+            top_level.append((name, cumulative))
+    return sum(cumulative for _, cumulative in top_level), modules, top_level
+
+def run_command(arguments, env):
+    """(wall seconds, completed process) of one `python -X importtime` run."""
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime'] + arguments, cwd=str(REPO_DIR), env=env,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, encoding='utf-8')
+    return time.perf_counter() - started, process
+
+def measure(arguments, env, repeat):
+    """Best and median wall seconds of repeat runs, with the import stats of the best one."""
+    runs = []
+    for _ in range(max(1, repeat)):
+        seconds, process = run_command(arguments, env)
+        if process.returncode != 0:
+            raise RuntimeError(f"{' '.join(arguments)} exited with {process.returncode}:\n"
+                               + '\n'.join(line for line in process.stderr.splitlines()
+                                           if not line.startswith(('import time:', MODULES_PREFIX))))
+        runs.append((seconds, process.stderr))
+    runs.sort(key=lambda run: run[0])
+    best, stderr = runs[0]
+    import_us, modules, top_level = parse_importtime(stderr)
+    return {'seconds': best, 'median': runs[len(runs) // 2][0], 'import_us': import_us,
+            'modules': modules, 'top_level': top_level}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(REPO_DIR),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def benchmark_env():
+    """Environment of the runs: the checkout importable, bytecode caching on."""
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env.pop('AGENTS_MD_TRACE', None)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(REPO_DIR), env.get('PYTHONPATH')]))
+    return env
+
+def scratch_workspace():
+    """Workspace with the language templates and an English AGENTS.md, for switch-lang."""
+    workspace = Path(tempfile.mkdtemp(prefix='agents-md-bench-startup-'))
+    for name in ('AGENTS.md.en', 'AGENTS.md.ja'):
+        shutil.copy(REPO_DIR / name, workspace / name)
+    shutil.copy(REPO_DIR / 'AGENTS.md.en', workspace / 'AGENTS.md')
+    shutil.copy(REPO_DIR / 'AGENTS.md.en', workspace / 'GEMINI.md')
+    return workspace
+
+# ============================================================================
+# COMPARISON
+# ============================================================================
+def compare(baseline, current):
+    """Print current results next to a baseline results file."""
+    old = {row['benchmark']: row for row in baseline.get('results', [])}
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} ({baseline.get('created', '?')}):")
+    print(f"{'benchmark':<16} {'before ms':>10} {'after ms':>10} {'change':>8} {'modules':>13}")
+    for row in current['results']:
+        before = old.get(row['benchmark'])
+        change = f"{row['seconds'] / before['seconds']:>7.2f}x" if before else '     new'
+        before_text = f"{before['seconds'] * 1000:>10.1f}" if before else f"{'-':>10}"
+        modules = f"{before['modules']} -> {row['modules']}" if before else str(row['modules'])
+        print(f"{row['benchmark']:<16} {before_text} {row['seconds'] * 1000:>10.1f} {change} {modules:>13}")
+
+# ============================================================================
+# MAIN
+# ============================================================================
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Benchmark the cold start of the agents-md command line')
+    parser.add_argument('--only', nargs='+', help='Run only these commands (e.g. help switch-lang)')
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per command; the fastest is kept (default: 10)')
+    parser.add_argument('--top', type=int, default=5, help='Slowest top-level imports to list per command (default: 5)')
+    parser.add_argument('--max-ms', type=float, help='Fail when a command takes longer than this many milliseconds')
+    parser.add_argument('--output', help='Write the results JSON to this file')
+    parser.add_argument('--compare', help='Results JSON of an earlier run to compare with')
+    parser.add_argument('--json', action='store_true', help='Print the results JSON instead of the table')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            print(f"✗ Error: cannot read {args.compare}: {e}")
+            return 1
+
+    def log(message):
+        print(message, file=sys.stderr if args.json else sys.stdout, flush=True)
+
+    report = {
+        'version': RESULTS_VERSION,
+        'created': datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': [],
+    }
+    env = benchmark_env()
+    workspace = scratch_workspace()
+    problems = []
+    try:
+        commands = [('python', ['-c', MODULES_HOOK], ())]
+        commands += [(name, ['-c', MODULES_HOOK + RUN_MODULE] + [item.format(workspace=workspace) for item in arguments],
+                      lazy) for name, arguments, lazy in COMMANDS]
+        if args.only:
+            commands = [command for command in commands if command[0] in args.only]
+        log(f"{'command':<16} {'wall ms':>9} {'median':>9} {'imports ms':>11} {'modules':>8}")
+        for name, arguments, lazy in commands:
+            run_command(arguments, env)
+            try:
+                result = measure(arguments, env, args.repeat)
+            except RuntimeError as e:
+                problems.append(f"{name}: {e}")
+                continue
+            loaded = set(result['modules'])
+            eager = [module for module in lazy if module in loaded]
+            if eager:
+                problems.append(f"{name}: imports {', '.join(eager)}")
+            if args.max_ms is not None and result['seconds'] * 1000 > args.max_ms:
+                problems.append(f"{name}: {result['seconds'] * 1000:.1f} ms is over the {args.max_ms:g} ms budget")
+            top = sorted(result['top_level'], key=lambda item: -item[1])[:args.top]
+            report['results'].append({
+                'benchmark': name, 'seconds': round(result['seconds'], 6), 'median': round(result['median'], 6),
+                'import_us': result['import_us'], 'modules': len(loaded), 'runs': args.repeat,
+                'top_imports': [{'module': module, 'us': us} for module, us in top],
+                'eager_imports': eager,
+            })
+            log(f"{name:<16} {result['seconds'] * 1000:>9.1f} {result['median'] * 1000:>9.1f} "
+                f"{result['import_us'] / 1000:>11.1f} {len(loaded):>8}")
+            for module, us in top:
+                log(f"    {us / 1000:>7.1f} ms  {module}")
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    if baseline and not args.json:
+        compare(baseline, report)
+    for problem in problems:
+        print(f"✗ {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
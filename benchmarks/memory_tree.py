@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Synthetic memory-root generator for benchmarks.
+
+Builds a memory root laid out the way organization.md asks agents to keep
+one, with enough variety that the indexes behave as they do on real trees:
+
+    common/preferences.md, common/patterns.md
+    private/credentials.md, private/personal_info.md
+    [project]/context.md
+    [project]/topic/topic_name.md                    about 20% of the files
+    [project]/session/YYYY-MM/YYYY-MM-DD_feature.md  the rest, newest month first
+    [project]/memories.json                          written by the indexer
+
+Files mix English and Japanese text (about a third Japanese), have several
+headings, Keywords: lines and <!-- #tag --> footers with a skewed tag
+distribution, and a few are near-duplicates of another file or quote a value
+from private/, so dedup and privacy have something to find. Session files
+get the modification time of their date. The tree is fully determined by
+--files and --seed.
+
+Usage:
+    python3 benchmarks/memory_tree.py DIR --files 1k [--seed 0] [--no-index]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from agents_md.indexer import index_project  # noqa: E402
+
+TREE_VERSION = 1
+# Written at the memory root so the harness can reuse a matching tree
+TREE_INFO = ".bench-tree.json"
+SIZES = {'k': 1000, 'm': 1000 * 1000}
+NEWEST_MONTH = date(2025, 12, 1)
+SESSIONS_PER_MONTH = 40
+JAPANESE_RATIO = 0.3
+DUPLICATE_RATIO = 0.02
+LEAK_RATIO = 0.001
+
+WORDS = (
+    "auth token refresh session cache database query index migration schema api endpoint request "
+    "response handler middleware router controller service worker queue retry timeout backoff "
+    "deploy build release pipeline docker container kubernetes config environment secret rotation "
+    "logging metrics tracing alert dashboard latency throughput memory leak profile benchmark "
+    "frontend backend component state hook render layout style theme accessibility test fixture "
+    "mock coverage regression bug fix patch refactor cleanup rename module package dependency "
+    "upgrade version lockfile python typescript react postgres redis sqlite graphql rest websocket "
+    "upload download storage bucket file path permission user role admin invite email notification "
+    "payment invoice billing subscription search ranking filter pagination sort export import csv "
+    "json yaml parser validation error exception warning edge case decision tradeoff pattern "
+    "convention review feedback todo follow up blocked investigate reproduce verify confirm"
+).split()
+JAPANESE_PHRASES = (
+    "認証トークンの更新", "セッション管理", "キャッシュの無効化", "データベース移行", "検索インデックス",
+    "エラーハンドリング", "パフォーマンス改善", "メモリリークの調査", "テストの追加", "リファクタリング",
+    "デプロイ手順", "設定ファイル", "環境変数", "ログ出力", "監視とアラート", "ユーザー権限",
+    "通知メール", "決済処理", "ページネーション", "バリデーション", "依存関係の更新", "ビルド時間",
+    "レビュー指摘", "設計判断", "トレードオフ", "再現手順", "原因の特定", "修正内容", "今後の課題",
+    "コンポーネント設計", "状態管理", "アクセシビリティ", "国際化対応", "バックアップ", "権限チェック",
+)
+JAPANESE_GLUE = ("を確認した。", "について検討した。", "を修正した。", "が必要。", "は問題なし。", "の方針を決めた。")
+FRAMEWORKS = ("React", "Django", "FastAPI", "Rails", "Next.js", "Flask", "Vue", "Express", "Spring")
+DATABASES = ("PostgreSQL", "MySQL", "SQLite", "Redis", "MongoDB", "DynamoDB")
+TAGS = sorted({word.replace(' ', '-') for word in WORDS} | {
+    f"{first}-{second}" for first, second in zip(WORDS[::7], WORDS[3::7])})
+
+# ============================================================================
+# TEXT
+# ============================================================================
+class TextMaker:
+    """Deterministic English/Japanese memory text from one random stream."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.tag_weights = [1.0 / (rank + 1) for rank in range(len(TAGS))]
+
+    def words(self, count):
+        return ' '.join(self.rng.choices(WORDS, k=count))
+
+    def title(self, japanese):
+        if japanese:
+            return self.rng.choice(JAPANESE_PHRASES)
+        return self.words(self.rng.randint(2, 4)).capitalize()
+
+    def sentence(self, japanese):
+        if japanese:
+            phrases = self.rng.choices(JAPANESE_PHRASES, k=self.rng.randint(1, 3))
+            return '、'.join(phrases) + self.rng.choice(JAPANESE_GLUE)
+        return self.words(self.rng.randint(6, 16)).capitalize() + '.'
+
+    def paragraph(self, japanese):
+        return ' '.join(self.sentence(japanese) for _ in range(self.rng.randint(2, 5)))
+
+    def bullets(self, japanese):
+        lines = []
+        for _ in range(self.rng.randint(2, 6)):
+            line = f"- {self.sentence(japanese)}"
+            if self.rng.random() < 0.2:
+                line += f" (`src/{self.rng.choice(WORDS)}/{self.rng.choice(WORDS)}.py`)"
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def tags(self):
+        count = self.rng.randint(3, 7)
+        return list(dict.fromkeys(self.rng.choices(TAGS, weights=self.tag_weights, k=count)))
+
+    def body(self, japanese, sections):
+        parts = []
+        for _ in range(sections):
+            parts.append(f"## {self.title(japanese)}\n\n{self.paragraph(japanese)}\n\n{self.bullets(japanese)}\n")
+        return '\n'.join(parts)
+
+    def footer(self, tags):
+        keywords = ', '.join(self.rng.sample(WORDS, 3))
+        return f"\nKeywords: {keywords}\n\n<!-- {' '.join('#' + tag for tag in tags)} -->\n"
+
+# ============================================================================
+# FILES
+# ============================================================================
+def parse_size(value):
+    """File count from "1k", "100k", "1M" or a plain number."""
+    value = str(value).strip().lower()
+    scale = SIZES.get(value[-1:], 1)
+    number = value[:-1] if value[-1:] in SIZES else value
+    try:
+        count = int(float(number) * scale)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a file count: {value}")
+    if count < 10:
+        raise argparse.ArgumentTypeError("a memory tree needs at least 10 files")
+    return count
+
+def plan_projects(files):
+    """(project name, files in it) pairs adding up to files minus common/ and private/."""
+    count = max(2, round(math.sqrt(files) / 4))
+    remaining = files - 4
+    share, extra = divmod(remaining, count)
+    return [(f"project-{number:04d}", share + (1 if number < extra else 0)) for number in range(count)]
+
+def month_before(month, steps):
+    year, index = divmod(month.year * 12 + month.month - 1 - steps, 12)
+    return date(year, index + 1, 1)
+
+def write_file(path, text, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+def write_private(root, rng):
+    """private/ files; returns the values an agent might copy elsewhere by mistake."""
+    values = [f"bench.user{rng.randint(100, 999)}@corp-mail.net", f"Taro Bench{rng.randint(10, 99)}",
+              f"tok_{rng.getrandbits(64):016x}"]
+    write_file(root / 'private' / 'personal_info.md',
+               f"# Personal Info\n\n- **Email**: {values[0]}\n- **Name**: {values[1]}\n")
+    write_file(root / 'private' / 'credentials.md',
+               f"# Credentials\n\n- **Staging token**: `{values[2]}`\n")
+    return values
+
+def write_common(root, maker):
+    write_file(root / 'common' / 'preferences.md',
+               f"# User Preferences\n\n{maker.bullets(False)}\n\n<!-- #preferences #user -->\n")
+    write_file(root / 'common' / 'patterns.md',
+               f"# Cross-Project Patterns\n\n{maker.body(False, 4)}\n<!-- #patterns #cross-project -->\n")
+
+def project_files(project, count, rng, maker):
+    """Yield (relpath, text, mtime) for one project."""
+    japanese_project = rng.random() < JAPANESE_RATIO
+    yield f"{project}/context.md", (
+        f"# Project Context\n- Framework: {rng.choice(FRAMEWORKS)}\n- Database: {rng.choice(DATABASES)}\n\n"
+        f"## Recent Changes\n\n{maker.bullets(japanese_project)}\n"), None
+    count -= 1
+    topics = max(1, count // 5)
+    used = set()
+    for _ in range(topics):
+        name = '_'.join(rng.sample(WORDS, 2))
+        while name in used:
+            name += f"_{len(used)}"
+        used.add(name)
+        japanese = rng.random() < JAPANESE_RATIO
+        text = f"# {maker.title(japanese)}\n\n{maker.paragraph(japanese)}\n\n{maker.body(japanese, rng.randint(2, 6))}"
+        yield f"{project}/topic/{name}.md", text + maker.footer(maker.tags()), None
+    sessions = count - topics
+    for number in range(sessions):
+        month = month_before(NEWEST_MONTH, number // SESSIONS_PER_MONTH)
+        day = month + timedelta(days=rng.randint(0, 27))
+        feature = '_'.join(rng.sample(WORDS, 2))
+        japanese = rng.random() < JAPANESE_RATIO
+        heading = "セッションノート" if japanese else "Session Notes"
+        text = (f"# {heading} - {day.isoformat()}\n\n{maker.body(japanese, rng.randint(1, 4))}"
+                + maker.footer(maker.tags()))
+        mtime = datetime(day.year, day.month, day.day, 18, tzinfo=timezone.utc).timestamp()
+        yield f"{project}/session/{month:%Y-%m}/{day.isoformat()}_{feature}_{number}.md", text, mtime
+
+def generate(root, files, seed=0, index=True, log=None):
+    """Write a synthetic memory tree of about files markdown files; returns its info dict."""
+    started = time.perf_counter()
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    maker = TextMaker(rng)
+    secrets = write_private(root, rng)
+    write_common(root, maker)
+    written = 4
+    total_bytes = 0
+    previous = None
+    projects = plan_projects(files)
+    for number, (project, count) in enumerate(projects):
+        for relpath, text, mtime in project_files(project, count, rng, maker):
+            roll = rng.random()
+            if previous and roll < DUPLICATE_RATIO:
+                # Near-duplicate: the previous file with a line changed
+                lines = previous.splitlines()
+                lines[rng.randrange(len(lines))] = maker.sentence(False)
+                text = '\n'.join(lines) + '\n'
+            elif roll < DUPLICATE_RATIO + LEAK_RATIO:
+                text += f"\nContact: {rng.choice(secrets)}\n"
+            write_file(root / relpath, text, mtime)
+            total_bytes += len(text.encode('utf-8'))
+            previous = text
+            written += 1
+        if log and (number + 1) % max(1, len(projects) // 10) == 0:
+            log(f"  {written}/{files} files")
+    if index:
+        for project, _ in projects:
+            index_project(root / project)
+    info = {'version': TREE_VERSION, 'files': written, 'seed': seed, 'indexed': index,
+            'projects': len(projects), 'bytes': total_bytes,
+            'seconds': round(time.perf_counter() - started, 3)}
+    (root / TREE_INFO).write_text(json.dumps(info, indent=2) + '\n', encoding='utf-8')
+    return info
+
+def tree_info(root):
+    """Info of a generated tree, or None when root is not one."""
+    try:
+        return json.loads((Path(root) / TREE_INFO).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+# ============================================================================
+# MAIN
+# ============================================================================
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Generate a synthetic memory root')
+    parser.add_argument('directory', help='Memory root to create (must be empty or missing)')
+    parser.add_argument('--files', type=parse_size, default=1000, help='Number of files: 1k, 100k, 1M, ... (default: 1k)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--no-index', action='store_true', help='Do not write memories.json')
+    args = parser.parse_args()
+
+    root = Path(args.directory)
+    if root.exists() and any(root.iterdir()):
+        print(f"✗ Error: {root} is not empty.")
+        return 1
+    info = generate(root, args.files, seed=args.seed, index=not args.no_index,
+                    log=lambda message: print(message, file=sys.stderr))
+    print(f"Generated {info['files']} files in {info['projects']} projects, "
+          f"{info['bytes'] / 1024 / 1024:.1f} MB ({info['seconds']:.1f}s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""
+Memory tools for agents-md.
+
+Maintains the machine-readable parts of the memory system so agents do not
+rebuild them by hand. The memory root defaults to the MEMORY_PATH configured
+in AGENTS.md (run setup.py first), or pass --memory-path.
+
+Usage:
+    python memory.py index [project ...] [--full]        # Windows
+    python3 memory.py index [project ...] [--full]       # macOS/Linux
+    python3 memory.py store init|query|export|drop [project ...] [--tag T] [--path PREFIX]
+    python3 memory.py journal append|write PATH [TEXT] [--writer NAME] [--merge]
+    python3 memory.py journal set PROJECT[/FILE] KEY=VALUE ... | merge [--watch] | status
+    python3 memory.py ingest PROJECT [--repo DIR] [--since WHEN | --all] [--dry-run]
+    python3 memory.py verify PROJECT [--workspace DIR] [--lookup NAME ...]
+    python3 memory.py serve [--socket PATH] [--status | --stop]
+    python3 memory.py call lookup|search|tags|headers|section|stats [WORD ...] [KEY=VALUE ...]
+    python3 memory.py digest [project ...] [--budget TOKENS] [--dry-run]
+    python3 memory.py search QUERY [--refresh] [-n N]
+    python3 memory.py headers [path ...] [--refresh]
+    python3 memory.py section PATH SECTION [--subsections]
+    python3 memory.py tags ["EXPRESSION"] [--sections] [--refresh]
+    python3 memory.py semantic QUERY [--refresh] [--svd] [--batch FILE]
+    python3 memory.py retrieve QUERY --budget TOKENS [--project NAME]
+    python3 memory.py compact [project ...] [--before YYYY-MM] [--dry-run]
+    python3 memory.py pack DIR [--older-than DAYS] [--dry-run]
+    python3 memory.py unpack PACK [member ...] [--list]
+    python3 memory.py watch [--backend auto|inotify|poll] [--status]
+    python3 memory.py mirror LOCAL [--watch] [--dry-run]
+    python3 memory.py dedup [path ...] [--threshold T] [--sections]
+    python3 memory.py privacy [path ...] [--full] [--jobs N]
+
+Installing the package (pip install .) provides the same commands, plus
+configure and switch-lang (what setup.py runs), as the `agents-md` console
+script.
+
+Every command accepts --trace FILE (or AGENTS_MD_TRACE=FILE) to record step
+timings and file-operation counts as JSON lines, or a Chrome trace for .json.
+
+Commands:
+    index    Update [project]/memories.json, re-parsing only changed files
+    store    Keep memories.json entries in an SQLite store (upserts, indexed lookups)
+    journal  Record writes of concurrent agents in per-writer journals and merge them under locks
+    ingest   Write a repository's commits since the last run into [project]/session/YYYY-MM/
+    verify   Report file paths and symbols cited in memory that no longer exist in the code
+    serve    Keep the memory indexes resident and answer queries over a Unix socket (JSON-RPC)
+    call     Send one lookup, search, tags, headers, section or stats request to the server
+    digest   Regenerate the status digest in [project]/context.md when its inputs changed
+    search   Ranked BM25 search over all memory files (English and Japanese)
+    headers  List headings with line numbers and token counts from the section index
+    section  Print one section of a memory file by number or title
+    tags     Files or sections matching a tag expression (AND/OR/NOT), or all tags
+    semantic Sections closest in meaning to a query, from a local vector index (NumPy)
+    retrieve Best-scoring sections for a query within a hard token budget
+    compact  Roll closed session/YYYY-MM/ months into session/YYYY-MM.md archives
+    pack     Move cold files of a directory into one compressed DIR.mdpack
+    unpack   Restore (or list) files of a pack
+    watch    Keep memories.json, digests and the search/section/tag indexes live as files change
+             (and merge journal records)
+    mirror   Sync a fast local copy of a cloud-synced memory root both ways
+    dedup    Report clusters of near-duplicate files or sections (MinHash/LSH)
+    privacy  Report credentials, emails and private values found outside private/
+"""
+
+import sys
+
+from agents_md.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
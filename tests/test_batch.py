@@ -0,0 +1,72 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""Regression checks of the headless batch mode (agents_md/configure.py)."""
+
+import contextlib
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from agents_md import configure
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+class BatchWorkspacesTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix='agents-md-test-batch-'))
+        self.addCleanup(shutil.rmtree, self.root, True)
+        template = (REPO_DIR / 'AGENTS.md.en').read_text(encoding='utf-8')
+        for name, files in (('agents', ['AGENTS.md']), ('gemini', ['GEMINI.md']), ('unrelated', [])):
+            (self.root / name).mkdir()
+            for file_name in files:
+                (self.root / name / file_name).write_text(template, encoding='utf-8')
+        (self.root / 'unrelated' / 'README.md').write_text("# Somebody else's checkout\n", encoding='utf-8')
+
+    def run_batch(self, **kwargs):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+            code = configure.run_batch([str(self.root / '*')], target_lang='ja', jobs=1, **kwargs)
+        return code, json.loads(output.getvalue())
+
+    def test_glob_skips_directories_without_either_file(self):
+        code, summary = self.run_batch()
+
+        self.assertEqual(code, 0)
+        self.assertEqual(summary['skipped'], [str(self.root / 'unrelated')])
+        self.assertEqual(sorted(result['workspace'] for result in summary['workspaces']),
+                         [str(self.root / 'agents'), str(self.root / 'gemini')])
+        self.assertEqual(sorted(path.name for path in (self.root / 'unrelated').iterdir()), ['README.md'])
+        for name in ('agents', 'gemini'):
+            self.assertEqual(configure.get_current_language(self.root / name), 'ja')
+
+    def test_create_opts_in(self):
+        code, summary = self.run_batch(create=True)
+
+        self.assertEqual(code, 0)
+        self.assertEqual(summary['skipped'], [])
+        self.assertTrue((self.root / 'unrelated' / 'AGENTS.md').exists())
+        self.assertTrue((self.root / 'unrelated' / 'GEMINI.md').exists())
+
+    def test_create_without_language_uses_the_cli_language(self):
+        configure.configure_workspace(self.root / 'agents', target_lang='ja')
+        memory = self.root / 'memory'
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+            code = configure.run_batch([str(self.root / 'agents'), str(self.root / 'unrelated')],
+                                       memory_path=str(memory), jobs=1, create=True)
+
+        self.assertEqual(code, 0, output.getvalue())
+        self.assertEqual(configure.get_current_language(self.root / 'unrelated'), 'en')
+        self.assertEqual(configure.get_current_language(self.root / 'agents'), 'ja')
+        for name in ('agents', 'unrelated'):
+            for file_name in ('AGENTS.md', 'GEMINI.md'):
+                text = (self.root / name / file_name).read_text(encoding='utf-8')
+                self.assertEqual(configure.extract_memory_path(text), memory.as_posix())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""Regression checks of the interactive setup flow (agents_md/configure.py)."""
+
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from agents_md import configure
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+class InteractiveConfigureTest(unittest.TestCase):
+    def setUp(self):
+        self.workspace = Path(tempfile.mkdtemp(prefix='agents-md-test-configure-'))
+        self.addCleanup(shutil.rmtree, self.workspace, True)
+        template = (REPO_DIR / 'AGENTS.md.en').read_text(encoding='utf-8')
+        for name in ('AGENTS.md', 'GEMINI.md'):
+            (self.workspace / name).write_text(configure.render_memory_path(template, '/old/memory'), encoding='utf-8')
+
+    def run_configure(self, answer, memory_path=None, dry_run=False):
+        args = argparse.Namespace(scan=None, upgrade=False, workspace=None, memory_path=None, lang='ja',
+                                  jobs=None, dry_run=dry_run, create=False)
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(mock.patch.object(configure, 'default_workspace', return_value=self.workspace))
+            stack.enter_context(mock.patch('builtins.input', return_value=answer))
+            stack.enter_context(mock.patch.object(configure, 'get_memory_path', return_value=memory_path))
+            commits = stack.enter_context(mock.patch.object(configure, 'commit_plan', wraps=configure.commit_plan))
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+            code = configure.run_configure(args)
+        return code, commits.call_count
+
+    def memory_paths(self):
+        return {configure.extract_memory_path((self.workspace / name).read_text(encoding='utf-8'))
+                for name in ('AGENTS.md', 'GEMINI.md')}
+
+    def test_language_and_memory_path_are_written_once(self):
+        code, commits = self.run_configure('y', memory_path='/new/memory')
+
+        self.assertEqual(code, 0)
+        self.assertEqual(commits, 1)
+        self.assertEqual(configure.get_current_language(self.workspace), 'ja')
+        self.assertEqual(self.memory_paths(), {'/new/memory'})
+
+    def test_quitting_writes_only_the_language(self):
+        code, commits = self.run_configure('n')
+
+        self.assertEqual(code, 0)
+        self.assertEqual(commits, 1)
+        self.assertEqual(configure.get_current_language(self.workspace), 'ja')
+        self.assertEqual(self.memory_paths(), {'/old/memory'})
+
+    def test_dry_run_writes_nothing(self):
+        before = (self.workspace / 'AGENTS.md').read_bytes()
+        code, commits = self.run_configure('y', memory_path='/new/memory', dry_run=True)
+
+        self.assertEqual(code, 0)
+        self.assertEqual(commits, 0)
+        self.assertEqual((self.workspace / 'AGENTS.md').read_bytes(), before)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""Regression checks of the multi-writer journal merge (agents_md/journal.py)."""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from agents_md import journal
+from agents_md.journal import ABANDONED_SECONDS, JOURNAL_STATE, Journal, list_segments, merge_journals
+
+class MergeTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix='agents-md-test-journal-'))
+        self.addCleanup(shutil.rmtree, self.root, True)
+        (self.root / 'my-project').mkdir()
+        (self.root / 'my-project/context.md').write_text("# Context\n", encoding='utf-8')
+
+    def read(self, relpath):
+        return (self.root / relpath).read_text(encoding='utf-8')
+
+    def test_writers_are_merged_in_timestamp_order(self):
+        with Journal(self.root, 'cursor') as cursor, Journal(self.root, 'gemini') as gemini:
+            cursor.append('my-project/context.md', "- cursor 1\n")
+            gemini.append('my-project/context.md', "- gemini 1\n")
+            cursor.append('my-project/context.md', "- cursor 2\n")
+            gemini.write('my-project/topic/auth.md', "# Auth\n")
+            gemini.set('my-project', {'summary': "Token refresh"}, file='topic/auth.md')
+
+        stats = merge_journals(self.root)
+
+        self.assertEqual((stats['records'], stats['files'], stats['removed'], stats['errors']), (5, 3, 2, []))
+        self.assertEqual(self.read('my-project/context.md'), "# Context\n- cursor 1\n- gemini 1\n- cursor 2\n")
+        self.assertEqual(self.read('my-project/topic/auth.md'), "# Auth\n")
+        document = json.loads(self.read('my-project/memories.json'))
+        self.assertEqual(document['files']['topic/auth.md'], {'summary': "Token refresh"})
+        self.assertEqual(list_segments(self.root), {})
+        self.assertEqual(merge_journals(self.root)['records'], 0)
+
+    def test_open_segments_are_merged_incrementally(self):
+        writer = Journal(self.root, 'cursor')
+        self.addCleanup(writer.close)
+        writer.append('my-project/context.md', "- first\n")
+        self.assertEqual(merge_journals(self.root)['records'], 1)
+        writer.append('my-project/context.md', "- second\n")
+
+        stats = merge_journals(self.root)
+
+        self.assertEqual((stats['records'], stats['removed']), (1, 0))
+        self.assertEqual(self.read('my-project/context.md'), "# Context\n- first\n- second\n")
+
+    def test_batch_is_applied_again_if_the_offsets_were_not_saved(self):
+        writer = Journal(self.root, 'cursor')
+        self.addCleanup(writer.close)
+        writer.append('my-project/context.md', "- once\n")
+        writer.set('my-project', {'owner': "cursor"})
+        write_json = journal.write_json
+
+        def killed_before_saving_offsets(path, *args, **kwargs):
+            if Path(path).name == JOURNAL_STATE:
+                raise KeyboardInterrupt
+            return write_json(path, *args, **kwargs)
+
+        with mock.patch.object(journal, 'write_json', killed_before_saving_offsets):
+            with self.assertRaises(KeyboardInterrupt):
+                merge_journals(self.root)
+        self.assertEqual(self.read('my-project/context.md'), "# Context\n- once\n")
+        writer.append('my-project/context.md', "- later\n")
+
+        stats = merge_journals(self.root)
+
+        # At least once: the unconfirmed batch is applied again, nothing is lost
+        self.assertEqual(stats['records'], 3)
+        self.assertEqual(self.read('my-project/context.md'), "# Context\n- once\n- once\n- later\n")
+        self.assertEqual(json.loads(self.read('my-project/memories.json')), {'owner': "cursor"})
+        self.assertEqual(merge_journals(self.root)['records'], 0)
+
+class AbandonedSegmentTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix='agents-md-test-journal-'))
+        self.addCleanup(shutil.rmtree, self.root, True)
+        (self.root / 'my-project').mkdir()
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        self.dead_pid = process.pid
+
+    def open_segment(self, label, pid, idle):
+        """An open segment with one record, left by pid idle seconds ago."""
+        writer = Journal(self.root, label)
+        writer.append(f"my-project/{label}.md", f"- {label}\n")
+        os.close(writer.fd)
+        writer.fd = None
+        host, _, ns = writer.name.rsplit('.', 2)
+        path = writer.path.with_name(f"{host}.{pid}.{ns}{journal.OPEN_SUFFIX}")
+        os.replace(str(writer.path), str(path))
+        past = time.time() - idle
+        os.utime(str(path), (past, past))
+        return path
+
+    def test_only_old_segments_of_dead_writers_are_removed(self):
+        abandoned = self.open_segment('abandoned', self.dead_pid, ABANDONED_SECONDS + 60)
+        recent = self.open_segment('recent', self.dead_pid, 60)
+        running = self.open_segment('running', os.getpid(), ABANDONED_SECONDS + 60)
+
+        stats = merge_journals(self.root)
+
+        self.assertEqual((stats['records'], stats['removed']), (3, 1))
+        self.assertFalse(abandoned.exists())
+        self.assertTrue(recent.exists())
+        self.assertTrue(running.exists())
+        for label in ('abandoned', 'recent', 'running'):
+            self.assertEqual((self.root / f"my-project/{label}.md").read_text(encoding='utf-8'), f"- {label}\n")
+        offsets = json.loads((self.root / '.agents-md' / JOURNAL_STATE).read_text(encoding='utf-8'))['offsets']
+        self.assertEqual(len(offsets), 2)
+        self.assertEqual(merge_journals(self.root)['records'], 0)
+
+    def test_unmerged_records_keep_an_abandoned_segment(self):
+        abandoned = self.open_segment('abandoned', self.dead_pid, ABANDONED_SECONDS + 60)
+        with abandoned.open('ab') as f:
+            f.write(b'{"ts": 1, "op": "append", "path": "my-project/abandoned.md", "text": "- half')
+
+        stats = merge_journals(self.root)
+
+        self.assertEqual((stats['records'], stats['removed']), (1, 0))
+        self.assertTrue(abandoned.exists())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""Regression checks of the compressed cold-storage packs (agents_md/pack.py)."""
+
+import shutil
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+from unittest import mock
+
+from agents_md import pack
+from agents_md.common import PACK_SUFFIX
+from agents_md.pack import FRAME_SIZE, PackFile, find_packed, frame_boundaries, pack_directory, unpack
+
+def session(count, size):
+    """Markdown with count level-2 sections of about size bytes each."""
+    sections = [f"## Day {day}\n\n" + ("token refresh notes " * (size // 20)) + "\n\n" for day in range(count)]
+    return ("# Sessions\n\n" + ''.join(sections)).encode('utf-8')
+
+class FrameBoundariesTest(unittest.TestCase):
+    def test_sections_share_frames_and_frames_start_at_headings(self):
+        data = session(20, 3000)
+        starts = {0} | {index for index in range(len(data)) if data.startswith(b'\n## ', index - 1)}
+        cuts = frame_boundaries(data)
+
+        self.assertGreater(len(cuts), 1)
+        self.assertLess(len(cuts), 20)
+        self.assertTrue(set(cuts) <= starts)
+        for start, end in zip(cuts, cuts[1:] + [len(data)]):
+            self.assertLessEqual(end - start, FRAME_SIZE)
+
+    def test_large_section_is_cut_every_frame_size(self):
+        data = session(1, 3 * FRAME_SIZE)
+        heading = data.index(b'## Day 0')
+        cuts = frame_boundaries(data)
+
+        self.assertEqual(cuts[:2], [0, heading])
+        self.assertEqual(cuts[2:], list(range(heading + FRAME_SIZE, len(data), FRAME_SIZE)))
+
+    def test_empty_file_has_no_frames(self):
+        self.assertEqual(frame_boundaries(b''), [])
+
+class PackTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix='agents-md-test-pack-'))
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.addCleanup(pack._OPEN_PACKS.clear)
+        self.directory = self.root / 'my-project' / 'session' / '2025-01'
+        self.files = {
+            '2025-01-03.md': session(30, 2000),
+            'notes/auth.md': "# Auth\n\nRefresh tokens hourly. 認証\n".encode('utf-8'),
+            'empty.md': b'',
+        }
+        for name, data in self.files.items():
+            path = self.directory / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+        self.mtimes = {name: (self.directory / name).stat().st_mtime_ns for name in self.files}
+        self.pack_path = self.directory.parent / ('2025-01' + PACK_SUFFIX)
+
+    def test_reads_decompress_only_the_frames_they_span(self):
+        self.assertIsNone(pack_directory(self.directory)['error'])
+        packed = PackFile(self.pack_path)
+        data = self.files['2025-01-03.md']
+        frames = packed.members['2025-01-03.md']['frames']
+        self.assertGreater(len(frames), 2)
+
+        boundary = frames[1][0]
+        with mock.patch.object(pack.zlib, 'decompress', wraps=zlib.decompress) as decompress:
+            self.assertEqual(packed.read('2025-01-03.md', boundary - 10, boundary + 10), data[boundary - 10:boundary + 10])
+        self.assertEqual(decompress.call_count, 2)
+        with mock.patch.object(pack.zlib, 'decompress', wraps=zlib.decompress) as decompress:
+            self.assertEqual(packed.read('2025-01-03.md', boundary, boundary + 5), data[boundary:boundary + 5])
+        self.assertEqual(decompress.call_count, 1)
+        self.assertEqual(packed.read('2025-01-03.md'), data)
+        self.assertEqual(packed.read('2025-01-03.md', len(data) - 3, len(data) + 100), data[-3:])
+        self.assertEqual(packed.read('empty.md'), b'')
+
+    def test_pack_then_unpack_round_trip(self):
+        stats = pack_directory(self.directory)
+
+        self.assertIsNone(stats['error'])
+        self.assertEqual(stats['files'], len(self.files))
+        self.assertFalse(self.directory.exists())
+        self.assertEqual(find_packed(self.root, 'my-project/session/2025-01/notes/auth.md'),
+                         ('my-project/session/2025-01' + PACK_SUFFIX, 'notes/auth.md'))
+        self.assertIsNone(find_packed(self.root, 'my-project/session/2025-01/missing.md'))
+
+        stats = unpack(self.pack_path)
+
+        self.assertEqual(stats['files'], len(self.files))
+        self.assertEqual(stats['conflicts'], [])
+        self.assertFalse(self.pack_path.exists())
+        for name, data in self.files.items():
+            self.assertEqual((self.directory / name).read_bytes(), data)
+            self.assertEqual((self.directory / name).stat().st_mtime_ns, self.mtimes[name])
+
+    def test_partial_unpack_keeps_the_rest_packed(self):
+        pack_directory(self.directory)
+        stats = unpack(self.pack_path, names=['notes/auth.md', 'missing.md'])
+
+        self.assertEqual(stats['files'], 1)
+        self.assertEqual(stats['missing'], ['missing.md'])
+        self.assertEqual((self.directory / 'notes/auth.md').read_bytes(), self.files['notes/auth.md'])
+        self.assertEqual(sorted(PackFile(self.pack_path).members), ['2025-01-03.md', 'empty.md'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""Regression checks of the token-budgeted retrieval planner (agents_md/retrieve.py)."""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from agents_md.indexer import index_project
+from agents_md.retrieve import SEARCH_LIMIT, STAGE_CEILINGS, plan_retrieval
+
+def topic(title, body):
+    return (f"# {title}\n\n## Overview\n\n{body}\n\n## Details\n\n{body} Keep notes short.\n\n"
+            f"<!-- #auth #token #refresh -->\n")
+
+class RetrieveTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix='agents-md-test-retrieve-'))
+        self.addCleanup(shutil.rmtree, self.root, True)
+        # Many projects that match the query better than the one asked for
+        strong = "Token refresh: refresh the auth token before it expires; token refresh retries. " * 3
+        for number in range(SEARCH_LIMIT + 5):
+            self.write(f"project-{number:02d}/topic/auth-token-refresh-{number}.md", topic("Auth token refresh", strong))
+        self.write("target/topic/login.md", topic("Login flow", "The login flow calls token refresh once."))
+        for project in sorted(path.name for path in self.root.iterdir()):
+            index_project(self.root / project)
+
+    def write(self, relpath, text):
+        path = self.root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+
+    def stage(self, plan, name):
+        return next(stage for stage in plan['stages'] if stage['stage'] == name)
+
+    def test_project_filter_applies_before_the_search_limit(self):
+        plan = plan_retrieval(self.root, "auth token refresh", 4000, projects=['target'])
+        self.assertGreater(self.stage(plan, 'search')['items'], 0)
+        self.assertTrue(plan['sections'])
+        self.assertTrue(all(section['path'].startswith('target/') for section in plan['sections']))
+
+    def test_small_budgets_leave_room_for_sections(self):
+        for budget in (500, 800):
+            plan = plan_retrieval(self.root, "auth token refresh", budget)
+            self.assertLessEqual(plan['spent'], budget)
+            self.assertLessEqual(self.stage(plan, 'index')['tokens'], budget * STAGE_CEILINGS['index'])
+            before_sections = sum(stage['tokens'] for stage in plan['stages'] if stage['stage'] != 'sections')
+            self.assertLessEqual(before_sections, budget * STAGE_CEILINGS['headers'])
+            self.assertTrue(plan['sections'], f"no sections at --budget {budget}")
+
+if __name__ == '__main__':
+    unittest.main()
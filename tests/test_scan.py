@@ -0,0 +1,154 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""Regression checks of the AGENTS.md / GEMINI.md scanner (agents_md/scan.py)."""
+
+import contextlib
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from agents_md import configure, scan
+from agents_md.render import render_memory_path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+FOREIGN = "# Unrelated\n\nSomebody else's agent instructions.\n"
+MEMORY_PATH = "/tmp/agents-md-test-memory"
+HAND_EDIT = "\n## Project rules\n\nNever push to main.\n"
+
+class ForeignFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix='agents-md-test-scan-'))
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.template = (REPO_DIR / 'AGENTS.md.en').read_text(encoding='utf-8')
+        self.outdated = self.template + "\nEdited by hand.\n"
+
+    def run_upgrade(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+            code = configure.run_scan([str(self.root)], upgrade=True, jobs=1)
+        return code, json.loads(output.getvalue())
+
+    def test_upgrade_never_overwrites_foreign_sibling(self):
+        directory = self.root / 'mixed'
+        directory.mkdir()
+        (directory / 'AGENTS.md').write_text(self.outdated, encoding='utf-8')
+        (directory / 'GEMINI.md').write_text(FOREIGN, encoding='utf-8')
+
+        code, summary = self.run_upgrade()
+
+        self.assertEqual(code, 0)
+        self.assertEqual((directory / 'GEMINI.md').read_text(encoding='utf-8'), FOREIGN)
+        self.assertEqual((directory / 'AGENTS.md').read_text(encoding='utf-8'), self.outdated)
+        self.assertEqual(summary['held'], [str(directory)])
+        self.assertEqual(summary['upgraded'], [])
+
+    def test_foreign_only_directory_is_not_a_target(self):
+        directory = self.root / 'foreign'
+        directory.mkdir()
+        (directory / 'AGENTS.md').write_text(FOREIGN, encoding='utf-8')
+
+        code, summary = self.run_upgrade()
+
+        self.assertEqual(code, 0)
+        self.assertEqual((directory / 'AGENTS.md').read_text(encoding='utf-8'), FOREIGN)
+        self.assertFalse((directory / 'GEMINI.md').exists())
+        self.assertEqual(summary['held'], [])
+
+    def test_outdated_pair_is_still_upgraded(self):
+        directory = self.root / 'ours'
+        directory.mkdir()
+        (directory / 'AGENTS.md').write_text(self.outdated, encoding='utf-8')
+
+        targets, held = scan.upgrade_targets([
+            {'path': str(directory / 'AGENTS.md'), 'name': 'AGENTS.md', 'status': 'outdated',
+             'language': 'en', 'memory_path': None},
+        ])
+
+        self.assertEqual(targets, {str(directory): ('en', None)})
+        self.assertEqual(held, [])
+
+class HandEditsTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix='agents-md-test-scan-'))
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.template = (REPO_DIR / 'AGENTS.md.en').read_text(encoding='utf-8')
+        self.directory = self.root / 'workspace'
+        self.directory.mkdir()
+
+    def plant(self, agents, gemini):
+        (self.directory / 'AGENTS.md').write_text(agents, encoding='utf-8')
+        (self.directory / 'GEMINI.md').write_text(gemini, encoding='utf-8')
+
+    def run_upgrade(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+            code = configure.run_scan([str(self.root)], upgrade=True, jobs=1)
+        return code, json.loads(output.getvalue())
+
+    def test_hand_edit_is_held_not_overwritten(self):
+        configured = render_memory_path(self.template, MEMORY_PATH)
+        edited = configured + HAND_EDIT
+        self.plant(edited, configured)
+
+        code, summary = self.run_upgrade()
+
+        self.assertEqual(code, 0)
+        self.assertEqual({result['name']: result['status'] for result in summary['files']},
+                         {'AGENTS.md': 'modified', 'GEMINI.md': 'current'})
+        self.assertEqual(summary['held'], [str(self.directory)])
+        self.assertEqual(summary['upgraded'], [])
+        self.assertEqual((self.directory / 'AGENTS.md').read_text(encoding='utf-8'), edited)
+
+    def test_released_template_is_upgraded_with_backups(self):
+        older = self.template.replace("\n\n", "\n\nAn older release paragraph.\n\n", 1)
+        configured = render_memory_path(older, MEMORY_PATH)
+        self.plant(configured, configured)
+
+        with mock.patch.object(scan, 'RELEASED_TEMPLATES', frozenset([scan.template_digest(older)])):
+            code, summary = self.run_upgrade()
+
+        self.assertEqual(code, 0)
+        self.assertEqual(summary['held'], [])
+        self.assertEqual([result['workspace'] for result in summary['upgraded']], [str(self.directory)])
+        self.assertEqual((self.directory / 'AGENTS.md').read_text(encoding='utf-8'),
+                         render_memory_path(self.template, MEMORY_PATH))
+        for name in ('AGENTS.md.backup', 'GEMINI.md.backup'):
+            self.assertEqual((self.directory / name).read_text(encoding='utf-8'), configured)
+
+    def test_upgrade_renders_from_the_scanned_templates(self):
+        older = self.template.replace("\n\n", "\n\nAn older release paragraph.\n\n", 1)
+        configured = render_memory_path(older, MEMORY_PATH)
+        self.plant(configured, configured)
+        # A stale language source in the workspace itself
+        (self.directory / 'AGENTS.md.en').write_text(older, encoding='utf-8')
+
+        with mock.patch.object(scan, 'RELEASED_TEMPLATES', frozenset([scan.template_digest(older)])):
+            code, summary = self.run_upgrade()
+
+        self.assertEqual(code, 0)
+        self.assertTrue(summary['upgraded'][0]['ok'])
+        for name in ('AGENTS.md', 'GEMINI.md'):
+            self.assertEqual((self.directory / name).read_text(encoding='utf-8'),
+                             render_memory_path(self.template, MEMORY_PATH))
+
+    def test_upgrade_that_leaves_files_stale_fails(self):
+        older = self.template.replace("\n\n", "\n\nAn older release paragraph.\n\n", 1)
+        configured = render_memory_path(older, MEMORY_PATH)
+        self.plant(configured, configured)
+
+        with mock.patch.object(scan, 'RELEASED_TEMPLATES', frozenset([scan.template_digest(older)])), \
+                mock.patch.object(configure, 'switch_to_language', return_value=True):
+            code, summary = self.run_upgrade()
+
+        self.assertEqual(code, 1)
+        self.assertFalse(summary['upgraded'][0]['ok'])
+        self.assertIn('AGENTS.md', summary['upgraded'][0]['error'])
+
+if __name__ == '__main__':
+    unittest.main()
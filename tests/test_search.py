@@ -0,0 +1,102 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""Regression checks of the search index generations (agents_md/search.py)."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from agents_md.search import CURRENT, SearchIndex, current_generation, search_directory, update_search_index
+
+class GenerationTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix='agents-md-test-search-'))
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.write('my-project/topic/auth.md', "# Auth\n\nRefresh the token hourly.\n")
+        self.write('my-project/topic/deploy.md', "# Deploy\n\nShip on Fridays after the token rotation.\n")
+        self.write('private/credentials.md', "# Credentials\n\nThe token is secret.\n")
+        update_search_index(self.root)
+
+    def write(self, relpath, text):
+        path = self.root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+
+    def generations(self):
+        return sorted(entry.name for entry in os.scandir(search_directory(self.root)) if entry.is_dir())
+
+    def search(self, query):
+        index = SearchIndex.open(self.root)
+        self.addCleanup(index.close)
+        return [(result['path'], result['score']) for result in index.search(query)]
+
+    def test_update_switches_to_a_new_generation(self):
+        before = current_generation(self.root)
+        self.write('my-project/topic/cache.md', "# Cache\n\nRedis keeps the token for an hour.\n")
+
+        stats = update_search_index(self.root)
+
+        self.assertTrue(stats['written'])
+        self.assertEqual(stats['tokenized'], 1)
+        after = current_generation(self.root)
+        self.assertNotEqual(after, before)
+        self.assertEqual((search_directory(self.root) / CURRENT).read_text(encoding='utf-8'), after.name)
+        self.assertEqual(self.generations(), [after.name])
+        self.assertIn('my-project/topic/cache.md', [path for path, _ in self.search('redis')])
+
+    def test_open_index_keeps_answering_from_its_generation(self):
+        index = SearchIndex.open(self.root)
+        self.addCleanup(index.close)
+        self.write('my-project/topic/auth.md', "# Auth\n\nSessions expire daily.\n")
+
+        update_search_index(self.root)
+
+        self.assertEqual([result['path'] for result in index.search('hourly')], ['my-project/topic/auth.md'])
+        self.assertEqual(self.search('hourly'), [])
+        self.assertEqual([path for path, _ in self.search('sessions')], ['my-project/topic/auth.md'])
+
+    def test_unchanged_root_keeps_the_generation(self):
+        before = current_generation(self.root)
+        path = self.root / 'my-project/topic/auth.md'
+        os.utime(str(path), ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+
+        stats = update_search_index(self.root)
+
+        self.assertFalse(stats['written'])
+        self.assertEqual(stats['tokenized'], 0)
+        self.assertEqual(current_generation(self.root), before)
+        self.assertEqual(update_search_index(self.root)['tokenized'], 0)
+
+    def test_incremental_generation_matches_a_full_rebuild(self):
+        self.write('my-project/topic/deploy.md', "# Deploy\n\nShip on Mondays; rotate the token first.\n")
+        (self.root / 'my-project/topic/auth.md').unlink()
+        self.write('my-project/topic/cache.md', "# Cache\n\nThe token cache holds a token per user.\n")
+
+        stats = update_search_index(self.root)
+        incremental = sorted(self.search('token ship cache'))
+        update_search_index(self.root, full=True)
+
+        self.assertEqual((stats['tokenized'], stats['removed']), (2, 1))
+        self.assertEqual(incremental, sorted(self.search('token ship cache')))
+
+    def test_private_setting_change_rebuilds(self):
+        self.assertEqual(self.search('secret'), [])
+
+        stats = update_search_index(self.root, include_private=True)
+
+        self.assertEqual(stats['tokenized'], 3)
+        self.assertEqual([path for path, _ in self.search('secret')], ['private/credentials.md'])
+
+    def test_missing_generation_is_no_index(self):
+        (search_directory(self.root) / CURRENT).write_text('gen-999999', encoding='utf-8')
+
+        self.assertIsNone(SearchIndex.open(self.root))
+        self.assertTrue(update_search_index(self.root)['written'])
+        self.assertEqual(len(self.search('token')), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""Regression checks of the section command's path confinement (agents_md/sections.py)."""
+
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from agents_md.sections import run_section
+
+SECRET = "sk-planted-0123456789"
+
+class SectionPathsTest(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp(prefix='agents-md-test-sections-'))
+        self.addCleanup(shutil.rmtree, self.base, True)
+        self.root = self.base / 'memory'
+        for relpath, text in (
+            ('memory/my-project/topic/auth.md', "# Auth\n\n## Token refresh\n\nRefresh the token hourly.\n"),
+            ('memory/private/credentials.md', f"# Credentials\n\n## Token\n\nThe token is {SECRET}.\n"),
+            ('outside.md', f"# Outside\n\n## Token\n\nThe token is {SECRET}.\n"),
+        ):
+            path = self.base / relpath
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding='utf-8')
+
+    def section(self, path, section='Token', include_private=False):
+        args = argparse.Namespace(path=path, section=section, subsections=False, include_private=include_private)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            code = run_section(args, self.root)
+        return code, output.getvalue()
+
+    def test_reads_files_inside_the_root(self):
+        code, text = self.section('my-project/topic/auth.md', 'Token refresh')
+
+        self.assertEqual(code, 0)
+        self.assertIn('Refresh the token hourly.', text)
+
+    def test_refuses_paths_outside_the_root(self):
+        for path in ('../outside.md', 'my-project/../../outside.md', str(self.root / '..' / 'outside.md')):
+            code, text = self.section(path)
+            self.assertEqual(code, 1)
+            self.assertNotIn(SECRET, text)
+
+    def test_private_needs_include_private(self):
+        for path in ('private/credentials.md', str(self.root / 'private' / 'credentials.md')):
+            code, text = self.section(path)
+            self.assertEqual(code, 1)
+            self.assertNotIn(SECRET, text)
+
+        code, text = self.section('private/credentials.md', include_private=True)
+        self.assertEqual(code, 0)
+        self.assertIn(SECRET, text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""Regression checks of the memory query server (agents_md/server.py)."""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from agents_md.client import MAX_SOCKET_PATH, socket_path
+from agents_md.search import update_search_index
+from agents_md.sections import SectionIndex
+from agents_md.server import MemoryServer, MemoryService, RequestError
+from agents_md.tags import update_tag_index
+
+SECRET = "sk-planted-0123456789"
+
+class PrivatePathsTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix='agents-md-test-server-'))
+        self.addCleanup(shutil.rmtree, self.root, True)
+        for relpath, text in (
+            ('my-project/topic/auth.md', "# Auth\n\n## Token refresh\n\nRefresh the token hourly.\n\n<!-- #auth -->\n"),
+            ('private/credentials.md', f"# Credentials\n\n## Token\n\nThe token is {SECRET}.\n\n<!-- #auth -->\n"),
+        ):
+            path = self.root / relpath
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding='utf-8')
+        # Indexes an --include-private run left behind
+        update_search_index(self.root, include_private=True)
+        update_tag_index(self.root, include_private=True)
+        sections = SectionIndex(self.root)
+        sections.update(include_private=True)
+        sections.save()
+        self.service = MemoryService(self.root)
+        self.service.warm()
+        self.addCleanup(self.service.close)
+
+    def call(self, method, **params):
+        line = json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}).encode('utf-8')
+        response, _ = self.service.handle(line)
+        return json.loads(response.decode('utf-8'))
+
+    def test_section_refuses_private_paths(self):
+        for path in ('private/credentials.md', '/private/credentials.md', 'private//credentials.md'):
+            response = self.call('section', path=path, section=0)
+            self.assertIn('error', response)
+            self.assertNotIn(SECRET, json.dumps(response))
+        with self.assertRaises(RequestError):
+            self.service.section({'path': 'private/credentials.md', 'section': 'Token'})
+
+    def test_headers_hide_private_paths(self):
+        self.assertIn('error', self.call('headers', path='private'))
+        listing = self.call('headers')['result']
+        self.assertIn('my-project/topic/auth.md', listing)
+        self.assertFalse(any(path.startswith('private/') for path in listing))
+
+    def test_search_and_tags_filter_private_results(self):
+        results = self.call('search', query='token')['result']
+        self.assertEqual([item['path'] for item in results], ['my-project/topic/auth.md'])
+        files = self.call('tags', expression='auth')['result']
+        self.assertEqual([item['path'] for item in files], ['my-project/topic/auth.md'])
+        sections = self.call('tags', expression='auth', sections=True)['result']
+        self.assertTrue(sections)
+        self.assertFalse(any(item['path'].startswith('private/') for item in sections))
+
+    def test_include_private_serves_them(self):
+        service = MemoryService(self.root, include_private=True)
+        self.addCleanup(service.close)
+        result = service.section({'path': 'private/credentials.md', 'section': 'Token'})
+        self.assertIn(SECRET, result['text'])
+
+class DiskThreadTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix='agents-md-test-server-'))
+        self.addCleanup(shutil.rmtree, self.root, True)
+        path = self.root / 'my-project/topic/auth.md'
+        path.parent.mkdir(parents=True)
+        path.write_text("# Auth\n\n## Token refresh\n\nRefresh the token hourly.\n\n<!-- #auth -->\n", encoding='utf-8')
+        (self.root / 'my-project/memories.json').write_text(
+            json.dumps({'files': {'topic/auth.md': {'title': 'Auth', 'tags': ['auth']}}}), encoding='utf-8')
+        self.service = MemoryService(self.root)
+        self.service.warm()
+        self.addCleanup(self.service.close)
+
+    async def request(self, socket, method, **params):
+        reader, writer = await asyncio.open_unix_connection(str(socket))
+        try:
+            writer.write(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}).encode('utf-8')
+                         + b'\n')
+            await writer.drain()
+            return json.loads(await reader.readline())
+        finally:
+            writer.close()
+
+    async def exercise(self, release):
+        server = MemoryServer(self.service, self.root / 'server.sock')
+        serving = asyncio.ensure_future(server.serve())
+        while not server.path.exists():
+            await asyncio.sleep(0.01)
+        try:
+            slow = asyncio.ensure_future(self.request(server.path, 'section', path='my-project/topic/auth.md',
+                                                      section='Token refresh'))
+            await asyncio.sleep(0.05)
+            lookup = await asyncio.wait_for(self.request(server.path, 'lookup', tags=['auth']), 5)
+            self.assertFalse(slow.done())
+            release.set()
+            return lookup, await asyncio.wait_for(slow, 5)
+        finally:
+            release.set()
+            server.stopping.set()
+            await serving
+
+    def test_lookups_are_answered_while_a_section_read_blocks(self):
+        release = threading.Event()
+        read = self.service.sections.read
+
+        def blocked_read(*args, **kwargs):
+            release.wait(5)
+            return read(*args, **kwargs)
+
+        with mock.patch.object(self.service.sections, 'read', blocked_read):
+            lookup, section = asyncio.run(self.exercise(release))
+
+        self.assertEqual([entry['path'] for entry in lookup['result']], ['my-project/topic/auth.md'])
+        self.assertIn('Refresh the token hourly.', section['result']['text'])
+
+class SocketPathTest(unittest.TestCase):
+    def test_socket_is_outside_the_memory_root(self):
+        root = Path(tempfile.gettempdir(), 'cloud-drive' * 20, 'memory')
+        path = socket_path(root)
+        self.assertLessEqual(len(os.fsencode(str(path))), MAX_SOCKET_PATH)
+        self.assertNotIn('cloud-drive', str(path))
+        self.assertEqual(path, socket_path(root))
+        self.assertNotEqual(path, socket_path(root / 'other'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""Regression checks of the SQLite memory store exports (agents_md/store.py)."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from agents_md.common import load_json
+from agents_md.indexer import index_project
+from agents_md.store import MemoryStore, export_pending, store_path
+
+class DeferredExportTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix='agents-md-test-store-'))
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.state = Path(tempfile.mkdtemp(prefix='agents-md-test-state-'))
+        self.addCleanup(shutil.rmtree, self.state, True)
+        env = mock.patch.dict(os.environ, {'XDG_STATE_HOME': str(self.state)})
+        env.start()
+        self.addCleanup(env.stop)
+        self.project = self.root / 'my-project'
+        self.write('topic/auth.md', "# Auth\n\nRefresh tokens hourly.\n\n<!-- #auth -->\n")
+        index_project(self.project)
+        store = MemoryStore(self.project, create=True)
+        store.import_document(load_json(self.project / 'memories.json', {}))
+        store.close()
+        index_project(self.project, full=True)
+
+    def write(self, relpath, text):
+        path = self.project / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+
+    def exported(self):
+        return set(json.loads((self.project / 'memories.json').read_text(encoding='utf-8'))['files'])
+
+    def test_watcher_batches_defer_the_export(self):
+        self.write('topic/deploy.md', "# Deploy\n\nShip on Fridays.\n")
+        stats = index_project(self.project, paths={'topic/deploy.md'}, defer_export=True)
+
+        self.assertFalse(stats['written'])
+        self.assertEqual(self.exported(), {'topic/auth.md'})
+        store = MemoryStore(self.project)
+        self.addCleanup(store.close)
+        self.assertEqual([relpath for relpath, _ in store.find(prefix='topic/deploy')], ['topic/deploy.md'])
+        # Exported a moment ago, so the interval has not passed yet
+        self.assertEqual(export_pending(self.root), [])
+        self.assertEqual(export_pending(self.root, force=True), ['my-project'])
+        self.assertEqual(self.exported(), {'topic/auth.md', 'topic/deploy.md'})
+        self.assertEqual(export_pending(self.root, force=True), [])
+
+    def test_database_stays_out_of_the_memory_root(self):
+        path = store_path(self.project)
+
+        self.assertTrue(path.exists())
+        self.assertEqual(path.parent, self.state / 'agents-md' / 'stores')
+        self.assertEqual([p for p in self.root.rglob('*.db*')], [])
+
+    def test_commands_export_right_away(self):
+        self.write('topic/deploy.md', "# Deploy\n\nShip on Fridays.\n")
+        stats = index_project(self.project, paths={'topic/deploy.md'})
+
+        self.assertTrue(stats['written'])
+        self.assertEqual(self.exported(), {'topic/auth.md', 'topic/deploy.md'})
+
+    def test_deferred_changes_are_exported_by_the_next_command(self):
+        self.write('topic/deploy.md', "# Deploy\n\nShip on Fridays.\n")
+        index_project(self.project, paths={'topic/deploy.md'}, defer_export=True)
+
+        self.assertTrue(index_project(self.project)['written'])
+        self.assertEqual(self.exported(), {'topic/auth.md', 'topic/deploy.md'})
+
+if __name__ == '__main__':
+    unittest.main()
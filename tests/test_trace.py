@@ -0,0 +1,60 @@
+# Copyright (c) 2025 Paulus Ery Wasito Adhi paupawsan@gmail.com
+#
+# Licensed under the MIT License. See LICENSE file for details.
+
+"""Regression checks of the chrome trace format (agents_md/trace.py)."""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from agents_md.trace import Span, Tracer
+
+def record(tracer, *names):
+    for name in names:
+        with Span(tracer, name, {}):
+            pass
+
+class ChromeTraceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp(prefix='agents-md-test-trace-'))
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.path = self.directory / 'trace.json'
+
+    def load(self):
+        return [event['name'] for event in json.loads(self.path.read_text(encoding='utf-8'))]
+
+    def test_started_file_is_valid_json(self):
+        tracer = Tracer(self.path, append=False)
+        record(tracer, 'a', 'b')
+        tracer.close()
+        self.assertEqual(self.load(), ['a', 'b'])
+
+    def test_started_file_without_events_is_valid_json(self):
+        Tracer(self.path, append=False).close()
+        self.assertEqual(self.load(), [])
+
+    def test_appending_after_a_finished_run(self):
+        first = Tracer(self.path, append=False)
+        record(first, 'run')
+        first.close()
+        appender = Tracer(self.path, append=True)
+        record(appender, 'fleet')
+        appender.close()
+        # An appended file stays an open array, as trace viewers read it
+        text = self.path.read_text(encoding='utf-8')
+        self.assertTrue(text.endswith('},\n'))
+        self.assertEqual([event['name'] for event in json.loads(text.rstrip().rstrip(',') + ']')], ['run', 'fleet'])
+
+    def test_appending_after_an_empty_finished_run(self):
+        Tracer(self.path, append=False).close()
+        appender = Tracer(self.path, append=True)
+        record(appender, 'fleet')
+        appender.close()
+        text = self.path.read_text(encoding='utf-8')
+        self.assertEqual([event['name'] for event in json.loads(text.rstrip().rstrip(',') + ']')], ['fleet'])
+
+if __name__ == '__main__':
+    unittest.main()